@@ -0,0 +1,70 @@
+"""Benchmark del control de admisión ante una ráfaga de un cliente abusivo.
+
+Un cliente lanza una ráfaga de llamadas concurrentes al modelo mientras
+otros 10 clientes envían pocas. Con un cupo global de 8 llamadas (IA
+simulada), compara un semáforo FIFO con la cola justa de
+`AdmissionController` y reporta la espera de los clientes normales, los
+rechazos y las métricas de la cola.
+
+Uso:
+    python -m benchmarks.bench_admission [RAFAGA] [LATENCIA_IA_MS]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from src.domain.exceptions import RateLimitExceededError
+from src.infrastructure.llm_providers.admission import AdmissionController, AdmittedLLMService
+from src.infrastructure.llm_providers.fake_service import FakeLLMService
+
+CAP = 8
+
+
+async def _scenario(burst: int, latency: float, fair: bool):
+    """Latencias (ms) de los clientes normales y cantidad de rechazos."""
+    inner = FakeLLMService(latency=latency)
+    ctl = AdmissionController(max_concurrent=CAP, max_wait=5.0, max_queue=burst + 64)
+    fifo = asyncio.Semaphore(CAP)
+    normal, rejected = [], 0
+
+    async def call(client: str, delay: float):
+        nonlocal rejected
+        await asyncio.sleep(delay)
+        t0 = time.perf_counter()
+        try:
+            if fair:
+                await AdmittedLLMService(inner, ctl, client=client).generate_response("hola", [], "")
+            else:
+                async with fifo:
+                    await inner.generate_response(user_message="hola", products=[], context="")
+        except RateLimitExceededError:
+            rejected += 1
+            return
+        if client != "abusivo":
+            normal.append((time.perf_counter() - t0) * 1000)
+
+    tasks = [call("abusivo", 0) for _ in range(burst)]
+    tasks += [call(f"c{c}", 0.01 + r * latency) for c in range(10) for r in range(3)]
+    await asyncio.gather(*tasks)
+    return normal, rejected, ctl.stats()
+
+
+def main() -> None:
+    """Ejecuta ambos escenarios e imprime el resumen."""
+    burst = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.2
+    print(f"ráfaga: {burst} llamadas de un cliente + 30 de 10 clientes; cupo {CAP}; IA {latency * 1000:.0f} ms")
+    for name, fair in (("semáforo FIFO", False), ("cola justa", True)):
+        normal, rejected, stats = asyncio.run(_scenario(burst, latency, fair))
+        q = statistics.quantiles(normal, n=20)
+        print(f"{name:14s} clientes normales p50 {statistics.median(normal):7.0f} ms  p95 {q[18]:7.0f} ms  "
+              f"rechazos {rejected}")
+        if fair:
+            print(f"{'':14s} métricas: espera p50 {stats['wait_ms_p50']} ms, p95 {stats['wait_ms_p95']} ms, "
+                  f"máx {stats['wait_ms_max']} ms, encolados {stats['queued']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark del archivo de historial: tamaño de la tabla caliente y lecturas.
+
+Puebla una base SQLite en archivo con N sesiones de 10 mensajes (90 %
+inactivas hace más de 30 días), archiva las inactivas y compara antes y
+después:
+
+- tamaño de `chat_memory` y de su índice;
+- latencia de `get_recent_messages` de sesiones activas con caché fría;
+- lectura del historial de una sesión archivada;
+- compresión.
+
+Uso:
+    python -m benchmarks.bench_chat_archive [N_SESIONES]
+"""
+
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from src.infrastructure.db.database import Base
+from src.infrastructure.db.models import ChatMemoryModel
+from src.infrastructure.repositories.chat_archive import ArchivedChatRepository, ChatArchiver
+from src.infrastructure.repositories.chat_repository import SQLChatRepository
+from benchmarks.bench_intents import SEED
+
+NOW = datetime(2024, 6, 1)
+
+
+def _reply(rng: random.Random) -> str:
+    """Respuesta del asistente típica: recomendación con varios productos."""
+    picks = rng.sample(SEED, 3)
+    lines = "\n".join(f"- {n} ({b}) | ${p:.2f} | Talla {s} | {c}" for n, b, _, s, c, p, _ in picks)
+    return f"¡Claro! Te recomiendo estas opciones disponibles:\n{lines}\n¿Quieres que te ayude con la talla?"
+
+
+def _populate(engine, sessions: int) -> None:
+    """Inserta 10 mensajes por sesión; el 10 % de las sesiones está activa."""
+    rng = random.Random(3)
+    rows = []
+    with engine.begin() as conn:
+        for s in range(sessions):
+            start = NOW - timedelta(hours=2) if s % 10 == 0 else NOW - timedelta(days=rng.randint(31, 365))
+            for i in range(10):
+                rows.append({"session_id": f"sesion-{s:07d}", "role": "user" if i % 2 == 0 else "assistant",
+                             "message": f"Busco zapatillas talla {rng.choice([41, 42])}" if i % 2 == 0 else _reply(rng),
+                             "timestamp": start + timedelta(minutes=i)})
+            if len(rows) >= 20_000:
+                conn.execute(insert(ChatMemoryModel.__table__), rows)
+                rows.clear()
+        if rows:
+            conn.execute(insert(ChatMemoryModel.__table__), rows)
+
+
+def _sizes(engine) -> dict:
+    """Bytes de la tabla y del índice (dbstat) y tamaño del archivo."""
+    with engine.connect() as conn:
+        per = dict(conn.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")).all())
+        pages = conn.execute(text("PRAGMA page_count")).scalar() * conn.execute(text("PRAGMA page_size")).scalar()
+    return {"table": per.get("chat_memory", 0), "index": per.get("ix_chat_memory_session_id", 0),
+            "archive": per.get("chat_archive", 0), "file": pages}
+
+
+def _recent_ms(engine, session_ids) -> float:
+    """p50 (ms) de `get_recent_messages(…, 6)` con la caché de páginas fría."""
+    out = []
+    for sid in session_ids:
+        engine.dispose()
+        db = sessionmaker(bind=engine)()
+        repo = ArchivedChatRepository(SQLChatRepository(db), db)
+        t0 = time.perf_counter()
+        repo.get_recent_messages(sid, 6)
+        out.append((time.perf_counter() - t0) * 1000)
+        db.close()
+    return statistics.median(out)
+
+
+def main() -> None:
+    """Puebla, mide, archiva y vuelve a medir."""
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    mb = 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/chat.db")
+        Base.metadata.create_all(bind=engine)
+        _populate(engine, sessions)
+        active = [f"sesion-{s:07d}" for s in range(0, sessions, 10)][:200]
+        before, recent_before = _sizes(engine), _recent_ms(engine, active)
+
+        db = sessionmaker(bind=engine)()
+        t0 = time.perf_counter()
+        stats = ChatArchiver(db, batch_sessions=500).archive_idle(30, now=NOW)
+        archive_s = time.perf_counter() - t0
+        db.close()
+        with engine.connect() as conn:
+            conn.execute(text("VACUUM"))
+        after, recent_after = _sizes(engine), _recent_ms(engine, active)
+        cold_ms = _recent_ms(engine, [f"sesion-{s:07d}" for s in range(1, sessions, 10)][:200])
+
+    print(f"sesiones: {sessions} ({sessions * 10} mensajes), archivadas {stats['sessions']} en {archive_s:.1f} s")
+    print(f"chat_memory  {before['table'] / mb:7.1f} MB → {after['table'] / mb:6.1f} MB   "
+          f"índice {before['index'] / mb:5.1f} MB → {after['index'] / mb:4.1f} MB")
+    print(f"archivo      texto {stats['raw_bytes'] / mb:.1f} MB → {stats['stored_bytes'] / mb:.1f} MB comprimido "
+          f"({stats['raw_bytes'] / stats['stored_bytes']:.1f}x); tabla chat_archive {after['archive'] / mb:.1f} MB")
+    print(f"base total   {before['file'] / mb:7.1f} MB → {after['file'] / mb:6.1f} MB")
+    print(f"get_recent_messages activa (caché fría) p50 {recent_before:.2f} ms → {recent_after:.2f} ms; "
+          f"archivada {cold_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
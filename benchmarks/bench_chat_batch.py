@@ -0,0 +1,82 @@
+"""Benchmark de chat por lotes frente a un request por mensaje.
+
+Reproduce N mensajes (repartidos en sesiones de 4 turnos) contra
+`ChatService` sobre SQLite con el proveedor de IA simulado:
+
+- secuencial: `process_message` uno por uno (como el replay actual);
+- lote: `process_batch` con concurrencia acotada y guardado en bloque.
+
+Uso:
+    python -m benchmarks.bench_chat_batch [N_MENSAJES] [LATENCIA_IA_MS] [CONCURRENCIA]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+from src.infrastructure.cache.catalog import CatalogSnapshot, SnapshotProductRepository
+from src.infrastructure.db.database import Base
+from src.infrastructure.db.models import ProductModel
+from src.infrastructure.llm_providers.fake_service import FakeLLMService
+from src.infrastructure.repositories.chat_repository import SQLChatRepository
+from src.infrastructure.repositories.product_repository import SQLProductRepository
+from benchmarks.bench_intents import SEED
+
+
+def _service(path: str, latency: float):
+    """Servicio sobre una base SQLite en archivo y contador de commits."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    commits = [0]
+    event.listen(engine, "commit", lambda conn: commits.__setitem__(0, commits[0] + 1))
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    db.add_all([ProductModel(name=n, brand=b, category=c, size=s, color=col, price=p, stock=st, description="")
+                for n, b, c, s, col, p, st in SEED])
+    db.commit()
+    commits[0] = 0
+    products = SnapshotProductRepository(SQLProductRepository(db), CatalogSnapshot())
+    return ChatService(products, SQLChatRepository(db), FakeLLMService(latency=latency)), commits
+
+
+def main() -> None:
+    """Ejecuta ambos modos e imprime throughput y commits."""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.05
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    reqs = [ChatMessageRequestDTO(session_id=f"s{i // 4}", message=f"¿Qué me recomiendas? turno {i % 4}")
+            for i in range(n)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        svc, commits = _service(f"{tmp}/seq.db", latency)
+
+        async def sequential():
+            for r in reqs:
+                await svc.process_message(r)
+
+        t0 = time.perf_counter()
+        asyncio.run(sequential())
+        seq_s, seq_commits = time.perf_counter() - t0, commits[0]
+
+        svc, commits = _service(f"{tmp}/batch.db", latency)
+
+        async def batch():
+            return [item async for item in svc.process_batch(reqs, concurrency)]
+
+        t0 = time.perf_counter()
+        results = asyncio.run(batch())
+        batch_s, batch_commits = time.perf_counter() - t0, commits[0]
+        assert len(results) == n
+
+    print(f"mensajes: {n}  latencia IA: {latency * 1000:.0f} ms  concurrencia: {concurrency}")
+    print(f"secuencial  {seq_s:7.2f} s  {n / seq_s:8.1f} msg/s  commits {seq_commits}")
+    print(f"lote        {batch_s:7.2f} s  {n / batch_s:8.1f} msg/s  commits {batch_commits}")
+
+
+if __name__ == "__main__":
+    main()
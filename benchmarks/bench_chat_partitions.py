@@ -0,0 +1,123 @@
+"""Benchmark del historial particionado: una tabla frente a N shards.
+
+Para que la comparación aísle el particionado, la tabla única es un
+`ChatShards` de 1 shard (mismos pragmas: WAL y `synchronous=NORMAL`).
+
+- Puebla cada variante con M mensajes (sesiones de 10 mensajes).
+- Escritura: W hilos guardan intercambios (2 mensajes, un commit) de
+  sesiones al azar durante unos segundos, como hace `/chat`.
+- Lectura: `get_recent_messages(…, 6)` de sesiones al azar con la caché
+  de conexiones fría.
+
+Uso:
+    python -m benchmarks.bench_chat_partitions [MENSAJES] [SHARDS] [HILOS]
+"""
+
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from src.domain.entities import ChatMessage
+from src.infrastructure.db.models import ChatMemoryModel
+from src.infrastructure.db.shards import ChatShards
+from src.infrastructure.repositories.sharded_chat import ShardedChatRepository
+
+NOW = datetime(2024, 6, 1)
+WRITE_SECONDS = 5.0
+
+
+def _sid(s: int) -> str:
+    return f"sesion-{s:08d}"
+
+
+def _populate(shards: ChatShards, messages: int) -> float:
+    """Carga masiva de `messages` mensajes; retorna filas por segundo."""
+    table = ChatMemoryModel.__table__
+    pending = {i: [] for i in range(shards.count)}
+    t0 = time.perf_counter()
+
+    def flush(index):
+        with shards.engines[index].begin() as conn:
+            conn.execute(insert(table), pending[index])
+        pending[index] = []
+
+    for n in range(messages):
+        s, i = divmod(n, 10)
+        sid = _sid(s)
+        index = shards.index_for(sid)
+        pending[index].append({"session_id": sid, "role": "user" if i % 2 == 0 else "assistant",
+                               "message": f"mensaje {i} de la sesión {s}: busco zapatillas talla 42",
+                               "timestamp": NOW + timedelta(seconds=n)})
+        if len(pending[index]) >= 20_000:
+            flush(index)
+    for index in pending:
+        if pending[index]:
+            flush(index)
+    return messages / (time.perf_counter() - t0)
+
+
+def _writes(repo: ShardedChatRepository, sessions: int, threads: int) -> float:
+    """Intercambios por segundo con `threads` escritores concurrentes."""
+    done = [0] * threads
+    stop = time.perf_counter() + WRITE_SECONDS
+
+    def writer(k):
+        rng = random.Random(k)
+        while time.perf_counter() < stop:
+            sid = _sid(rng.randrange(sessions))
+            repo.save_messages([
+                ChatMessage(id=None, session_id=sid, role="user", message="¿Tienen talla 42?", timestamp=NOW),
+                ChatMessage(id=None, session_id=sid, role="assistant", message="Sí, en negro y blanco.",
+                            timestamp=NOW),
+            ])
+            done[k] += 1
+
+    workers = [threading.Thread(target=writer, args=(k,)) for k in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sum(done) / WRITE_SECONDS
+
+
+def _recent_ms(shards: ChatShards, repo: ShardedChatRepository, sessions: int, samples: int = 300):
+    """p50 y p95 (ms) de `get_recent_messages` con conexiones nuevas."""
+    rng = random.Random(7)
+    out = []
+    for _ in range(samples):
+        shards.dispose()
+        t0 = time.perf_counter()
+        repo.get_recent_messages(_sid(rng.randrange(sessions)), 6)
+        out.append((time.perf_counter() - t0) * 1000)
+    out.sort()
+    return statistics.median(out), out[int(len(out) * 0.95)]
+
+
+def main() -> None:
+    """Mide carga, escritura concurrente y lectura en ambas variantes."""
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    sessions = messages // 10
+    print(f"{messages} mensajes, {sessions} sesiones, {threads} hilos escritores")
+    for label, n in (("tabla única", 1), (f"{count} shards", count)):
+        with tempfile.TemporaryDirectory() as tmp:
+            shards = ChatShards(tmp, n)
+            shards.init()
+            repo = ShardedChatRepository(shards)
+            load = _populate(shards, messages)
+            writes = _writes(repo, sessions, threads)
+            p50, p95 = _recent_ms(shards, repo, sessions)
+            shards.dispose()
+        print(f"{label:12s} carga {load:9.0f} filas/s   escritura {writes:7.0f} intercambios/s   "
+              f"get_recent_messages p50 {p50:.2f} ms p95 {p95:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark del catálogo en columnas frente a los filtros con closures.
+
+Mide `ProductService.search_products` y `get_available_products` sobre un
+`SnapshotProductRepository` con y sin `columnar=True`, con N productos
+sintéticos (los de `bench_facets`). El resultado se recorre completo en
+ambos casos para no favorecer a la selección perezosa.
+
+Uso:
+    python -m benchmarks.bench_columnar [N_PRODUCTOS]
+"""
+
+import sys
+import time
+
+from src.application.product_service import ProductService
+from src.infrastructure.cache.catalog import CatalogSnapshot, SnapshotProductRepository
+from benchmarks.bench_facets import _catalog, _ms
+from tests.test_services import FakeProductRepo
+
+
+class _Repo(FakeProductRepo):
+    """Repositorio en memoria con el catálogo sintético."""
+
+    def __init__(self, products):
+        self._data = products
+
+
+CASES = [
+    ("brand", lambda s: s.search_products({"brand": "Marca 7"})),
+    ("category + size + color", lambda s: s.search_products({"category": "Running", "size": "42",
+                                                              "color": "Negro"})),
+    ("rango de precio", lambda s: s.search_products({"min_price": 100, "max_price": 120})),
+    ("Running top-10 más baratas", lambda s: s.search_products({"category": "Running"}, sort="price", limit=10)),
+    ("get_available_products", lambda s: s.get_available_products()),
+]
+
+
+def main() -> None:
+    """Mide cada consulta con ambos motores."""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    products = _catalog(n)
+    services = {}
+    for label, columnar in (("closures", False), ("columnar", True)):
+        snapshot = CatalogSnapshot(max_age=None, columnar=columnar)
+        t0 = time.perf_counter()
+        snapshot.load(lambda: products)
+        print(f"{label:9s} carga del snapshot {time.perf_counter() - t0:.2f} s")
+        services[label] = ProductService(SnapshotProductRepository(_Repo(products), snapshot))
+
+    print(f"{n} productos")
+    for name, query in CASES:
+        py = _ms(lambda: sum(1 for _ in query(services["closures"])), repeat=5)
+        col = _ms(lambda: sum(1 for _ in query(services["columnar"])), repeat=20)
+        hits = len(query(services["columnar"]))
+        print(f"{name:28s} {hits:7d} filas   closures {py:8.2f} ms   columnar {col:7.2f} ms   ({py / col:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark de formatos compactos y compresión de las respuestas de listas.
+
+Para 10k productos y 1k mensajes (los datos de `bench_serialization`) mide,
+por formato (JSON por filas, JSON columnar, MessagePack columnar) y
+codificación (sin comprimir, gzip, brotli):
+
+- bytes en la red;
+- CPU del servidor para codificar y comprimir, por bloques como en la API;
+- tiempo estimado de transferencia en una red móvil de `MBPS` Mbit/s.
+
+Además compara la memoria pico de codificar y comprimir en streaming (como
+`list_response` + `CompressionMiddleware`) frente a armar el cuerpo completo
+y comprimirlo de una vez.
+
+Uso:
+    python -m benchmarks.bench_compression [MBPS]
+"""
+
+import gzip
+import sys
+import time
+import tracemalloc
+
+from src.application.dtos import ChatHistoryDTO, ProductDTO
+from src.infrastructure.api import formats
+from src.infrastructure.api.middleware import ENCODERS, GZIP_LEVEL
+from benchmarks.bench_serialization import _messages, _products
+
+
+def _wire(media_type, dto_cls, items, encoding):
+    """Cuerpo en la red, codificado y comprimido por bloques como en la API."""
+    chunks = formats.encode_chunks(media_type, dto_cls, items)
+    if encoding is None:
+        return b"".join(chunks)
+    compress, finish = ENCODERS[encoding]()
+    return b"".join(compress(c) for c in chunks) + finish()
+
+
+def _best_ms(fn, *args, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def _peak_kib(fn) -> float:
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main() -> None:
+    """Imprime tamaño, CPU y transferencia estimada de cada combinación."""
+    mbps = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    media_types = [formats.JSON, formats.COLUMNAR] + ([formats.MSGPACK] if formats.msgpack else [])
+    encodings = [None, *ENCODERS]
+    cases = [("10k productos", ProductDTO, _products(10_000)), ("1k mensajes", ChatHistoryDTO, _messages(1_000))]
+    print(f"transferencia estimada a {mbps:g} Mbit/s; CPU = mejor de 5")
+    for label, dto_cls, items in cases:
+        print(f"\n{label}")
+        print(f"{'formato':<32}{'codif.':>7}{'bytes':>11}{'CPU ms':>9}{'red ms':>9}{'total ms':>10}")
+        for media_type in media_types:
+            for encoding in encodings:
+                size = len(_wire(media_type, dto_cls, items, encoding))
+                cpu = _best_ms(_wire, media_type, dto_cls, items, encoding)
+                net = size * 8 / (mbps * 1e6) * 1000
+                print(f"{media_type:<32}{encoding or '-':>7}{size:>11,}{cpu:>9.2f}{net:>9.1f}{cpu + net:>10.1f}")
+
+    items = _products(10_000)
+    body_size = len(formats.encode(formats.JSON, ProductDTO, items))
+    streamed = _peak_kib(lambda: _wire(formats.JSON, ProductDTO, items, "gzip"))
+    buffered = _peak_kib(lambda: gzip.compress(formats.encode(formats.JSON, ProductDTO, items), GZIP_LEVEL))
+    print(f"\nmemoria pico, 10k productos JSON + gzip (cuerpo {body_size / 1024:,.0f} KiB; "
+          f"el streaming también retiene aquí la salida comprimida)")
+    print(f"por bloques: {streamed:,.0f} KiB   cuerpo completo: {buffered:,.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
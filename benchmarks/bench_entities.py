@@ -0,0 +1,79 @@
+"""Benchmark de memoria y construcción de entidades de dominio.
+
+Compara la representación anterior (`@dataclass` con `__dict__` y validación
+siempre activa) con la actual (`slots=True`), tanto validando como usando el
+camino confiable `from_trusted` que emplean los repositorios.
+
+Uso:
+    python -m benchmarks.bench_entities [N]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+from src.domain.entities import Product
+
+
+@dataclass
+class LegacyProduct:
+    """Copia de la entidad `Product` previa a `slots=True` (solo para comparar)."""
+
+    id: Optional[int]
+    name: str
+    brand: str
+    category: str
+    size: str
+    color: str
+    price: float
+    stock: int
+    description: str = ""
+
+    def __post_init__(self):
+        """Mismas validaciones que la entidad original."""
+        if not self.name or not self.name.strip():
+            raise ValueError("El nombre del producto no puede estar vacío.")
+        if self.price is None or self.price <= 0:
+            raise ValueError("El precio debe ser mayor a 0.")
+        if self.stock is None or self.stock < 0:
+            raise ValueError("El stock no puede ser negativo.")
+
+
+def _build(factory, n: int):
+    """Construye `n` entidades con valores compartidos (solo mide la entidad)."""
+    return [factory(i, "Pegasus", "Nike", "Running", "42", "Negro", 120.0, 5, "") for i in range(n)]
+
+
+def _measure(label: str, factory, n: int) -> None:
+    """Mide tiempo de construcción y memoria retenida para `n` entidades."""
+    gc.collect()
+    t0 = time.perf_counter()
+    items = _build(factory, n)
+    elapsed = time.perf_counter() - t0
+    del items
+
+    gc.collect()
+    tracemalloc.start()
+    items = _build(factory, n)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+
+    print(f"{label:<28}{elapsed * 1000:>12.0f}{n / elapsed / 1e6:>12.2f}{current / 2**20:>12.1f}")
+
+
+def main() -> None:
+    """Ejecuta el benchmark para N entidades (por defecto 1M)."""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"N = {n:,}")
+    print(f"{'representación':<28}{'tiempo (ms)':>12}{'Mobj/s':>12}{'memoria MB':>12}")
+    _measure("dataclass (anterior)", LegacyProduct, n)
+    _measure("slots + validación", Product, n)
+    _measure("slots + from_trusted", Product.from_trusted, n)
+
+
+if __name__ == "__main__":
+    main()
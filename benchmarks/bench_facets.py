@@ -0,0 +1,86 @@
+"""Benchmark de facetas del catálogo (`FacetService`).
+
+Genera N productos sintéticos y mide:
+
+- recorrer `get_all()` y contar en Python (lo que hace hoy un cliente);
+- `rebuild` (carga inicial o recarga del snapshot);
+- facetas sin filtro y con uno o dos filtros (precalculadas), y con tres
+  (listas de filas y columnas NumPy), también justo después de una
+  escritura que invalida las listas en caché;
+- `upsert`/`remove` de un producto.
+
+Uso:
+    python -m benchmarks.bench_facets [N_PRODUCTOS]
+"""
+
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+
+from src.application.facet_service import FacetService
+from src.domain.entities import Product
+
+BRANDS = [f"Marca {i}" for i in range(60)]
+CATEGORIES = ["Running", "Casual", "Formal", "Basketball", "Trail", "Training", "Sandalias", "Botas"]
+SIZES = [str(s) for s in range(34, 47)]
+COLORS = ["Negro", "Blanco", "Azul", "Rojo", "Gris", "Verde", "Rosa", "Beige", "Café", "Amarillo"]
+
+
+def _catalog(n: int):
+    rng = random.Random(1)
+    return [
+        Product.from_trusted(i, f"Modelo {i}", rng.choice(BRANDS), rng.choice(CATEGORIES), rng.choice(SIZES),
+                             rng.choice(COLORS), round(rng.uniform(20, 450), 2), rng.randint(0, 20), "")
+        for i in range(1, n + 1)
+    ]
+
+
+def _ms(fn, repeat: int = 50) -> float:
+    """Mediana en ms de `repeat` ejecuciones."""
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(out)
+
+
+def _client_side(products) -> None:
+    """Conteos como los haría un cliente tras `get_all()`."""
+    running = [p for p in products if p.category == "Running"]
+    for field in ("brand", "size", "color"):
+        Counter(getattr(p, field) for p in running)
+
+
+def main() -> None:
+    """Construye el catálogo y mide cada operación."""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    products = _catalog(n)
+    facets = FacetService()
+    t0 = time.perf_counter()
+    facets.rebuild(products)
+    rebuild_s = time.perf_counter() - t0
+
+    rng = random.Random(2)
+    print(f"{n} productos; rebuild {rebuild_s:.2f} s")
+    rows = [
+        ("get_all + Counter (Running)", _ms(lambda: _client_side(products), repeat=5)),
+        ("sin filtro", _ms(lambda: facets.facets())),
+        ("category=Running", _ms(lambda: facets.facets({"category": "Running"}))),
+        ("category + color", _ms(lambda: facets.facets({"category": "Running", "color": "Negro"}))),
+        ("category + color + size", _ms(lambda: facets.facets({"category": "Running", "color": "Negro",
+                                                                  "size": "42"}))),
+        ("3 filtros tras un upsert", _ms(lambda: (facets.upsert(products[rng.randrange(n)]), facets.facets(
+            {"category": "Running", "color": "Negro", "size": "42"})))),
+        ("upsert", _ms(lambda: facets.upsert(products[rng.randrange(n)]), repeat=1000)),
+        ("remove + upsert", _ms(lambda: (lambda p: (facets.remove(p.id), facets.upsert(p)))(
+            products[rng.randrange(n)]), repeat=1000)),
+    ]
+    for label, ms in rows:
+        print(f"{label:32s} {ms:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark del analizador de intención: tasa de respuesta sin IA y latencia.
+
+Envía un corpus de mensajes típicos del chat a `ChatService` sobre el
+catálogo de ejemplo (SQLite en memoria + snapshot) con el proveedor de IA
+simulado, con y sin `IntentParser`, y reporta qué fracción se respondió con
+plantilla y la latencia de cada camino.
+
+Uso:
+    python -m benchmarks.bench_intents [LATENCIA_IA_MS]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+from src.application.intent_parser import IntentParser
+from src.infrastructure.cache.catalog import CatalogSnapshot, SnapshotProductRepository
+from src.infrastructure.db.database import Base
+from src.infrastructure.db.models import ProductModel
+from src.infrastructure.llm_providers.fake_service import FakeLLMService
+from src.infrastructure.repositories.chat_repository import SQLChatRepository
+from src.infrastructure.repositories.product_repository import SQLProductRepository
+
+SEED = [
+    ("Pegasus 40", "Nike", "Running", "42", "Negro", 120.0, 8),
+    ("Ultraboost Light", "Adidas", "Running", "42", "Blanco", 150.0, 5),
+    ("Suede Classic", "Puma", "Casual", "41", "Azul", 80.0, 12),
+    ("Classic Leather", "Reebok", "Casual", "42", "Blanco", 90.0, 10),
+    ("Fresh Foam 1080", "New Balance", "Running", "42", "Gris", 160.0, 6),
+    ("Gel-Cumulus 25", "ASICS", "Running", "42", "Azul", 140.0, 7),
+    ("Madrid", "Hush Puppies", "Formal", "42", "Café", 110.0, 4),
+    ("Chuck 70", "Converse", "Casual", "42", "Negro", 75.0, 15),
+    ("Old Skool", "Vans", "Casual", "42", "Negro", 70.0, 20),
+    ("Go Run Ride 11", "Skechers", "Running", "42", "Rojo", 95.0, 9),
+]
+
+# Mezcla de consultas de catálogo y preguntas abiertas, como en el historial.
+MESSAGES = [
+    "¿Tienen Nike?", "Busco zapatillas Adidas talla 42", "¿Qué zapatos formales hay?",
+    "Muéstrame opciones para correr por menos de 130", "¿Hay algo negro en talla 42?",
+    "Quiero ver New Balance", "zapatillas casual blancas", "¿Tienen Vans talla 42?",
+    "¿Qué tienen entre 70 y 100 dólares?", "Busco algo para la oficina",
+    "¿Hay Converse negras?", "tenis de running hasta $150", "¿Tienen Puma azules talla 41?",
+    "¿Cuánto cuestan las ASICS?", "¿Tienen Skechers rojas?", "Zapatos café elegantes",
+    "¿Qué me recomiendas para correr un maratón?", "¿Cuál es la diferencia entre Nike y Adidas?",
+    "¿Son cómodas las Vans para caminar todo el día?", "Hola, ¿cómo estás?",
+    "¿Qué zapato me sirve para una boda en la playa?", "¿Hacen envíos a Medellín?",
+    "¿Las Pegasus son buenas para pronadores?", "¿Cuál es la política de devoluciones?",
+    "Busco Reebok talla 44", "¿Tienen Hush Puppies?", "Quiero algo casual por menos de 80",
+    "¿Qué running tienen desde 140?", "Dame opciones grises", "¿Tienen Nike azules?",
+]
+
+
+def _repos():
+    """Repositorios sobre una base en memoria con el catálogo de ejemplo."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    db.add_all([ProductModel(name=n, brand=b, category=c, size=s, color=col, price=p, stock=st, description="")
+                for n, b, c, s, col, p, st in SEED])
+    db.commit()
+    return SnapshotProductRepository(SQLProductRepository(db), CatalogSnapshot()), SQLChatRepository(db)
+
+
+async def _run(latency: float, parser):
+    """Latencias (ms) por mensaje y cuáles se respondieron sin IA."""
+    products, chats = _repos()
+    svc = ChatService(products, chats, FakeLLMService(latency=latency), intent_parser=parser)
+    out = []
+    for i, message in enumerate(MESSAGES):
+        t0 = time.perf_counter()
+        await svc.process_message(ChatMessageRequestDTO(session_id=f"b{i}", message=message))
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def main() -> None:
+    """Ejecuta ambos escenarios e imprime el resumen."""
+    latency = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.8
+    parser = IntentParser()
+    baseline = asyncio.run(_run(latency, None))
+    with_parser = asyncio.run(_run(latency, parser))
+
+    answered = [ms for ms in with_parser if ms < latency * 1000]
+    fallback = [ms for ms in with_parser if ms >= latency * 1000]
+    print(f"mensajes: {len(MESSAGES)}  latencia IA simulada: {latency * 1000:.0f} ms")
+    print(f"respondidos sin IA: {parser.stats['answered']}/{len(MESSAGES)} "
+          f"({parser.stats['answered'] / len(MESSAGES):.0%}), acotados: {parser.stats['narrowed']}")
+    print(f"sin analizador   p50 {statistics.median(baseline):8.2f} ms  media {statistics.mean(baseline):8.2f} ms")
+    print(f"con analizador   p50 {statistics.median(with_parser):8.2f} ms  media {statistics.mean(with_parser):8.2f} ms")
+    if answered:
+        print(f"  plantilla      p50 {statistics.median(answered):8.2f} ms")
+    if fallback:
+        print(f"  fallback IA    p50 {statistics.median(fallback):8.2f} ms")
+    print(f"tiempo total: {sum(baseline) / 1000:.2f} s → {sum(with_parser) / 1000:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark del costo del perfilado a demanda sobre un turno de chat.
+
+Ejecuta `ChatService.process_message` sobre el catálogo de ejemplo (SQLite
+en memoria + snapshot, proveedor de IA simulado sin latencia) con:
+
+- sin perfilador (referencia);
+- perfilador desactivado (sin `PROFILE_TOKEN`) y con token pero sin pedir
+  perfil: el camino de todos los requests en producción;
+- cada request perfilado por muestreo y con cProfile (con spans).
+
+Además mide por separado `RequestProfiler.start` cuando no hay perfil que
+iniciar, que es lo único que agrega el perfilado a un request normal.
+
+Uso:
+    python -m benchmarks.bench_profiling [TURNOS]
+"""
+
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+from src.infrastructure.llm_providers.fake_service import FakeLLMService
+from src.infrastructure.profiling import RequestProfiler, Timed
+from benchmarks.bench_intents import _repos
+
+MESSAGE = "¿Qué me recomiendas para correr un maratón?"
+
+
+async def _turns(n: int, profiler, header, spans: bool):
+    """Latencias (µs) de `n` turnos, iniciando un perfil por turno si corresponde."""
+    products, chats = _repos()
+    ai = FakeLLMService()
+    out = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        capture = profiler.start(header) if profiler is not None else None
+        p, c, a = products, chats, ai
+        if capture is not None and spans:
+            p, c, a = Timed(products, capture, "products"), Timed(chats, capture, "chat"), Timed(ai, capture, "llm")
+        service = ChatService(p, c, a)
+        work = service.process_message(ChatMessageRequestDTO(session_id=f"s{i % 50}", message=MESSAGE))
+        if capture is not None:
+            work = capture.timed("process_message", work)
+        await work
+        if capture is not None:
+            capture.finish()
+        out.append((time.perf_counter() - t0) * 1e6)
+    return out
+
+
+def main() -> None:
+    """Mide cada escenario e imprime mediana y media por turno."""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as out:
+        sample = RequestProfiler("t", out)
+        cprof = RequestProfiler("t", out, mode="cprofile")
+        cases = [
+            ("sin perfilador", None, None, False),
+            ("desactivado (sin token)", RequestProfiler(None, out), None, False),
+            ("con token, sin pedir", RequestProfiler("t", out), None, False),
+            ("perfilado: muestreo 5 ms", sample, "t", True),
+            ("perfilado: cProfile", cprof, "t", True),
+        ]
+        for name, profiler in (("sin token", RequestProfiler(None, out)), ("con token", RequestProfiler("t", out))):
+            ns = min(timeit.repeat(lambda: profiler.start(None), number=100_000, repeat=5)) / 100_000 * 1e9
+            print(f"start() sin perfil, {name}: {ns:.0f} ns")
+        asyncio.run(_turns(200, None, None, False))  # calentamiento
+        # Rondas intercaladas; se reporta la mejor mediana de cada caso para
+        # que el ruido de la máquina no se confunda con el costo del perfilado.
+        best = {}
+        for _ in range(3):
+            for name, profiler, header, spans in cases:
+                p50 = statistics.median(asyncio.run(_turns(n, profiler, header, spans)))
+                best[name] = min(best.get(name, p50), p50)
+        base = best["sin perfilador"]
+        print(f"{n} turnos de chat por ronda (IA simulada sin latencia), mejor p50 de 3 rondas")
+        for name, p50 in best.items():
+            print(f"{name:26s} p50 {p50:8.1f} µs  ({p50 / base - 1:+.1%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Benchmark del pipeline completo de `/chat` offline, reproduciendo un journal.
+
+Levanta el servidor (uvicorn, 1 worker) con `LLM_PROVIDER=replay` sobre una
+base SQLite temporal con los datos de ejemplo y envía cada mensaje del
+journal a `POST /chat` en su instante de llegada grabado: carga abierta con
+la forma del tráfico grabado. Llegadas y latencias del modelo se escalan por
+el mismo `--time-scale`.
+
+Sin `--journal` genera uno sintético con forma de producción: sesiones que
+llegan como proceso de Poisson, de 1 a 4 turnos separados por la respuesta y
+un tiempo de lectura, y latencia del modelo log-normal (mediana 900 ms).
+
+Reporta la latencia de `/chat` frente a la del modelo reproducida (la
+diferencia es el costo del resto del pipeline) y las respuestas del replay
+por prompt, por mensaje o sin respuesta (`/metrics`).
+
+Uso:
+    python -m benchmarks.bench_replay [--journal RUTA] [--time-scale 0.1] [--sessions 200] [--rate 20]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from src.infrastructure.llm_providers.journal import JournalEntry, LLMJournal, prompt_key, read_journals
+from benchmarks.bench_workers import _free_port
+
+MESSAGES = [
+    "¿Qué me recomiendas para correr un maratón?",
+    "Busco algo cómodo para caminar todo el día en la ciudad",
+    "¿Cuál es mejor para pies anchos?",
+    "Necesito un regalo para mi hermano que juega básquet",
+    "¿Qué diferencia hay entre las de running y las de trail?",
+    "Quiero algo elegante pero que no me lastime",
+]
+
+
+def synthesize(path: Path, sessions: int, rate: float, seed: int = 7) -> None:
+    """Escribe un journal sintético con forma de tráfico de producción."""
+    rng = random.Random(seed)
+    journal = LLMJournal(path)
+    entries = []
+    start = 1_700_000_000.0
+    for s in range(sessions):
+        start += rng.expovariate(rate)
+        ts = start
+        for turn in range(rng.choice((1, 1, 2, 2, 3, 4))):
+            latency = rng.lognormvariate(0, 0.5) * 900
+            message = f"{rng.choice(MESSAGES)} ({s}.{turn})"
+            entries.append(JournalEntry(
+                ts=ts, key=prompt_key(message), message=message, session=f"u{s}", latency_ms=round(latency, 1),
+                response=f"Te recomiendo revisar nuestras zapatillas ({s}.{turn}).",
+                prompt_tokens=600 + 40 * turn, response_tokens=int(rng.lognormvariate(4.8, 0.4)),
+            ))
+            ts += latency / 1000 + rng.uniform(3, 15)
+    for entry in sorted(entries, key=lambda e: e.ts):
+        journal.append(entry)
+    journal.close()
+
+
+def _start_server(db_url: str, journal: Path, time_scale: float) -> tuple[subprocess.Popen, str]:
+    """Arranca el servidor con el proveedor replay y espera el lifespan."""
+    port = _free_port()
+    env = dict(os.environ, WEB_CONCURRENCY="1", PORT=str(port), HOST="127.0.0.1", DATABASE_URL=db_url,
+               LLM_PROVIDER="replay", LLM_REPLAY_JOURNAL=str(journal), LLM_REPLAY_TIME_SCALE=str(time_scale),
+               SESSION_RATE_PER_MIN="0", CLIENT_RATE_PER_MIN="0", LLM_MAX_CONCURRENCY="64")
+    proc = subprocess.Popen([sys.executable, "-m", "src.infrastructure.api.server"], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base}/health").json().get("ready"):
+                return proc, base
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("El servidor no quedó listo a tiempo")
+
+
+async def _replay(base: str, entries: list, time_scale: float) -> tuple[list, list, int, float]:
+    """Envía cada mensaje en su instante grabado (escalado); retorna latencias (s)."""
+    chat, model, failed = [], [], 0
+    t0 = entries[0].ts
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=64)
+    async with httpx.AsyncClient(base_url=base, timeout=60, limits=limits) as http:
+        start = time.perf_counter()
+
+        async def send(entry: JournalEntry):
+            nonlocal failed
+            await asyncio.sleep(max(0.0, (entry.ts - t0) * time_scale - (time.perf_counter() - start)))
+            sent = time.perf_counter()
+            r = await http.post("/chat", json={"session_id": entry.session or "replay", "message": entry.message})
+            if r.status_code != 200:
+                failed += 1
+                return
+            chat.append(time.perf_counter() - sent)
+            model.append(entry.latency_ms / 1000 * time_scale)
+
+        await asyncio.gather(*(send(e) for e in entries))
+        return chat, model, failed, time.perf_counter() - start
+
+
+def _pct(values: list, p: int) -> float:
+    return statistics.quantiles(values, n=100)[p - 1] * 1000
+
+
+def main() -> None:
+    """Reproduce el journal contra el servidor e imprime latencias y coincidencias."""
+    parser = argparse.ArgumentParser(description="Reproduce un journal de llamadas contra POST /chat.")
+    parser.add_argument("--journal", help="Journal grabado (por defecto, uno sintético)")
+    parser.add_argument("--time-scale", type=float, default=0.1, help="Factor de llegadas y latencias")
+    parser.add_argument("--sessions", type=int, default=200, help="Sesiones del journal sintético")
+    parser.add_argument("--rate", type=float, default=20.0, help="Sesiones nuevas por segundo (sintético)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = Path(args.journal) if args.journal else Path(tmp) / "llm.jsonl.gz"
+        if not args.journal:
+            synthesize(journal, args.sessions, args.rate)
+        entries = [e for e in read_journals(journal) if e.error is None]
+        db_url = f"sqlite:///{tmp}/bench.db"
+        subprocess.run([sys.executable, "-m", "src.infrastructure.db.init_data"],
+                       env=dict(os.environ, DATABASE_URL=db_url), check=True, stdout=subprocess.DEVNULL)
+        proc, base = _start_server(db_url, journal, args.time_scale)
+        try:
+            chat, model, failed, wall = asyncio.run(_replay(base, entries, args.time_scale))
+            replay = httpx.get(f"{base}/metrics").json()["llm_replay"]
+        finally:
+            proc.terminate()
+            proc.wait(timeout=40)
+
+    span = (entries[-1].ts - entries[0].ts) * args.time_scale
+    print(f"{len(entries)} mensajes en {span:.1f} s de llegadas (escala {args.time_scale:g}), "
+          f"{len(chat) / wall:.1f} req/s, {failed} fallidos")
+    print(f"{'':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    overhead = [c - m for c, m in zip(chat, model)]
+    for label, values in (("/chat", chat), ("modelo", model), ("resto", overhead)):
+        print(f"{label:>10}{_pct(values, 50):>9.1f}{_pct(values, 95):>9.1f}{_pct(values, 99):>9.1f}")
+    print(f"replay: {replay}")
+
+
+if __name__ == "__main__":
+    main()
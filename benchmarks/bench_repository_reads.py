@@ -0,0 +1,99 @@
+"""Benchmark de lecturas de repositorio: ORM (`db.query`) vs SQLAlchemy Core.
+
+Puebla una base SQLite en memoria con productos y mensajes y compara el
+camino anterior (`db.query(Model)` + conversión) con las lecturas Core de
+`SQLProductRepository` y `SQLChatRepository`.
+
+Uso:
+    python -m benchmarks.bench_repository_reads [N_PRODUCTOS]
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.domain.entities import Product, ChatMessage
+from src.infrastructure.db.database import Base
+from src.infrastructure.db.models import ProductModel, ChatMemoryModel
+from src.infrastructure.repositories.product_repository import SQLProductRepository
+from src.infrastructure.repositories.chat_repository import SQLChatRepository
+
+
+def _orm_get_all(db):
+    """Camino anterior de `get_all`: entidades ORM con identity map."""
+    return [Product(id=m.id, name=m.name, brand=m.brand, category=m.category, size=m.size,
+                    color=m.color, price=m.price, stock=m.stock, description=m.description or "")
+            for m in db.query(ProductModel).all()]
+
+
+def _orm_by_brand(db, brand):
+    """Camino anterior de `get_by_brand`."""
+    return [Product(id=m.id, name=m.name, brand=m.brand, category=m.category, size=m.size,
+                    color=m.color, price=m.price, stock=m.stock, description=m.description or "")
+            for m in db.query(ProductModel).filter(ProductModel.brand == brand).all()]
+
+
+def _orm_recent(db, session_id, count):
+    """Camino anterior de `get_recent_messages`."""
+    rows = (db.query(ChatMemoryModel).filter(ChatMemoryModel.session_id == session_id)
+            .order_by(ChatMemoryModel.timestamp.desc()).limit(count).all())
+    return [ChatMessage(id=m.id, session_id=m.session_id, role=m.role, message=m.message,
+                        timestamp=m.timestamp) for m in reversed(rows)]
+
+
+def _orm_history(db, session_id):
+    """Camino anterior de `get_session_history` sin límite."""
+    rows = (db.query(ChatMemoryModel).filter(ChatMemoryModel.session_id == session_id)
+            .order_by(ChatMemoryModel.timestamp.asc()).all())
+    return [ChatMessage(id=m.id, session_id=m.session_id, role=m.role, message=m.message,
+                        timestamp=m.timestamp) for m in rows]
+
+
+def _best_of(Session, fn, *args, repeat: int = 7) -> float:
+    """Mejor tiempo (ms) usando una sesión nueva por ejecución, como en un request."""
+    best = float("inf")
+    for _ in range(repeat):
+        db = Session()
+        t0 = time.perf_counter()
+        fn(db, *args)
+        best = min(best, time.perf_counter() - t0)
+        db.close()
+    return best * 1000
+
+
+def main() -> None:
+    """Puebla la base y compara ambos caminos."""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    brands = ["Nike", "Adidas", "Puma", "Vans", "Converse"]
+    with engine.begin() as conn:
+        conn.execute(ProductModel.__table__.insert(), [
+            dict(name=f"Modelo {i}", brand=brands[i % 5], category="Running", size="42", color="Negro",
+                 price=100.0, stock=i % 9, description="desc") for i in range(n)])
+        base = datetime(2024, 1, 1)
+        conn.execute(ChatMemoryModel.__table__.insert(), [
+            dict(session_id=f"s{i % 50}", role="user" if i % 2 else "assistant", message=f"mensaje {i}",
+                 timestamp=base + timedelta(seconds=i)) for i in range(50_000)])
+
+    cases = [
+        (f"get_all ({n})", _orm_get_all, lambda db: SQLProductRepository(db).get_all(), ()),
+        ("get_by_brand", _orm_by_brand, lambda db, b: SQLProductRepository(db).get_by_brand(b), ("Nike",)),
+        ("get_recent_messages(6)", _orm_recent, lambda db, s, c: SQLChatRepository(db).get_recent_messages(s, c), ("s7", 6)),
+        ("get_session_history", _orm_history, lambda db, s: SQLChatRepository(db).get_session_history(s), ("s7",)),
+    ]
+    print(f"{'lectura':<26}{'ORM (ms)':>10}{'Core (ms)':>11}{'speedup':>9}")
+    for label, orm_fn, core_fn, args in cases:
+        orm = _best_of(Session, orm_fn, *args)
+        core = _best_of(Session, core_fn, *args)
+        print(f"{label:<26}{orm:>10.2f}{core:>11.2f}{orm / core:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark de búsqueda de texto libre: FTS5 + BM25 vs recorrido en memoria.
+
+Puebla una base SQLite temporal (en disco) con un catálogo sintético a través
+de la tabla `products` (los triggers mantienen el índice) y mide la latencia
+de `SQLProductRepository.search_text` para consultas típicas. Como
+referencia, mide `rank_products` (la implementación por defecto, sin índice)
+sobre una muestra de 100k productos.
+
+Uso:
+    python -m benchmarks.bench_search [N_PRODUCTOS]
+"""
+
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from src.domain.entities import Product
+from src.domain.search import rank_products
+from src.infrastructure.db.database import Base
+from src.infrastructure.db.models import ProductModel
+from src.infrastructure.repositories.product_repository import SQLProductRepository
+
+BRANDS = ["Nike", "Adidas", "Puma", "Reebok", "New Balance", "ASICS", "Clarks", "Vans",
+          "Converse", "Salomon", "Hoka", "Brooks", "Mizuno", "Saucony", "Skechers", "Fila"]
+CATEGORIES = ["Running", "Casual", "Formal", "Trail", "Training", "Basketball"]
+COLORS = ["Blanco", "Negro", "Azul", "Rojo", "Gris", "Verde", "Marrón", "Beige", "Rosa", "Naranja"]
+WORDS = ["amortiguación", "ligero", "transpirable", "cuero", "gamuza", "malla", "suela", "goma",
+         "estabilidad", "clásico", "urbano", "diario", "maratón", "impermeable", "agarre", "premium",
+         "espuma", "reactiva", "cómodo", "elegante", "resistente", "flexible", "acolchado", "retro"]
+QUERIES = ["amortiguación running blanco", "zapatos de cuero marrón", "nike negro", "trail impermeable",
+           "gamuza casual azul", "maraton ligero", "hoka", "elegante formal", "Ultra 42"]
+
+
+def _rows(n: int, rng: random.Random):
+    """Filas sintéticas para `products`."""
+    for i in range(n):
+        yield {
+            "name": f"{rng.choice(['Ultra', 'Air', 'Gel', 'Classic', 'Fresh', 'Speed', 'Cloud'])} {i % 997}",
+            "brand": rng.choice(BRANDS), "category": rng.choice(CATEGORIES), "size": "42",
+            "color": rng.choice(COLORS), "price": round(rng.uniform(50, 200), 2), "stock": rng.randint(0, 20),
+            "description": " ".join(rng.sample(WORDS, 4)),
+        }
+
+
+def _latencies(fn, queries, repeat: int = 5) -> list:
+    """Latencias (ms) de `fn(q)` para cada consulta, `repeat` veces."""
+    out = []
+    for _ in range(repeat):
+        for q in queries:
+            t0 = time.perf_counter()
+            fn(q)
+            out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def main() -> None:
+    """Puebla la base, mide FTS5 y la referencia en memoria."""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/search.db")
+        Base.metadata.create_all(bind=engine)
+        t0 = time.perf_counter()
+        rows = list(_rows(n, rng))
+        with engine.begin() as conn:
+            for i in range(0, n, 50_000):
+                conn.execute(insert(ProductModel.__table__), rows[i:i + 50_000])
+        print(f"carga de {n} productos (con índice): {time.perf_counter() - t0:.1f} s")
+
+        db = sessionmaker(bind=engine)()
+        repo = SQLProductRepository(db)
+        repo.search_text("calentamiento")
+        lat = sorted(_latencies(lambda q: repo.search_text(q, 20), QUERIES))
+        print(f"FTS5 top-20 ({len(lat)} consultas): p50 {statistics.median(lat):.2f} ms, "
+              f"p95 {lat[int(len(lat) * 0.95)]:.2f} ms, max {lat[-1]:.2f} ms")
+        for q in QUERIES:
+            best = min(_latencies(lambda x: repo.search_text(x, 20), [q], repeat=3))
+            print(f"  {q!r:34} {best:8.2f} ms")
+        db.close()
+
+        sample = [Product.from_trusted(i, r["name"], r["brand"], r["category"], r["size"], r["color"],
+                                       r["price"], r["stock"], r["description"])
+                  for i, r in enumerate(rows[:100_000], 1)]
+        mem = _latencies(lambda q: rank_products(sample, q, 20), QUERIES[:3], repeat=1)
+        print(f"en memoria sin índice (100k): p50 {statistics.median(mem):.0f} ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark de serialización de respuestas de la API.
+
+Compara el camino original (`model_validate` en el endpoint + validación de
+`response_model` + encoder JSON estándar) con el camino rápido
+(`to_payload` sin re-validación + orjson) para 10k productos y 1k mensajes.
+
+Uso:
+    python -m benchmarks.bench_serialization
+"""
+
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+
+from src.application.dtos import ProductDTO, ChatHistoryDTO, to_payload
+from src.domain.entities import Product, ChatMessage
+
+
+def _products(n: int) -> List[Product]:
+    """Genera `n` productos sintéticos."""
+    return [
+        Product(id=i, name=f"Modelo {i}", brand="Nike", category="Running", size="42",
+                color="Negro", price=100.0 + i % 50, stock=i % 7, description="Zapatilla de prueba")
+        for i in range(1, n + 1)
+    ]
+
+
+def _messages(n: int) -> List[ChatMessage]:
+    """Genera `n` mensajes sintéticos de una sesión."""
+    base = datetime(2024, 1, 1)
+    return [
+        ChatMessage(id=i, session_id="s1", role="user" if i % 2 else "assistant",
+                    message=f"mensaje número {i}", timestamp=base + timedelta(seconds=i))
+        for i in range(1, n + 1)
+    ]
+
+
+def _legacy(dto_cls, items) -> bytes:
+    """Camino original: valida en el endpoint, re-valida con `response_model` y usa json."""
+    adapter = TypeAdapter(List[dto_cls])
+    dtos = [dto_cls.model_validate(x) for x in items]
+    value = adapter.validate_python(dtos, from_attributes=True)
+    content = adapter.dump_python(value, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _fast(dto_cls, items) -> bytes:
+    """Camino rápido: proyección sin re-validación serializada con orjson."""
+    return orjson.dumps(to_payload(dto_cls, items))
+
+
+def _best_of(fn, *args, repeat: int = 5) -> float:
+    """Retorna el mejor tiempo (en ms) de `repeat` ejecuciones."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main() -> None:
+    """Ejecuta el benchmark e imprime una tabla comparativa."""
+    cases = [
+        ("10k productos", ProductDTO, _products(10_000)),
+        ("1k mensajes", ChatHistoryDTO, _messages(1_000)),
+    ]
+    print(f"{'caso':<16}{'original (ms)':>16}{'rápido (ms)':>14}{'speedup':>10}")
+    for label, dto_cls, items in cases:
+        legacy = _best_of(_legacy, dto_cls, items)
+        fast = _best_of(_fast, dto_cls, items)
+        print(f"{label:<16}{legacy:>16.2f}{fast:>14.2f}{legacy / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
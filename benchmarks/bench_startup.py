@@ -0,0 +1,54 @@
+"""Benchmark de arranque en frío (`python -X importtime`).
+
+Mide, en procesos nuevos, el tiempo de importar la app FastAPI y de correr
+la suite de tests, y lista los módulos con mayor costo acumulado de import.
+
+Uso:
+    python -m benchmarks.bench_startup [REPETICIONES]
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+
+TARGET = "src.infrastructure.api.main"
+
+
+def _importtime(module: str) -> list[tuple[int, str]]:
+    """Importa `module` en un proceso nuevo y retorna (µs acumulados, módulo)."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in out.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            rows.append((int(cumulative), name.strip()))
+    return rows
+
+
+def _wall(cmd: list[str]) -> float:
+    """Tiempo de pared (s) de ejecutar `cmd`."""
+    t0 = time.perf_counter()
+    subprocess.run(cmd, capture_output=True, check=True)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    """Imprime medianas de import de la app y de la suite, y el top de módulos."""
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    samples = [_importtime(TARGET) for _ in range(runs)]
+    totals = [next(us for us, name in rows if name == TARGET) for rows in samples]
+    print(f"import {TARGET}: {statistics.median(totals) / 1000:.0f} ms (mediana de {runs})")
+    loaded = {name for _, name in samples[-1]}
+    print(f"google.generativeai importado: {'google.generativeai' in loaded}")
+    print("top 8 (acumulado, ms):")
+    top = sorted((r for r in samples[-1] if "." not in r[1] or r[1].startswith("src.")), reverse=True)[:8]
+    for us, name in top:
+        print(f"  {us / 1000:8.1f}  {name}")
+    suite = [_wall([sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider"]) for _ in range(runs)]
+    print(f"pytest -q: {statistics.median(suite):.2f} s (mediana de {runs})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark del índice vectorial: construcción, top-K exacto vs IVF y recall.
+
+Uso:
+    python -m benchmarks.bench_vectors [N_PRODUCTOS]
+"""
+
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from src.domain.entities import Product
+from src.infrastructure.vector.embeddings import HashedNgramEmbedder
+from src.infrastructure.vector.index import ProductVectorIndex
+from benchmarks.bench_search import BRANDS, CATEGORIES, COLORS, WORDS
+
+QUERIES = ["zapato elegante para boda", "algo cómodo para correr", "botas impermeables de trail",
+           "gamuza azul casual", "zapatillas blancas ligeras", "cuero marrón formal"]
+
+
+def _catalog(n: int):
+    """Catálogo sintético con el mismo vocabulario que `bench_search`."""
+    rng = random.Random(7)
+    return [Product.from_trusted(i, f"{rng.choice(['Ultra', 'Air', 'Gel', 'Classic', 'Cloud'])} {i % 997}",
+                                 rng.choice(BRANDS), rng.choice(CATEGORIES), "42", rng.choice(COLORS),
+                                 100.0, 5, " ".join(rng.sample(WORDS, 4)))
+            for i in range(1, n + 1)]
+
+
+def _ms(fn, repeat: int = 5) -> list:
+    """Latencias (ms) de `fn()`."""
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def main() -> None:
+    """Construye el índice y compara búsqueda exacta, IVF y sync incremental."""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    catalog = _catalog(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ProductVectorIndex(tmp, HashedNgramEmbedder(), ann_threshold=10**12)
+        t0 = time.perf_counter()
+        index.sync(catalog)
+        print(f"embeddings + escritura de {n} productos: {time.perf_counter() - t0:.1f} s")
+        t0 = time.perf_counter()
+        index.sync(catalog)
+        print(f"sync sin cambios: {(time.perf_counter() - t0) * 1000:.0f} ms")
+        catalog[0] = Product.from_trusted(1, "Derby", "Clarks", "Formal", "42", "Negro", 100.0, 5, "boda")
+        print(f"sync con 1 cambio: {statistics.median(_ms(lambda: index.sync(catalog), 1)):.0f} ms")
+
+        # Hay muchos empates en el catálogo sintético: un resultado del IVF
+        # cuenta como acierto si su similitud alcanza la del 10.º exacto.
+        cutoff = {q: index.search(q, 10)[-1][1] - 1e-6 for q in QUERIES}
+        lat_exact = [x for q in QUERIES for x in _ms(lambda: index.search(q, 10))]
+        print(f"top-10 exacto: p50 {statistics.median(lat_exact):.1f} ms")
+        t0 = time.perf_counter()
+        index.build_ann()
+        print(f"IVF (nlist≈√N): {(time.perf_counter() - t0):.1f} s")
+        for nprobe in (8, 32):
+            index.nprobe = nprobe
+            lat_ivf = [x for q in QUERIES for x in _ms(lambda: index.search(q, 10))]
+            recall = statistics.mean(sum(s >= cutoff[q] for _, s in index.search(q, 10)) / 10 for q in QUERIES)
+            print(f"top-10 IVF (nprobe={nprobe}): p50 {statistics.median(lat_ivf):.1f} ms, recall@10 {recall:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark de throughput con 1 y N workers de uvicorn.
+
+Levanta `python -m src.infrastructure.api.server` sobre una base SQLite
+temporal con el proveedor de IA simulado (`LLM_PROVIDER=fake`) y mide
+requests/s y latencias de `GET /products` y `POST /chat`.
+
+Uso:
+    python -m benchmarks.bench_workers [N_WORKERS] [SEGUNDOS] [CONCURRENCIA]
+"""
+
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+
+def _free_port() -> int:
+    """Obtiene un puerto TCP libre en localhost."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(workers: int, db_url: str) -> tuple[subprocess.Popen, str]:
+    """Arranca el servidor y espera a que el lifespan termine."""
+    port = _free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), HOST="127.0.0.1",
+               DATABASE_URL=db_url, LLM_PROVIDER="fake", FAKE_LLM_LATENCY_MS="20")
+    proc = subprocess.Popen([sys.executable, "-m", "src.infrastructure.api.server"], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base}/health").json().get("ready"):
+                return proc, base
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("El servidor no quedó listo a tiempo")
+
+
+async def _load(base: str, scenario: str, seconds: float, concurrency: int) -> list[float]:
+    """Genera carga cerrada con `concurrency` clientes durante `seconds`."""
+    latencies: list[float] = []
+    stop = time.perf_counter() + seconds
+
+    async def client(i: int):
+        async with httpx.AsyncClient(base_url=base, timeout=30) as http:
+            n = 0
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                if scenario == "products":
+                    r = await http.get("/products")
+                else:
+                    r = await http.post("/chat", json={"session_id": f"bench-{i}", "message": f"hola {n}"})
+                r.raise_for_status()
+                latencies.append(time.perf_counter() - t0)
+                n += 1
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return latencies
+
+
+def main() -> None:
+    """Compara 1 worker contra N workers en ambos escenarios."""
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{tmp}/bench.db"
+        subprocess.run([sys.executable, "-m", "src.infrastructure.db.init_data"],
+                       env=dict(os.environ, DATABASE_URL=db_url), check=True, stdout=subprocess.DEVNULL)
+        print(f"{'workers':>8}{'escenario':>11}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}")
+        for workers in sorted({1, n}):
+            proc, base = _start_server(workers, db_url)
+            try:
+                for scenario in ("products", "chat"):
+                    lat = asyncio.run(_load(base, scenario, seconds, concurrency))
+                    lat.sort()
+                    p99 = lat[min(len(lat) - 1, int(len(lat) * 0.99))]
+                    print(f"{workers:>8}{scenario:>11}{len(lat) / seconds:>9.0f}"
+                          f"{statistics.median(lat) * 1000:>9.1f}{p99 * 1000:>9.1f}")
+            finally:
+                proc.terminate()
+                proc.wait(timeout=40)
+
+
+if __name__ == "__main__":
+    main()
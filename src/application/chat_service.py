@@ -7,14 +7,19 @@ Este módulo expone la clase `ChatService`, que implementa los casos de uso
 de la capa de aplicación relacionados con la conversación.
 """
 
+import asyncio
 from datetime import datetime, UTC
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
 
 from src.application.dtos import (
     ChatMessageRequestDTO,
     ChatMessageResponseDTO,
 )
-from src.domain.entities import ChatContext, ChatMessage
+from src.application.deadline import Deadline, scope as deadline_scope
+from src.application.intent_parser import render_answer
+from src.application.product_service import ProductService
+from src.domain.entities import ChatContext, ChatMessage, Product
+from src.domain.exceptions import DeadlineExceededError
 from src.domain.repositories import IChatRepository, IProductRepository
 
 
@@ -30,69 +35,182 @@ class ChatService:
         _chat_repo (IChatRepository): Repositorio de historial de chat.
         _ai_service: Servicio de IA con un método asíncrono
             `generate_response(user_message, products, context) -> str`.
+        _write_queue: Cola write-behind opcional con un método asíncrono
+            `submit(messages)`; si se define, los mensajes se persisten en
+            segundo plano en lugar de esperar los commits.
+        _retriever: Recuperador semántico opcional con un método
+            `retrieve(query, k) -> List[int]`; si se define, al modelo se le
+            pasan solo los productos relevantes en lugar del catálogo completo.
+        _intent_parser: Analizador opcional de consultas de catálogo (ver
+            `IntentParser`); si se define, las consultas simples se responden
+            con una plantilla sin llamar a la IA y, en las demás, los filtros
+            reconocidos acotan los productos del prompt.
     """
 
-    def __init__(self, product_repo: IProductRepository, chat_repo: IChatRepository, ai_service):
+    RETRIEVE_K = 8
+    BATCH_FLUSH = 200
+
+    def __init__(self, product_repo: IProductRepository, chat_repo: IChatRepository, ai_service,
+                 write_queue=None, retriever=None, intent_parser=None):
         """Inicializa el servicio con sus dependencias.
 
         Args:
             product_repo (IProductRepository): Repositorio de productos.
             chat_repo (IChatRepository): Repositorio de historial de chat.
             ai_service: Adaptador del proveedor de IA.
+            write_queue: Cola write-behind opcional (ver `ChatWriteBehindQueue`).
+            retriever: Recuperador opcional (ver `ProductVectorIndex`).
+            intent_parser: Analizador de intención opcional (ver `IntentParser`).
         """
         self._product_repo = product_repo
         self._chat_repo = chat_repo
         self._ai_service = ai_service
+        self._write_queue = write_queue
+        self._retriever = retriever
+        self._intent_parser = intent_parser
+
+    async def _select_products(self, message: str, catalog: Optional[List[Product]] = None) -> List[Product]:
+        """Productos para el prompt: los más relevantes si hay recuperador.
+
+        La búsqueda del recuperador (CPU) corre en un hilo para no bloquear el
+        loop. Si no encuentra nada (o no hay recuperador), se usa el catálogo
+        completo (`catalog` si ya se cargó, como en los lotes).
+        """
+        if self._retriever is not None:
+            ids = await asyncio.to_thread(self._retriever.retrieve, message, self.RETRIEVE_K)
+            relevant = [p for p in map(self._product_repo.get_by_id, ids) if p is not None]
+            if relevant:
+                return relevant
+        return catalog if catalog is not None else self._product_repo.get_all()
+
+    def _answer_from_catalog(self, message: str, catalog: Optional[List[Product]] = None,
+                             recent: Optional[List[ChatMessage]] = None):
+        """Intenta responder sin IA a partir de los filtros del mensaje.
+
+        Solo aplica al primer mensaje de una sesión: con historial, un mensaje
+        como "¿y en talla 42?" depende de lo conversado y va al modelo.
+
+        Returns:
+            tuple[str | None, List[Product] | None]: La respuesta en plantilla
+            (si la consulta es simple y tiene resultados) y, si no, los
+            productos filtrados para acotar el prompt (None si no aplica).
+        """
+        if self._intent_parser is None or recent:
+            return None, None
+        intent = self._intent_parser.parse(message, catalog if catalog is not None else self._product_repo.get_all())
+        if not intent.filters:
+            return None, None
+        matches = ProductService(self._product_repo).search_products(intent.filters)
+        if not matches:
+            return None, None
+        if intent.answerable:
+            self._intent_parser.stats["answered"] += 1
+            return render_answer(intent.filters, matches), None
+        self._intent_parser.stats["narrowed"] += 1
+        return None, matches
+
+    async def _reply(self, request: ChatMessageRequestDTO, catalog: Optional[List[Product]] = None,
+                     recent: Optional[List[ChatMessage]] = None, deadline: Optional[Deadline] = None) -> str:
+        """Genera el texto del asistente (plantilla o IA) sin persistir nada.
+
+        Args:
+            request (ChatMessageRequestDTO): Mensaje del usuario.
+            catalog (List[Product] | None): Catálogo ya cargado; si es None se
+                lee del repositorio.
+            recent (List[ChatMessage] | None): Últimos mensajes de la sesión;
+                si es None se leen del repositorio.
+            deadline (Deadline | None): Plazo de la solicitud; acota la espera
+                de la IA.
+
+        Raises:
+            DeadlineExceededError: Si el plazo vence antes de la respuesta.
+        """
+        if recent is None:
+            recent = self._chat_repo.get_recent_messages(session_id=request.session_id, count=6)
+        assistant_text, products = self._answer_from_catalog(request.message, catalog, recent)
+        if assistant_text is not None:
+            return assistant_text
+        if products is None:
+            products = await self._select_products(request.message, catalog)
+        context = ChatContext(messages=recent, max_messages=6).format_for_prompt()
+
+        # Llamada a IA (async), acotada por el plazo si lo hay
+        if deadline is not None:
+            deadline.check()
+        call = self._ai_service.generate_response(
+            user_message=request.message,
+            products=products,
+            context=context,
+        )
+        if deadline is None or deadline.expires_at is None:
+            return await call
+        try:
+            return await asyncio.wait_for(call, deadline.remaining())
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError() from None
 
-    async def process_message(self, request: ChatMessageRequestDTO) -> ChatMessageResponseDTO:
+    @staticmethod
+    def _exchange(request: ChatMessageRequestDTO, assistant_text: str) -> Tuple[ChatMessage, ChatMessage]:
+        """Mensajes (usuario, asistente) a persistir para un intercambio."""
+        user_msg = ChatMessage(
+            id=None, session_id=request.session_id, role="user",
+            message=request.message, timestamp=datetime.now(UTC)
+        )
+        assistant_msg = ChatMessage(
+            id=None, session_id=request.session_id, role="assistant",
+            message=assistant_text, timestamp=datetime.utcnow()
+        )
+        return user_msg, assistant_msg
+
+    async def process_message(self, request: ChatMessageRequestDTO,
+                              deadline: Optional[Deadline] = None) -> ChatMessageResponseDTO:
         """Procesa un mensaje del usuario y genera una respuesta con IA.
 
         Flujo:
-          1) Obtiene el catálogo de productos.
-          2) Recupera los últimos N mensajes de la sesión.
+          1) Recupera los últimos N mensajes de la sesión.
+          2) Si hay analizador de intención, la sesión no tiene historial y el
+             mensaje es una consulta simple de catálogo con resultados,
+             responde con una plantilla y omite los pasos 3–4. Si no, obtiene
+             el catálogo de productos (los filtrados por la intención, o los
+             más relevantes si hay un recuperador semántico).
           3) Construye el contexto (`ChatContext`) para el prompt.
           4) Llama al servicio de IA para generar la respuesta.
-          5) Persiste el mensaje del usuario y el del asistente.
+          5) Persiste el mensaje del usuario y el del asistente (o los encola
+             si el servicio usa una cola write-behind). Si la solicitud se
+             abandonó (plazo vencido o cliente desconectado) no se persiste.
           6) Retorna un `ChatMessageResponseDTO` con la respuesta.
 
+        Si la tarea se cancela (el cliente se desconectó) la cancelación
+        interrumpe la espera de la IA y tampoco se persiste nada.
+
         Args:
             request (ChatMessageRequestDTO): Mensaje del usuario que incluye `session_id`.
+            deadline (Deadline | None): Plazo de la solicitud, visible para el
+                proveedor de IA mediante `deadline.current()`.
 
         Returns:
             ChatMessageResponseDTO: Respuesta del asistente y metadatos (timestamp, sesión).
 
         Raises:
+            DeadlineExceededError: Si el plazo vence antes de tener la respuesta.
             Exception: Si el proveedor de IA falla o se produce un error inesperado.
 
         Example:
             >>> req = ChatMessageRequestDTO(session_id="u1", message="Busco zapatillas 42")
             >>> # await chat_service.process_message(req)
         """
-        products = self._product_repo.get_all()
-
-        recent = self._chat_repo.get_recent_messages(session_id=request.session_id, count=6)
-        context = ChatContext(messages=recent, max_messages=6).format_for_prompt()
-
-        # Llamada a IA (async)
-        assistant_text = await self._ai_service.generate_response(
-            user_message=request.message,
-            products=products,
-            context=context,
-        )
+        with deadline_scope(deadline):
+            assistant_text = await self._reply(request, deadline=deadline)
+        if deadline is not None and deadline.abandoned():
+            raise DeadlineExceededError("Solicitud abandonada antes de guardar la respuesta")
 
         # Guardar mensajes
-        now = datetime.now(UTC)
-        user_msg = ChatMessage(
-            id=None, session_id=request.session_id, role="user",
-            message=request.message, timestamp=now
-        )
-        self._chat_repo.save_message(user_msg)
-
-        assistant_msg = ChatMessage(
-            id=None, session_id=request.session_id, role="assistant",
-            message=assistant_text, timestamp=datetime.utcnow()
-        )
-        self._chat_repo.save_message(assistant_msg)
+        user_msg, assistant_msg = self._exchange(request, assistant_text)
+        if self._write_queue is not None:
+            await self._write_queue.submit([user_msg, assistant_msg])
+        else:
+            # Un solo commit (y una inserción por lotes) para el intercambio.
+            self._chat_repo.save_messages([user_msg, assistant_msg])
 
         return ChatMessageResponseDTO(
             session_id=request.session_id,
@@ -101,6 +219,83 @@ class ChatService:
             timestamp=datetime.now(UTC),
         )
 
+    async def process_batch(
+        self, requests: Sequence[ChatMessageRequestDTO], concurrency: int = 4,
+    ) -> AsyncIterator[Tuple[int, Union[ChatMessageResponseDTO, Exception]]]:
+        """Procesa muchos mensajes con concurrencia acotada (reproducciones, evaluación).
+
+        - Los mensajes de una misma sesión se procesan en orden, cada uno con
+          el contexto de los anteriores del lote; sesiones distintas avanzan
+          en paralelo con hasta `concurrency` respuestas en curso.
+        - El catálogo se carga una sola vez para todo el lote.
+        - El historial se persiste en bloques de `BATCH_FLUSH` mensajes con
+          `save_messages` (o la cola write-behind), no un commit por mensaje.
+
+        Args:
+            requests (Sequence[ChatMessageRequestDTO]): Mensajes a procesar.
+            concurrency (int): Máximo de respuestas generándose a la vez.
+
+        Yields:
+            tuple[int, ChatMessageResponseDTO | Exception]: Índice del mensaje
+            en `requests` y su respuesta (o el error que la impidió), en orden
+            de finalización.
+        """
+        catalog = self._product_repo.get_all()
+        sessions: Dict[str, List[int]] = {}
+        for i, request in enumerate(requests):
+            sessions.setdefault(request.session_id, []).append(i)
+
+        done: asyncio.Queue = asyncio.Queue()
+        limit = asyncio.Semaphore(max(1, concurrency))
+        pending: List[ChatMessage] = []
+
+        async def run_session(session_id: str, indexes: List[int]) -> None:
+            try:
+                recent = self._chat_repo.get_recent_messages(session_id=session_id, count=6)
+            except Exception as e:
+                for i in indexes:
+                    done.put_nowait((i, e))
+                return
+            for i in indexes:
+                request = requests[i]
+                try:
+                    async with limit:
+                        assistant_text = await self._reply(request, catalog, recent)
+                except Exception as e:
+                    done.put_nowait((i, e))
+                    continue
+                exchange = self._exchange(request, assistant_text)
+                recent = [*recent, *exchange][-6:]
+                pending.extend(exchange)
+                done.put_nowait((i, ChatMessageResponseDTO(
+                    session_id=session_id,
+                    user_message=request.message,
+                    assistant_message=assistant_text,
+                    timestamp=exchange[1].timestamp,
+                )))
+
+        tasks = [asyncio.create_task(run_session(sid, idx)) for sid, idx in sessions.items()]
+        try:
+            for _ in range(len(requests)):
+                yield await done.get()
+                if len(pending) >= self.BATCH_FLUSH:
+                    await self._persist_batch(pending)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self._persist_batch(pending)
+
+    async def _persist_batch(self, pending: List[ChatMessage]) -> None:
+        """Persiste (y vacía) los mensajes acumulados de un lote."""
+        if not pending:
+            return
+        messages = list(pending)
+        pending.clear()
+        if self._write_queue is not None:
+            await self._write_queue.submit(messages)
+        else:
+            self._chat_repo.save_messages(messages)
+
     def get_session_history(self, session_id: str, limit: Optional[int] = None):
         """Obtiene el historial de una sesión en orden cronológico.
 
@@ -0,0 +1,72 @@
+"""Plazos y cancelación de una solicitud de chat.
+
+Un `Deadline` acompaña a la solicitud desde la capa HTTP hasta el proveedor
+de IA: `ChatService` limita la espera de la respuesta al tiempo restante y
+no persiste intercambios abandonados, y los proveedores que ejecutan la
+llamada en un hilo lo consultan (vía `current()`, que `asyncio.to_thread`
+propaga) para no iniciar una generación que ya nadie espera y para acotar
+el timeout de la llamada de red.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from src.domain.exceptions import DeadlineExceededError
+
+_current: ContextVar[Optional["Deadline"]] = ContextVar("chat_deadline", default=None)
+
+
+class Deadline:
+    """Plazo absoluto (reloj monotónico) y marca de cancelación.
+
+    Attributes:
+        expires_at (Optional[float]): Instante límite; None = sin plazo.
+        cancelled (bool): True si el cliente abandonó la solicitud.
+    """
+
+    __slots__ = ("expires_at", "cancelled")
+
+    def __init__(self, timeout: Optional[float] = None):
+        """Crea el plazo a `timeout` segundos de ahora (None = sin plazo)."""
+        self.expires_at = time.monotonic() + timeout if timeout else None
+        self.cancelled = False
+
+    def remaining(self) -> Optional[float]:
+        """Segundos restantes (0 si venció; None si no hay plazo)."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """True si el plazo venció."""
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def abandoned(self) -> bool:
+        """True si la solicitud fue cancelada o su plazo venció."""
+        return self.cancelled or self.expired()
+
+    def cancel(self) -> None:
+        """Marca la solicitud como abandonada por el cliente."""
+        self.cancelled = True
+
+    def check(self) -> None:
+        """Lanza `DeadlineExceededError` si el plazo venció."""
+        if self.expired():
+            raise DeadlineExceededError()
+
+
+def current() -> Optional[Deadline]:
+    """Plazo de la solicitud en curso (None fuera de `scope`)."""
+    return _current.get()
+
+
+@contextmanager
+def scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Hace visible `deadline` para el código llamado dentro del bloque."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
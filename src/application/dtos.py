@@ -6,8 +6,9 @@ servicios de aplicación.
 """
 
 from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, field_validator
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Type
+from pydantic import BaseModel, Field, field_validator
 from pydantic import ConfigDict
 
 
@@ -73,6 +74,31 @@ class ProductDTO(BaseModel):
             raise ValueError("El stock no puede ser negativo.")
         return v
 
+    @classmethod
+    def from_entity(cls, product: Any) -> "ProductDTO":
+        """Construye el DTO desde una entidad `Product` ya validada.
+
+        Usa `model_construct`, por lo que no repite las validaciones: la
+        entidad de dominio ya garantizó sus invariantes al crearse.
+
+        Args:
+            product (Product): Entidad de dominio (o cualquier objeto con los mismos atributos).
+
+        Returns:
+            ProductDTO: DTO poblado sin re-validación.
+        """
+        return cls.model_construct(
+            id=product.id,
+            name=product.name,
+            brand=product.brand,
+            category=product.category,
+            size=product.size,
+            color=product.color,
+            price=product.price,
+            stock=product.stock,
+            description=product.description or "",
+        )
+
 
 class ChatMessageRequestDTO(BaseModel):
     """DTO de entrada para el endpoint de chat.
@@ -101,6 +127,18 @@ class ChatMessageRequestDTO(BaseModel):
         return v
 
 
+class ChatBatchRequestDTO(BaseModel):
+    """DTO de entrada para el procesamiento de chat por lotes.
+
+    Attributes:
+        messages (List[ChatMessageRequestDTO]): Mensajes a procesar; los de
+            una misma sesión se responden en el orden recibido.
+        concurrency (int): Respuestas generándose a la vez (1–32).
+    """
+    messages: List[ChatMessageRequestDTO] = Field(min_length=1, max_length=10_000)
+    concurrency: int = Field(default=4, ge=1, le=32)
+
+
 class ChatMessageResponseDTO(BaseModel):
     """DTO de salida para respuestas del chat.
 
@@ -131,3 +169,51 @@ class ChatHistoryDTO(BaseModel):
     timestamp: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+    @classmethod
+    def from_entity(cls, message: Any) -> "ChatHistoryDTO":
+        """Construye el DTO desde una entidad `ChatMessage` ya validada, sin re-validar.
+
+        Args:
+            message (ChatMessage): Mensaje persistido (con ID).
+
+        Returns:
+            ChatHistoryDTO: DTO poblado con `model_construct`.
+        """
+        return cls.model_construct(
+            id=message.id,
+            role=message.role,
+            message=message.message,
+            timestamp=message.timestamp,
+        )
+
+
+def to_payload(dto_cls: Type[BaseModel], items: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Proyecta entidades ya validadas a diccionarios con los campos del DTO.
+
+    Es el camino rápido para listas grandes: no instancia modelos de Pydantic
+    ni re-valida, solo copia los atributos declarados en `dto_cls`. El
+    resultado es serializable directamente con orjson.
+
+    Args:
+        dto_cls (Type[BaseModel]): DTO cuyo esquema define los campos de salida.
+        items (Iterable[Any]): Entidades de dominio (p. ej. `Product`, `ChatMessage`).
+
+    Returns:
+        List[Dict[str, Any]]: Un diccionario por entidad.
+    """
+    fields = [(f, f in text_fields(dto_cls)) for f in dto_cls.model_fields]
+    return [{f: (getattr(x, f) or "") if text else getattr(x, f) for f, text in fields} for x in items]
+
+
+@lru_cache(maxsize=None)
+def text_fields(dto_cls: Type[BaseModel]) -> frozenset:
+    """Campos `str` del DTO: un `None` de la entidad se emite como `""`, igual que en `from_entity`."""
+    return frozenset(f for f, info in dto_cls.model_fields.items() if info.annotation is str)
+
+
+def field_values(dto_cls: Type[BaseModel], items: Iterable[Any], field: str) -> List[Any]:
+    """Columna `field` de las entidades, con la misma normalización que `to_payload`."""
+    if field in text_fields(dto_cls):
+        return [getattr(x, field) or "" for x in items]
+    return [getattr(x, field) for x in items]
@@ -0,0 +1,365 @@
+"""Facetas y agregados del catálogo para los filtros de la tienda.
+
+`FacetService` mantiene, por campo (`brand`, `category`, `size`, `color` y
+rango de precio), cuántos productos tiene cada valor:
+
+- Sin filtro y con uno o dos filtros (p. ej. "dentro de Running", "Running
+  en negro"): tablas precalculadas que se actualizan en cada alta, cambio o
+  baja (`upsert`/`remove`); responder es copiar diccionarios.
+- Tres o más filtros: columnas NumPy de códigos por campo. Se parte de la
+  lista de filas del filtro más selectivo (en caché hasta que cambie un
+  producto con ese valor), se descartan las que no cumplen los demás y cada
+  faceta es un `bincount` sobre las filas restantes.
+
+`rebuild` carga todo desde cero (al iniciar o cuando el catálogo se recargó
+desde la base) con conteos vectorizados. NumPy se importa al cargar el
+primer producto, no al importar el módulo (que importa `ProductService`).
+"""
+
+import bisect
+import threading
+from collections import Counter
+from itertools import combinations
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.domain.entities import Product
+
+if TYPE_CHECKING:
+    import numpy as np
+
+FACET_FIELDS = ("brand", "category", "size", "color", "price_range")
+# Límites superiores de los rangos de precio; el último rango no tiene tope.
+PRICE_EDGES = (50.0, 100.0, 150.0, 200.0, 300.0)
+# Combinaciones de filtros con agregado precalculado (0, 1 o 2 campos).
+MAX_PRECOMPUTED = 2
+
+# Hasta cuántas celdas (grupos × valores) se cuenta con un `bincount` denso;
+# por encima, solo los pares presentes (`np.unique`).
+DENSE_CELLS = 1 << 20
+
+# Clave de un agregado: pares (campo, código) ordenados por campo.
+_Key = Tuple[Tuple[str, int], ...]
+
+
+def price_labels(edges: Sequence[float]) -> List[str]:
+    """Etiquetas de los rangos de precio: "0-50", "50-100", ..., "300+"."""
+    bounds = [0.0, *edges]
+    labels = [f"{lo:g}-{hi:g}" for lo, hi in zip(bounds, bounds[1:])]
+    return labels + [f"{bounds[-1]:g}+"]
+
+
+def _counter_of(codes: List[int], counts: List[int]) -> Counter:
+    """Counter código → cantidad armado sin `Counter.__init__`.
+
+    `rebuild` crea uno por faceta de cada agregado (millones con catálogos
+    de alta cardinalidad); la validación de `__init__` es la mayor parte
+    de su costo.
+    """
+    counter = Counter.__new__(Counter)
+    dict.update(counter, zip(codes, counts))
+    return counter
+
+
+def _counter(counts: "np.ndarray") -> Counter:
+    """Counter código → cantidad con las posiciones no nulas de `counts`."""
+    import numpy as np
+
+    nonzero = np.flatnonzero(counts)
+    return _counter_of(nonzero.tolist(), counts[nonzero].tolist())
+
+
+class _Aggregate:
+    """Conteos por campo y totales de un conjunto de productos."""
+
+    __slots__ = ("counts", "total", "in_stock", "price_sum")
+
+    def __init__(self, total: int = 0, in_stock: int = 0, price_sum: float = 0.0, empty: bool = True):
+        self.counts: Dict[str, Counter] = {f: Counter() for f in FACET_FIELDS} if empty else {}
+        self.total = total
+        self.in_stock = in_stock
+        self.price_sum = price_sum
+
+    def apply(self, codes: Dict[str, int], price: float, stock: int, sign: int) -> None:
+        """Suma (`sign=1`) o resta (`sign=-1`) un producto."""
+        for field, code in codes.items():
+            counter = self.counts[field]
+            counter[code] += sign
+            if not counter[code]:
+                del counter[code]
+        self.total += sign
+        self.in_stock += sign * (stock > 0)
+        self.price_sum += sign * price
+
+
+class FacetService:
+    """Facetas del catálogo mantenidas de forma incremental.
+
+    Attributes:
+        version (int): Se incrementa con cada cambio.
+    """
+
+    def __init__(self, price_edges: Sequence[float] = PRICE_EDGES):
+        """Crea el servicio vacío.
+
+        Args:
+            price_edges (Sequence[float]): Límites de los rangos de precio.
+        """
+        self._edges = tuple(float(e) for e in price_edges)
+        self._labels = price_labels(price_edges)
+        self._lock = threading.Lock()
+        self.version = 0
+        self._reset(0)
+
+    def _reset(self, capacity: int) -> None:
+        """Estructuras vacías; las columnas tendrán lugar para `capacity` filas."""
+        self._capacity = max(capacity, 1024)
+        self._values: Dict[str, List[str]] = {f: [] for f in FACET_FIELDS}
+        self._code_of: Dict[str, Dict[str, int]] = {f: {} for f in FACET_FIELDS}
+        self._cols: Optional[Dict[str, "np.ndarray"]] = None
+        self._row_of: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._used = 0
+        self._aggs: Dict[_Key, _Aggregate] = {(): _Aggregate()}
+        self._postings: Dict[Tuple[str, int], "np.ndarray"] = {}
+        for label in self._labels:
+            self._code("price_range", label)
+
+    def _allocate(self) -> None:
+        """Crea las columnas vacías (primer producto o `rebuild`)."""
+        import numpy as np
+
+        capacity = self._capacity
+        self._cols = {f: np.zeros(capacity, dtype=np.int32) for f in FACET_FIELDS}
+        self._price = np.zeros(capacity, dtype=np.float64)
+        self._stock = np.zeros(capacity, dtype=np.int32)
+        self._alive = np.zeros(capacity, dtype=bool)
+
+    def _code(self, field: str, value: str) -> int:
+        """Código del valor en el campo (lo registra si es nuevo)."""
+        codes = self._code_of[field]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._values[field])
+            self._values[field].append(value)
+        return code
+
+    def _codes(self, p: Product) -> Dict[str, int]:
+        """Códigos de los campos facetados del producto."""
+        codes = {f: self._code(f, getattr(p, f)) for f in FACET_FIELDS[:-1]}
+        codes["price_range"] = bisect.bisect_right(self._edges, p.price)
+        return codes
+
+    def _apply(self, codes: Dict[str, int], price: float, stock: int, sign: int) -> None:
+        """Actualiza cada agregado precalculado al que pertenece el producto."""
+        items = sorted(codes.items())
+        for r in range(MAX_PRECOMPUTED + 1):
+            for key in combinations(items, r):
+                agg = self._aggs.get(key)
+                if agg is None:
+                    agg = self._aggs[key] = _Aggregate()
+                agg.apply(codes, price, stock, sign)
+        for item in items:
+            self._postings.pop(item, None)
+
+    def _grow(self) -> None:
+        """Duplica la capacidad de las columnas."""
+        import numpy as np
+
+        capacity = len(self._alive) * 2
+        for f in FACET_FIELDS:
+            self._cols[f] = np.resize(self._cols[f], capacity)
+        self._price = np.resize(self._price, capacity)
+        self._stock = np.resize(self._stock, capacity)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive
+        self._alive = alive
+
+    def rebuild(self, products: Iterable[Product]) -> None:
+        """Recalcula todo a partir del catálogo completo."""
+        import numpy as np
+
+        products = list(products)
+        n = len(products)
+        with self._lock:
+            self._reset(n)
+            self._allocate()
+            for f in FACET_FIELDS[:-1]:
+                self._cols[f][:n] = [self._code(f, getattr(p, f)) for p in products]
+            self._price[:n] = np.fromiter((p.price for p in products), np.float64, n)
+            self._stock[:n] = np.fromiter((p.stock for p in products), np.int32, n)
+            self._cols["price_range"][:n] = np.searchsorted(self._edges, self._price[:n], side="right")
+            self._alive[:n] = True
+            self._row_of = {p.id: row for row, p in enumerate(products)}
+            self._used = n
+            self._aggregate_all()
+            self.version += 1
+
+    def _aggregate_all(self) -> None:
+        """Agregados precalculados, solo de las combinaciones que tienen filas.
+
+        Cada combinación de campos se agrupa por su código combinado y cada
+        faceta se cuenta por pares (grupo, valor). Con pocas celdas se usa un
+        `bincount` denso; por encima de `DENSE_CELLS`, `np.unique` sobre los
+        pares presentes, de modo que la memoria depende de las filas y no del
+        producto de cardinalidades (2.000 marcas × 200 categorías × 2.000
+        marcas son 800M celdas).
+        """
+        import numpy as np
+
+        n = self._used
+        cols = {f: self._cols[f][:n].astype(np.int64) for f in FACET_FIELDS}
+        sizes = {f: len(self._values[f]) for f in FACET_FIELDS}
+        price, in_stock = self._price[:n], (self._stock[:n] > 0)
+
+        for r in range(MAX_PRECOMPUTED + 1):
+            for fields in combinations(sorted(FACET_FIELDS), r):
+                combined = np.zeros(n, dtype=np.int64)
+                for f in fields:
+                    combined = combined * sizes[f] + cols[f]
+                space = int(np.prod([sizes[f] for f in fields], dtype=np.int64))
+                if space <= DENSE_CELLS:
+                    cells = np.flatnonzero(np.bincount(combined, minlength=space))
+                    remap = np.zeros(space, dtype=np.int64)
+                    remap[cells] = np.arange(len(cells))
+                    group = remap[combined]
+                else:
+                    cells, group = np.unique(combined, return_inverse=True)
+                k = len(cells)
+                if not k:
+                    continue
+                totals = np.bincount(group, minlength=k).tolist()
+                stocked = np.bincount(group, weights=in_stock, minlength=k).tolist()
+                sums = np.bincount(group, weights=price, minlength=k).tolist()
+                if fields:
+                    codes = np.unravel_index(cells, tuple(sizes[f] for f in fields))
+                    keys = list(zip(*(zip([f] * k, c.tolist()) for f, c in zip(fields, codes))))
+                else:
+                    keys = [()]
+                aggs = []
+                for key, total, stock, price_sum in zip(keys, totals, stocked, sums):
+                    agg = self._aggs[key] = _Aggregate(total, int(stock), price_sum, empty=False)
+                    aggs.append(agg)
+                for g in FACET_FIELDS:
+                    if k * sizes[g] <= DENSE_CELLS:
+                        matrix = np.bincount(group * sizes[g] + cols[g], minlength=k * sizes[g]).reshape(k, sizes[g])
+                        for agg, row in zip(aggs, matrix):
+                            agg.counts[g] = _counter(row)
+                        continue
+                    pairs, counts = np.unique(group * sizes[g] + cols[g], return_counts=True)
+                    bounds = np.searchsorted(pairs // sizes[g], np.arange(k + 1)).tolist()
+                    values, counts = (pairs % sizes[g]).tolist(), counts.tolist()
+                    for agg, lo, hi in zip(aggs, bounds, bounds[1:]):
+                        agg.counts[g] = _counter_of(values[lo:hi], counts[lo:hi])
+
+    def upsert(self, product: Product) -> None:
+        """Agrega el producto o actualiza sus valores si ya estaba."""
+        with self._lock:
+            self._delete(product.id)
+            self._insert(product)
+            self.version += 1
+
+    def remove(self, product_id: int) -> None:
+        """Quita el producto (no hace nada si no estaba)."""
+        with self._lock:
+            if self._delete(product_id):
+                self.version += 1
+
+    def _insert(self, p: Product) -> None:
+        """Guarda el producto en una fila libre y suma sus conteos."""
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._cols is None:
+                self._allocate()
+            elif self._used == len(self._alive):
+                self._grow()
+            row = self._used
+            self._used += 1
+        codes = self._codes(p)
+        for f, code in codes.items():
+            self._cols[f][row] = code
+        self._price[row] = p.price
+        self._stock[row] = p.stock
+        self._alive[row] = True
+        self._row_of[p.id] = row
+        self._apply(codes, p.price, p.stock, 1)
+
+    def _delete(self, product_id: int) -> bool:
+        """Libera la fila del producto y resta sus conteos."""
+        row = self._row_of.pop(product_id, None)
+        if row is None:
+            return False
+        codes = {f: int(self._cols[f][row]) for f in FACET_FIELDS}
+        self._apply(codes, float(self._price[row]), int(self._stock[row]), -1)
+        self._alive[row] = False
+        self._free.append(row)
+        return True
+
+    def facets(self, filters: Optional[Dict[str, str]] = None) -> Dict[str, object]:
+        """Facetas y agregados de los productos que cumplen `filters`.
+
+        Args:
+            filters (dict | None): Valor exacto por campo de `FACET_FIELDS`
+                (p. ej. `{"category": "Running", "price_range": "50-100"}`).
+
+        Returns:
+            dict: `total`, `in_stock`, `avg_price` y `facets` (por campo,
+            valor → cantidad, de mayor a menor; sin valores en cero).
+
+        Raises:
+            ValueError: Si algún filtro no es un campo facetado.
+        """
+        filters = {f: v for f, v in (filters or {}).items() if v is not None}
+        unknown = set(filters) - set(FACET_FIELDS)
+        if unknown:
+            raise ValueError(f"Campos no facetados: {', '.join(sorted(unknown))}")
+        with self._lock:
+            codes = {}
+            for field, value in filters.items():
+                code = self._code_of[field].get(value)
+                if code is None:
+                    return self._render(_Aggregate())
+                codes[field] = code
+            if len(codes) <= MAX_PRECOMPUTED:
+                return self._render(self._aggs.get(tuple(sorted(codes.items()))) or _Aggregate())
+            return self._render(self._scan(codes))
+
+    def _rows(self, field: str, code: int) -> "np.ndarray":
+        """Filas vigentes con ese valor (en caché hasta que cambie alguna)."""
+        import numpy as np
+
+        key = (field, code)
+        rows = self._postings.get(key)
+        if rows is None:
+            n = self._used
+            rows = self._postings[key] = np.flatnonzero((self._cols[field][:n] == code) & self._alive[:n])
+        return rows
+
+    def _scan(self, codes: Dict[str, int]) -> _Aggregate:
+        """Agregado de varios filtros partiendo de la lista de filas más corta."""
+        import numpy as np
+
+        order = sorted(codes.items(), key=lambda item: self._aggs.get((item,), _Aggregate()).total)
+        rows = self._rows(*order[0])
+        for field, code in order[1:]:
+            rows = rows[self._cols[field][rows] == code]
+        agg = _Aggregate()
+        for f in FACET_FIELDS:
+            agg.counts[f] = _counter(np.bincount(self._cols[f][rows], minlength=len(self._values[f])))
+        agg.total = int(rows.size)
+        agg.in_stock = int((self._stock[rows] > 0).sum())
+        agg.price_sum = float(self._price[rows].sum())
+        return agg
+
+    def _render(self, agg: _Aggregate) -> Dict[str, object]:
+        """Convierte un agregado (por códigos) a la respuesta (por valores)."""
+        facets = {
+            f: {self._values[f][code]: count for code, count in agg.counts[f].most_common() if count > 0}
+            for f in FACET_FIELDS
+        }
+        return {
+            "total": agg.total,
+            "in_stock": agg.in_stock,
+            "avg_price": round(agg.price_sum / agg.total, 2) if agg.total else None,
+            "facets": facets,
+        }
@@ -0,0 +1,234 @@
+"""Extracción de intención y filtros de catálogo por reglas.
+
+Muchos mensajes del chat son consultas directas al catálogo ("¿qué Adidas
+tienen en talla 42 por menos de 150?"). `IntentParser` reconoce marca,
+categoría, talla, color y rango de precio usando el vocabulario del propio
+catálogo y decide si la pregunta se puede responder sin el modelo de IA:
+
+- Confianza alta (consulta de catálogo sin pedidos de opinión ni palabras
+  sin reconocer): `ChatService` responde con `render_answer` sobre
+  `ProductService.search_products`.
+- En otro caso: los filtros extraídos acotan los productos que se envían al
+  modelo.
+- Mensajes con negaciones ("no quiero Nike") no producen filtros: las reglas
+  no distinguen lo que se pide de lo que se excluye.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.domain.entities import Product
+from src.domain.search import normalize, words
+
+# Sinónimos de categoría → categoría canónica (normalizada).
+CATEGORY_SYNONYMS = {
+    "correr": "running", "trotar": "running", "maraton": "running", "deportiva": "running",
+    "deportivas": "running", "zapatillas de correr": "running",
+    "formales": "formal", "casuales": "casual",
+    "vestir": "formal", "elegante": "formal", "elegantes": "formal", "oficina": "formal",
+    "boda": "formal", "traje": "formal",
+    "diario": "casual", "urbano": "casual", "urbanas": "casual", "informal": "casual",
+}
+
+# Palabras que indican una consulta de catálogo (no aportan filtros).
+LOOKUP_WORDS = frozenset(
+    "que cual cuales tienen tienes tiene hay busco buscando quiero ver muestrame mostrar muestra "
+    "mostrarme dame lista listar disponible disponibles venden vendes stock existencia modelos "
+    "modelo zapatos zapato zapatillas zapatilla tenis calzado opciones opcion algun alguna "
+    "algunos algunas marca color talla tallas numero precio precios cuesta cuestan cuanto valen "
+    "algo hola porfa favor gracias me mi tu usted ustedes".split()
+)
+
+# Palabras que piden juicio, comparación o consejo: requieren al modelo.
+OPEN_ENDED_WORDS = frozenset(
+    "recomienda recomiendas recomiendan recomendacion recomendarias mejor mejores peor "
+    "diferencia diferencias comparar compara comparacion conviene aconsejas consejo opinas "
+    "opinion porque sirve sirven ayudame ayuda duran dura comodo comodos sugieres sugerencia".split()
+)
+
+# Negaciones y exclusiones: el mensaje se deja entero al modelo.
+NEGATION_WORDS = frozenset("no ni sin nunca tampoco excepto salvo ningun ninguna ninguno evitar".split())
+_NEGATION = re.compile(r"\b(?:" + "|".join(sorted(NEGATION_WORDS)) + r")\b")
+
+_SIZE = re.compile(r"\b(?:talla|tallas|numero|num|n|size|t)\s*[:#.]?\s*(\d{2}(?:[.,]5)?)\b")
+_NUMBER = r"\$?\s*(\d+(?:[.,]\d+)?)\s*(?:usd|dolares|\$)?"
+_BETWEEN = re.compile(rf"\bentre\s+{_NUMBER}\s+y\s+{_NUMBER}")
+_MAX = re.compile(rf"(?:\bmenos\s+de|\bhasta|\bmaximo|\bmax|\bbajo|\bmenor\s+a|\bno\s+mas\s+de|<=?)\s*{_NUMBER}")
+_MIN = re.compile(rf"(?:\bmas\s+de|\bdesde|\bminimo|\bmin|\bmayor\s+a|\bsobre|>=?)\s*{_NUMBER}")
+
+
+def _color_key(word: str) -> str:
+    """Clave de color sin plural ni género (blancas → blanc, grises/gris → gri)."""
+    if len(word) > 4 and word.endswith("es") and word[-3] in "lnrsz":
+        word = word[:-2]
+    if len(word) > 3 and word.endswith("s"):
+        word = word[:-1]
+    if len(word) > 3 and word[-1] in "ao":
+        word = word[:-1]
+    return word
+
+
+@dataclass(slots=True)
+class ParsedIntent:
+    """Resultado del análisis de un mensaje.
+
+    Attributes:
+        filters (Dict[str, Any]): Filtros para `ProductService.search_products`.
+        answerable (bool): Si se puede responder con una plantilla sin la IA.
+        unknown_words (List[str]): Palabras de contenido no reconocidas.
+    """
+
+    filters: Dict[str, Any] = field(default_factory=dict)
+    answerable: bool = False
+    unknown_words: List[str] = field(default_factory=list)
+
+
+class _Vocabulary:
+    """Valores conocidos del catálogo indexados por su forma normalizada."""
+
+    def __init__(self, products: Sequence[Product]):
+        """Construye el vocabulario a partir de los productos."""
+        self.brands = {normalize(p.brand): p.brand for p in products}
+        self.categories = {normalize(p.category): p.category for p in products}
+        self.colors = {_color_key(normalize(p.color)): p.color for p in products}
+        self.sizes = {p.size for p in products}
+
+
+class IntentParser:
+    """Analizador por reglas de consultas de catálogo.
+
+    Attributes:
+        max_unknown (int): Palabras sin reconocer toleradas para responder sin IA.
+        stats (Dict[str, int]): Contadores `parsed`, `answered` y `narrowed`.
+    """
+
+    def __init__(self, max_unknown: int = 0):
+        """Configura el analizador.
+
+        Args:
+            max_unknown (int): Palabras sin reconocer toleradas para responder sin IA.
+        """
+        self.max_unknown = max_unknown
+        self.stats = {"parsed": 0, "answered": 0, "narrowed": 0}
+        self._vocab: Optional[_Vocabulary] = None
+        self._vocab_source: Optional[Sequence[Product]] = None
+
+    def _vocabulary(self, products: Sequence[Product]) -> _Vocabulary:
+        """Vocabulario del catálogo, reconstruido si cambió la lista de productos.
+
+        El snapshot del catálogo entrega la misma lista hasta que se recarga,
+        así que la identidad de la lista equivale a su versión.
+        """
+        if self._vocab is None or products is not self._vocab_source:
+            self._vocab = _Vocabulary(products)
+            self._vocab_source = products
+        return self._vocab
+
+    def parse(self, message: str, products: Sequence[Product]) -> ParsedIntent:
+        """Extrae filtros del mensaje y decide si puede responderse sin IA.
+
+        Args:
+            message (str): Mensaje del usuario.
+            products (Sequence[Product]): Catálogo (fuente del vocabulario).
+
+        Returns:
+            ParsedIntent: Filtros reconocidos y si la consulta es respondible.
+        """
+        self.stats["parsed"] += 1
+        vocab = self._vocabulary(products)
+        text = normalize(message)
+        filters: Dict[str, Any] = {}
+        consumed = set()
+
+        def take(pattern, target, key, convert):
+            nonlocal text
+            m = pattern.search(text)
+            if m:
+                values = [convert(g) for g in m.groups() if g is not None]
+                target.update(zip(key, values))
+                consumed.update(words(m.group(0)))
+                text = text[:m.start()] + " " + text[m.end():]
+
+        number = lambda g: float(g.replace(",", "."))  # noqa: E731
+        take(_BETWEEN, filters, ("min_price", "max_price"), number)
+        take(_MAX, filters, ("max_price",), number)
+        take(_MIN, filters, ("min_price",), number)
+        take(_SIZE, filters, ("size",), lambda g: g.replace(",", "."))
+        if _NEGATION.search(text):
+            return ParsedIntent()
+
+        for brand_key, brand in sorted(vocab.brands.items(), key=lambda kv: -len(kv[0])):
+            if re.search(rf"\b{re.escape(brand_key)}\b", text):
+                filters["brand"] = brand
+                consumed.update(brand_key.split())
+                text = re.sub(rf"\b{re.escape(brand_key)}\b", " ", text)
+                break
+        for phrase, category_key in sorted(CATEGORY_SYNONYMS.items(), key=lambda kv: -len(kv[0])):
+            if category_key in vocab.categories and re.search(rf"\b{re.escape(phrase)}\b", text):
+                if filters.setdefault("category", vocab.categories[category_key]) == vocab.categories[category_key]:
+                    consumed.update(phrase.split())
+
+        remaining = words(text)
+        for w in remaining:
+            if "category" not in filters and w in vocab.categories:
+                filters["category"] = vocab.categories[w]
+                consumed.add(w)
+            elif "color" not in filters and _color_key(w) in vocab.colors:
+                filters["color"] = vocab.colors[_color_key(w)]
+                consumed.add(w)
+            elif "size" not in filters and w in vocab.sizes:
+                filters["size"] = w
+                consumed.add(w)
+
+        open_ended = any(w in OPEN_ENDED_WORDS for w in remaining)
+        unknown = [w for w in remaining if w not in consumed and w not in LOOKUP_WORDS
+                   and w not in OPEN_ENDED_WORDS and not w.isdigit()]
+        answerable = bool(filters) and not open_ended and len(unknown) <= self.max_unknown
+        return ParsedIntent(filters=filters, answerable=answerable, unknown_words=unknown)
+
+
+def describe_filters(filters: Dict[str, Any]) -> str:
+    """Describe los filtros en español ("Adidas, talla 42, hasta $150")."""
+    parts = []
+    if "category" in filters:
+        parts.append(filters["category"])
+    if "brand" in filters:
+        parts.append(filters["brand"])
+    if "color" in filters:
+        parts.append(f"color {filters['color']}")
+    if "size" in filters:
+        parts.append(f"talla {filters['size']}")
+    if "min_price" in filters and "max_price" in filters:
+        parts.append(f"entre ${filters['min_price']:.0f} y ${filters['max_price']:.0f}")
+    elif "max_price" in filters:
+        parts.append(f"hasta ${filters['max_price']:.0f}")
+    elif "min_price" in filters:
+        parts.append(f"desde ${filters['min_price']:.0f}")
+    return ", ".join(parts)
+
+
+def render_answer(filters: Dict[str, Any], products: Sequence[Product], max_items: int = 8) -> str:
+    """Respuesta en plantilla para una consulta de catálogo con resultados.
+
+    Args:
+        filters (Dict[str, Any]): Filtros aplicados.
+        products (Sequence[Product]): Resultados (no vacío).
+        max_items (int): Máximo de productos listados.
+
+    Returns:
+        str: Texto para el usuario.
+    """
+    available = [p for p in products if p.is_available()]
+    desc = describe_filters(filters)
+    if not available:
+        names = ", ".join(p.name for p in products[:max_items])
+        return f"Tenemos {names} ({desc}), pero por ahora están agotados."
+    lines = [
+        f"- {p.name} ({p.brand}) | ${p.price:.2f} | Talla {p.size} | {p.color} | Stock: {p.stock}"
+        for p in sorted(available, key=lambda p: p.price)[:max_items]
+    ]
+    extra = len(available) - len(lines)
+    more = f"\n…y {extra} más." if extra > 0 else ""
+    plural = "opciones disponibles" if len(available) > 1 else "opción disponible"
+    return f"Tenemos {len(available)} {plural} ({desc}):\n" + "\n".join(lines) + more
@@ -4,12 +4,13 @@ Orquesta casos de uso sobre `IProductRepository`, aplicando validaciones
 de negocio y transformaciones desde/hacia DTOs.
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
 from src.domain.entities import Product
 from src.domain.exceptions import InvalidProductDataError, ProductNotFoundError
 from src.domain.repositories import IProductRepository
 from .dtos import ProductDTO
+from .facet_service import FacetService
 
 
 class ProductService:
@@ -20,15 +21,19 @@ class ProductService:
 
     Attributes:
         _repo (IProductRepository): Repositorio de productos inyectado.
+        _facets (FacetService | None): Facetas a mantener al escribir.
     """
 
-    def __init__(self, repo: IProductRepository):
+    def __init__(self, repo: IProductRepository, facets: Optional[FacetService] = None):
         """Inicializa el servicio con su repositorio.
 
         Args:
             repo (IProductRepository): Repositorio concreto de productos.
+            facets (FacetService | None): Facetas que se actualizan en cada
+                alta, cambio o baja.
         """
         self._repo = repo
+        self._facets = facets
 
     def get_all_products(self) -> List[Product]:
         """Retorna todos los productos registrados.
@@ -55,54 +60,41 @@ class ProductService:
             raise ProductNotFoundError(product_id)
         return prod
 
-    def search_products(self, filters: Optional[Dict[str, Any]] = None) -> List[Product]:
+    def search_products(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Sequence[Product]:
         """Busca productos según filtros simples.
 
-        Soporta filtros por:
-          - brand
-          - category
-        Otros filtros (size, color, min_price, max_price) se aplican en memoria.
+        Soporta filtros por marca, categoría, talla y color (exactos), rango
+        de precio (`min_price`, `max_price`) e `in_stock`. La evaluación
+        queda a cargo del repositorio (`IProductRepository.find`).
 
         Args:
             filters (dict | None): Diccionario de criterios de búsqueda.
+            sort (str | None): `price`, `-price`, `stock` o `-stock`.
+            limit (int | None): Máximo de resultados.
 
         Returns:
-            List[Product]: Resultados que cumplen con los filtros.
+            Sequence[Product]: Resultados que cumplen con los filtros.
         """
-        filters = filters or {}
-        brand = filters.get("brand")
-        category = filters.get("category")
-
-        # Usa los métodos del repositorio cuando existan
-        if brand and category:
-            # Intersección simple
-            by_brand = {p.id: p for p in self._repo.get_by_brand(brand)}
-            result = [p for p in self._repo.get_by_category(category) if p.id in by_brand]
-        elif brand:
-            result = self._repo.get_by_brand(brand)
-        elif category:
-            result = self._repo.get_by_category(category)
-        else:
-            result = self._repo.get_all()
-
-        # Filtros opcionales en memoria
-        size = filters.get("size")
-        color = filters.get("color")
-        min_price = filters.get("min_price")
-        max_price = filters.get("max_price")
-
-        def ok(p: Product) -> bool:
-            if size and p.size != size:
-                return False
-            if color and p.color != color:
-                return False
-            if min_price is not None and p.price < float(min_price):
-                return False
-            if max_price is not None and p.price > float(max_price):
-                return False
-            return True
-
-        return [p for p in result if ok(p)]
+        return self._repo.find(filters, sort, limit)
+
+    def search_text(self, query: str, limit: int = 20) -> List[Product]:
+        """Búsqueda de texto libre ordenada por relevancia.
+
+        Args:
+            query (str): Texto del usuario (p. ej. "amortiguación running blanco").
+            limit (int): Máximo de resultados.
+
+        Returns:
+            List[Product]: Productos coincidentes, el más relevante primero.
+        """
+        if not query.strip():
+            return []
+        return self._repo.search_text(query, limit)
 
     def create_product(self, product_dto: ProductDTO) -> Product:
         """Crea y persiste un nuevo producto a partir de un DTO.
@@ -135,7 +127,7 @@ class ProductService:
         except ValueError as e:
             raise InvalidProductDataError(str(e)) from e
 
-        return self._repo.save(prod)
+        return self._saved(self._repo.save(prod))
 
     def update_product(self, product_id: int, product_dto: ProductDTO) -> Product:
         """Actualiza un producto existente.
@@ -173,7 +165,13 @@ class ProductService:
         except ValueError as e:
             raise InvalidProductDataError(str(e)) from e
 
-        return self._repo.save(updated)
+        return self._saved(self._repo.save(updated))
+
+    def _saved(self, product: Product) -> Product:
+        """Refleja en las facetas un producto recién guardado."""
+        if self._facets is not None:
+            self._facets.upsert(product)
+        return product
 
     def delete_product(self, product_id: int) -> bool:
         """Elimina un producto por su ID.
@@ -190,12 +188,14 @@ class ProductService:
         existed = self._repo.delete(product_id)
         if not existed:
             raise ProductNotFoundError(product_id)
+        if self._facets is not None:
+            self._facets.remove(product_id)
         return True
 
-    def get_available_products(self) -> List[Product]:
+    def get_available_products(self) -> Sequence[Product]:
         """Obtiene únicamente productos con stock disponible.
 
         Returns:
-            List[Product]: Productos con `stock > 0`.
+            Sequence[Product]: Productos con `stock > 0`.
         """
-        return [p for p in self._repo.get_all() if p.is_available()]
+        return self._repo.find({"in_stock": True})
@@ -2,6 +2,10 @@
 
 Contiene las clases de negocio puras: `Product`, `ChatMessage` y `ChatContext`.
 Implementan validaciones y utilidades sin depender de frameworks externos.
+
+Las entidades usan `slots=True` (sin `__dict__` por instancia) para reducir
+memoria con catálogos e historiales grandes, y exponen `from_trusted` para
+rehidratar filas ya validadas sin repetir `__post_init__`.
 """
 
 from dataclasses import dataclass
@@ -9,7 +13,7 @@ from typing import Optional
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     """Entidad que representa un producto en el e-commerce.
 
@@ -57,6 +61,40 @@ class Product:
         if self.stock is None or self.stock < 0:
             raise ValueError("El stock no puede ser negativo.")
 
+    @classmethod
+    def from_trusted(
+        cls,
+        id: Optional[int],
+        name: str,
+        brand: str,
+        category: str,
+        size: str,
+        color: str,
+        price: float,
+        stock: int,
+        description: str = "",
+    ) -> "Product":
+        """Construye un producto a partir de datos confiables, sin validar.
+
+        Pensado para la hidratación desde la base de datos, donde las filas ya
+        cumplieron las invariantes al guardarse. No debe usarse con datos de
+        entrada del usuario.
+
+        Returns:
+            Product: Instancia creada sin ejecutar `__post_init__`.
+        """
+        self = object.__new__(cls)
+        self.id = id
+        self.name = name
+        self.brand = brand
+        self.category = category
+        self.size = size
+        self.color = color
+        self.price = price
+        self.stock = stock
+        self.description = description
+        return self
+
     def is_available(self) -> bool:
         """Indica si el producto tiene stock disponible.
 
@@ -94,7 +132,7 @@ class Product:
         self.stock += quantity
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatMessage:
     """Entidad que representa un mensaje en el chat.
 
@@ -130,6 +168,28 @@ class ChatMessage:
         if not self.session_id or not self.session_id.strip():
             raise ValueError("El session_id no puede estar vacío.")
 
+    @classmethod
+    def from_trusted(
+        cls,
+        id: Optional[int],
+        session_id: str,
+        role: str,
+        message: str,
+        timestamp: datetime,
+    ) -> "ChatMessage":
+        """Construye un mensaje a partir de datos confiables, sin validar.
+
+        Returns:
+            ChatMessage: Instancia creada sin ejecutar `__post_init__`.
+        """
+        self = object.__new__(cls)
+        self.id = id
+        self.session_id = session_id
+        self.role = role
+        self.message = message
+        self.timestamp = timestamp
+        return self
+
     def is_from_user(self) -> bool:
         """Indica si el mensaje fue enviado por el usuario.
 
@@ -147,12 +207,13 @@ class ChatMessage:
         return self.role == "assistant"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ChatContext:
     """Value Object que encapsula el contexto de una conversación.
 
     Mantiene los mensajes recientes para dar coherencia al chat y ofrece
     utilidades para formatearlos según el estilo requerido por el LLM.
+    Es inmutable (`frozen=True`), como corresponde a un Value Object.
 
     Attributes:
         messages (list[ChatMessage]): Mensajes de la conversación.
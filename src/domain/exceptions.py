@@ -48,3 +48,33 @@ class ChatServiceError(Exception):
             message (str): Descripción del problema detectado.
         """
         super().__init__(message)
+
+
+class RateLimitExceededError(Exception):
+    """Error lanzado cuando se supera un límite de uso o la espera de la cola.
+
+    Attributes:
+        retry_after (float): Segundos sugeridos antes de reintentar.
+    """
+
+    def __init__(self, message: str = "Demasiadas solicitudes", retry_after: float = 1.0):
+        """Inicializa el error con el tiempo de espera sugerido.
+
+        Args:
+            message (str): Descripción del límite superado.
+            retry_after (float): Segundos sugeridos antes de reintentar.
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(Exception):
+    """Error lanzado cuando una solicitud supera su plazo de respuesta."""
+
+    def __init__(self, message: str = "Plazo de la solicitud agotado"):
+        """Inicializa el error con un mensaje descriptivo.
+
+        Args:
+            message (str): Descripción del plazo superado.
+        """
+        super().__init__(message)
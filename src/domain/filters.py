@@ -0,0 +1,78 @@
+"""Filtros estructurados del catálogo (marca, categoría, talla, color, precio, stock).
+
+Define la semántica de `IProductRepository.find`, independiente del motor:
+los filtros de texto son coincidencias exactas (un valor vacío no filtra),
+los límites de precio son inclusivos y el orden es estable (a igual clave se
+conserva el orden del catálogo). Los motores vectorizados deben devolver
+exactamente lo mismo que `filter_products`.
+"""
+
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional
+
+from .entities import Product
+
+EXACT_FIELDS = ("brand", "category", "size", "color")
+# Claves de orden admitidas; el prefijo "-" indica orden descendente.
+SORT_FIELDS = ("price", "stock")
+
+
+def parse_sort(sort: Optional[str]):
+    """Separa `sort` en (campo, descendente).
+
+    Raises:
+        ValueError: Si el campo no está en `SORT_FIELDS`.
+    """
+    if not sort:
+        return None, False
+    field, descending = sort.lstrip("-"), sort.startswith("-")
+    if field not in SORT_FIELDS:
+        raise ValueError(f"Orden no soportado: {sort}")
+    return field, descending
+
+
+def filter_products(
+    products: Iterable[Product],
+    filters: Optional[Dict[str, Any]] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[Product]:
+    """Aplica filtros, orden y top-K recorriendo los productos uno a uno.
+
+    Args:
+        products (Iterable[Product]): Catálogo.
+        filters (dict | None): `brand`, `category`, `size`, `color` (exactos),
+            `min_price`/`max_price` (inclusivos) e `in_stock` (bool).
+        sort (str | None): `price`, `-price`, `stock` o `-stock`.
+        limit (int | None): Máximo de resultados (tras ordenar).
+
+    Returns:
+        List[Product]: Productos que cumplen, en el orden pedido.
+    """
+    filters = filters or {}
+    result = products
+    # Un recorrido por filtro sobre lo que dejó el anterior, con acceso
+    # directo al atributo (más rápido que `getattr` por producto).
+    brand, category, size, color = (filters.get(f) for f in EXACT_FIELDS)
+    if brand:
+        result = [p for p in result if p.brand == brand]
+    if category:
+        result = [p for p in result if p.category == category]
+    if size:
+        result = [p for p in result if p.size == size]
+    if color:
+        result = [p for p in result if p.color == color]
+    if filters.get("min_price") is not None:
+        low = float(filters["min_price"])
+        result = [p for p in result if p.price >= low]
+    if filters.get("max_price") is not None:
+        high = float(filters["max_price"])
+        result = [p for p in result if p.price <= high]
+    if filters.get("in_stock"):
+        result = [p for p in result if p.stock > 0]
+    result = list(result) if result is products else result
+
+    field, descending = parse_sort(sort)
+    if field:
+        result.sort(key=attrgetter(field), reverse=descending)
+    return result[:limit] if limit is not None else result
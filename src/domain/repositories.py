@@ -6,8 +6,10 @@ en la capa de infraestructura.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 from .entities import Product, ChatMessage
+from .filters import filter_products
+from .search import rank_products
 
 
 class IProductRepository(ABC):
@@ -85,6 +87,45 @@ class IProductRepository(ABC):
         """
         raise NotImplementedError
 
+    def search_text(self, query: str, limit: int = 20) -> List[Product]:
+        """Búsqueda de texto libre en nombre, marca, categoría, color y descripción.
+
+        Insensible a mayúsculas y tildes, ordenada por relevancia. La
+        implementación por defecto recorre `get_all`; los repositorios con
+        índice de texto completo deben sobrescribirla.
+
+        Args:
+            query (str): Texto de búsqueda (p. ej. "amortiguación running blanco").
+            limit (int): Máximo de resultados.
+
+        Returns:
+            List[Product]: Productos coincidentes, el más relevante primero.
+        """
+        return rank_products(self.get_all(), query, limit)
+
+    def find(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Sequence[Product]:
+        """Productos que cumplen filtros estructurados, ordenados y acotados.
+
+        La implementación por defecto recorre `get_all` (ver
+        `filters.filter_products`, que define la semántica); los repositorios
+        con un motor en columnas deben sobrescribirla.
+
+        Args:
+            filters (dict | None): `brand`, `category`, `size`, `color`,
+                `min_price`, `max_price` e `in_stock`.
+            sort (str | None): `price`, `-price`, `stock` o `-stock`.
+            limit (int | None): Máximo de resultados.
+
+        Returns:
+            Sequence[Product]: Productos en el orden pedido.
+        """
+        return filter_products(self.get_all(), filters, sort, limit)
+
 
 class IChatRepository(ABC):
     """Contrato para gestionar el historial de conversaciones (memoria)."""
@@ -101,6 +142,20 @@ class IChatRepository(ABC):
         """
         raise NotImplementedError
 
+    def save_messages(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        """Persiste varios mensajes en orden.
+
+        La implementación por defecto delega en `save_message`; los
+        repositorios concretos pueden sobrescribirla con una inserción por lotes.
+
+        Args:
+            messages (List[ChatMessage]): Mensajes a guardar, en orden cronológico.
+
+        Returns:
+            List[ChatMessage]: Mensajes persistidos (con ID, si aplica).
+        """
+        return [self.save_message(m) for m in messages]
+
     @abstractmethod
     def get_session_history(self, session_id: str, limit: Optional[int] = None) -> List[ChatMessage]:
         """Obtiene el historial de una sesión.
@@ -0,0 +1,113 @@
+"""Normalización de texto y ranking de búsqueda libre sobre productos.
+
+Define las reglas de la búsqueda de texto del catálogo, independientes del
+motor: minúsculas, sin tildes (``amortiguación`` = ``amortiguacion``),
+plurales simples recortados (``blancos`` → ``blanco``) y coincidencia por
+prefijo de término. Las implementaciones con índice (FTS5) usan las mismas
+reglas para construir su consulta.
+"""
+
+import re
+import unicodedata
+from typing import Iterable, List, Tuple
+
+from .entities import Product
+
+_WORD = re.compile(r"\w+")
+
+# Peso de cada campo en el ranking (mismo orden que el índice FTS).
+FIELD_WEIGHTS: Tuple[Tuple[str, float], ...] = (
+    ("name", 10.0),
+    ("brand", 6.0),
+    ("category", 4.0),
+    ("color", 3.0),
+    ("description", 1.0),
+)
+
+MAX_TERMS = 8
+
+# Palabras vacías: no aportan al ranking y harían fallar la búsqueda con AND.
+STOPWORDS = frozenset(
+    "a al con de del el en la las lo los o para por que se sin su un una unos unas y".split()
+)
+
+
+def normalize(text: str) -> str:
+    """Pasa a minúsculas y elimina diacríticos.
+
+    Args:
+        text (str): Texto original.
+
+    Returns:
+        str: Texto normalizado.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def words(text: str) -> List[str]:
+    """Palabras normalizadas del texto, sin palabras vacías.
+
+    Args:
+        text (str): Texto original.
+
+    Returns:
+        List[str]: Palabras en minúsculas y sin tildes, en orden.
+    """
+    return [w for w in _WORD.findall(normalize(text)) if w not in STOPWORDS]
+
+
+def _stem(term: str) -> str:
+    """Recorta plurales simples del español (``-es``/``-s``)."""
+    if len(term) > 4 and term.endswith("es") and term[-3] not in "aeiou":
+        return term[:-2]
+    if len(term) > 3 and term.endswith("s"):
+        return term[:-1]
+    return term
+
+
+def query_terms(query: str) -> List[str]:
+    """Extrae los términos de búsqueda de una consulta libre.
+
+    Args:
+        query (str): Texto escrito por el usuario.
+
+    Returns:
+        List[str]: Hasta `MAX_TERMS` raíces únicas, normalizadas, en orden
+        (sin palabras vacías).
+    """
+    terms: List[str] = []
+    for word in words(query):
+        stem = _stem(word)
+        if stem not in terms:
+            terms.append(stem)
+    return terms[:MAX_TERMS]
+
+
+def rank_products(products: Iterable[Product], query: str, limit: int = 20) -> List[Product]:
+    """Ranking en memoria (sin índice) con las mismas reglas que la búsqueda FTS.
+
+    Cada término que aparece como prefijo de una palabra de un campo suma el
+    peso de ese campo; gana el producto con más puntaje (empate: por ID).
+
+    Args:
+        products (Iterable[Product]): Productos candidatos.
+        query (str): Consulta libre.
+        limit (int): Máximo de resultados.
+
+    Returns:
+        List[Product]: Productos con al menos una coincidencia, mejor primero.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+    scored = []
+    for p in products:
+        score = 0.0
+        for field, weight in FIELD_WEIGHTS:
+            words = _WORD.findall(normalize(getattr(p, field) or ""))
+            score += weight * sum(1 for t in terms if any(w.startswith(t) for w in words))
+        if score:
+            scored.append((-score, p.id or 0, p))
+    scored.sort(key=lambda s: s[:2])
+    return [p for _, _, p in scored[:limit]]
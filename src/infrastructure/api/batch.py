@@ -0,0 +1,69 @@
+"""
+Procesamiento de chat por lotes desde la línea de comandos.
+
+Uso:
+    python -m src.infrastructure.api.batch [ENTRADA.jsonl] [--concurrency N] > salida.ndjson
+
+Lee un `{"session_id": ..., "message": ...}` por línea (de un archivo o de
+stdin) y escribe en stdout los resultados NDJSON de `POST /chat/batch`, sin
+levantar el servidor HTTP. Usa la misma configuración y el mismo lifespan que
+la API (BD, catálogo, cliente del modelo y cola write-behind).
+"""
+
+import argparse
+import asyncio
+import sys
+
+import orjson
+
+from src.application.dtos import ChatBatchRequestDTO, ChatMessageRequestDTO
+from src.infrastructure.api import main
+from src.infrastructure.db.database import SessionLocal
+from src.infrastructure.llm_providers.admission import BATCH
+
+
+def read_requests(lines) -> list:
+    """Convierte líneas JSON (ignorando las vacías) en DTOs de mensaje."""
+    return [ChatMessageRequestDTO(**orjson.loads(line)) for line in lines if line.strip()]
+
+
+async def run(requests: list, concurrency: int, out=None) -> int:
+    """Procesa el lote y escribe cada resultado en `out` apenas termina.
+
+    Returns:
+        int: Cantidad de mensajes que fallaron.
+    """
+    out = out or sys.stdout.buffer
+    failed = 0
+    async with main.lifespan(main.app):
+        db = SessionLocal()
+        try:
+            batch = ChatBatchRequestDTO(messages=requests, concurrency=concurrency)
+            service = main._chat_service(db, client="cli", priority=BATCH)
+            async for line in main.ndjson_results(service, batch):
+                failed += "error" in orjson.loads(line)
+                out.write(line)
+                out.flush()
+        finally:
+            db.close()
+    return failed
+
+
+def cli() -> None:
+    """Punto de entrada de `python -m src.infrastructure.api.batch`."""
+    parser = argparse.ArgumentParser(description="Procesa un lote de mensajes de chat (JSONL → NDJSON).")
+    parser.add_argument("input", nargs="?", help="Archivo JSONL (por defecto, stdin)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Respuestas en curso a la vez (1–32)")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, "rb") as f:
+            requests = read_requests(f)
+    else:
+        requests = read_requests(sys.stdin.buffer)
+    failed = asyncio.run(run(requests, args.concurrency))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,159 @@
+"""
+Formatos de respuesta de los endpoints de listas (`/products`,
+`/chat/history/{session_id}`), elegidos por la cabecera `Accept`:
+
+- `application/json` (por defecto): lista de objetos, el contrato de siempre.
+- `application/vnd.columnar+json`: las mismas filas por columnas,
+  `{"count": n, "columns": {"id": [...], "name": [...], ...}}`; cada nombre
+  de campo aparece una vez en lugar de una vez por fila.
+- `application/msgpack`: el documento columnar en MessagePack. Solo se ofrece
+  si está instalado `msgpack`; si no, la negociación cae a JSON.
+
+Las fechas se codifican como texto ISO 8601 en los tres formatos. Las listas
+de más de `STREAM_MIN_ROWS` filas se envían en streaming por bloques (filas
+en JSON, columnas en los formatos compactos), de modo que ni el cuerpo
+completo ni su versión comprimida se arman en memoria.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Type
+
+import orjson
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+
+from src.application.dtos import field_values, to_payload
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependencia opcional
+    msgpack = None
+
+JSON = "application/json"
+COLUMNAR = "application/vnd.columnar+json"
+MSGPACK = "application/msgpack"
+
+# Filas a partir de las cuales la respuesta se envía en streaming.
+STREAM_MIN_ROWS = 1000
+_CHUNK_ROWS = 1000
+
+_ALIASES = {"application/x-msgpack": MSGPACK}
+
+
+def available_formats() -> List[str]:
+    """Formatos que este proceso puede producir (JSON primero)."""
+    return [JSON, COLUMNAR] + ([MSGPACK] if msgpack is not None else [])
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Elige el formato de respuesta según la cabecera `Accept`.
+
+    Gana el tipo soportado con mayor `q` (a igual `q`, el primero de la
+    cabecera); los comodines (`*/*`, `application/*`) y lo no soportado
+    resuelven a JSON, que nunca se rechaza con 406.
+
+    Args:
+        accept (Optional[str]): Valor de la cabecera `Accept`.
+
+    Returns:
+        str: Uno de `JSON`, `COLUMNAR` o `MSGPACK`.
+    """
+    if not accept:
+        return JSON
+    supported = available_formats()
+    best, best_q = JSON, 0.0
+    for part in accept.split(","):
+        media, _, params = part.partition(";")
+        media = media.strip().lower()
+        media = _ALIASES.get(media, media)
+        if media not in supported:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = media, q
+    return best
+
+
+def _columns(dto_cls: Type[BaseModel], items: Sequence[Any]) -> Dict[str, list]:
+    """Una lista de valores por campo, leída directo de las entidades."""
+    return {f: field_values(dto_cls, items, f) for f in dto_cls.model_fields}
+
+
+def _msgpack_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable en MessagePack: {type(value).__name__}")
+
+
+def encode_chunks(media_type: str, dto_cls: Type[BaseModel], items: Sequence[Any]) -> Iterator[bytes]:
+    """Codifica `items` en `media_type` por bloques.
+
+    JSON emite bloques de `_CHUNK_ROWS` filas; los formatos columnares, una
+    columna por bloque. La concatenación es el documento completo.
+
+    Args:
+        media_type (str): `JSON`, `COLUMNAR` o `MSGPACK`.
+        dto_cls (Type[BaseModel]): DTO cuyos campos se exponen.
+        items (Sequence[Any]): Entidades de dominio.
+
+    Yields:
+        bytes: Trozos del cuerpo.
+    """
+    fields = tuple(dto_cls.model_fields)
+    if media_type == JSON:
+        yield b"["
+        for start in range(0, len(items), _CHUNK_ROWS):
+            chunk = orjson.dumps(to_payload(dto_cls, items[start:start + _CHUNK_ROWS]))[1:-1]
+            yield chunk if start == 0 else b"," + chunk
+        yield b"]"
+    elif media_type == COLUMNAR:
+        yield b'{"count":%d,"columns":{' % len(items)
+        for i, f in enumerate(fields):
+            column = orjson.dumps({f: field_values(dto_cls, items, f)})[1:-1]
+            yield column if i == 0 else b"," + column
+        yield b"}}"
+    elif media_type == MSGPACK:
+        packer = msgpack.Packer(default=_msgpack_default)
+        yield (packer.pack_map_header(2) + packer.pack("count") + packer.pack(len(items))
+               + packer.pack("columns") + packer.pack_map_header(len(fields)))
+        for f in fields:
+            yield packer.pack(f) + packer.pack(field_values(dto_cls, items, f))
+    else:
+        raise ValueError(f"Formato no soportado: {media_type}")
+
+
+def encode(media_type: str, dto_cls: Type[BaseModel], items: Sequence[Any]) -> bytes:
+    """Documento completo en `media_type` (ver `encode_chunks`)."""
+    if media_type == JSON:
+        return orjson.dumps(to_payload(dto_cls, items))
+    if media_type == COLUMNAR:
+        return orjson.dumps({"count": len(items), "columns": _columns(dto_cls, items)})
+    return b"".join(encode_chunks(media_type, dto_cls, items))
+
+
+def list_response(accept: Optional[str], dto_cls: Type[BaseModel], items: Sequence[Any],
+                  headers: Optional[Dict[str, str]] = None) -> Response:
+    """Respuesta de una lista en el formato negociado.
+
+    Args:
+        accept (Optional[str]): Cabecera `Accept` del request.
+        dto_cls (Type[BaseModel]): DTO cuyos campos se exponen.
+        items (Sequence[Any]): Entidades ya validadas (no se re-validan).
+        headers (Optional[Dict[str, str]]): Cabeceras extra (p. ej. `ETag`).
+
+    Returns:
+        Response: Cuerpo completo, o `StreamingResponse` si hay más de
+        `STREAM_MIN_ROWS` filas. Siempre con `Vary: Accept`.
+    """
+    media_type = negotiate(accept)
+    headers = {**(headers or {}), "Vary": "Accept"}
+    if len(items) > STREAM_MIN_ROWS:
+        return StreamingResponse(encode_chunks(media_type, dto_cls, items), media_type=media_type, headers=headers)
+    return Response(encode(media_type, dto_cls, items), media_type=media_type, headers=headers)
@@ -1,36 +1,456 @@
 """
 Aplicación FastAPI con endpoints:
-- GET /, /health
-- GET /products, GET /products/{id}
-- POST /chat, GET/DELETE /chat/history/{session_id}
+- GET /, /health, /metrics
+- GET /products, GET /products/search?q=, GET /products/facets, GET /products/{id}
+- POST /chat, POST /chat/batch (NDJSON), GET/DELETE /chat/history/{session_id}
 """
 
+import asyncio
+import logging
+import math
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime
-from typing import List
-from fastapi import FastAPI, Depends, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from typing import List, Optional
 
-from src.infrastructure.db.database import get_session as get_db, init_db
+import orjson
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session, configure_mappers
+
+from src.infrastructure.config import get_settings
+from src.infrastructure.api.formats import list_response
+from src.infrastructure.api.middleware import CompressionMiddleware, QueryStatsMiddleware
+from src.infrastructure.profiling import PROFILE_MODES, Capture, RequestProfiler, Timed
+from src.infrastructure.db.database import SessionLocal, get_session as get_db, init_db, replicas
+from src.infrastructure.db.shards import ChatShards
+from src.infrastructure.events.changes import ChangeBus, latest_version, load_changes
+from src.infrastructure.events.facet_updates import FacetUpdater
+from src.infrastructure.events.transports import create_transport
 from src.infrastructure.repositories.product_repository import SQLProductRepository
 from src.infrastructure.repositories.chat_repository import SQLChatRepository
+from src.infrastructure.repositories.chat_archive import ArchiveMisses, ArchivedChatRepository
+from src.infrastructure.repositories.sharded_chat import ShardedChatRepository
+from src.infrastructure.repositories.write_behind import ChatWriteBehindQueue, WriteBehindChatRepository
+from src.infrastructure.cache.backends import FileBackend, create_backend
+from src.infrastructure.cache.catalog import CatalogSnapshot, SnapshotProductRepository
+from src.infrastructure.cache.idempotency import IdempotencyKeyConflictError, IdempotencyStore
+from src.infrastructure.cache.session_window import (
+    CachedChatRepository,
+    SessionWindowCache,
+    SharedSessionWindowCache,
+)
 from src.infrastructure.llm_providers.gemini_service import GeminiService
+from src.infrastructure.llm_providers.fake_service import FakeLLMService
+from src.infrastructure.llm_providers.journal import LLMJournal, RecordingLLMService, ReplayLLMService
+from src.infrastructure.llm_providers.admission import BATCH, INTERACTIVE, AdmissionController, AdmittedLLMService
 
 from src.application.dtos import (
     ProductDTO,
+    ChatBatchRequestDTO,
     ChatMessageRequestDTO,
     ChatMessageResponseDTO,
     ChatHistoryDTO,
+    to_payload,
 )
 from src.application.product_service import ProductService
+from src.application.facet_service import FacetService
 from src.application.chat_service import ChatService
-from src.domain.exceptions import ProductNotFoundError, ChatServiceError
+from src.application.deadline import Deadline
+from src.application.intent_parser import IntentParser
+from src.domain.exceptions import (
+    ChatServiceError,
+    DeadlineExceededError,
+    ProductNotFoundError,
+    RateLimitExceededError,
+)
+from src.domain.repositories import IChatRepository, IProductRepository
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+# Ventanas recientes de chat: en el proceso con un solo worker, o compartidas
+# entre workers/nodos si CACHE_URL apunta a un backend (file:///...,
+# redis://...). El perfil de producción (`server.py`) fija un backend de
+# archivos si arranca varios workers sin CACHE_URL.
+window_cache = (
+    SharedSessionWindowCache(create_backend(settings.cache_url), window=6)
+    if settings.cache_url else SessionWindowCache(window=6)
+)
+
+# Con CACHE_URL, las marcas de lee-lo-que-escribiste de las réplicas se
+# comparten: otro worker tampoco lee de una réplica atrasada la sesión escrita.
+if replicas is not None and isinstance(window_cache, SharedSessionWindowCache):
+    replicas.backend = window_cache.backend
+
+
+# Sesiones activas ya vistas sin historial archivado: un fallo de la caché de
+# ventanas no vuelve a consultar `chat_archive` para ellas.
+archive_misses = ArchiveMisses(settings.chat_archive_after_days)
+
+# Historial de chat particionado por sesión en varios archivos (CHAT_SHARDS=N).
+chat_shards = ChatShards(settings.chat_shard_dir, settings.chat_shards) if settings.chat_shards else None
+
+
+@contextmanager
+def _batch_chat_repo():
+    """Repositorio de chat con sesión propia para el worker write-behind."""
+    if chat_shards is not None:
+        yield CachedChatRepository(ShardedChatRepository(chat_shards), window_cache)
+        return
+    db = SessionLocal()
+    try:
+        yield CachedChatRepository(SQLChatRepository(db, replicas), window_cache)
+    finally:
+        db.close()
+
+
+# Persistencia diferida del historial (opcional): CHAT_WRITE_BEHIND=1 y,
+# para sobrevivir a caídas, CHAT_WRITE_JOURNAL=<ruta del journal>.
+write_queue = (
+    ChatWriteBehindQueue(_batch_chat_repo, journal_path=settings.chat_write_journal)
+    if settings.chat_write_behind else None
+)
+
+
+# Catálogo en memoria del worker; se precarga en el lifespan. Con
+# CATALOG_COLUMNAR=1 los filtros de productos se evalúan sobre columnas NumPy.
+catalog = CatalogSnapshot(max_age=settings.catalog_max_age, columnar=settings.catalog_columnar)
+
+
+def _changes_since(version: int):
+    """Cambios del catálogo posteriores a `version`, leídos de la base principal."""
+    db = SessionLocal()
+    try:
+        return load_changes(db, version)
+    finally:
+        db.close()
+
+
+# Cambios del catálogo hechos por cualquier worker o proceso (registro
+# `catalog_changes`): invalidan el snapshot y, con él, facetas y ETag.
+# CATALOG_EVENTS_URL avisa al resto de workers al instante; el sondeo cada
+# CATALOG_POLL_INTERVAL segundos es el respaldo.
+catalog_events = ChangeBus(create_transport(settings.catalog_events_url), source=_changes_since)
+catalog_events.subscribe(lambda change: catalog.invalidate())
+
+# Facetas del catálogo (conteos por marca, categoría, talla, color y precio).
+# Se cargan en el lifespan; las escrituras de `ProductService` y los cambios
+# del bus (de cualquier worker) las actualizan de forma incremental, y solo
+# una carga masiva las recalcula, en el hilo del actualizador.
+facets = FacetService()
+
+
+def _products_from_primary(product_ids):
+    """Productos con esos IDs, leídos de la base principal."""
+    db = SessionLocal()
+    try:
+        return SQLProductRepository(db).get_by_ids_from_primary(product_ids)
+    finally:
+        db.close()
+
+
+def _catalog_from_primary():
+    """Catálogo completo desde el snapshot (recargado de la principal si hace falta)."""
+    db = SessionLocal()
+    try:
+        return catalog.products(SQLProductRepository(db).get_all_from_primary)
+    finally:
+        db.close()
+
+
+facet_updates = FacetUpdater(facets, _products_from_primary, _catalog_from_primary)
+catalog_events.subscribe(facet_updates)
+
+# Índice vectorial opcional (VECTOR_INDEX_PATH) para elegir los productos
+# del prompt; NumPy solo se importa si está activado.
+vector_index = None
+if settings.vector_index_path:
+    from src.infrastructure.vector.embeddings import create_embedder
+    from src.infrastructure.vector.index import ProductVectorIndex
+
+    vector_index = ProductVectorIndex(settings.vector_index_path, create_embedder(settings.embedding_model))
+
+# Analizador de consultas de catálogo (CHAT_INTENTS): responde las simples sin
+# llamar al modelo; sus contadores se comparten entre requests del worker.
+intent_parser = IntentParser() if settings.chat_intents else None
+
+# Límites de frecuencia por sesión/cliente y de llamadas simultáneas al modelo
+# (cola justa con espera acotada); ver `GET /metrics`. Con CACHE_URL los
+# límites de frecuencia se cuentan en el backend compartido (globales); la
+# concurrencia al modelo es por worker.
+admission = AdmissionController(
+    max_concurrent=settings.llm_max_concurrency,
+    max_wait=settings.llm_queue_timeout,
+    session_rate=settings.session_rate_per_min / 60,
+    client_rate=settings.client_rate_per_min / 60,
+    backend=window_cache.backend if isinstance(window_cache, SharedSessionWindowCache) else None,
+)
+
+# Respuestas de /chat por `Idempotency-Key`: los reintentos del cliente no
+# repiten la llamada al modelo ni escriben el intercambio dos veces. Con
+# CACHE_URL las claves se comparten entre workers (el reintento puede llegar a
+# cualquiera); el marcador de ejecución dura el plazo de /chat más un margen.
+idempotency = IdempotencyStore(
+    ttl=settings.idempotency_ttl,
+    max_entries=settings.idempotency_max_keys,
+    backend=window_cache.backend if isinstance(window_cache, SharedSessionWindowCache) else None,
+    encode=lambda response: response.model_dump_json().encode(),
+    decode=ChatMessageResponseDTO.model_validate_json,
+    lease=(settings.chat_request_timeout or 300.0) + 30.0,
+)
+
+# Perfilado a demanda de /chat (PROFILE_TOKEN); sin token no hace nada.
+profiler = RequestProfiler(settings.profile_token, settings.profile_dir,
+                           interval=settings.profile_interval, mode=settings.profile_mode)
+
+# Cliente del modelo creado una sola vez por worker (ver `lifespan`).
+ai_service = None
+
+# Grabación de las llamadas al modelo (LLM_JOURNAL), para reproducirlas offline.
+llm_journal = LLMJournal(settings.llm_journal) if settings.llm_journal else None
+
+
+def _build_ai_service():
+    """Crea el proveedor de IA según `LLM_PROVIDER` (`gemini` por defecto, `fake` o `replay`)."""
+    if settings.llm_provider == "fake":
+        return FakeLLMService(latency=settings.fake_llm_latency)
+    if settings.llm_provider == "replay":
+        return ReplayLLMService.load(settings.llm_replay_journal, time_scale=settings.llm_replay_time_scale)
+    return GeminiService()
+
+
+def _product_repo(db: Session) -> IProductRepository:
+    """Repositorio de productos servido desde el snapshot del catálogo.
+
+    Con índice vectorial, las escrituras también actualizan los embeddings.
+    """
+    sql = SQLProductRepository(db, replicas, catalog_events)
+    repo = SnapshotProductRepository(sql, catalog, loader=sql.get_all_from_primary)
+    if vector_index is not None:
+        from src.infrastructure.vector.index import IndexedProductRepository
+
+        return IndexedProductRepository(repo, vector_index)
+    return repo
+
+
+async def _purge_window_files(interval: float) -> None:
+    """Borra cada `interval` segundos las ventanas expiradas de un `FileBackend`."""
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(window_cache.backend.purge_expired)
+
+
+async def _poll_catalog_changes(interval: float) -> None:
+    """Sondea el registro de cambios del catálogo cada `interval` segundos."""
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(catalog_events.poll)
+
+
+def _product_service(db: Session) -> ProductService:
+    """Servicio de productos que mantiene las facetas al escribir."""
+    return ProductService(_product_repo(db), facets=facets)
+
+
+def _chat_service(db: Session, client: str = "anon", priority: int = INTERACTIVE,
+                  capture: Optional[Capture] = None, session: Optional[str] = None) -> ChatService:
+    """Servicio de chat con las dependencias compartidas del worker.
+
+    Las llamadas al modelo pasan por el control de admisión atribuidas a
+    `client` con la prioridad indicada. Con `LLM_JOURNAL`, se graban
+    atribuidas a `session` (sin contar la espera de admisión). Si el request
+    se perfila (`capture`), cada llamada a los repositorios y al modelo es un span.
+    """
+    model = ai_service or _build_ai_service()
+    if llm_journal is not None:
+        model = RecordingLLMService(model, llm_journal, session)
+    ai = AdmittedLLMService(model, admission, client=client, priority=priority)
+    products, chats = _product_repo(db), _chat_repo(db)
+    if capture is not None:
+        products = Timed(products, capture, "products")
+        chats = Timed(chats, capture, "chat")
+        ai = Timed(ai, capture, "llm")
+    return ChatService(
+        products, chats, ai,
+        write_queue=write_queue, retriever=vector_index, intent_parser=intent_parser,
+    )
+
+
+def _client_id(http: Request) -> str:
+    """Cliente al que se atribuyen los límites (IP de origen)."""
+    return http.client.host if http.client else "anon"
+
+
+# Resultado de las solicitudes a /chat en este worker (ver `GET /metrics`).
+chat_outcomes = {"completed": 0, "cancelled": 0, "timed_out": 0}
+
+
+def _request_deadline(http: Request) -> Deadline:
+    """Plazo de la solicitud: `X-Request-Timeout` (s) acotado por `CHAT_REQUEST_TIMEOUT`."""
+    limit = settings.chat_request_timeout or None
+    try:
+        asked = float(http.headers.get("x-request-timeout", ""))
+    except ValueError:
+        asked = None
+    if asked and asked > 0:
+        limit = min(asked, limit) if limit else asked
+    return Deadline(limit)
+
+
+async def _until_disconnect(http: Request, work, deadline: Deadline):
+    """Ejecuta `work` y lo cancela si el cliente se desconecta antes.
+
+    Returns:
+        El resultado de `work`, o None si el cliente se desconectó.
+    """
+    async def disconnected():
+        while (await http.receive())["type"] != "http.disconnect":
+            pass
+
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(disconnected())
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+    if task.done():
+        return task.result()
+    deadline.cancel()
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    return None
+
+
+# Longitud máxima aceptada para `Idempotency-Key`.
+MAX_IDEMPOTENCY_KEY = 255
+
+
+def _idempotency_key(http: Request, client: str) -> Optional[str]:
+    """Clave de idempotencia del request, acotada al cliente (None si no hay cabecera).
+
+    Raises:
+        HTTPException(400): si la clave supera `MAX_IDEMPOTENCY_KEY` caracteres.
+    """
+    key = http.headers.get("idempotency-key", "").strip()
+    if not key:
+        return None
+    if len(key) > MAX_IDEMPOTENCY_KEY:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key supera {MAX_IDEMPOTENCY_KEY} caracteres")
+    return f"{client}\x00{key}"
+
+
+def _too_many_requests(e: RateLimitExceededError) -> HTTPException:
+    """429 con `Retry-After` en segundos enteros."""
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+
+
+async def ndjson_results(service: ChatService, batch: ChatBatchRequestDTO):
+    """Resultados de un lote como líneas NDJSON, a medida que terminan.
+
+    Cada línea lleva el `index` del mensaje en el lote; los errores se
+    informan en la línea del mensaje (`error`) sin cortar el resto del lote.
+    """
+    async for index, result in service.process_batch(batch.messages, batch.concurrency):
+        if isinstance(result, Exception):
+            logger.warning("Lote de chat: mensaje %d falló: %s", index, result)
+            line = {"index": index, "session_id": batch.messages[index].session_id, "error": str(result)}
+        else:
+            line = {"index": index, **result.model_dump()}
+        yield orjson.dumps(line) + b"\n"
+
+
+def _archived_shard_repo(db: Session) -> IChatRepository:
+    """Repositorio de un shard del historial: tabla caliente + archivo."""
+    return ArchivedChatRepository(SQLChatRepository(db), db, archive_misses)
+
+
+def _chat_repo(db: Session) -> IChatRepository:
+    """Repositorio de chat: caché de ventanas, historial archivado y, si aplica, pendientes en cola."""
+    history = (
+        ShardedChatRepository(chat_shards, _archived_shard_repo) if chat_shards is not None
+        else ArchivedChatRepository(SQLChatRepository(db, replicas), db, archive_misses)
+    )
+    repo = CachedChatRepository(history, window_cache)
+    return WriteBehindChatRepository(repo, write_queue) if write_queue is not None else repo
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida de la aplicación.
+
+    - Inicio: inicializa la base de datos, configura los mappers, precarga
+      el catálogo (y sincroniza el índice vectorial, si está activado) y el
+      cliente del modelo y arranca la cola write-behind,
+      de modo que el worker está listo antes de aceptar tráfico.
+    - Cambios del catálogo: empieza a escuchar el transporte y a sondear el
+      registro desde la versión vigente al cargar el catálogo.
+    - Apagado: vacía la cola para no perder mensajes encolados y cierra el
+      journal de llamadas al modelo.
+    """
+    global ai_service
+    init_db()
+    if chat_shards is not None:
+        chat_shards.init()
+    configure_mappers()
+    db = SessionLocal()
+    try:
+        if chat_shards is not None and db.execute(text("SELECT 1 FROM chat_memory LIMIT 1")).first():
+            logger.warning("CHAT_SHARDS está activo pero chat_memory de la base principal tiene mensajes "
+                           "que no se leerán; muévalos con: python -m src.infrastructure.db.shards --migrate")
+        # La versión se lee antes de cargar: un cambio intermedio se vuelve a
+        # entregar (e invalida) en vez de perderse.
+        catalog_events.start(latest_version(db))
+        products = catalog.load(SQLProductRepository(db).get_all_from_primary)
+    finally:
+        db.close()
+    poller = (
+        asyncio.create_task(_poll_catalog_changes(settings.catalog_poll_interval))
+        if settings.catalog_poll_interval > 0 else None
+    )
+    purger = (
+        asyncio.create_task(_purge_window_files(window_cache.ttl))
+        if isinstance(window_cache, SharedSessionWindowCache) and isinstance(window_cache.backend, FileBackend)
+        and window_cache.ttl else None
+    )
+    facet_updates.rebuild(products)
+    facet_updates.start()
+    if vector_index is not None:
+        vector_index.sync(products)
+    try:
+        ai_service = _build_ai_service()
+    except RuntimeError as e:
+        logger.warning("Proveedor de IA no disponible al iniciar: %s", e)
+    if write_queue is not None:
+        await write_queue.start()
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        for task in (poller, purger):
+            if task is not None:
+                task.cancel()
+        catalog_events.close()
+        facet_updates.close()
+        if write_queue is not None:
+            await write_queue.stop()
+        if llm_journal is not None:
+            llm_journal.close()
 
 
 app = FastAPI(
     title="E-commerce Chat AI",
     description="API de e-commerce de zapatos con chat inteligente (Gemini).",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # CORS básico en desarrollo (ajusta orígenes si lo necesitas)
@@ -42,16 +462,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Sentencias SQL por request (cabeceras X-DB-Queries / X-DB-Time-Ms).
+app.add_middleware(QueryStatsMiddleware, warn_over=settings.query_count_warn)
 
-@app.on_event("startup")
-def on_startup():
-    """
-    Evento de inicio de la aplicación.
-
-    - Inicializa la base de datos (crea tablas si no existen).
-    - Deja la app lista para atender requests.
-    """
-    init_db()
+# Compresión negociada (Accept-Encoding), la capa más externa.
+if settings.compress_min_bytes > 0:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compress_min_bytes)
 
 
 @app.get("/", summary="Información básica de la API", tags=["Meta"])
@@ -69,7 +485,10 @@ def root_info():
         "name": "E-commerce Chat AI",
         "version": "1.0.0",
         "docs": "/docs",
-        "endpoints": ["/products", "/products/{id}", "/chat", "/chat/history/{session_id}", "/health"],
+        "endpoints": [
+            "/products", "/products/search", "/products/{id}", "/chat", "/chat/batch",
+            "/chat/history/{session_id}", "/health", "/metrics",
+        ],
         "timestamp": datetime.utcnow().isoformat(),
     }
 
@@ -80,25 +499,125 @@ def health():
     Verifica el estado de la API.
 
     Returns:
-        dict: {"status": "ok", "timestamp": "..."}
+        dict: {"status": "ok", "ready": <lifespan completado>, "timestamp": "..."}
     """
-    return {"status": "ok", "timestamp": datetime.utcnow().isoformat()}
+    return {
+        "status": "ok",
+        "ready": getattr(app.state, "ready", False),
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+@app.get("/metrics", summary="Métricas del worker", tags=["Meta"])
+def metrics():
+    """
+    Métricas en proceso del worker que atiende el request.
+
+    Returns:
+        dict: `admission` (cupos en uso, profundidad de la cola, esperas en ms
+        y rechazos), `intents` (respuestas sin IA), `chat` (completadas,
+        canceladas por desconexión y con plazo agotado), `write_behind_depth` y
+        `replicas` (lecturas por réplica y su salud), `idempotency` (respuestas
+        guardadas, en curso y duplicados repetidos o en espera),
+        `catalog_events` (versión del catálogo y cambios recibidos),
+        `facets` (productos aplicados, recálculos y cambios en espera),
+        `llm_journal` (llamadas grabadas) y `llm_replay` (respuestas desde el
+        journal por prompt, por mensaje y sin respuesta).
+    """
+    return {
+        "admission": admission.stats(),
+        "intents": dict(intent_parser.stats) if intent_parser is not None else None,
+        "chat": dict(chat_outcomes),
+        "write_behind_depth": write_queue.depth if write_queue is not None else None,
+        "replicas": replicas.stats() if replicas is not None else None,
+        "idempotency": idempotency.stats(),
+        "catalog_events": catalog_events.stats(),
+        "facets": facet_updates.stats(),
+        "llm_journal": {"recorded": llm_journal.recorded} if llm_journal is not None else None,
+        "llm_replay": ai_service.stats() if isinstance(ai_service, ReplayLLMService) else None,
+    }
 
 
 @app.get("/products", response_model=List[ProductDTO], summary="Lista todos los productos", tags=["Products"])
-def list_products(db: Session = Depends(get_db)):
+def list_products(http: Request, db: Session = Depends(get_db)):
     """
     Lista todos los productos registrados (incluye sin stock).
 
+    La respuesta lleva un `ETag` con la versión del catálogo; con
+    `If-None-Match` igual responde 304 sin leer ni serializar el catálogo.
+    Con `Accept: application/vnd.columnar+json` o `application/msgpack`
+    responde por columnas (ver `formats`).
+
     Args:
+        http (Request): request HTTP (cabeceras `If-None-Match` y `Accept`).
         db (Session): sesión de base de datos inyectada con Depends(get_db).
 
     Returns:
         List[ProductDTO]: lista de productos.
     """
-    service = ProductService(SQLProductRepository(db))
+    # Se calcula antes de leer: el cuerpo nunca es más viejo que su ETag.
+    etag = f'W/"catalog-{catalog_events.version}"'
+    if http.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    service = _product_service(db)
     products = service.get_all_products()
-    return [ProductDTO.model_validate(p) for p in products]
+    # Las entidades ya están validadas: se serializan directo y se devuelve
+    # una Response para que FastAPI no re-valide contra response_model.
+    return list_response(http.headers.get("accept"), ProductDTO, products, headers={"ETag": etag})
+
+
+@app.get("/products/search", response_model=List[ProductDTO], summary="Búsqueda de texto libre", tags=["Products"])
+def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    Busca productos por texto libre en nombre, marca, categoría, color y descripción.
+
+    Insensible a mayúsculas y tildes; los resultados se ordenan por
+    relevancia (BM25 sobre el índice FTS5).
+
+    Args:
+        q (str): texto de búsqueda (p. ej. "amortiguación running blanco").
+        limit (int): cantidad máxima de resultados (1–100, default=20).
+        db (Session): sesión de base de datos.
+
+    Returns:
+        List[ProductDTO]: productos coincidentes, el más relevante primero.
+    """
+    service = _product_service(db)
+    return ORJSONResponse(to_payload(ProductDTO, service.search_text(q, limit)))
+
+
+@app.get("/products/facets", summary="Facetas y agregados del catálogo", tags=["Products"])
+def product_facets(
+    brand: Optional[str] = Query(None, max_length=60),
+    category: Optional[str] = Query(None, max_length=60),
+    size: Optional[str] = Query(None, max_length=20),
+    color: Optional[str] = Query(None, max_length=30),
+    price_range: Optional[str] = Query(None, max_length=20),
+    db: Session = Depends(get_db),
+):
+    """
+    Cantidad de productos por marca, categoría, talla, color y rango de precio.
+
+    Los filtros restringen el conjunto sobre el que se cuenta (p. ej.
+    `?category=Running` da las marcas, tallas y colores dentro de Running).
+
+    Args:
+        brand, category, size, color (str | None): valor exacto del campo.
+        price_range (str | None): rango de precio tal como lo devuelven las
+            facetas (p. ej. "50-100" o "300+").
+        db (Session): sesión de base de datos (solo si hay que recargar el catálogo).
+
+    Returns:
+        dict: `total`, `in_stock`, `avg_price` y `facets` (campo → valor → cantidad).
+    """
+    if not facet_updates.loaded:  # sin lifespan (p. ej. tests): carga inicial
+        facet_updates.rebuild(catalog.products(SQLProductRepository(db).get_all_from_primary))
+    filters = {"brand": brand, "category": category, "size": size, "color": color, "price_range": price_range}
+    return ORJSONResponse(facets.facets(filters))
 
 
 @app.get("/products/{product_id}", response_model=ProductDTO, summary="Obtiene un producto por ID", tags=["Products"])
@@ -116,16 +635,16 @@ def get_product(product_id: int, db: Session = Depends(get_db)):
     Returns:
         ProductDTO: producto solicitado.
     """
-    service = ProductService(SQLProductRepository(db))
+    service = _product_service(db)
     try:
         product = service.get_product_by_id(product_id)
-        return ProductDTO.model_validate(product)
+        return ORJSONResponse(ProductDTO.from_entity(product).model_dump())
     except ProductNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
 @app.post("/chat", response_model=ChatMessageResponseDTO, summary="Procesa un mensaje de chat con IA", tags=["Chat"])
-async def chat(request: ChatMessageRequestDTO, db: Session = Depends(get_db)):
+async def chat(request: ChatMessageRequestDTO, http: Request, reply: Response, db: Session = Depends(get_db)):
     """
     Procesa el mensaje del usuario con ayuda de la IA (Gemini) y persiste el intercambio.
 
@@ -137,24 +656,142 @@ async def chat(request: ChatMessageRequestDTO, db: Session = Depends(get_db)):
 
     Args:
         request (ChatMessageRequestDTO): sesión y texto del usuario
+        http (Request): request HTTP (identifica al cliente)
+        reply (Response): respuesta (cabecera `Idempotent-Replayed`)
         db (Session): sesión de base de datos
 
+    El plazo de la solicitud (`X-Request-Timeout`, acotado por
+    `CHAT_REQUEST_TIMEOUT`) llega hasta la llamada al modelo. Si el cliente
+    se desconecta, el trabajo se cancela y el intercambio no se guarda.
+
+    Con `PROFILE_TOKEN` configurado, `X-Profile: <token>` (o un perfilado
+    armado con `POST /admin/profile`) perfila el request: el perfil se
+    escribe en `PROFILE_DIR` y la respuesta trae `Server-Timing` y
+    `X-Profile-File`.
+
+    Con la cabecera `Idempotency-Key`, los reintentos con la misma clave y el
+    mismo cuerpo reciben la respuesta de la primera solicitud (con
+    `Idempotent-Replayed: true`), sin llamar al modelo ni escribir en la BD;
+    si la primera aún está en curso, esperan a que termine.
+
     Raises:
+        HTTPException(400): si `Idempotency-Key` es demasiado larga
+        HTTPException(422): si `Idempotency-Key` ya se usó con otro cuerpo
+        HTTPException(429): si la sesión o el cliente superan su límite, o no
+            hay cupo del modelo dentro de la espera máxima (con `Retry-After`)
+        HTTPException(504): si se agota el plazo de la solicitud
         HTTPException(500): en caso de error interno del servicio de chat
 
     Returns:
         ChatMessageResponseDTO: con `assistant_message` y metadata
     """
-    product_repo = SQLProductRepository(db)
-    chat_repo = SQLChatRepository(db)
-    ai = GeminiService()
-    service = ChatService(product_repo, chat_repo, ai)
+    client = _client_id(http)
+    key = _idempotency_key(http, client)
+    capture = profiler.start(http.headers.get("x-profile"))
+
+    async def process():
+        deadline = _request_deadline(http)
+        admission.admit(request.session_id, client)
+        service = _chat_service(db, client, capture=capture, session=request.session_id)
+        work = service.process_message(request, deadline)
+        if capture is not None:
+            work = capture.timed("process_message", work)
+        return await _until_disconnect(http, work, deadline)
 
     try:
-        response = await service.process_message(request)
-        return response
+        if key is None:
+            response = await process()
+        else:
+            fingerprint = orjson.dumps(request.model_dump(), option=orjson.OPT_SORT_KEYS).decode()
+            response, replayed = await idempotency.run(key, fingerprint, process)
+            if replayed:
+                reply.headers["Idempotent-Replayed"] = "true"
+                return response
+    except IdempotencyKeyConflictError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except RateLimitExceededError as e:
+        raise _too_many_requests(e)
+    except DeadlineExceededError as e:
+        chat_outcomes["timed_out"] += 1
+        raise HTTPException(status_code=504, detail=str(e))
     except ChatServiceError as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if capture is not None:
+            capture.stop()
+            reply.headers["X-Profile-File"] = (await asyncio.to_thread(capture.write)).name
+            reply.headers["Server-Timing"] = capture.server_timing()
+    if response is None:
+        chat_outcomes["cancelled"] += 1
+        return Response(status_code=499)
+    chat_outcomes["completed"] += 1
+    return response
+
+
+@app.post("/admin/profile", summary="Perfila los próximos requests de /chat", tags=["Meta"])
+def arm_profiler(
+    http: Request,
+    requests: int = Query(1, ge=0, le=100),
+    mode: Optional[str] = Query(None, pattern="^(" + "|".join(PROFILE_MODES) + ")$"),
+):
+    """
+    Arma el perfilador para los próximos `requests` requests de `/chat` del worker.
+
+    Requiere la cabecera `X-Profile-Token` con el valor de `PROFILE_TOKEN`.
+    `requests=0` desarma. Con varios workers, cada llamada arma solo al que
+    la atiende.
+
+    Args:
+        http (Request): request HTTP (cabecera `X-Profile-Token`)
+        requests (int): cantidad de requests a perfilar (0–100)
+        mode (str | None): `sample` o `cprofile` (por defecto `PROFILE_MODE`)
+
+    Raises:
+        HTTPException(404): si el perfilado no está configurado
+        HTTPException(403): si el token no coincide
+
+    Returns:
+        dict: estado del perfilador (`armed`, `captured`, `skipped`) y carpeta de salida.
+    """
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Perfilado desactivado (PROFILE_TOKEN)")
+    if not profiler.authorized(http.headers.get("x-profile-token")):
+        raise HTTPException(status_code=403, detail="Token de perfilado inválido")
+    profiler.arm(requests, mode)
+    return {**profiler.stats(), "directory": str(profiler.directory)}
+
+
+@app.post("/chat/batch", summary="Procesa un lote de mensajes de chat", tags=["Chat"])
+async def chat_batch(batch: ChatBatchRequestDTO, http: Request, db: Session = Depends(get_db)):
+    """
+    Procesa muchos mensajes (reproducción de conversaciones, evaluación) en un request.
+
+    Los mensajes de una misma sesión se responden en orden; las sesiones
+    avanzan en paralelo con hasta `concurrency` respuestas en curso. El
+    catálogo se carga una vez para todo el lote y el historial se guarda en
+    bloques. El lote consume un solo token del límite del cliente y sus
+    llamadas al modelo ceden el turno a las de `/chat`.
+
+    Args:
+        batch (ChatBatchRequestDTO): mensajes y concurrencia
+        http (Request): request HTTP (identifica al cliente)
+        db (Session): sesión de base de datos
+
+    Raises:
+        HTTPException(429): si el cliente superó su límite de solicitudes
+
+    Returns:
+        StreamingResponse: NDJSON (`application/x-ndjson`), una línea por
+        mensaje en orden de finalización: `index`, `session_id`,
+        `user_message`, `assistant_message`, `timestamp` o bien `error`.
+    """
+    client = _client_id(http)
+    try:
+        admission.admit(None, client)
+    except RateLimitExceededError as e:
+        raise _too_many_requests(e)
+    service = _chat_service(db, client, priority=BATCH)
+    return StreamingResponse(ndjson_results(service, batch), media_type="application/x-ndjson")
 
 
 @app.get(
@@ -163,11 +800,14 @@ async def chat(request: ChatMessageRequestDTO, db: Session = Depends(get_db)):
     summary="Obtiene historial de chat por sesión",
     tags=["Chat"],
 )
-def chat_history(session_id: str, limit: int = 10, db: Session = Depends(get_db)):
+def chat_history(http: Request, session_id: str, limit: int = 10, db: Session = Depends(get_db)):
     """
     Retorna los últimos N mensajes de la sesión, en orden cronológico.
 
+    Acepta los mismos formatos compactos que `GET /products` (`Accept`).
+
     Args:
+        http (Request): request HTTP (cabecera `Accept`)
         session_id (str): identificador de la sesión de chat
         limit (int): cantidad máxima de mensajes a retornar (default=10)
         db (Session): sesión de base de datos
@@ -175,9 +815,9 @@ def chat_history(session_id: str, limit: int = 10, db: Session = Depends(get_db)
     Returns:
         List[ChatHistoryDTO]: mensajes en orden cronológico
     """
-    chat_repo = SQLChatRepository(db)
+    chat_repo = _chat_repo(db)
     msgs = chat_repo.get_session_history(session_id, limit)
-    return [ChatHistoryDTO.model_validate(m) for m in msgs]
+    return list_response(http.headers.get("accept"), ChatHistoryDTO, msgs)
 
 
 @app.delete("/chat/history/{session_id}", summary="Elimina el historial de una sesión", tags=["Chat"])
@@ -192,6 +832,6 @@ def delete_history(session_id: str, db: Session = Depends(get_db)):
     Returns:
         dict: {"deleted": <cantidad_de_mensajes_eliminados>}
     """
-    chat_repo = SQLChatRepository(db)
+    chat_repo = _chat_repo(db)
     count = chat_repo.delete_session_history(session_id)
     return {"deleted": count}
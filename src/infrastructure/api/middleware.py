@@ -0,0 +1,181 @@
+"""
+Middlewares ASGI de la API.
+
+`QueryStatsMiddleware` abre un `query_stats.track()` por request HTTP y
+agrega a la respuesta:
+
+- `X-DB-Queries`: sentencias ejecutadas hasta enviar las cabeceras.
+- `X-DB-Time-Ms`: tiempo acumulado en la base de datos.
+
+En respuestas en streaming (`/chat/batch`) las cabeceras salen antes del
+trabajo y solo cuentan lo previo. Si un request supera `warn_over`
+sentencias se registra una advertencia con el total al terminar.
+
+`CompressionMiddleware` comprime las respuestas de texto, JSON y MessagePack
+con brotli (si está instalado `brotli`) o gzip según `Accept-Encoding`.
+Comprime trozo a trozo a medida que la aplicación los envía: las respuestas
+en streaming no se acumulan, y cada trozo sale con un *flush* para que las
+líneas NDJSON no esperen al siguiente. Los cuerpos completos de menos de
+`minimum_size` bytes se envían sin comprimir.
+"""
+
+import logging
+import zlib
+from typing import Callable, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from src.infrastructure.db.query_stats import track
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """Cuenta las sentencias SQL de cada request HTTP."""
+
+    def __init__(self, app, warn_over: int = 0):
+        """Envuelve la aplicación ASGI.
+
+        Args:
+            app: Aplicación ASGI.
+            warn_over (int): Sentencias a partir de las cuales se advierte (0 = nunca).
+        """
+        self.app = app
+        self.warn_over = warn_over
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with track() as stats:
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start":
+                    message = {**message, "headers": [
+                        *message.get("headers", ()),
+                        (b"x-db-queries", str(stats.count).encode()),
+                        (b"x-db-time-ms", f"{stats.seconds * 1000:.1f}".encode()),
+                    ]}
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+        if self.warn_over and stats.count > self.warn_over:
+            logger.warning("%s %s ejecutó %d sentencias SQL (%.1f ms)",
+                           scope["method"], scope["path"], stats.count, stats.seconds * 1000)
+
+
+# Nivel de gzip y calidad de brotli: balance entre CPU por request y tamaño
+# (ver `benchmarks/bench_compression.py`).
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+_COMPRESSIBLE = ("text/", "application/json", "application/x-ndjson", "application/msgpack",
+                 "application/javascript", "application/xml")
+
+# (comprimir trozo con flush, cerrar el flujo)
+Encoder = Tuple[Callable[[bytes], bytes], Callable[[], bytes]]
+
+
+def _gzip() -> Encoder:
+    stream = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return (lambda data: stream.compress(data) + stream.flush(zlib.Z_SYNC_FLUSH)), stream.flush
+
+
+def _brotli() -> Encoder:
+    stream = brotli.Compressor(quality=BROTLI_QUALITY)
+    return (lambda data: stream.process(data) + stream.flush()), stream.finish
+
+
+# En orden de preferencia del servidor.
+ENCODERS = {"br": _brotli, "gzip": _gzip} if brotli is not None else {"gzip": _gzip}
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Codificación a usar según `Accept-Encoding` (None = sin comprimir).
+
+    Entre las aceptadas con `q > 0` (explícitas o por `*`) se elige la
+    preferida del servidor (brotli antes que gzip).
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        key, _, value = params.partition("=")
+        if key.strip() == "q":
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    for name in ENCODERS:
+        if accepted.get(name, wildcard) > 0:
+            return name
+    return None
+
+
+class CompressionMiddleware:
+    """Compresión negociada y en streaming de las respuestas HTTP."""
+
+    def __init__(self, app, minimum_size: int = 1024):
+        """Envuelve la aplicación ASGI.
+
+        Args:
+            app: Aplicación ASGI.
+            minimum_size (int): Bytes mínimos de un cuerpo completo para comprimirlo.
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding")) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        start = None
+        encoder: Optional[Encoder] = None
+
+        async def send_compressed(message):
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                start = message  # se decide con el primer trozo del cuerpo
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body, more = message.get("body", b""), message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=list(start.get("headers", ())))
+                if self._compressible(start["status"], headers) and (more or len(body) >= self.minimum_size):
+                    encoder = ENCODERS[encoding]()
+                    del headers["content-length"]
+                    headers["content-encoding"] = encoding
+                    headers.add_vary_header("Accept-Encoding")
+                    start = {**start, "headers": headers.raw}
+                await send(start)
+                start = None
+            if encoder is None:
+                await send(message)
+                return
+            compress, finish = encoder
+            data = compress(body) if body else b""
+            if not more:
+                data += finish()
+            if data or not more:
+                await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _compressible(status: int, headers: MutableHeaders) -> bool:
+        """Indica si la respuesta admite compresión (tipo, estado y sin codificar)."""
+        if status < 200 or status in (204, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(_COMPRESSIBLE) or "+json" in content_type
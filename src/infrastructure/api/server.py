@@ -0,0 +1,78 @@
+"""
+Perfil de servidor de producción con varios workers de uvicorn.
+
+Uso:
+    python -m src.infrastructure.api.server
+
+Variables de entorno:
+    WEB_CONCURRENCY: Número de workers (por defecto, uno por CPU).
+    HOST / PORT: Dirección de escucha (por defecto 0.0.0.0:8000).
+    GRACEFUL_TIMEOUT: Segundos para drenar requests en curso al recibir
+        SIGTERM antes de cerrar (por defecto 30).
+    FORWARDED_ALLOW_IPS: IPs (separadas por comas, o `*`) del proxy cuyas
+        cabeceras `X-Forwarded-For` definen la IP del cliente, que es la
+        clave de los límites por cliente (por defecto 127.0.0.1).
+    CACHE_URL: Backend compartido de las ventanas de chat, los límites de
+        frecuencia, las claves de idempotencia y las marcas de lectura de la
+        réplica. Con más de un worker y sin valor se usa
+        `DEFAULT_SHARED_CACHE_URL`: una caché por proceso serviría a cada
+        worker un historial distinto de la misma sesión.
+
+Cada worker ejecuta el lifespan de la app (BD, catálogo y cliente del
+modelo precargados) antes de aceptar tráfico. Al recibir SIGTERM uvicorn deja
+de aceptar conexiones, espera los requests en curso hasta `GRACEFUL_TIMEOUT`
+y luego ejecuta el apagado del lifespan (vaciado de la cola write-behind).
+"""
+
+import logging
+import os
+
+import uvicorn
+
+from src.infrastructure.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Caché de ventanas compartida por defecto cuando hay varios workers.
+DEFAULT_SHARED_CACHE_URL = "file://./data/cache"
+
+
+def default_workers() -> int:
+    """Calcula el número de workers a partir de la configuración o de las CPUs.
+
+    Returns:
+        int: `WEB_CONCURRENCY` si está definida; si no, la cantidad de CPUs
+        disponibles para el proceso (mínimo 1).
+    """
+    configured = get_settings().web_concurrency
+    if configured:
+        return configured
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - no disponible en Windows/macOS
+        cpus = os.cpu_count() or 1
+    return max(1, cpus)
+
+
+def main() -> None:
+    """Arranca uvicorn con el perfil de producción."""
+    settings = get_settings()
+    workers = default_workers()
+    if workers > 1 and not settings.cache_url:
+        # Los workers leen la configuración del entorno al importar la app.
+        os.environ["CACHE_URL"] = DEFAULT_SHARED_CACHE_URL
+        logger.warning("%d workers sin CACHE_URL: ventanas de chat en %s", workers, DEFAULT_SHARED_CACHE_URL)
+    uvicorn.run(
+        "src.infrastructure.api.main:app",
+        host=settings.host,
+        port=settings.port,
+        workers=workers,
+        timeout_graceful_shutdown=settings.graceful_timeout,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.forwarded_allow_ips,
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,594 @@
+"""
+Backends clave-valor intercambiables para el estado compartido del proceso.
+
+Ventanas recientes de chat, cachés de respuestas o contadores de rate limit
+necesitan un hogar común cuando hay varios workers de uvicorn o varios nodos.
+Todos los backends cumplen el mismo contrato (`KeyValueBackend`) y la misma
+semántica de invalidación:
+
+- `set` sobrescribe el valor y reinicia su TTL (o lo quita si `ttl=None`).
+- `delete` elimina la clave de inmediato para todos los lectores.
+- `add` escribe solo si la clave no existe (`SET NX`): un único ganador.
+- Una clave expirada se comporta exactamente como una clave inexistente.
+- `lock` serializa lecturas-modificación-escritura sobre una clave.
+
+Implementaciones:
+  - `InMemoryBackend`: LRU en el proceso (por claves y bytes).
+  - `FileBackend`: un archivo por clave en un directorio local; compartido
+    entre procesos del mismo host (escrituras atómicas con `os.replace`).
+  - `RedisBackend`: cliente mínimo del protocolo RESP de Redis.
+
+`create_backend(url)` elige la implementación a partir de una URL
+(`memory://`, `file:///ruta`, `redis://host:puerto/db`).
+"""
+
+import hashlib
+import os
+import socket
+import struct
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+try:  # POSIX; en Windows el FileBackend solo sincroniza hilos del proceso
+    import fcntl
+except ImportError:  # pragma: no cover - depende de la plataforma
+    fcntl = None
+
+# Locks de hilo repartidos por hash de clave (evita un lock por cada clave).
+_LOCK_STRIPES = 64
+
+
+class KeyValueBackend(ABC):
+    """Contrato de almacenamiento clave-valor con TTL y bloqueo por clave."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Obtiene el valor de una clave.
+
+        Args:
+            key (str): Clave a consultar.
+
+        Returns:
+            Optional[bytes]: Valor almacenado o `None` si no existe o expiró.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Guarda (o sobrescribe) el valor de una clave.
+
+        Args:
+            key (str): Clave a escribir.
+            value (bytes): Valor a guardar.
+            ttl (Optional[float]): Segundos de vida; `None` para no expirar.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Elimina una clave.
+
+        Args:
+            key (str): Clave a eliminar.
+
+        Returns:
+            bool: `True` si la clave existía.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Guarda el valor solo si la clave no existe (o expiró), de forma atómica.
+
+        Args:
+            key (str): Clave a escribir.
+            value (bytes): Valor a guardar.
+            ttl (Optional[float]): Segundos de vida; `None` para no expirar.
+
+        Returns:
+            bool: `True` si se escribió; `False` si la clave ya tenía valor.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Incrementa atómicamente un contador entero.
+
+        Si la clave no existe se crea con valor `amount` y, si se indica, con
+        el `ttl` dado (útil para ventanas de rate limit).
+
+        Args:
+            key (str): Clave del contador.
+            amount (int): Incremento (puede ser negativo).
+            ttl (Optional[float]): TTL aplicado solo al crear la clave.
+
+        Returns:
+            int: Valor resultante.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    @contextmanager
+    def lock(self, key: str, timeout: float = 5.0) -> Iterator[None]:
+        """Bloqueo exclusivo sobre una clave para lectura-modificación-escritura.
+
+        Args:
+            key (str): Clave a proteger.
+            timeout (float): Segundos máximos de espera para adquirirlo.
+
+        Raises:
+            TimeoutError: Si no se obtiene el bloqueo a tiempo.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Libera recursos (conexiones, descriptores). Por defecto no hace nada."""
+
+
+class InMemoryBackend(KeyValueBackend):
+    """Backend LRU en el proceso, acotado por número de claves y bytes.
+
+    Attributes:
+        max_keys (int): Máximo de claves retenidas.
+        max_bytes (int): Presupuesto aproximado de bytes de valores.
+    """
+
+    def __init__(self, max_keys: int = 100_000, max_bytes: int = 64 * 1024 * 1024):
+        """Inicializa el almacenamiento vacío.
+
+        Args:
+            max_keys (int): Máximo de claves retenidas.
+            max_bytes (int): Presupuesto aproximado de bytes de valores.
+        """
+        self.max_keys = max_keys
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._mutex = threading.RLock()
+        self._stripes = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Obtiene el valor (y lo marca como usado recientemente)."""
+        with self._mutex:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                self._pop(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Guarda el valor aplicando la política LRU."""
+        with self._mutex:
+            self._put(key, value, time.monotonic() + ttl if ttl is not None else None)
+
+    def delete(self, key: str) -> bool:
+        """Elimina la clave si existe y no expiró."""
+        with self._mutex:
+            existed = self.get(key) is not None
+            self._pop(key)
+            return existed
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Guarda el valor si la clave no existe, bajo el mutex."""
+        with self._mutex:
+            if self.get(key) is not None:
+                return False
+            self._put(key, value, time.monotonic() + ttl if ttl is not None else None)
+            return True
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Incrementa el contador conservando su TTL."""
+        with self._mutex:
+            current = self.get(key)
+            if current is None:
+                value = amount
+                expires = time.monotonic() + ttl if ttl is not None else None
+            else:
+                value = int(current) + amount
+                expires = self._data[key][1]
+            self._put(key, str(value).encode(), expires)
+            return value
+
+    @contextmanager
+    def lock(self, key: str, timeout: float = 5.0) -> Iterator[None]:
+        """Bloqueo por clave dentro del proceso."""
+        lk = self._stripes[hash(key) % _LOCK_STRIPES]
+        if not lk.acquire(timeout=timeout):
+            raise TimeoutError(f"No se pudo bloquear la clave {key!r}")
+        try:
+            yield
+        finally:
+            lk.release()
+
+    def _put(self, key: str, value: bytes, expires: Optional[float]) -> None:
+        """Inserta una clave y expulsa las menos usadas si se excede el límite (requiere el mutex)."""
+        self._pop(key)
+        self._data[key] = (value, expires)
+        self._bytes += len(value)
+        while self._data and (len(self._data) > self.max_keys or self._bytes > self.max_bytes):
+            self._pop(next(iter(self._data)))
+
+    def _pop(self, key: str) -> None:
+        """Quita una clave actualizando el contador de bytes (requiere el mutex)."""
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+
+# Cabecera de cada archivo del FileBackend: instante de expiración (epoch, 0 = nunca).
+_FILE_HEADER = struct.Struct(">d")
+
+
+class FileBackend(KeyValueBackend):
+    """Backend de un archivo por clave, compartido entre procesos del host.
+
+    Las escrituras son atómicas (archivo temporal + `os.replace`), así que un
+    lector nunca ve un valor a medio escribir. `incr` y `lock` usan
+    `fcntl.flock` sobre uno de `_LOCK_STRIPES` archivos `.lock` fijos (el de
+    la franja del hash de la clave), así que los archivos de bloqueo no
+    crecen con las claves. Claves de la misma franja se serializan entre sí.
+
+    Attributes:
+        directory (Path): Directorio donde se guardan los valores.
+    """
+
+    def __init__(self, directory: str):
+        """Crea el directorio si no existe.
+
+        Args:
+            directory (str): Ruta del directorio compartido.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._stripes = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        self._held = threading.local()
+
+    def _path(self, key: str) -> Path:
+        """Ruta del archivo de una clave (nombre derivado de su hash)."""
+        return self.directory / hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _stripe(self, key: str) -> int:
+        """Franja de bloqueo de una clave (la misma en todos los procesos)."""
+        return int(self._path(key).name[:8], 16) % _LOCK_STRIPES
+
+    def _read(self, path: Path) -> Optional[Tuple[bytes, float]]:
+        """Lee valor y expiración de un archivo, o `None` si no existe."""
+        try:
+            raw = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        (expires,) = _FILE_HEADER.unpack_from(raw)
+        return raw[_FILE_HEADER.size:], expires
+
+    def _write(self, path: Path, value: bytes, expires: float) -> None:
+        """Escribe el archivo de forma atómica."""
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(_FILE_HEADER.pack(expires) + value)
+        os.replace(tmp, path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Obtiene el valor si el archivo existe y no expiró."""
+        entry = self._read(self._path(key))
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires and expires <= time.time():
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Escribe el valor con su expiración absoluta."""
+        self._write(self._path(key), value, time.time() + ttl if ttl is not None else 0.0)
+
+    def delete(self, key: str) -> bool:
+        """Elimina el archivo de la clave."""
+        existed = self.get(key) is not None
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+        return existed
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Guarda el valor si la clave no existe, bajo `flock`."""
+        with self.lock(key):
+            if self.get(key) is not None:
+                return False
+            self.set(key, value, ttl)
+            return True
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Incrementa el contador bajo `flock`, conservando su expiración."""
+        path = self._path(key)
+        with self.lock(key):
+            entry = self._read(path)
+            if entry is None or (entry[1] and entry[1] <= time.time()):
+                value = amount
+                expires = time.time() + ttl if ttl is not None else 0.0
+            else:
+                value = int(entry[0]) + amount
+                expires = entry[1]
+            self._write(path, str(value).encode(), expires)
+            return value
+
+    @contextmanager
+    def lock(self, key: str, timeout: float = 5.0) -> Iterator[None]:
+        """Bloqueo exclusivo entre procesos (y entre hilos del proceso).
+
+        Es reentrante dentro del mismo hilo por franja, de modo que `incr`
+        puede usarse mientras se sostiene el bloqueo de la misma clave (o de
+        otra clave de la misma franja).
+        """
+        stripe = self._stripe(key)
+        held = self._held.__dict__.setdefault("stripes", set())
+        if stripe in held:
+            yield
+            return
+        tlock = self._stripes[stripe]
+        if not tlock.acquire(timeout=timeout):
+            raise TimeoutError(f"No se pudo bloquear la clave {key!r}")
+        fd = None
+        try:
+            if fcntl is not None:
+                fd = os.open(self.directory / f"stripe-{stripe:02d}.lock", os.O_CREAT | os.O_RDWR, 0o644)
+                deadline = time.monotonic() + timeout
+                while True:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.monotonic() >= deadline:
+                            raise TimeoutError(f"No se pudo bloquear la clave {key!r}")
+                        time.sleep(0.001)
+            held.add(stripe)
+            try:
+                yield
+            finally:
+                held.discard(stripe)
+        finally:
+            if fd is not None:
+                os.close(fd)  # cerrar el descriptor libera el flock
+            tlock.release()
+
+    def purge_expired(self) -> int:
+        """Elimina los archivos expirados (mantenimiento periódico).
+
+        Returns:
+            int: Cantidad de claves eliminadas.
+        """
+        removed = 0
+        now = time.time()
+        for path in self.directory.iterdir():
+            if path.suffix:
+                continue
+            entry = self._read(path)
+            if entry is not None and entry[1] and entry[1] <= now:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+# Borra la clave de bloqueo solo si aún guarda el token propio (atómico en Redis).
+RELEASE_LOCK_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+
+class RedisBackend(KeyValueBackend):
+    """Backend sobre el protocolo RESP de Redis (sin dependencias externas).
+
+    Usa una única conexión protegida por un lock; ante un error de red se
+    reconecta en el siguiente comando.
+
+    Attributes:
+        host (str): Host del servidor.
+        port (int): Puerto del servidor.
+        db (int): Base lógica seleccionada al conectar.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, timeout: Optional[float] = 2.0):
+        """Configura la conexión (se abre de forma perezosa).
+
+        Args:
+            host (str): Host del servidor.
+            port (int): Puerto del servidor.
+            db (int): Base lógica (`SELECT`).
+            timeout (Optional[float]): Timeout de socket en segundos (None = sin límite).
+        """
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._mutex = threading.Lock()
+
+    def _connect(self) -> None:
+        """Abre la conexión y selecciona la base lógica."""
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile("rb")
+        if self.db:
+            self._send(("SELECT", str(self.db)))
+            self._read_reply()
+
+    def _send(self, args) -> None:
+        """Codifica y envía un comando en formato RESP."""
+        parts = [b"*%d\r\n" % len(args)]
+        for a in args:
+            data = a if isinstance(a, bytes) else str(a).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b"".join(parts))
+
+    def _read_reply(self):
+        """Lee y decodifica una respuesta RESP."""
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Conexión cerrada por el servidor")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RuntimeError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            n = int(body)
+            if n < 0:
+                return None
+            data = self._reader.read(n + 2)
+            return data[:-2]
+        if kind == b"*":
+            n = int(body)
+            return None if n < 0 else [self._read_reply() for _ in range(n)]
+        raise RuntimeError(f"Respuesta RESP inválida: {line!r}")
+
+    def command(self, *args):
+        """Ejecuta un comando y retorna su respuesta decodificada.
+
+        Raises:
+            ConnectionError: Si el servidor no responde.
+            RuntimeError: Si el servidor responde con un error.
+        """
+        with self._mutex:
+            try:
+                if self._sock is None:
+                    self._connect()
+                self._send(args)
+                return self._read_reply()
+            except (OSError, ConnectionError):
+                self._close_socket()
+                raise
+
+    def get(self, key: str) -> Optional[bytes]:
+        """`GET key`."""
+        return self.command("GET", key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """`SET key value [PX ms]`."""
+        if ttl is None:
+            self.command("SET", key, value)
+        else:
+            self.command("SET", key, value, "PX", max(1, int(ttl * 1000)))
+
+    def delete(self, key: str) -> bool:
+        """`DEL key`."""
+        return self.command("DEL", key) > 0
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """`SET key value NX [PX ms]`."""
+        if ttl is None:
+            return self.command("SET", key, value, "NX") is not None
+        return self.command("SET", key, value, "NX", "PX", max(1, int(ttl * 1000))) is not None
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """`INCRBY key amount` (+ `PEXPIRE` si la clave se acaba de crear)."""
+        value = self.command("INCRBY", key, amount)
+        if ttl is not None and value == amount:
+            self.command("PEXPIRE", key, max(1, int(ttl * 1000)))
+        return value
+
+    @contextmanager
+    def lock(self, key: str, timeout: float = 5.0) -> Iterator[None]:
+        """Bloqueo distribuido simple con `SET NX PX` y liberación por token.
+
+        La liberación compara el token y borra en un solo `EVAL`: si el bloqueo
+        expiró y otro proceso lo tomó entre medio, no se le borra.
+        """
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        while self.command("SET", lock_key, token, "NX", "PX", int(timeout * 1000)) is None:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"No se pudo bloquear la clave {key!r}")
+            time.sleep(0.002)
+        try:
+            yield
+        finally:
+            self.command("EVAL", RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+
+    def subscribe(self, channel: str) -> Iterator[bytes]:
+        """`SUBSCRIBE channel`: itera los mensajes publicados en el canal.
+
+        Bloquea esperando mensajes y deja la conexión en modo suscripción:
+        usar una instancia dedicada con `timeout=None` y cortar con `close`.
+
+        Raises:
+            ConnectionError: Si la conexión se cierra.
+        """
+        with self._mutex:
+            if self._sock is None:
+                self._connect()
+            self._send(("SUBSCRIBE", channel))
+            self._read_reply()
+            reader = self._reader
+        while True:
+            line = reader.readline()
+            if not line:
+                raise ConnectionError("Conexión cerrada por el servidor")
+            # Cada mensaje es ["message", canal, datos].
+            kind, _, data = (self._read_bulk(reader) for _ in range(int(line[1:-2])))
+            if kind == b"message":
+                yield data
+
+    @staticmethod
+    def _read_bulk(reader) -> bytes:
+        """Lee un bulk string RESP."""
+        n = int(reader.readline()[1:-2])
+        return reader.read(n + 2)[:-2]
+
+    def close(self) -> None:
+        """Cierra la conexión."""
+        with self._mutex:
+            self._close_socket()
+
+    def _close_socket(self) -> None:
+        """Cierra el socket actual, ignorando errores (requiere el lock)."""
+        if self._sock is not None:
+            try:
+                # `shutdown` despierta a un hilo bloqueado en `subscribe`.
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+
+def create_backend(url: str) -> KeyValueBackend:
+    """Crea un backend a partir de una URL.
+
+    Formatos soportados:
+      - `memory://`
+      - `file:///ruta/al/directorio` (o `file://./relativo`)
+      - `redis://host:puerto/db`
+
+    Args:
+        url (str): URL del backend.
+
+    Raises:
+        ValueError: Si el esquema no está soportado.
+
+    Returns:
+        KeyValueBackend: Instancia configurada.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return InMemoryBackend()
+    if parsed.scheme == "file":
+        return FileBackend((parsed.netloc or "") + parsed.path)
+    if parsed.scheme == "redis":
+        db = int(parsed.path.lstrip("/") or 0)
+        return RedisBackend(parsed.hostname or "localhost", parsed.port or 6379, db)
+    raise ValueError(f"Backend de caché no soportado: {url!r}")
@@ -0,0 +1,202 @@
+"""
+Snapshot en memoria del catálogo de productos.
+
+Cada turno de chat y cada `GET /products` leen el catálogo completo. El
+snapshot se carga una vez (en el lifespan, antes de aceptar tráfico) y se
+comparte entre requests del worker:
+
+- `CatalogSnapshot`: lista inmutable de productos con índice por ID, que se
+  recarga al invalidarse o al superar `max_age` segundos (red de seguridad
+  para cambios hechos por otros procesos, p. ej. `init_data`).
+- `SnapshotProductRepository`: decorador de `IProductRepository` que sirve
+  las lecturas desde el snapshot e invalida en `save`/`delete`.
+
+Con `columnar=True` el snapshot mantiene además una copia en columnas
+(`columnar.ColumnarCatalog`) con la que se resuelven los filtros de `find`,
+`get_by_brand` y `get_by_category`. NumPy solo se importa en ese caso.
+"""
+
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.domain.entities import Product
+from src.domain.filters import filter_products
+from src.domain.repositories import IProductRepository
+
+if TYPE_CHECKING:
+    from .columnar import ColumnarCatalog
+
+
+def _columnar(products: Tuple[Product, ...]) -> "ColumnarCatalog":
+    """Columnas de `products` (importa `columnar`, y con él NumPy, al primer uso)."""
+    from .columnar import ColumnarCatalog
+
+    return ColumnarCatalog(products)
+
+
+class CatalogSnapshot:
+    """Copia en memoria del catálogo compartida por los requests del proceso.
+
+    Attributes:
+        max_age (Optional[float]): Segundos tras los cuales se recarga; `None` = nunca.
+        columnar (bool): Mantiene una copia en columnas para filtrar.
+        version (int): Se incrementa con cada carga.
+    """
+
+    def __init__(self, max_age: Optional[float] = 60.0, columnar: bool = False):
+        """Crea un snapshot vacío (se carga en el primer acceso o con `load`).
+
+        Args:
+            max_age (Optional[float]): Segundos de validez del snapshot.
+            columnar (bool): Construye `ColumnarCatalog` en cada carga.
+        """
+        self.max_age = max_age
+        self.columnar = columnar
+        self.version = 0
+        self._columns: Optional["ColumnarCatalog"] = None
+        self._products: Optional[Tuple[Product, ...]] = None
+        self._by_id: Dict[int, Product] = {}
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Indica si hay un snapshot vigente."""
+        return self._products is not None and not self._expired()
+
+    def _expired(self) -> bool:
+        """Indica si el snapshot superó `max_age`."""
+        return self.max_age is not None and time.monotonic() - self._loaded_at > self.max_age
+
+    def load(self, loader: Callable[[], List[Product]]) -> Tuple[Product, ...]:
+        """Carga (o recarga) el catálogo desde `loader`.
+
+        Si el snapshot se invalida mientras `loader` lee, el resultado no se
+        instala: el siguiente acceso vuelve a cargar.
+
+        Args:
+            loader (Callable[[], List[Product]]): Función que lee todos los productos.
+
+        Returns:
+            Tuple[Product, ...]: Productos cargados.
+        """
+        generation = self._generation
+        products = tuple(loader())
+        columns = _columnar(products) if self.columnar else None
+        with self._lock:
+            if generation != self._generation:
+                # Invalidado durante la lectura: puede ser anterior al cambio.
+                # Se entrega a quien la pidió pero no queda como snapshot.
+                return products
+            self._products = products
+            self._columns = columns
+            self._by_id = {p.id: p for p in products}
+            self._loaded_at = time.monotonic()
+            self.version += 1
+        return products
+
+    def products(self, loader: Callable[[], List[Product]]) -> Tuple[Product, ...]:
+        """Retorna el catálogo, cargándolo con `loader` si no está vigente."""
+        current = self._products
+        if current is None or self._expired():
+            return self.load(loader)
+        return current
+
+    def columns(self, loader: Callable[[], List[Product]]) -> "ColumnarCatalog":
+        """Catálogo en columnas vigente (requiere `columnar=True`)."""
+        if not self.columnar:
+            raise RuntimeError("El snapshot no mantiene columnas (columnar=False)")
+        products = self.products(loader)
+        columns = self._columns
+        if columns is None or columns.products is not products:
+            # Invalidado o recargado por otro hilo entre ambas lecturas.
+            columns = _columnar(products)
+        return columns
+
+    def get(self, product_id: int, loader: Callable[[], List[Product]]) -> Optional[Product]:
+        """Busca un producto por ID en el snapshot."""
+        products = self.products(loader)
+        with self._lock:
+            if self._products is products:
+                return self._by_id.get(product_id)
+        # Carga no instalada (invalidada mientras se leía).
+        return next((p for p in products if p.id == product_id), None)
+
+    def invalidate(self) -> None:
+        """Descarta el snapshot; el siguiente acceso lo recarga."""
+        with self._lock:
+            self._generation += 1
+            self._products = None
+            self._columns = None
+            self._by_id = {}
+
+
+class SnapshotProductRepository(IProductRepository):
+    """Decorador que resuelve las lecturas de productos desde un `CatalogSnapshot`.
+
+    Las entidades devueltas son compartidas entre requests: deben tratarse
+    como de solo lectura (las escrituras pasan por `save`).
+
+    Attributes:
+        _inner (IProductRepository): Repositorio real (normalmente SQL).
+        _snapshot (CatalogSnapshot): Snapshot del proceso.
+    """
+
+    def __init__(self, inner: IProductRepository, snapshot: CatalogSnapshot,
+                 loader: Optional[Callable[[], List[Product]]] = None):
+        """Crea el decorador.
+
+        Args:
+            inner (IProductRepository): Repositorio al que se delega.
+            snapshot (CatalogSnapshot): Snapshot compartido del catálogo.
+            loader (Optional[Callable]): Lectura con la que se (re)carga el
+                snapshot; por defecto `inner.get_all`. Con réplicas debe leer
+                de la base principal.
+        """
+        self._inner = inner
+        self._snapshot = snapshot
+        self._load = loader or inner.get_all
+
+    def get_all(self) -> List[Product]:
+        """Todos los productos desde el snapshot."""
+        return list(self._snapshot.products(self._load))
+
+    def get_by_id(self, product_id: int) -> Optional[Product]:
+        """Producto por ID desde el snapshot."""
+        return self._snapshot.get(product_id, self._load)
+
+    def get_by_brand(self, brand: str) -> List[Product]:
+        """Productos de la marca, filtrados en memoria."""
+        if self._snapshot.columnar:
+            return list(self.find({"brand": brand}))
+        return [p for p in self._snapshot.products(self._load) if p.brand == brand]
+
+    def get_by_category(self, category: str) -> List[Product]:
+        """Productos de la categoría, filtrados en memoria."""
+        if self._snapshot.columnar:
+            return list(self.find({"category": category}))
+        return [p for p in self._snapshot.products(self._load) if p.category == category]
+
+    def find(self, filters=None, sort=None, limit=None) -> Sequence[Product]:
+        """Filtros estructurados sobre el snapshot (vectorizados si es columnar)."""
+        if self._snapshot.columnar:
+            return self._snapshot.columns(self._load).select(filters, sort, limit)
+        return filter_products(self._snapshot.products(self._load), filters, sort, limit)
+
+    def search_text(self, query: str, limit: int = 20) -> List[Product]:
+        """Búsqueda de texto libre delegada al repositorio interno (índice FTS)."""
+        return self._inner.search_text(query, limit)
+
+    def save(self, product: Product) -> Product:
+        """Persiste en el repositorio interno e invalida el snapshot."""
+        saved = self._inner.save(product)
+        self._snapshot.invalidate()
+        return saved
+
+    def delete(self, product_id: int) -> bool:
+        """Elimina en el repositorio interno e invalida el snapshot."""
+        deleted = self._inner.delete(product_id)
+        self._snapshot.invalidate()
+        return deleted
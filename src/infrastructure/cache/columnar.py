@@ -0,0 +1,154 @@
+"""
+Representación en columnas del catálogo para filtrar con NumPy.
+
+`ColumnarCatalog` se construye una vez por versión del snapshot del
+catálogo (ver `CatalogSnapshot.columns`):
+
+- `price` (float64) y `stock` (int32) como arreglos;
+- `brand`, `category`, `size` y `color` codificados con diccionario
+  (valor → entero) en arreglos int32.
+
+Cada filtro es una comparación vectorizada que se combina en una máscara;
+el orden usa `argsort` estable y el top-K `partition`, de modo que el
+resultado es idéntico al de `domain.filters.filter_products`. Las entidades
+se devuelven en una `ProductSelection`, que solo toca los productos que el
+llamador efectivamente recorre.
+"""
+
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple, Union, overload
+
+import numpy as np
+
+from src.domain.entities import Product
+from src.domain.filters import EXACT_FIELDS, parse_sort
+
+
+class ProductSelection(Sequence[Product]):
+    """Vista perezosa de productos del catálogo por posición."""
+
+    __slots__ = ("_products", "_rows")
+
+    def __init__(self, products: Tuple[Product, ...], rows: np.ndarray):
+        """Crea la vista sobre `products` en las posiciones `rows`."""
+        self._products = products
+        self._rows = rows
+
+    def __len__(self) -> int:
+        """Cantidad de productos de la vista."""
+        return int(self._rows.size)
+
+    @overload
+    def __getitem__(self, i: int) -> Product: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> "ProductSelection": ...
+
+    def __getitem__(self, i: Union[int, slice]):
+        """Producto en la posición `i`, o una vista de las posiciones del slice."""
+        if isinstance(i, slice):
+            return ProductSelection(self._products, self._rows[i])
+        return self._products[int(self._rows[i])]
+
+    def __iter__(self) -> Iterator[Product]:
+        """Recorre los productos en orden, sin materializar una lista."""
+        return map(self._products.__getitem__, self._rows.tolist())
+
+    def __repr__(self) -> str:
+        """Representación breve (no enumera los productos)."""
+        return f"ProductSelection({len(self)} productos)"
+
+
+class ColumnarCatalog:
+    """Catálogo inmutable en columnas NumPy.
+
+    Attributes:
+        products (Tuple[Product, ...]): Entidades en el orden del catálogo.
+    """
+
+    def __init__(self, products: Sequence[Product]):
+        """Codifica las columnas a partir de los productos.
+
+        Args:
+            products (Sequence[Product]): Catálogo completo.
+        """
+        self.products = tuple(products)
+        n = len(self.products)
+        self._codes: Dict[str, Dict[str, int]] = {}
+        self._cols: Dict[str, np.ndarray] = {}
+        for field in EXACT_FIELDS:
+            codes = self._codes[field] = {}
+            self._cols[field] = np.fromiter(
+                (codes.setdefault(getattr(p, field), len(codes)) for p in self.products), np.int32, n
+            )
+        self._cols["price"] = np.fromiter((p.price for p in self.products), np.float64, n)
+        self._cols["stock"] = np.fromiter((p.stock for p in self.products), np.int32, n)
+
+    def __len__(self) -> int:
+        """Cantidad de productos del catálogo."""
+        return len(self.products)
+
+    def _mask(self, filters: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Máscara de las filas que cumplen (None = todas)."""
+        mask = None
+
+        def both(m):
+            return m if mask is None else mask & m
+
+        for field in EXACT_FIELDS:
+            value = filters.get(field)
+            if not value:
+                continue
+            code = self._codes[field].get(value)
+            if code is None:
+                return np.zeros(len(self.products), dtype=bool)
+            mask = both(self._cols[field] == code)
+        if filters.get("min_price") is not None:
+            mask = both(self._cols["price"] >= float(filters["min_price"]))
+        if filters.get("max_price") is not None:
+            mask = both(self._cols["price"] <= float(filters["max_price"]))
+        if filters.get("in_stock"):
+            mask = both(self._cols["stock"] > 0)
+        return mask
+
+    def select(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> ProductSelection:
+        """Filtra, ordena y acota (misma semántica que `filter_products`).
+
+        Args:
+            filters (dict | None): Ver `IProductRepository.find`.
+            sort (str | None): `price`, `-price`, `stock` o `-stock`.
+            limit (int | None): Máximo de resultados.
+
+        Returns:
+            ProductSelection: Productos en el orden pedido.
+        """
+        field, descending = parse_sort(sort)
+        mask = self._mask(filters or {})
+        rows = np.flatnonzero(mask) if mask is not None else np.arange(len(self.products))
+        if field:
+            rows = self._sorted(rows, self._cols[field], descending, limit)
+        elif limit is not None:
+            rows = rows[:limit]
+        return ProductSelection(self.products, rows)
+
+    @staticmethod
+    def _sorted(rows: np.ndarray, column: np.ndarray, descending: bool, limit: Optional[int]) -> np.ndarray:
+        """Orden estable de `rows` por `column`; con `limit`, solo el top-K."""
+        keys = column[rows]
+        if descending:
+            keys = -keys
+        if limit is not None and limit < rows.size:
+            if limit <= 0:
+                return rows[:0]
+            # Umbral del K-ésimo y, entre empates en el umbral, los primeros
+            # en orden de catálogo (como el orden estable de Python).
+            kth = np.partition(keys, limit - 1)[limit - 1]
+            below = np.flatnonzero(keys < kth)
+            ties = np.flatnonzero(keys == kth)[: limit - below.size]
+            keep = np.sort(np.concatenate([below, ties]))
+            rows, keys = rows[keep], keys[keep]
+        return rows[np.argsort(keys, kind="stable")]
@@ -0,0 +1,249 @@
+"""
+Claves de idempotencia para reintentos de `POST /chat`.
+
+Un cliente móvil que reintenta `/chat` tras un corte de red envía la misma
+cabecera `Idempotency-Key`. `IdempotencyStore` garantiza que el trabajo
+(llamada al modelo y escritura del historial) se ejecute una sola vez por
+clave:
+
+- La primera solicitud ejecuta el trabajo y guarda su resultado durante
+  `ttl` segundos (LRU acotado por `max_entries`).
+- Los duplicados que llegan mientras tanto esperan a que termine, sin
+  repetirlo, y reciben el mismo resultado.
+- Los duplicados posteriores obtienen el resultado guardado.
+
+Solo se guardan resultados exitosos: si la primera solicitud falla o se
+cancela, el siguiente duplicado (en espera o nuevo) ejecuta el trabajo. Una
+clave reutilizada con otro cuerpo es un error del cliente
+(`IdempotencyKeyConflictError`).
+
+Con un `backend` compartido (el de `CACHE_URL`) la deduplicación abarca a
+todos los workers y nodos, sin afinidad en el balanceador:
+
+- Quien ejecuta toma un marcador `SET NX` con la huella y un TTL (`lease`):
+  si el worker muere a mitad, el marcador expira y un reintento lo retoma.
+- El resultado se guarda serializado (`encode`/`decode`) durante `ttl`.
+- Un duplicado en otro worker sondea el backend cada `poll_interval`
+  segundos hasta ver el resultado (o hasta que el marcador desaparezca sin
+  resultado, y entonces lo ejecuta él).
+
+Dentro del worker los duplicados siguen esperando al futuro local, sin
+sondear. Si el backend falla se sigue solo con el estado del worker.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+
+from .backends import KeyValueBackend
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyKeyConflictError(Exception):
+    """La clave de idempotencia ya se usó con un cuerpo distinto."""
+
+    def __init__(self, message: str = "Idempotency-Key reutilizada con otra solicitud"):
+        """Inicializa el error con un mensaje descriptivo.
+
+        Args:
+            message (str): Descripción del conflicto.
+        """
+        super().__init__(message)
+
+
+class IdempotencyStore:
+    """Resultados por clave de idempotencia, con deduplicación en curso.
+
+    Attributes:
+        ttl (float): Segundos durante los que se repite un resultado.
+        max_entries (int): Máximo de resultados guardados (LRU).
+        lease (float): TTL del marcador de ejecución en el backend compartido.
+        poll_interval (float): Segundos entre sondeos a otro worker.
+    """
+
+    def __init__(self, ttl: float = 86400.0, max_entries: int = 10_000,
+                 backend: Optional[KeyValueBackend] = None,
+                 encode: Callable[[Any], bytes] = orjson.dumps,
+                 decode: Callable[[bytes], Any] = orjson.loads,
+                 lease: float = 120.0, poll_interval: float = 0.05, prefix: str = "idem:"):
+        """Crea el almacén vacío.
+
+        Args:
+            ttl (float): Segundos de vida de cada resultado.
+            max_entries (int): Resultados máximos en memoria (sin backend).
+            backend (Optional[KeyValueBackend]): Backend compartido entre
+                workers; `None` para guardar los resultados en el proceso.
+            encode (Callable[[Any], bytes]): Serializa un resultado para el backend.
+            decode (Callable[[bytes], Any]): Inverso de `encode`.
+            lease (float): Segundos que dura el marcador de ejecución; debe
+                superar la duración máxima del trabajo.
+            poll_interval (float): Espera entre sondeos a otro worker.
+            prefix (str): Prefijo de las claves en el backend.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._backend = backend
+        self._encode = encode
+        self._decode = decode
+        self._prefix = prefix
+        # clave -> (expira, huella del cuerpo, resultado)
+        self._done: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()
+        # clave -> (huella del cuerpo, futuro que se resuelve al terminar)
+        self._in_flight: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self._replayed = 0
+        self._joined = 0
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def _lookup(self, key: str) -> Optional[Tuple[str, Any]]:
+        """Resultado vigente de `key` como (huella, resultado)."""
+        entry = self._done.get(key)
+        if entry is None:
+            return None
+        expires, fingerprint, value = entry
+        if expires <= time.monotonic():
+            del self._done[key]
+            return None
+        self._done.move_to_end(key)
+        return fingerprint, value
+
+    def _store(self, key: str, fingerprint: str, value: Any) -> None:
+        """Guarda el resultado y expulsa los menos usados si hace falta."""
+        self._done[key] = (time.monotonic() + self.ttl, fingerprint, value)
+        self._done.move_to_end(key)
+        while len(self._done) > self.max_entries:
+            self._done.popitem(last=False)
+
+    @staticmethod
+    def _check(fingerprint: str, stored: str) -> None:
+        if fingerprint != stored:
+            raise IdempotencyKeyConflictError()
+
+    async def _shared(self, method: str, *args, fallback=None):
+        """Llama a `backend.<method>` fuera del event loop; ante un fallo, `fallback`."""
+        try:
+            return await asyncio.to_thread(getattr(self._backend, method), *args)
+        except (OSError, ConnectionError) as exc:
+            logger.warning("Backend de idempotencia no disponible (%s): %s", method, exc)
+            return fallback
+
+    async def _shared_result(self, key: str) -> Optional[Tuple[str, Any]]:
+        """Resultado guardado en el backend como (huella, resultado)."""
+        raw = await self._shared("get", self._prefix + key)
+        if raw is None:
+            return None
+        fingerprint, _, payload = raw.partition(b"\n")
+        return fingerprint.decode(), self._decode(payload)
+
+    async def _claim(self, key: str, fingerprint: str) -> Optional[Any]:
+        """Toma el marcador de ejecución de `key` en el backend compartido.
+
+        Mientras otro worker lo tenga, sondea hasta que aparezca su resultado
+        o el marcador se libere sin resultado.
+
+        Raises:
+            IdempotencyKeyConflictError: Si el otro worker ejecuta otra huella.
+
+        Returns:
+            Optional[Any]: `None` si se tomó el marcador; si no, el resultado
+            que guardó el otro worker.
+        """
+        run_key = self._prefix + key + ":run"
+        while True:
+            claimed = await self._shared("add", run_key, fingerprint.encode(), self.lease, fallback=True)
+            # Releer tras tomarlo: el otro worker pudo guardar y soltar justo antes.
+            done = await self._shared_result(key)
+            if done is not None:
+                if claimed:
+                    await self._shared("delete", run_key)
+                self._check(fingerprint, done[0])
+                return done[1]
+            if claimed:
+                return None
+            holder = await self._shared("get", run_key)
+            if holder is not None:
+                self._check(fingerprint, holder.decode())
+            await asyncio.sleep(self.poll_interval)
+
+    async def run(
+        self, key: str, fingerprint: str, work: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """Ejecuta `work` una sola vez por `key` y repite su resultado.
+
+        Args:
+            key (str): Clave de idempotencia (ya acotada al cliente).
+            fingerprint (str): Huella del cuerpo de la solicitud.
+            work (Callable[[], Awaitable[Any]]): Trabajo a ejecutar; un
+                resultado `None` (p. ej. solicitud cancelada) no se guarda.
+
+        Raises:
+            IdempotencyKeyConflictError: Si `key` se usó con otra huella.
+
+        Returns:
+            Tuple[Any, bool]: Resultado y si es una repetición (no se ejecutó `work`).
+        """
+        while True:
+            done = self._lookup(key) if self._backend is None else await self._shared_result(key)
+            if done is not None:
+                self._check(fingerprint, done[0])
+                self._replayed += 1
+                return done[1], True
+            flight = self._in_flight.get(key)
+            if flight is None:
+                break
+            self._check(fingerprint, flight[0])
+            self._joined += 1
+            # `shield`: cancelar a quien espera no afecta a la solicitud original.
+            await asyncio.shield(flight[1])
+
+        finished = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (fingerprint, finished)
+        claimed = False
+        try:
+            if self._backend is not None:
+                shared = await self._claim(key, fingerprint)
+                if shared is not None:
+                    self._replayed += 1
+                    self._joined += 1
+                    return shared, True
+                claimed = True
+            value = await work()
+            if value is not None:
+                if self._backend is None:
+                    self._store(key, fingerprint, value)
+                else:
+                    record = fingerprint.encode() + b"\n" + self._encode(value)
+                    await self._shared("set", self._prefix + key, record, self.ttl)
+            return value, False
+        finally:
+            del self._in_flight[key]
+            finished.set_result(None)
+            if claimed:
+                await asyncio.shield(self._shared("delete", self._prefix + key + ":run"))
+
+    def stats(self) -> dict:
+        """Resultados guardados, solicitudes en curso y duplicados atendidos.
+
+        `replayed` cuenta los duplicados respondidos sin ejecutar el trabajo;
+        `joined`, los que además esperaron a una solicitud en curso (de este
+        u otro worker). Con backend compartido `entries` es siempre 0: los
+        resultados viven en el backend.
+        """
+        return {
+            "entries": len(self._done),
+            "in_flight": len(self._in_flight),
+            "replayed": self._replayed,
+            "joined": self._joined,
+        }
+
+    def clear(self) -> None:
+        """Descarta los resultados guardados en el worker (no los del backend)."""
+        self._done.clear()
@@ -0,0 +1,418 @@
+"""
+Caché de la ventana reciente de cada sesión de chat.
+
+`ChatService.process_message` pide los últimos mensajes de la sesión en cada
+turno, aunque el propio servicio los escribió segundos antes. Este módulo
+mantiene esa ventana en memoria:
+
+- `SessionWindowCache`: LRU acotado por número de sesiones y por bytes.
+- `SharedSessionWindowCache`: misma interfaz sobre un `KeyValueBackend`
+  (archivo o Redis), para compartir las ventanas entre workers y nodos.
+- `CachedChatRepository`: decorador de `IChatRepository` que la puebla en
+  `save_message`, la invalida en `delete_session_history` y recurre al
+  repositorio interno (BD) ante un fallo de caché o tras un reinicio.
+
+En régimen estable un turno de chat no hace lecturas de historial.
+
+Para no guardar una ventana vieja cuando otro request escribe mientras se
+lee la BD, cada llenado tras un fallo obtiene un token (`begin_fill`); una
+escritura o invalidación concurrente lo anula y `put` descarta la ventana.
+
+Si el backend compartido no responde (Redis caído, timeout de un bloqueo),
+la caché compartida se comporta como un fallo de caché y los requests van a
+la BD; una escritura que no pudo aplicarse a la ventana queda corregida, a
+más tardar, cuando la ventana expira por TTL.
+"""
+
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import orjson
+
+from src.domain.entities import ChatMessage
+from src.domain.repositories import IChatRepository
+from src.infrastructure.cache.backends import KeyValueBackend
+
+logger = logging.getLogger(__name__)
+
+# Vida máxima (s) de un token de llenado en un backend compartido.
+_FILL_TTL = 30.0
+
+# Sobrecosto aproximado (bytes) de cada mensaje además de su texto.
+_MESSAGE_OVERHEAD = 160
+
+
+def _message_size(message: ChatMessage) -> int:
+    """Estima el tamaño en memoria de un mensaje cacheado."""
+    return len(message.message.encode("utf-8")) + len(message.session_id) + _MESSAGE_OVERHEAD
+
+
+class SessionWindowCache:
+    """LRU de ventanas recientes por sesión, acotado por sesiones y bytes.
+
+    Cada entrada guarda los últimos `window` mensajes de una sesión y si esa
+    ventana contiene el historial completo (sesiones más cortas que la
+    ventana), lo que permite responder pedidos de cualquier tamaño ≤ `window`.
+
+    Attributes:
+        window (int): Mensajes retenidos por sesión.
+        max_sessions (int): Máximo de sesiones en caché.
+        max_bytes (int): Presupuesto total aproximado en bytes.
+        hits (int): Lecturas resueltas desde la caché.
+        misses (int): Lecturas que tuvieron que ir al repositorio interno.
+    """
+
+    def __init__(self, window: int = 6, max_sessions: int = 10_000, max_bytes: int = 32 * 1024 * 1024):
+        """Inicializa la caché vacía.
+
+        Args:
+            window (int): Mensajes retenidos por sesión.
+            max_sessions (int): Máximo de sesiones activas en caché.
+            max_bytes (int): Presupuesto total aproximado en bytes.
+        """
+        self.window = window
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[List[ChatMessage], bool, int]]" = OrderedDict()
+        self._bytes = 0
+        self._fills: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def size_bytes(self) -> int:
+        """Tamaño total estimado de las ventanas cacheadas."""
+        return self._bytes
+
+    def __len__(self) -> int:
+        """Cantidad de sesiones en caché."""
+        return len(self._entries)
+
+    def get(self, session_id: str, count: int) -> Optional[List[ChatMessage]]:
+        """Obtiene los últimos `count` mensajes si la caché puede responder.
+
+        Args:
+            session_id (str): Identificador de la sesión.
+            count (int): Cantidad de mensajes pedidos.
+
+        Returns:
+            Optional[List[ChatMessage]]: Mensajes en orden cronológico o `None`
+            si la sesión no está en caché o la ventana no alcanza.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or count > self.window:
+                self.misses += 1
+                return None
+            messages, complete, _ = entry
+            if len(messages) < count and not complete:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return messages[-count:] if count else []
+
+    def begin_fill(self, session_id: str) -> object:
+        """Registra que se va a leer la ventana de la sesión desde el repositorio.
+
+        Args:
+            session_id (str): Identificador de la sesión.
+
+        Returns:
+            object: Token a pasar a `put`; queda anulado si hay escrituras entretanto.
+        """
+        token = object()
+        with self._lock:
+            self._fills[session_id] = token
+        return token
+
+    def put(self, session_id: str, messages: List[ChatMessage], complete: bool,
+            token: Optional[object] = None) -> None:
+        """Guarda la ventana de una sesión leída desde el repositorio.
+
+        Args:
+            session_id (str): Identificador de la sesión.
+            messages (List[ChatMessage]): Mensajes recientes en orden cronológico.
+            complete (bool): `True` si `messages` es todo el historial de la sesión.
+            token (Optional[object]): Token de `begin_fill`; si fue anulado no se guarda nada.
+        """
+        kept = list(messages[-self.window:])
+        complete = complete and len(kept) == len(messages)
+        with self._lock:
+            if token is not None:
+                if self._fills.get(session_id) is not token:
+                    return
+                del self._fills[session_id]
+            self._store(session_id, kept, complete)
+
+    def append(self, session_id: str, message: ChatMessage) -> None:
+        """Agrega un mensaje recién persistido a la ventana, si la sesión está en caché.
+
+        Si la sesión no está cacheada no se crea la entrada: podría haber
+        mensajes previos en la BD (p. ej. tras un reinicio) que no conocemos.
+
+        Args:
+            session_id (str): Identificador de la sesión.
+            message (ChatMessage): Mensaje persistido.
+        """
+        with self._lock:
+            self._fills.pop(session_id, None)
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return
+            messages, complete, _ = entry
+            messages = messages + [message]
+            if len(messages) > self.window:
+                messages = messages[-self.window:]
+                complete = False
+            self._store(session_id, messages, complete)
+
+    def invalidate(self, session_id: str) -> None:
+        """Descarta la ventana de una sesión.
+
+        Args:
+            session_id (str): Identificador de la sesión.
+        """
+        with self._lock:
+            self._fills.pop(session_id, None)
+            entry = self._entries.pop(session_id, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+
+    def clear(self) -> None:
+        """Vacía la caché por completo."""
+        with self._lock:
+            self._entries.clear()
+            self._fills.clear()
+            self._bytes = 0
+
+    def _store(self, session_id: str, messages: List[ChatMessage], complete: bool) -> None:
+        """Reemplaza una entrada y aplica la política LRU (requiere el lock)."""
+        size = sum(_message_size(m) for m in messages)
+        old = self._entries.pop(session_id, None)
+        if old is not None:
+            self._bytes -= old[2]
+        self._entries[session_id] = (messages, complete, size)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_sessions or self._bytes > self.max_bytes):
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+
+def _encode_window(messages: List[ChatMessage], complete: bool) -> bytes:
+    """Serializa una ventana para guardarla en un backend compartido."""
+    return orjson.dumps({
+        "complete": complete,
+        "messages": [[m.id, m.session_id, m.role, m.message, m.timestamp.isoformat()] for m in messages],
+    })
+
+
+def _decode_window(raw: bytes) -> Tuple[List[ChatMessage], bool]:
+    """Reconstruye una ventana serializada con `_encode_window`."""
+    data = orjson.loads(raw)
+    messages = [
+        ChatMessage.from_trusted(id=i, session_id=s, role=r, message=m, timestamp=datetime.fromisoformat(ts))
+        for i, s, r, m, ts in data["messages"]
+    ]
+    return messages, data["complete"]
+
+
+class SharedSessionWindowCache:
+    """Ventanas recientes por sesión guardadas en un `KeyValueBackend`.
+
+    Expone la misma interfaz que `SessionWindowCache`. Las ventanas se
+    serializan con orjson y cada modificación (`append`) se hace bajo
+    `backend.lock`, así dos workers que escriben en la misma sesión no pierden
+    mensajes. La expulsión la resuelve el backend (LRU o TTL). Un error del
+    backend (`OSError`/`ConnectionError`) cuenta como fallo de caché y no
+    llega al request.
+
+    Attributes:
+        window (int): Mensajes retenidos por sesión.
+        ttl (Optional[float]): Segundos de vida de una ventana inactiva.
+        hits (int): Lecturas resueltas desde el backend en este proceso.
+        misses (int): Lecturas que tuvieron que ir al repositorio interno.
+        errors (int): Operaciones abandonadas por un error del backend.
+    """
+
+    def __init__(self, backend: KeyValueBackend, window: int = 6, ttl: Optional[float] = 3600.0,
+                 prefix: str = "chat:window:"):
+        """Inicializa la caché sobre el backend indicado.
+
+        Args:
+            backend (KeyValueBackend): Almacenamiento compartido.
+            window (int): Mensajes retenidos por sesión.
+            ttl (Optional[float]): Segundos de vida de una ventana inactiva.
+            prefix (str): Prefijo de las claves en el backend.
+        """
+        self.window = window
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._backend = backend
+        self._prefix = prefix
+
+    @property
+    def backend(self) -> KeyValueBackend:
+        """Backend donde se guardan las ventanas."""
+        return self._backend
+
+    def _failed(self, operation: str, session_id: str, exc: Exception) -> None:
+        """Registra un error del backend que se degrada a fallo de caché."""
+        self.errors += 1
+        logger.warning("Caché de ventanas no disponible (%s %s): %s", operation, session_id, exc)
+
+    def _key(self, session_id: str) -> str:
+        """Clave del backend para una sesión."""
+        return self._prefix + session_id
+
+    def _fill_key(self, session_id: str) -> str:
+        """Clave del token de llenado en curso de una sesión."""
+        return self._prefix + "fill:" + session_id
+
+    def get(self, session_id: str, count: int) -> Optional[List[ChatMessage]]:
+        """Obtiene los últimos `count` mensajes si la ventana compartida alcanza."""
+        try:
+            raw = self._backend.get(self._key(session_id)) if count <= self.window else None
+        except (OSError, ConnectionError) as exc:
+            self._failed("get", session_id, exc)
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        messages, complete = _decode_window(raw)
+        if len(messages) < count and not complete:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return messages[-count:] if count else []
+
+    def begin_fill(self, session_id: str) -> object:
+        """Registra un llenado en curso (visible para todos los workers)."""
+        token = uuid.uuid4().hex.encode()
+        try:
+            self._backend.set(self._fill_key(session_id), token, ttl=_FILL_TTL)
+        except (OSError, ConnectionError) as exc:
+            # Un token que no quedó registrado nunca coincide: `put` no guarda.
+            self._failed("begin_fill", session_id, exc)
+        return token
+
+    def put(self, session_id: str, messages: List[ChatMessage], complete: bool,
+            token: Optional[object] = None) -> None:
+        """Guarda la ventana si el token de llenado sigue vigente."""
+        kept = list(messages[-self.window:])
+        complete = complete and len(kept) == len(messages)
+        key = self._key(session_id)
+        try:
+            with self._backend.lock(key):
+                if token is not None:
+                    if self._backend.get(self._fill_key(session_id)) != token:
+                        return
+                    self._backend.delete(self._fill_key(session_id))
+                self._backend.set(key, _encode_window(kept, complete), self.ttl)
+        except (OSError, ConnectionError) as exc:
+            self._failed("put", session_id, exc)
+
+    def append(self, session_id: str, message: ChatMessage) -> None:
+        """Agrega un mensaje a la ventana compartida, si existe."""
+        key = self._key(session_id)
+        try:
+            with self._backend.lock(key):
+                self._backend.delete(self._fill_key(session_id))
+                raw = self._backend.get(key)
+                if raw is None:
+                    return
+                messages, complete = _decode_window(raw)
+                messages.append(message)
+                if len(messages) > self.window:
+                    messages = messages[-self.window:]
+                    complete = False
+                self._backend.set(key, _encode_window(messages, complete), self.ttl)
+        except (OSError, ConnectionError) as exc:
+            self._failed("append", session_id, exc)
+            self._discard(session_id)
+
+    def invalidate(self, session_id: str) -> None:
+        """Elimina la ventana de la sesión para todos los workers."""
+        key = self._key(session_id)
+        try:
+            with self._backend.lock(key):
+                self._backend.delete(self._fill_key(session_id))
+                self._backend.delete(key)
+        except (OSError, ConnectionError) as exc:
+            self._failed("invalidate", session_id, exc)
+            self._discard(session_id)
+
+    def _discard(self, session_id: str) -> None:
+        """Intenta borrar la ventana sin bloqueo tras una escritura fallida."""
+        try:
+            self._backend.delete(self._fill_key(session_id))
+            self._backend.delete(self._key(session_id))
+        except (OSError, ConnectionError):
+            pass
+
+
+class CachedChatRepository(IChatRepository):
+    """Decorador de `IChatRepository` que sirve la ventana reciente desde memoria.
+
+    Attributes:
+        _inner (IChatRepository): Repositorio real (normalmente SQL).
+        _cache (SessionWindowCache | SharedSessionWindowCache): Caché de ventanas.
+    """
+
+    def __init__(self, inner: IChatRepository, cache):
+        """Crea el decorador.
+
+        Args:
+            inner (IChatRepository): Repositorio al que se delega.
+            cache (SessionWindowCache | SharedSessionWindowCache): Caché de
+                ventanas, en proceso o sobre un backend compartido.
+        """
+        self._inner = inner
+        self._cache = cache
+
+    def save_message(self, message: ChatMessage) -> ChatMessage:
+        """Persiste en el repositorio interno y agrega el mensaje a la ventana."""
+        saved = self._inner.save_message(message)
+        self._cache.append(saved.session_id, saved)
+        return saved
+
+    def save_messages(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        """Persiste el lote en el repositorio interno y lo agrega a las ventanas."""
+        saved = self._inner.save_messages(messages)
+        for m in saved:
+            self._cache.append(m.session_id, m)
+        return saved
+
+    def get_session_history(self, session_id: str, limit: Optional[int] = None) -> List[ChatMessage]:
+        """Delegado al repositorio interno (el historial completo no se cachea)."""
+        return self._inner.get_session_history(session_id, limit)
+
+    def delete_session_history(self, session_id: str) -> int:
+        """Invalida la ventana y elimina el historial en el repositorio interno."""
+        self._cache.invalidate(session_id)
+        try:
+            return self._inner.delete_session_history(session_id)
+        finally:
+            self._cache.invalidate(session_id)
+
+    def get_recent_messages(self, session_id: str, count: int) -> List[ChatMessage]:
+        """Retorna la ventana desde caché o la carga del repositorio interno."""
+        cached = self._cache.get(session_id, count)
+        if cached is not None:
+            return cached
+        fetch = max(count, self._cache.window)
+        token = self._cache.begin_fill(session_id)
+        try:
+            rows = self._inner.get_recent_messages(session_id, fetch)
+        except Exception:
+            self._cache.invalidate(session_id)
+            raise
+        self._cache.put(session_id, rows, complete=len(rows) < fetch, token=token)
+        return rows[-count:] if count else []
@@ -0,0 +1,169 @@
+"""
+Configuración centralizada de la aplicación.
+
+Carga `.env` una sola vez y expone los valores como un `Settings` inmutable.
+El resto de módulos obtiene la configuración con `get_settings()` en lugar de
+llamar a `load_dotenv()`/`os.getenv` por su cuenta.
+"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+_TRUE = ("1", "true", "yes")
+
+
+@dataclass(slots=True, frozen=True)
+class Settings:
+    """Valores de configuración leídos del entorno.
+
+    Attributes:
+        database_url (str): URL de SQLAlchemy.
+        database_replica_urls (Tuple[str, ...]): Réplicas de solo lectura (vacío = sin réplicas).
+        replica_sticky_seconds (float): Segundos que una sesión de chat escrita lee de la principal.
+        gemini_api_key (Optional[str]): Clave de la API de Gemini.
+        gemini_model (str): Modelo de Gemini a usar.
+        llm_provider (str): `gemini`, `fake` o `replay`.
+        fake_llm_latency (float): Latencia simulada del proveedor `fake` (s).
+        llm_journal (str): Archivo donde se graban las llamadas al modelo (vacío = sin grabar).
+        llm_replay_journal (str): Journal que responde con `LLM_PROVIDER=replay`.
+        llm_replay_time_scale (float): Factor de la latencia grabada al reproducir (0 = sin espera).
+        cache_url (str): Backend compartido de ventanas de chat (vacío = en proceso).
+        chat_write_behind (bool): Activa la persistencia diferida del historial.
+        chat_write_journal (Optional[str]): Ruta del journal write-behind.
+        catalog_max_age (float): Segundos de validez del snapshot del catálogo.
+        catalog_columnar (bool): Filtra el catálogo con columnas NumPy.
+        catalog_events_url (str): Transporte de cambios del catálogo entre workers (vacío = ninguno).
+        catalog_poll_interval (float): Segundos entre sondeos del registro de cambios (0 = sin sondeo).
+        vector_index_path (Optional[str]): Directorio del índice vectorial (None = desactivado).
+        embedding_model (str): Embedder del índice (`hashed`, `hashed:<dim>` o `st:<modelo>`).
+        chat_archive_after_days (float): Días de inactividad para archivar una sesión.
+        chat_shards (int): Archivos SQLite del historial de chat (0 = tabla única).
+        chat_shard_dir (str): Carpeta de los shards del historial.
+        chat_intents (bool): Responde consultas simples de catálogo sin la IA (desactivado por defecto).
+        chat_request_timeout (float): Plazo máximo de `/chat` en segundos (0 = sin plazo).
+        idempotency_ttl (float): Segundos que se repite la respuesta de una `Idempotency-Key`.
+        idempotency_max_keys (int): Respuestas de `/chat` guardadas por clave de idempotencia.
+        llm_max_concurrency (int): Llamadas simultáneas al modelo por worker.
+        llm_queue_timeout (float): Espera máxima por un cupo del modelo (s).
+        session_rate_per_min (float): Requests de chat por minuto por sesión (0 = sin límite).
+        client_rate_per_min (float): Requests de chat por minuto por cliente (0 = sin límite).
+        slow_query_ms (float): Sentencias SQL más lentas que esto se registran con sus parámetros.
+        query_count_warn (int): Requests con más sentencias SQL que esto se registran (0 = nunca).
+        compress_min_bytes (int): Tamaño mínimo (bytes) de respuesta a comprimir (0 = sin compresión).
+        profile_token (Optional[str]): Secreto para perfilar requests (None = perfilado desactivado).
+        profile_dir (str): Carpeta de los perfiles.
+        profile_interval (float): Segundos entre muestras del perfilador.
+        profile_mode (str): `sample` (pila muestreada, folded) o `cprofile`.
+        web_concurrency (Optional[int]): Workers de uvicorn (None = uno por CPU).
+        host (str): Dirección de escucha del servidor.
+        port (int): Puerto del servidor.
+        graceful_timeout (int): Segundos para drenar requests al apagar.
+        forwarded_allow_ips (str): IPs del proxy cuyas cabeceras `X-Forwarded-*` se aceptan.
+    """
+
+    database_url: str = "sqlite:///./data/ecommerce_chat.db"
+    database_replica_urls: Tuple[str, ...] = ()
+    replica_sticky_seconds: float = 5.0
+    gemini_api_key: Optional[str] = None
+    gemini_model: str = "gemini-2.5-flash"
+    llm_provider: str = "gemini"
+    fake_llm_latency: float = 0.0
+    llm_journal: str = ""
+    llm_replay_journal: str = "./data/llm_journal.jsonl.gz"
+    llm_replay_time_scale: float = 1.0
+    cache_url: str = ""
+    chat_write_behind: bool = False
+    chat_write_journal: Optional[str] = None
+    catalog_max_age: float = 60.0
+    catalog_columnar: bool = False
+    catalog_events_url: str = ""
+    catalog_poll_interval: float = 5.0
+    vector_index_path: Optional[str] = None
+    embedding_model: str = "hashed"
+    chat_archive_after_days: float = 30.0
+    chat_shards: int = 0
+    chat_shard_dir: str = "./data/chat_shards"
+    chat_intents: bool = False
+    chat_request_timeout: float = 60.0
+    idempotency_ttl: float = 86400.0
+    idempotency_max_keys: int = 10_000
+    llm_max_concurrency: int = 8
+    llm_queue_timeout: float = 10.0
+    session_rate_per_min: float = 30.0
+    client_rate_per_min: float = 120.0
+    slow_query_ms: float = 200.0
+    query_count_warn: int = 20
+    compress_min_bytes: int = 1024
+    profile_token: Optional[str] = None
+    profile_dir: str = "./data/profiles"
+    profile_interval: float = 0.005
+    profile_mode: str = "sample"
+    web_concurrency: Optional[int] = None
+    host: str = "0.0.0.0"
+    port: int = 8000
+    graceful_timeout: int = 30
+    forwarded_allow_ips: str = "127.0.0.1"
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Construye la configuración a partir de las variables de entorno."""
+        env = os.environ.get
+        workers = env("WEB_CONCURRENCY")
+        return cls(
+            database_url=env("DATABASE_URL", "sqlite:///./data/ecommerce_chat.db"),
+            database_replica_urls=tuple(u.strip() for u in env("DATABASE_REPLICA_URLS", "").split(",") if u.strip()),
+            replica_sticky_seconds=float(env("REPLICA_STICKY_SECONDS", "5")),
+            gemini_api_key=env("GEMINI_API_KEY") or None,
+            gemini_model=env("GEMINI_MODEL", "gemini-2.5-flash"),
+            llm_provider=env("LLM_PROVIDER", "gemini").lower(),
+            fake_llm_latency=float(env("FAKE_LLM_LATENCY_MS", "0")) / 1000,
+            llm_journal=env("LLM_JOURNAL", ""),
+            llm_replay_journal=env("LLM_REPLAY_JOURNAL", "./data/llm_journal.jsonl.gz"),
+            llm_replay_time_scale=float(env("LLM_REPLAY_TIME_SCALE", "1")),
+            cache_url=env("CACHE_URL", ""),
+            chat_write_behind=env("CHAT_WRITE_BEHIND", "").lower() in _TRUE,
+            chat_write_journal=env("CHAT_WRITE_JOURNAL") or None,
+            catalog_max_age=float(env("CATALOG_MAX_AGE", "60")),
+            catalog_columnar=env("CATALOG_COLUMNAR", "").lower() in _TRUE,
+            catalog_events_url=env("CATALOG_EVENTS_URL", ""),
+            catalog_poll_interval=float(env("CATALOG_POLL_INTERVAL", "5")),
+            vector_index_path=env("VECTOR_INDEX_PATH") or None,
+            embedding_model=env("EMBEDDING_MODEL", "hashed"),
+            chat_archive_after_days=float(env("CHAT_ARCHIVE_AFTER_DAYS", "30")),
+            chat_shards=max(0, int(env("CHAT_SHARDS", "0"))),
+            chat_shard_dir=env("CHAT_SHARD_DIR", "./data/chat_shards"),
+            chat_intents=env("CHAT_INTENTS", "").lower() in _TRUE,
+            chat_request_timeout=float(env("CHAT_REQUEST_TIMEOUT", "60")),
+            idempotency_ttl=float(env("IDEMPOTENCY_TTL", "86400")),
+            idempotency_max_keys=max(1, int(env("IDEMPOTENCY_MAX_KEYS", "10000"))),
+            llm_max_concurrency=max(1, int(env("LLM_MAX_CONCURRENCY", "8"))),
+            llm_queue_timeout=float(env("LLM_QUEUE_TIMEOUT", "10")),
+            session_rate_per_min=float(env("SESSION_RATE_PER_MIN", "30")),
+            client_rate_per_min=float(env("CLIENT_RATE_PER_MIN", "120")),
+            slow_query_ms=float(env("SLOW_QUERY_MS", "200")),
+            query_count_warn=int(env("QUERY_COUNT_WARN", "20")),
+            compress_min_bytes=int(env("COMPRESS_MIN_BYTES", "1024")),
+            profile_token=env("PROFILE_TOKEN") or None,
+            profile_dir=env("PROFILE_DIR", "./data/profiles"),
+            profile_interval=float(env("PROFILE_INTERVAL_MS", "5")) / 1000,
+            profile_mode=env("PROFILE_MODE", "sample").lower(),
+            web_concurrency=max(1, int(workers)) if workers else None,
+            host=env("HOST", "0.0.0.0"),
+            port=int(env("PORT", "8000")),
+            graceful_timeout=int(env("GRACEFUL_TIMEOUT", "30")),
+            forwarded_allow_ips=env("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Retorna la configuración del proceso, leyendo `.env` solo la primera vez.
+
+    Las variables ya definidas en el entorno tienen prioridad sobre `.env`.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return Settings.from_env()
@@ -1,17 +1,20 @@
 """
 Configuración de la base de datos con SQLAlchemy 2.0.
-Lee DATABASE_URL de .env y expone el Engine, SessionLocal y Base.
+Lee DATABASE_URL de la configuración y expone el Engine, SessionLocal y Base.
+Si hay réplicas de lectura (DATABASE_REPLICA_URLS), expone también `replicas`.
+El engine cuenta las sentencias por request y registra las lentas (ver
+`query_stats`), igual que los de las réplicas y los shards del historial.
 """
 
-import os
 from pathlib import Path
-from dotenv import load_dotenv
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
-load_dotenv()
+from src.infrastructure.config import get_settings
+from . import query_stats
+from .replicas import ReplicaSet
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/ecommerce_chat.db")
+DATABASE_URL = get_settings().database_url
 
 if DATABASE_URL.startswith("sqlite:///"):
     Path("data").mkdir(parents=True, exist_ok=True)
@@ -20,8 +23,15 @@ else:
     connect_args = {}
 
 engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args)
+query_stats.install(engine, slow_ms=get_settings().slow_query_ms)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
 
+# Réplicas de solo lectura (None si no hay): ver `replicas.ReplicaSet`.
+replicas = (
+    ReplicaSet(get_settings().database_replica_urls, sticky_seconds=get_settings().replica_sticky_seconds)
+    if get_settings().database_replica_urls else None
+)
+
 
 class Base(DeclarativeBase):
     """Base declarativa para los modelos ORM."""
@@ -43,8 +53,11 @@ def get_session():
 def init_db():
     """Inicializa la base de datos creando todas las tablas registradas.
 
-    Importa los modelos para registrar los mapeos y ejecuta
-    `Base.metadata.create_all`.
+    Importa los modelos para registrar los mapeos, ejecuta
+    `Base.metadata.create_all` y agrega el índice de texto completo a bases
+    creadas antes de que existiera.
     """
     from . import models  # registra modelos
+    from .fts import ensure_product_fts
     Base.metadata.create_all(bind=engine)
+    ensure_product_fts(engine)
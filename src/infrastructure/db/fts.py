@@ -0,0 +1,106 @@
+"""
+Índice de texto completo (SQLite FTS5) sobre la tabla `products`.
+
+`products_fts` es una tabla FTS5 de contenido externo: guarda solo el índice
+invertido y se mantiene sincronizada con `products` mediante triggers, de
+modo que cualquier escritura (ORM, Core o SQL directo) lo actualiza.
+
+- Tokenizador `unicode61 remove_diacritics 2`: insensible a mayúsculas y
+  tildes, igual que `src.domain.search.normalize`.
+- Ranking BM25 con los pesos por campo de `src.domain.search.FIELD_WEIGHTS`,
+  calculado dentro del índice: solo los `limit` mejores se unen con
+  `products`.
+
+En motores distintos de SQLite no se crea nada; el repositorio usa la
+búsqueda en memoria del dominio.
+"""
+
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from src.domain.search import FIELD_WEIGHTS, query_terms
+
+FTS_TABLE = "products_fts"
+_COLUMNS = ", ".join(field for field, _ in FIELD_WEIGHTS)
+_NEW = ", ".join(f"coalesce(new.{field}, '')" for field, _ in FIELD_WEIGHTS)
+_OLD = ", ".join(f"coalesce(old.{field}, '')" for field, _ in FIELD_WEIGHTS)
+
+_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_COLUMNS}, content='products', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.id, {_NEW}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON products BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.id, {_NEW}); END",
+)
+
+# Mismo orden de columnas que `Product.from_trusted`; menor bm25 = más relevante.
+SEARCH_SQL = text(
+    "SELECT p.id, p.name, p.brand, p.category, p.size, p.color, p.price, p.stock, "
+    "coalesce(p.description, '') "
+    f"FROM (SELECT rowid, bm25({FTS_TABLE}, {', '.join(str(w) for _, w in FIELD_WEIGHTS)}) AS score "
+    f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match ORDER BY score LIMIT :limit) AS hits "
+    "JOIN products AS p ON p.id = hits.rowid "
+    "ORDER BY hits.score, p.id"
+)
+
+
+def install_product_fts(target, connection: Connection, **kw) -> None:
+    """Crea la tabla FTS y sus triggers (listener `after_create` de `products`).
+
+    Args:
+        target: Tabla recién creada (no se usa).
+        connection (Connection): Conexión de la operación `create_all`.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    for ddl in _DDL:
+        connection.exec_driver_sql(ddl)
+
+
+def drop_product_fts(target, connection: Connection, **kw) -> None:
+    """Elimina la tabla FTS (listener `before_drop` de `products`)."""
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def ensure_product_fts(engine: Engine) -> None:
+    """Crea el índice en una base existente que aún no lo tiene y lo puebla.
+
+    Args:
+        engine (Engine): Engine de la aplicación.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+        ).first()
+        if exists is None:
+            install_product_fts(None, conn)
+            conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def match_expression(query: str, any_term: bool = False) -> Optional[str]:
+    """Traduce una consulta libre a una expresión MATCH de FTS5.
+
+    Cada término se busca por prefijo. Por defecto se exigen todos (AND);
+    con `any_term` basta con uno (OR).
+
+    Args:
+        query (str): Texto del usuario.
+        any_term (bool): Combinar los términos con OR en lugar de AND.
+
+    Returns:
+        Optional[str]: Expresión MATCH, o `None` si no hay términos.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return None
+    return (" OR " if any_term else " ").join(f'"{t}"*' for t in terms)
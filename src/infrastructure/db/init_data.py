@@ -8,6 +8,7 @@ Regla del taller:
 
 from src.infrastructure.db.database import init_db, SessionLocal
 from src.infrastructure.db.models import ProductModel
+from src.infrastructure.events.changes import CHANGE_BULK, record_change
 
 
 def load_initial_data() -> int:
@@ -34,6 +35,8 @@ def load_initial_data() -> int:
                 ProductModel(name="Go Run Ride 11",    brand="Skechers",    category="Running", size="42", color="Rojo",   price=95.0,  stock=9,  description="Ligero y cómodo"),
             ]
             db.add_all(products)
+            # Los workers en marcha ven la carga en su próximo sondeo.
+            record_change(db, CHANGE_BULK)
             db.commit()
             inserted = len(products)
         return inserted
@@ -1,9 +1,10 @@
-"""Modelos ORM (SQLAlchemy) para productos y mensajes de chat."""
+"""Modelos ORM (SQLAlchemy) para productos, mensajes de chat, su archivo y el registro de cambios del catálogo."""
 
 from datetime import datetime
-from sqlalchemy import String, Integer, Float, Text, DateTime
+from sqlalchemy import String, Integer, Float, Text, DateTime, LargeBinary, event
 from sqlalchemy.orm import Mapped, mapped_column
 from .database import Base
+from .fts import drop_product_fts, install_product_fts
 
 
 class ProductModel(Base):
@@ -24,6 +25,11 @@ class ProductModel(Base):
     description: Mapped[str] = mapped_column(Text, default="", nullable=False)
 
 
+# Índice de texto completo (SQLite): se crea y elimina junto con la tabla.
+event.listen(ProductModel.__table__, "after_create", install_product_fts)
+event.listen(ProductModel.__table__, "before_drop", drop_product_fts)
+
+
 class ChatMemoryModel(Base):
     """Tabla `chat_memory` para historizar mensajes de conversaciones.
 
@@ -36,3 +42,38 @@ class ChatMemoryModel(Base):
     role: Mapped[str] = mapped_column(String(20), nullable=False)  # 'user' | 'assistant'
     message: Mapped[str] = mapped_column(Text, nullable=False)
     timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ChatArchiveModel(Base):
+    """Tabla `chat_archive`: historial comprimido de sesiones inactivas.
+
+    Una fila por sesión archivada; `payload` guarda todos sus mensajes (ver
+    `repositories.chat_archive`). La clave primaria es el índice que usa
+    la lectura del historial.
+
+    Columnas:
+        session_id, message_count, first_at, last_at, archived_at, payload.
+    """
+    __tablename__ = "chat_archive"
+    session_id: Mapped[str] = mapped_column(String(100), primary_key=True)
+    message_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    first_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+
+class CatalogChangeModel(Base):
+    """Tabla `catalog_changes`: registro de cambios del catálogo.
+
+    Cada escritura de productos agrega una fila en la misma transacción; su
+    `id` es la versión del catálogo que notifica `events.changes.ChangeBus`.
+
+    Columnas:
+        id, op ('upsert' | 'delete' | 'bulk'), product_id, changed_at.
+    """
+    __tablename__ = "catalog_changes"
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    op: Mapped[str] = mapped_column(String(10), nullable=False)
+    product_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
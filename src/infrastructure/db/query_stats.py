@@ -0,0 +1,97 @@
+"""
+Conteo de sentencias SQL por request y registro de consultas lentas.
+
+`install(engine)` agrega dos hooks de SQLAlchemy (`before_cursor_execute` y
+`after_cursor_execute`) que miden cada sentencia. Se instala en todos los
+engines del proceso (principal, réplicas y shards del historial), así que
+el conteo de un request incluye las lecturas que van a cualquiera de ellos:
+
+- Si hay un `QueryStats` activo en el contexto (`track`, que abre la
+  middleware de la API por request), suma la sentencia y su duración.
+  Los endpoints síncronos corren en el threadpool con una copia del
+  contexto, así que comparten el mismo `QueryStats`.
+- Si la sentencia supera `slow_ms`, la registra con sus parámetros
+  (acotados) en el logger `src.infrastructure.db.query_stats`.
+
+Fuera de un request (worker write-behind, CLIs) solo aplica el registro de
+consultas lentas.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Largo máximo de la representación de los parámetros en el log.
+_MAX_PARAMS_REPR = 500
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+_slow_seconds = 0.2
+
+
+class QueryStats:
+    """Sentencias ejecutadas y tiempo acumulado en un request.
+
+    Attributes:
+        count (int): Sentencias ejecutadas.
+        seconds (float): Tiempo total en la base de datos.
+    """
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        """Crea el contador en cero."""
+        self.count = 0
+        self.seconds = 0.0
+
+
+@contextmanager
+def track() -> Iterator[QueryStats]:
+    """Cuenta las sentencias ejecutadas dentro del bloque (en este contexto)."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started"]
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    if elapsed >= _slow_seconds:
+        params = repr(parameters)
+        if len(params) > _MAX_PARAMS_REPR:
+            params = params[:_MAX_PARAMS_REPR] + "…"
+        logger.warning("Consulta lenta (%.1f ms): %s | parámetros: %s", elapsed * 1000, statement, params)
+
+
+def install(engine: Engine, slow_ms: Optional[float] = None) -> None:
+    """Registra los hooks de conteo y de consultas lentas en `engine`.
+
+    Es idempotente: instalar dos veces en el mismo engine no duplica cuentas.
+
+    Args:
+        engine (Engine): Engine a instrumentar.
+        slow_ms (Optional[float]): Umbral (ms) de consulta lenta para todo el
+            proceso; None conserva el actual.
+    """
+    global _slow_seconds
+    if slow_ms is not None:
+        _slow_seconds = slow_ms / 1000
+    if not event.contains(engine, "before_cursor_execute", _before):
+        event.listen(engine, "before_cursor_execute", _before)
+        event.listen(engine, "after_cursor_execute", _after)
@@ -0,0 +1,208 @@
+"""
+Réplicas de solo lectura de la base principal.
+
+Con `DATABASE_REPLICA_URLS` (URLs separadas por comas) las lecturas de los
+repositorios SQL de productos e historial van a una réplica sana, en turnos
+rotativos, y las escrituras siguen yendo a la principal. La replicación en
+sí (streaming de PostgreSQL, Litestream/LiteFS para SQLite, ...) queda
+fuera de la aplicación; aquí solo se elige a quién preguntar.
+
+- Lee-lo-que-escribiste: tras escribir en una sesión de chat, sus lecturas
+  van a la principal durante `sticky_seconds` (el retraso de replicación
+  tolerado). Con un `backend` compartido (el de `CACHE_URL`) la marca se
+  guarda allí con ese TTL y la respetan todos los workers; sin él es del
+  worker, y un request de la misma sesión atendido por otro worker puede
+  leer de una réplica atrasada (`get_session_history`, por ejemplo, no pasa
+  por la ventana de chat en caché).
+- Salud: cada réplica se verifica con `SELECT 1` como máximo cada
+  `check_interval` segundos. Una réplica que falla (en la verificación o en
+  una lectura) queda fuera hasta la siguiente verificación; sin réplicas
+  sanas se lee de la principal.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.infrastructure.cache.backends import KeyValueBackend
+from . import query_stats
+
+logger = logging.getLogger(__name__)
+
+
+class _Replica:
+    """Engine de una réplica y su estado de salud."""
+
+    __slots__ = ("url", "engine", "sessions", "healthy", "checked_at", "reads", "failures")
+
+    def __init__(self, url: str):
+        connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+        self.url = url
+        self.engine = create_engine(url, connect_args=connect_args)
+        query_stats.install(self.engine)
+        self.sessions = sessionmaker(bind=self.engine, autoflush=False, expire_on_commit=False)
+        self.healthy = True
+        self.checked_at = float("-inf")
+        self.reads = 0
+        self.failures = 0
+
+
+class ReplicaSet:
+    """Selección de réplica para lecturas con afinidad tras escribir.
+
+    Attributes:
+        sticky_seconds (float): Tiempo que una sesión escrita lee de la principal.
+        check_interval (float): Segundos entre verificaciones de salud.
+        backend (Optional[KeyValueBackend]): Dónde se comparten las marcas de
+            escritura entre workers (`None` = solo en el worker).
+    """
+
+    def __init__(self, urls: Sequence[str], sticky_seconds: float = 5.0,
+                 check_interval: float = 10.0, max_sticky_keys: int = 10_000,
+                 backend: Optional[KeyValueBackend] = None, prefix: str = "replica:written:"):
+        """Crea los engines de las réplicas.
+
+        Args:
+            urls (Sequence[str]): URLs de SQLAlchemy de las réplicas.
+            sticky_seconds (float): Ventana de lee-lo-que-escribiste.
+            check_interval (float): Intervalo de verificación de salud.
+            max_sticky_keys (int): Sesiones recordadas como máximo (LRU).
+            backend (Optional[KeyValueBackend]): Backend compartido de las marcas.
+            prefix (str): Prefijo de las marcas en el backend.
+        """
+        self._replicas: List[_Replica] = [_Replica(u) for u in urls]
+        self._turn = itertools.cycle(range(len(self._replicas)))
+        self.sticky_seconds = sticky_seconds
+        self.check_interval = check_interval
+        self._max_sticky = max_sticky_keys
+        self.backend = backend
+        self._prefix = prefix
+        self._written: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.primary_reads = 0
+
+    def mark_written(self, key: str) -> None:
+        """Registra una escritura de `key`: sus lecturas irán a la principal."""
+        with self._lock:
+            self._written[key] = time.monotonic()
+            self._written.move_to_end(key)
+            if len(self._written) > self._max_sticky:
+                self._written.popitem(last=False)
+        if self.backend is not None and self.sticky_seconds > 0:
+            try:
+                self.backend.set(self._prefix + key, b"1", ttl=self.sticky_seconds)
+            except (OSError, ConnectionError) as e:
+                logger.warning("No se pudo compartir la escritura de %s: %s", key, e)
+
+    def _sticky(self, key: Optional[str]) -> bool:
+        """True si `key` se escribió hace menos de `sticky_seconds` (en cualquier worker)."""
+        if key is None:
+            return False
+        with self._lock:
+            at = self._written.get(key)
+            if at is not None:
+                if time.monotonic() - at < self.sticky_seconds:
+                    return True
+                del self._written[key]
+        if self.backend is None or self.sticky_seconds <= 0:
+            return False
+        try:
+            return self.backend.get(self._prefix + key) is not None
+        except (OSError, ConnectionError) as e:
+            # Sin saber si otro worker escribió, se lee de la principal.
+            logger.warning("No se pudo consultar la marca de escritura de %s: %s", key, e)
+            return True
+
+    def _check(self, replica: _Replica, now: float) -> bool:
+        """Verifica la réplica si corresponde y retorna si está sana."""
+        if now - replica.checked_at < self.check_interval:
+            return replica.healthy
+        replica.checked_at = now
+        try:
+            with replica.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            if not replica.healthy:
+                logger.info("Réplica %s disponible de nuevo", replica.url)
+            replica.healthy = True
+        except SQLAlchemyError as e:
+            if replica.healthy:
+                logger.warning("Réplica %s no disponible: %s", replica.url, e)
+            replica.healthy = False
+        return replica.healthy
+
+    def pick(self, key: Optional[str] = None) -> Optional[_Replica]:
+        """Réplica para leer `key` (None = leer de la principal)."""
+        if self._sticky(key):
+            return None
+        now = time.monotonic()
+        for _ in range(len(self._replicas)):
+            replica = self._replicas[next(self._turn)]
+            if self._check(replica, now):
+                return replica
+        return None
+
+    def fail(self, replica: _Replica, error: Exception) -> None:
+        """Saca de servicio una réplica cuya lectura falló hasta la próxima verificación."""
+        logger.warning("Lectura fallida en la réplica %s: %s", replica.url, error)
+        replica.healthy = False
+        replica.failures += 1
+        replica.checked_at = time.monotonic()
+
+    @contextmanager
+    def session(self, replica: _Replica) -> Iterator[Session]:
+        """Sesión de corta duración sobre `replica`."""
+        db = replica.sessions()
+        replica.reads += 1
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, object]:
+        """Lecturas por réplica, fallos, salud y lecturas desviadas a la principal."""
+        return {
+            "primary_reads": self.primary_reads,
+            "sticky_sessions": len(self._written),
+            "replicas": [
+                {"url": r.engine.url.render_as_string(hide_password=True), "healthy": r.healthy,
+                 "reads": r.reads, "failures": r.failures}
+                for r in self._replicas
+            ],
+        }
+
+    def dispose(self) -> None:
+        """Cierra las conexiones de todas las réplicas."""
+        for r in self._replicas:
+            r.engine.dispose()
+
+
+def read_from_replica(replicas: Optional[ReplicaSet], key: Optional[str], read, primary: Session):
+    """Ejecuta `read(session)` en una réplica o, si no hay o falla, en la principal.
+
+    Args:
+        replicas (ReplicaSet | None): Réplicas configuradas.
+        key (str | None): Clave de afinidad (p. ej. `session_id`).
+        read (Callable[[Session], T]): Lectura a ejecutar.
+        primary (Session): Sesión de la base principal.
+
+    Returns:
+        T: Resultado de `read`.
+    """
+    replica = replicas.pick(key) if replicas is not None else None
+    if replica is not None:
+        try:
+            with replicas.session(replica) as db:
+                return read(db)
+        except SQLAlchemyError as e:
+            replicas.fail(replica, e)
+    if replicas is not None:
+        replicas.primary_reads += 1
+    return read(primary)
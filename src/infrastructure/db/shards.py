@@ -0,0 +1,191 @@
+"""
+Particionado del historial de chat en varios archivos SQLite por hash de sesión.
+
+Con `CHAT_SHARDS=N` (N > 0) los mensajes de chat no van a `chat_memory` de la
+base principal sino a N archivos `chat_XX.db` en `CHAT_SHARD_DIR`; cada
+sesión vive completa en el shard `crc32(session_id) % N`. SQLite admite un
+solo escritor por archivo, así que repartir las sesiones reparte el bloqueo
+de escritura, y cada índice por `session_id` es N veces más chico. Cada
+shard se mantiene por separado (`maintain`, archivo de sesiones inactivas).
+
+El número de shards no se puede cambiar sin redistribuir los datos.
+
+Al activar el particionado sobre una base con historial, las sesiones de
+`chat_memory`/`chat_archive` de la base principal dejan de leerse: hay que
+moverlas a sus shards con `--migrate` antes de abrir el tráfico (el
+servidor avisa al iniciar si quedan filas).
+
+Uso (mantenimiento, p. ej. desde cron):
+    python -m src.infrastructure.db.shards
+    python -m src.infrastructure.db.shards --migrate   # base principal -> shards
+"""
+
+import argparse
+import zlib
+from contextlib import contextmanager
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import create_engine, delete, event, insert, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import query_stats
+from .database import Base
+
+
+def _sqlite_pragmas(dbapi_conn, _record) -> None:
+    """WAL y `synchronous=NORMAL`: lectores concurrentes y commits sin fsync."""
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA busy_timeout=5000")
+    cur.close()
+
+
+class ChatShards:
+    """Conjunto de bases SQLite que particionan el historial de chat.
+
+    Attributes:
+        directory (Path): Carpeta de los archivos `chat_XX.db`.
+        count (int): Cantidad de shards.
+    """
+
+    def __init__(self, directory: str, count: int):
+        """Crea los engines (uno por shard); las tablas se crean con `init`.
+
+        Args:
+            directory (str): Carpeta de los archivos.
+            count (int): Cantidad de shards (> 0).
+        """
+        if count <= 0:
+            raise ValueError("La cantidad de shards debe ser mayor que 0")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.count = count
+        self.engines = []
+        self._sessions = []
+        for i in range(count):
+            engine = create_engine(f"sqlite:///{self.directory / f'chat_{i:02d}.db'}",
+                                   connect_args={"check_same_thread": False})
+            event.listen(engine, "connect", _sqlite_pragmas)
+            query_stats.install(engine)
+            self.engines.append(engine)
+            self._sessions.append(sessionmaker(bind=engine, autoflush=False, expire_on_commit=False))
+
+    def index_for(self, session_id: str) -> int:
+        """Shard de la sesión (estable entre procesos: CRC32, no `hash()`)."""
+        return zlib.crc32(session_id.encode()) % self.count
+
+    def init(self) -> None:
+        """Crea `chat_memory` y `chat_archive` en cada shard."""
+        from . import models
+
+        tables = [models.ChatMemoryModel.__table__, models.ChatArchiveModel.__table__]
+        for engine in self.engines:
+            Base.metadata.create_all(bind=engine, tables=tables)
+
+    @contextmanager
+    def session(self, index: int) -> Iterator[Session]:
+        """Sesión de corta duración sobre el shard `index`."""
+        db = self._sessions[index]()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def maintain(self) -> List[Tuple[int, int]]:
+        """Mantenimiento por shard: `PRAGMA optimize` y checkpoint del WAL.
+
+        Returns:
+            list[tuple[int, int]]: (shard, mensajes en la tabla caliente).
+        """
+        out = []
+        for i, engine in enumerate(self.engines):
+            with engine.connect() as conn:
+                conn.execute(text("PRAGMA optimize"))
+                conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+                out.append((i, conn.execute(text("SELECT COUNT(*) FROM chat_memory")).scalar()))
+        return out
+
+    def migrate_from(self, source: Engine, batch: int = 1000) -> Dict[str, int]:
+        """Mueve el historial de la base principal a los shards.
+
+        Cada lote se inserta (y confirma) en los shards antes de borrarse de
+        `source`, así que una interrupción no pierde mensajes; a lo sumo el
+        último lote de `chat_memory` queda duplicado al reintentar. Los
+        mensajes reciben IDs nuevos en su shard. Las sesiones archivadas se
+        copian por clave (reintentar no las duplica).
+
+        Args:
+            source (Engine): Base principal (`DATABASE_URL`).
+            batch (int): Filas por lote.
+
+        Returns:
+            dict: `messages` y `archived` movidos.
+        """
+        from . import models
+
+        memory, archive = models.ChatMemoryModel.__table__, models.ChatArchiveModel.__table__
+        moved = {"messages": 0, "archived": 0}
+        index_for = lambda row: self.index_for(row["session_id"])  # noqa: E731
+        while True:
+            with source.connect() as conn:
+                rows = [dict(r) for r in conn.execute(
+                    select(memory).order_by(memory.c.id).limit(batch)).mappings()]
+            if not rows:
+                break
+            for index, group in groupby(sorted(rows, key=index_for), key=index_for):
+                with self.engines[index].begin() as conn:
+                    conn.execute(insert(memory), [{k: v for k, v in r.items() if k != "id"} for r in group])
+            with source.begin() as conn:
+                conn.execute(delete(memory).where(memory.c.id.in_([r["id"] for r in rows])))
+            moved["messages"] += len(rows)
+        while True:
+            with source.connect() as conn:
+                rows = [dict(r) for r in conn.execute(
+                    select(archive).order_by(archive.c.session_id).limit(batch)).mappings()]
+            if not rows:
+                break
+            for index, group in groupby(sorted(rows, key=index_for), key=index_for):
+                with self.engines[index].begin() as conn:
+                    conn.execute(insert(archive).prefix_with("OR REPLACE"), list(group))
+            with source.begin() as conn:
+                conn.execute(delete(archive).where(archive.c.session_id.in_([r["session_id"] for r in rows])))
+            moved["archived"] += len(rows)
+        return moved
+
+    def dispose(self) -> None:
+        """Cierra las conexiones de todos los shards."""
+        for engine in self.engines:
+            engine.dispose()
+
+
+def cli() -> None:
+    """Punto de entrada de `python -m src.infrastructure.db.shards`."""
+    from src.infrastructure.config import get_settings
+
+    parser = argparse.ArgumentParser(description="Mantenimiento de los shards del historial de chat.")
+    parser.add_argument("--migrate", action="store_true",
+                        help="Mueve chat_memory/chat_archive de la base principal a los shards")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    if not settings.chat_shards:
+        raise SystemExit("CHAT_SHARDS no está configurado.")
+    shards = ChatShards(settings.chat_shard_dir, settings.chat_shards)
+    shards.init()
+    if args.migrate:
+        from .database import engine, init_db
+
+        init_db()
+        moved = shards.migrate_from(engine)
+        print(f"migrados: {moved['messages']} mensajes, {moved['archived']} sesiones archivadas")
+    for index, rows in shards.maintain():
+        print(f"shard {index:02d}: {rows} mensajes")
+    shards.dispose()
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,224 @@
+"""
+Notificación de cambios del catálogo a las cachés de cada worker.
+
+Las cachés de productos (snapshot del catálogo, facetas, ETag de
+`GET /products`) solo son correctas si se enteran de cada escritura, también
+de las hechas por otro worker, otro proceso o una carga masiva:
+
+- Registro (`catalog_changes`): cada escritura de `SQLProductRepository` y
+  cada carga masiva agrega una fila en la misma transacción. Su `id` es la
+  versión del catálogo, creciente y común a todos los procesos.
+- `ChangeBus`: tras el commit, el repositorio publica el `CatalogChange`; el
+  bus lo entrega a los suscriptores del proceso en orden de versión y lo
+  reenvía por un transporte (`events.transports`) a los demás workers.
+- Sondeo: `ChangeBus.poll` lee del registro las versiones que faltan. Cubre
+  notificaciones perdidas (transporte caído o ausente) y rellena los huecos
+  cuando una notificación llega antes que otra anterior.
+
+Los suscriptores se ejecutan en el hilo que entrega el cambio (request,
+lector del transporte o sondeo): deben ser rápidos y seguros entre hilos.
+
+Con SQLite las escrituras se serializan y las versiones se confirman en
+orden. En bases con secuencias (PostgreSQL) dos escrituras concurrentes
+pueden confirmarse fuera de orden y la menor no se entrega; `max_age` del
+snapshot del catálogo sigue acotando ese caso.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.infrastructure.db.models import CatalogChangeModel
+
+logger = logging.getLogger(__name__)
+
+CHANGE_UPSERT = "upsert"
+CHANGE_DELETE = "delete"
+# Carga o importación masiva: los suscriptores deben descartar todo.
+CHANGE_BULK = "bulk"
+
+_t = CatalogChangeModel.__table__
+
+
+@dataclass(slots=True, frozen=True)
+class CatalogChange:
+    """Un cambio del catálogo.
+
+    Attributes:
+        version (int): Versión del catálogo tras el cambio (id del registro).
+        op (str): `upsert`, `delete` o `bulk`.
+        product_id (Optional[int]): Producto afectado (None en `bulk`).
+    """
+
+    version: int
+    op: str
+    product_id: Optional[int] = None
+
+    def encode(self) -> bytes:
+        """Serializa el cambio para un transporte."""
+        return orjson.dumps([self.version, self.op, self.product_id])
+
+    @classmethod
+    def decode(cls, data: bytes) -> "CatalogChange":
+        """Reconstruye un cambio serializado con `encode`."""
+        version, op, product_id = orjson.loads(data)
+        return cls(version, op, product_id)
+
+
+def record_change(db: Session, op: str, product_id: Optional[int] = None) -> CatalogChange:
+    """Agrega el cambio al registro dentro de la transacción de `db`.
+
+    Debe llamarse antes del commit de la escritura, para que ambos se
+    confirmen (o se descarten) juntos.
+
+    Args:
+        db (Session): Sesión con la escritura pendiente.
+        op (str): `upsert`, `delete` o `bulk`.
+        product_id (Optional[int]): Producto afectado.
+
+    Returns:
+        CatalogChange: Cambio con su versión asignada.
+    """
+    row = CatalogChangeModel(op=op, product_id=product_id)
+    db.add(row)
+    db.flush()
+    return CatalogChange(row.id, op, product_id)
+
+
+def load_changes(db: Session, after: int, limit: int = 1000) -> List[CatalogChange]:
+    """Cambios con versión mayor que `after`, en orden.
+
+    Args:
+        db (Session): Sesión sobre la base principal.
+        after (int): Última versión conocida.
+        limit (int): Máximo de cambios a leer.
+
+    Returns:
+        List[CatalogChange]: Cambios posteriores a `after`.
+    """
+    stmt = select(_t.c.id, _t.c.op, _t.c.product_id).where(_t.c.id > after).order_by(_t.c.id).limit(limit)
+    return [CatalogChange(*row) for row in db.execute(stmt)]
+
+
+def latest_version(db: Session) -> int:
+    """Versión actual del catálogo (0 si no hay cambios registrados)."""
+    return db.execute(select(func.coalesce(func.max(_t.c.id), 0))).scalar_one()
+
+
+class ChangeBus:
+    """Entrega ordenada de cambios del catálogo a los suscriptores del proceso.
+
+    Attributes:
+        version (int): Última versión entregada.
+    """
+
+    def __init__(self, transport=None, source: Optional[Callable[[int], List[CatalogChange]]] = None):
+        """Crea el bus.
+
+        Args:
+            transport (ChangeTransport | None): Reenvío a otros workers (None = solo este proceso).
+            source (Callable[[int], List[CatalogChange]] | None): Lee del
+                registro los cambios posteriores a una versión (sondeo y huecos).
+        """
+        self.version = 0
+        self._transport = transport
+        self._source = source
+        self._subscribers: List[Callable[[CatalogChange], None]] = []
+        self._lock = threading.RLock()
+        self._counts = {"published": 0, "delivered": 0, "duplicates": 0, "polled": 0}
+
+    def subscribe(self, callback: Callable[[CatalogChange], None]) -> None:
+        """Registra un suscriptor (recibe cada cambio una vez, en orden)."""
+        self._subscribers.append(callback)
+
+    def start(self, version: int = 0) -> None:
+        """Fija la versión de partida y empieza a escuchar el transporte.
+
+        Args:
+            version (int): Versión ya reflejada por las cachés (p. ej. al
+                cargar el catálogo); los cambios anteriores no se entregan.
+        """
+        with self._lock:
+            self.version = max(self.version, version)
+        if self._transport is not None:
+            self._transport.start(self.receive)
+
+    def publish(self, change: CatalogChange) -> None:
+        """Entrega un cambio confirmado en este proceso y lo reenvía a los demás."""
+        self._counts["published"] += 1
+        self.receive(change)
+        if self._transport is not None:
+            try:
+                self._transport.publish(change)
+            except (OSError, ConnectionError, RuntimeError) as e:
+                # Los demás workers lo verán en su próximo sondeo.
+                logger.warning("No se pudo publicar el cambio %d del catálogo: %s", change.version, e)
+
+    def receive(self, change: CatalogChange) -> None:
+        """Entrega un cambio recibido (propio o de otro worker).
+
+        Los duplicados y los cambios ya entregados se ignoran. Si faltan
+        versiones intermedias y hay `source`, se leen antes del registro.
+        """
+        with self._lock:
+            if change.version <= self.version:
+                self._counts["duplicates"] += 1
+                return
+            if change.version > self.version + 1 and self._source is not None:
+                for missing in self._read_source():
+                    if missing.version < change.version:
+                        self._deliver(missing)
+            self._deliver(change)
+
+    def poll(self) -> int:
+        """Entrega los cambios del registro que no llegaron por el transporte.
+
+        Returns:
+            int: Cambios entregados.
+        """
+        if self._source is None:
+            return 0
+        with self._lock:
+            changes = self._read_source()
+            for change in changes:
+                self._deliver(change)
+            self._counts["polled"] += len(changes)
+            return len(changes)
+
+    def _read_source(self) -> List[CatalogChange]:
+        """Cambios posteriores a la versión actual según el registro."""
+        try:
+            return self._source(self.version)
+        except Exception as e:  # noqa: BLE001 - el sondeo no debe tumbar al llamador
+            logger.warning("No se pudo leer el registro de cambios del catálogo: %s", e)
+            return []
+
+    def _deliver(self, change: CatalogChange) -> None:
+        """Notifica a los suscriptores y avanza la versión (requiere el lock).
+
+        La versión se publica después de notificar: quien la lea (p. ej. el
+        ETag) encuentra las cachés ya invalidadas.
+        """
+        if change.version <= self.version:
+            return
+        for callback in self._subscribers:
+            try:
+                callback(change)
+            except Exception:  # noqa: BLE001 - un suscriptor no bloquea a los demás
+                logger.exception("Suscriptor de cambios del catálogo falló")
+        self.version = change.version
+        self._counts["delivered"] += 1
+
+    def stats(self) -> dict:
+        """Versión actual y contadores de publicación, entrega y sondeo."""
+        return {"version": self.version, **self._counts}
+
+    def close(self) -> None:
+        """Deja de escuchar el transporte."""
+        if self._transport is not None:
+            self._transport.close()
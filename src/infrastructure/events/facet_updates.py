@@ -0,0 +1,149 @@
+"""
+Actualización de las facetas del catálogo a partir de los cambios del bus.
+
+`FacetUpdater` se suscribe al `ChangeBus` y refleja en `FacetService` las
+escrituras de cualquier worker o proceso sin recalcular todo:
+
+- `upsert`/`delete`: el producto se anota como pendiente; el hilo del
+  actualizador lee los pendientes de la base principal en una consulta y
+  aplica `upsert` (si existe) o `remove` (si ya no está).
+- `bulk`: descarta los pendientes y recalcula las facetas desde cero con el
+  catálogo completo. Es también el estado inicial: hasta el primer
+  `rebuild` (en el lifespan) las facetas no están cargadas.
+
+El suscriptor solo anota y despierta al hilo: el request, el lector del
+transporte o el sondeo que entrega el cambio no leen la base ni esperan el
+recálculo. Las escrituras del propio worker ya se aplicaron en
+`ProductService`; volver a aplicarlas aquí no altera los conteos.
+"""
+
+import logging
+import threading
+from typing import Callable, Iterable, List, Optional, Set
+
+from src.application.facet_service import FacetService
+from src.domain.entities import Product
+from .changes import CHANGE_BULK, CatalogChange
+
+logger = logging.getLogger(__name__)
+
+
+class FacetUpdater:
+    """Aplica los cambios del catálogo a las facetas en un hilo propio.
+
+    Attributes:
+        facets (FacetService): Facetas que se mantienen.
+        loaded (bool): Las facetas reflejan el catálogo (hubo un `rebuild`).
+    """
+
+    def __init__(self, facets: FacetService, load_products: Callable[[List[int]], List[Product]],
+                 load_all: Callable[[], Iterable[Product]]):
+        """Crea el actualizador (el hilo arranca con `start`).
+
+        Args:
+            facets (FacetService): Facetas a mantener.
+            load_products (Callable[[List[int]], List[Product]]): Lee los
+                productos con esos IDs de la base principal.
+            load_all (Callable[[], Iterable[Product]]): Lee el catálogo
+                completo (recálculo tras una carga masiva).
+        """
+        self.facets = facets
+        self._load_products = load_products
+        self._load_all = load_all
+        self._lock = threading.Lock()
+        self._pending: Set[int] = set()
+        self._bulk = True
+        self.loaded = False
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._counts = {"applied": 0, "rebuilds": 0}
+
+    def __call__(self, change: CatalogChange) -> None:
+        """Suscriptor del bus: anota el cambio y despierta al hilo."""
+        with self._lock:
+            if change.op == CHANGE_BULK:
+                self._bulk = True
+                self._pending.clear()
+            elif not self._bulk and change.product_id is not None:
+                self._pending.add(change.product_id)
+        self._wake.set()
+
+    def start(self) -> None:
+        """Arranca el hilo que aplica los cambios anotados."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="facet-updates", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self.flush()
+            except Exception:  # noqa: BLE001 - el hilo sigue con el próximo cambio
+                logger.exception("No se pudieron actualizar las facetas del catálogo")
+
+    def flush(self) -> int:
+        """Aplica ahora los cambios anotados.
+
+        Returns:
+            int: Productos aplicados (o del catálogo, si hubo recálculo).
+        """
+        with self._lock:
+            ids, bulk = sorted(self._pending), self._bulk
+            self._pending, self._bulk = set(), False
+        if bulk:
+            return self._rebuild(list(self._load_all()))
+        if not ids:
+            return 0
+        found = {p.id: p for p in self._load_products(ids)}
+        for product_id in ids:
+            product = found.get(product_id)
+            if product is None:
+                self.facets.remove(product_id)
+            else:
+                self.facets.upsert(product)
+        self._counts["applied"] += len(ids)
+        return len(ids)
+
+    def rebuild(self, products: Iterable[Product]) -> int:
+        """Recalcula las facetas con el catálogo completo.
+
+        Args:
+            products (Iterable[Product]): Todos los productos.
+
+        Returns:
+            int: Productos cargados.
+        """
+        with self._lock:
+            self._bulk = False
+        return self._rebuild(list(products))
+
+    def _rebuild(self, products: List[Product]) -> int:
+        self.facets.rebuild(products)
+        self.loaded = True
+        self._counts["rebuilds"] += 1
+        return len(products)
+
+    def reset(self) -> None:
+        """Marca las facetas como no cargadas: el próximo `flush` las recalcula."""
+        with self._lock:
+            self._bulk = True
+            self._pending.clear()
+        self.loaded = False
+
+    def stats(self) -> dict:
+        """Productos aplicados, recálculos completos y cambios en espera."""
+        with self._lock:
+            return {**self._counts, "pending": len(self._pending), "rebuild_pending": self._bulk}
+
+    def close(self) -> None:
+        """Detiene el hilo (los cambios en espera se descartan)."""
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,236 @@
+"""
+Transportes de los cambios del catálogo entre workers.
+
+Un transporte solo acelera la notificación: lo que se pierda (worker
+reiniciando, red caída, buffer lleno) lo recupera el sondeo del registro
+(`ChangeBus.poll`). Todos cumplen `ChangeTransport`:
+
+- `InProcessTransport`: entrega en el mismo proceso (tests, un solo worker).
+- `SocketTransport`: datagramas por sockets Unix en un directorio; cada
+  worker del host escucha en su propio archivo `.sock`. No disponible en
+  Windows.
+- `RedisTransport`: `PUBLISH`/`SUBSCRIBE` sobre el protocolo RESP (Redis o
+  cualquier servidor compatible); sirve entre nodos.
+
+`create_transport(url)` elige la implementación (`memory://`,
+`unix:///ruta/al/directorio`, `redis://host:puerto/db`).
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, List, Optional
+from urllib.parse import urlparse
+
+from src.infrastructure.cache.backends import RedisBackend
+from .changes import CatalogChange
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[CatalogChange], None]
+
+
+class ChangeTransport(ABC):
+    """Contrato de difusión de cambios del catálogo."""
+
+    @abstractmethod
+    def publish(self, change: CatalogChange) -> None:
+        """Envía el cambio a los demás suscriptores (sin esperar confirmación)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def start(self, callback: Callback) -> None:
+        """Empieza a entregar a `callback` los cambios publicados por otros."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Deja de escuchar y libera recursos."""
+
+
+class InProcessTransport(ChangeTransport):
+    """Difusión entre buses del mismo proceso."""
+
+    def __init__(self):
+        """Crea el transporte sin suscriptores."""
+        self._callbacks: List[Callback] = []
+
+    def publish(self, change: CatalogChange) -> None:
+        """Entrega el cambio a todos los buses registrados."""
+        for callback in list(self._callbacks):
+            callback(change)
+
+    def start(self, callback: Callback) -> None:
+        """Registra un bus."""
+        self._callbacks.append(callback)
+
+    def close(self) -> None:
+        """Olvida los buses registrados."""
+        self._callbacks.clear()
+
+
+def _listen(name: str, receive: Callable[[], Optional[bytes]], callback: Callback, closed: threading.Event) -> None:
+    """Arranca un hilo que entrega a `callback` cada mensaje de `receive`."""
+    def loop():
+        while not closed.is_set():
+            try:
+                data = receive()
+            except (OSError, ConnectionError) as e:
+                if closed.is_set():
+                    return
+                logger.warning("Transporte de cambios %s desconectado: %s", name, e)
+                time.sleep(1.0)
+                continue
+            if data is None:
+                continue
+            try:
+                callback(CatalogChange.decode(data))
+            except Exception:  # noqa: BLE001 - un mensaje inválido no detiene al lector
+                logger.exception("Cambio del catálogo inválido en %s", name)
+
+    threading.Thread(target=loop, name=f"catalog-events-{name}", daemon=True).start()
+
+
+class SocketTransport(ChangeTransport):
+    """Datagramas por sockets Unix entre los workers de un host.
+
+    Attributes:
+        directory (Path): Carpeta con un `.sock` por worker suscrito.
+    """
+
+    def __init__(self, directory: str):
+        """Prepara el transporte (el socket propio se abre en `start`).
+
+        Args:
+            directory (str): Carpeta compartida por los workers.
+
+        Raises:
+            RuntimeError: Si la plataforma no tiene sockets Unix.
+        """
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("SocketTransport requiere sockets Unix")
+        self.directory = Path(directory)
+        self._path: Optional[Path] = None
+        self._sock: Optional[socket.socket] = None
+        self._closed = threading.Event()
+
+    def start(self, callback: Callback) -> None:
+        """Abre `<pid>-<id>.sock` en la carpeta y escucha en un hilo."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._path = self.directory / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(str(self._path))
+        self._sock.settimeout(0.5)
+
+        def receive() -> Optional[bytes]:
+            try:
+                return self._sock.recv(4096)
+            except socket.timeout:
+                return None
+
+        _listen("socket", receive, callback, self._closed)
+
+    def publish(self, change: CatalogChange) -> None:
+        """Envía el cambio a cada `.sock` de la carpeta salvo el propio.
+
+        Los archivos sin nadie escuchando (worker terminado) se eliminan.
+        """
+        data = change.encode()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as out:
+            out.setblocking(False)
+            for path in self.directory.glob("*.sock"):
+                if path == self._path:
+                    continue
+                try:
+                    out.sendto(data, str(path))
+                except (ConnectionRefusedError, FileNotFoundError):
+                    path.unlink(missing_ok=True)
+                except BlockingIOError:
+                    pass  # buffer del receptor lleno: lo recupera su sondeo
+
+    def close(self) -> None:
+        """Cierra el socket propio y elimina su archivo."""
+        self._closed.set()
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if self._path is not None:
+            self._path.unlink(missing_ok=True)
+
+
+class RedisTransport(ChangeTransport):
+    """`PUBLISH`/`SUBSCRIBE` sobre un servidor RESP.
+
+    Attributes:
+        channel (str): Canal de los cambios del catálogo.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0,
+                 channel: str = "catalog:changes"):
+        """Configura las conexiones (se abren de forma perezosa).
+
+        Args:
+            host (str): Host del servidor.
+            port (int): Puerto del servidor.
+            db (int): Base lógica.
+            channel (str): Canal de publicación.
+        """
+        self.channel = channel
+        self._publisher = RedisBackend(host, port, db)
+        self._subscriber = RedisBackend(host, port, db, timeout=None)
+        self._closed = threading.Event()
+
+    def publish(self, change: CatalogChange) -> None:
+        """`PUBLISH channel cambio`."""
+        self._publisher.command("PUBLISH", self.channel, change.encode())
+
+    def start(self, callback: Callback) -> None:
+        """Se suscribe al canal en un hilo (reconecta si se corta)."""
+        messages = None
+
+        def receive() -> Optional[bytes]:
+            nonlocal messages
+            if messages is None:
+                messages = self._subscriber.subscribe(self.channel)
+            try:
+                return next(messages)
+            except (OSError, ConnectionError):
+                messages = None
+                self._subscriber.close()
+                raise
+
+        _listen("redis", receive, callback, self._closed)
+
+    def close(self) -> None:
+        """Cierra ambas conexiones."""
+        self._closed.set()
+        self._subscriber.close()
+        self._publisher.close()
+
+
+def create_transport(url: str) -> Optional[ChangeTransport]:
+    """Crea un transporte a partir de una URL (vacía = ninguno).
+
+    Formatos soportados:
+      - `memory://`
+      - `unix:///ruta/al/directorio`
+      - `redis://host:puerto/db`
+
+    Raises:
+        ValueError: Si el esquema no está soportado.
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return InProcessTransport()
+    if parsed.scheme == "unix":
+        return SocketTransport((parsed.netloc or "") + parsed.path)
+    if parsed.scheme == "redis":
+        db = int(parsed.path.lstrip("/") or 0)
+        return RedisTransport(parsed.hostname or "localhost", parsed.port or 6379, db)
+    raise ValueError(f"Transporte de cambios no soportado: {url!r}")
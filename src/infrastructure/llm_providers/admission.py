@@ -0,0 +1,335 @@
+"""
+Control de admisión de llamadas al proveedor de IA.
+
+- Límite de frecuencia: un token bucket por `session_id` y otro por cliente
+  (IP de origen); se verifica al recibir el request (`admit`) para
+  rechazar con 429 antes de hacer trabajo. Con un `KeyValueBackend`
+  compartido (CACHE_URL) los contadores son comunes a todos los workers y el
+  límite es global; sin él cada worker cuenta por su lado.
+- Límite de concurrencia: como máximo `max_concurrent` llamadas al modelo en
+  curso. Las demás esperan en una cola justa: primero la prioridad
+  interactiva (`/chat`) sobre la de lotes (`/chat/batch`), y dentro de cada
+  prioridad en turnos rotativos por cliente, de modo que un cliente con
+  muchas solicitudes no acapare los cupos. La espera interactiva está
+  acotada por `max_wait`; al vencer se rechaza con `RateLimitExceededError`.
+  Los lotes esperan sin plazo: su cantidad en cola ya está acotada por la
+  concurrencia del lote y un rechazo solo cortaría la reproducción.
+
+`AdmittedLLMService` envuelve a cualquier proveedor con
+`generate_response(user_message, products, context)`.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from src.domain.exceptions import RateLimitExceededError
+from src.infrastructure.cache.backends import KeyValueBackend
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BATCH = 1
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Token bucket clásico: `rate` tokens por segundo hasta `burst` acumulados."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        """Crea el bucket lleno.
+
+        Args:
+            rate (float): Tokens repuestos por segundo.
+            burst (float): Capacidad máxima.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """Repone tokens y retorna cuánto falta para tener uno (0 si ya hay)."""
+        self.tokens = min(self.burst, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Consume un token (llamar solo si `wait_time` retornó 0)."""
+        self.tokens -= 1
+
+
+class _Buckets:
+    """Buckets por clave con desalojo LRU para acotar la memoria."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10_000):
+        """Configura los buckets (rate <= 0 desactiva el límite)."""
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._items: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def get(self, key: Optional[str]) -> Optional[TokenBucket]:
+        """Bucket de `key` (None si el límite está desactivado o no hay clave)."""
+        if self.rate <= 0 or not key:
+            return None
+        bucket = self._items.get(key)
+        if bucket is None:
+            bucket = self._items[key] = TokenBucket(self.rate, self.burst)
+            if len(self._items) > self.max_keys:
+                self._items.popitem(last=False)
+        else:
+            self._items.move_to_end(key)
+        return bucket
+
+
+class _SharedWindows:
+    """Límite de frecuencia común a varios procesos sobre un `KeyValueBackend`.
+
+    Cuenta en ventanas fijas de `burst / rate` segundos con hasta `burst`
+    requests cada una: la misma tasa media y ráfaga que el token bucket, con
+    un `incr` atómico del backend por request. Si el backend falla, el
+    request se deja pasar.
+    """
+
+    def __init__(self, backend: KeyValueBackend, prefix: str, rate: float, burst: float):
+        """Configura el límite (rate <= 0 lo desactiva)."""
+        self.rate = rate
+        self.burst = burst
+        self.window = burst / rate if rate > 0 else 0.0
+        self._backend = backend
+        self._prefix = prefix
+
+    def consume(self, key: Optional[str]) -> float:
+        """Cuenta un request de `key`; retorna cuánto esperar si excede (0 si no)."""
+        if self.rate <= 0 or not key:
+            return 0.0
+        now = time.time()
+        slot = int(now // self.window)
+        try:
+            count = self._backend.incr(f"{self._prefix}{key}:{slot}", ttl=self.window)
+        except (OSError, ConnectionError) as exc:
+            logger.warning("Límite de frecuencia compartido no disponible: %s", exc)
+            return 0.0
+        return 0.0 if count <= self.burst else (slot + 1) * self.window - now
+
+
+class AdmissionController:
+    """Límites de frecuencia y de concurrencia con cola justa y espera acotada.
+
+    Attributes:
+        max_concurrent (int): Llamadas al modelo en curso como máximo.
+        max_wait (float): Segundos máximos de espera en la cola.
+        max_queue (int): Solicitudes en espera como máximo.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        max_wait: float = 10.0,
+        max_queue: int = 256,
+        session_rate: float = 0.5,
+        session_burst: float = 10,
+        client_rate: float = 2.0,
+        client_burst: float = 30,
+        backend: Optional[KeyValueBackend] = None,
+    ):
+        """Configura los límites.
+
+        Args:
+            max_concurrent (int): Llamadas simultáneas al proveedor.
+            max_wait (float): Espera máxima en la cola (s).
+            max_queue (int): Capacidad de la cola de espera.
+            session_rate (float): Requests por segundo por sesión (<= 0 desactiva).
+            session_burst (float): Ráfaga permitida por sesión.
+            client_rate (float): Requests por segundo por cliente (<= 0 desactiva).
+            client_burst (float): Ráfaga permitida por cliente.
+            backend (Optional[KeyValueBackend]): Backend compartido para que
+                los límites de frecuencia sean comunes a todos los workers.
+        """
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self._sessions = _Buckets(session_rate, session_burst)
+        self._clients = _Buckets(client_rate, client_burst)
+        self._shared = [
+            _SharedWindows(backend, "rate:session:", session_rate, session_burst),
+            _SharedWindows(backend, "rate:client:", client_rate, client_burst),
+        ] if backend is not None else None
+        self._in_flight = 0
+        self._depth = 0
+        self._waiters: Dict[int, "OrderedDict[str, Deque[asyncio.Future]]"] = {
+            INTERACTIVE: OrderedDict(), BATCH: OrderedDict(),
+        }
+        self._waits: Deque[float] = deque(maxlen=1024)
+        self._counters = {"admitted": 0, "rejected_rate": 0, "rejected_queue": 0, "queued": 0}
+
+    def admit(self, session_id: Optional[str], client: Optional[str]) -> None:
+        """Consume un token de la sesión y del cliente o rechaza el request.
+
+        Raises:
+            RateLimitExceededError: Si alguno de los buckets está vacío
+                (`retry_after` indica cuándo habrá un token).
+        """
+        if self._shared is not None:
+            # La ventana del cliente solo cuenta requests que la sesión admite:
+            # una sesión rechazada no gasta el cupo de las demás del cliente.
+            sessions, clients = self._shared
+            wait = sessions.consume(session_id) or clients.consume(client)
+            if wait > 0:
+                self._counters["rejected_rate"] += 1
+                raise RateLimitExceededError("Límite de solicitudes excedido", retry_after=wait)
+            return
+        buckets = [b for b in (self._sessions.get(session_id), self._clients.get(client)) if b is not None]
+        now = time.monotonic()
+        wait = max((b.wait_time(now) for b in buckets), default=0.0)
+        if wait > 0:
+            self._counters["rejected_rate"] += 1
+            raise RateLimitExceededError("Límite de solicitudes excedido", retry_after=wait)
+        for b in buckets:
+            b.take()
+
+    @asynccontextmanager
+    async def slot(self, client: str = "anon", priority: int = INTERACTIVE):
+        """Reserva un cupo de llamada al modelo durante el bloque `async with`.
+
+        Raises:
+            RateLimitExceededError: Si la cola está llena o la espera
+                interactiva supera `max_wait`.
+        """
+        await self._acquire(client or "anon", priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def run(self, start: Callable[[], Awaitable[T]], client: str = "anon",
+                  priority: int = INTERACTIVE) -> T:
+        """Ejecuta `start()` con un cupo que se libera cuando la llamada termina.
+
+        A diferencia de `slot`, cancelar a quien espera (desconexión o plazo
+        vencido) no libera el cupo: la llamada sigue en una tarea propia,
+        protegida con `asyncio.shield`, y devuelve el cupo al terminar. Un
+        proveedor que llama al modelo en un hilo (`asyncio.to_thread`) sigue
+        ocupando al modelo aunque se cancele la espera, así que el cupo cuenta
+        las llamadas reales en curso.
+
+        Raises:
+            RateLimitExceededError: Si la cola está llena o la espera
+                interactiva supera `max_wait`.
+        """
+        await self._acquire(client or "anon", priority)
+        try:
+            call = asyncio.ensure_future(start())
+        except BaseException:
+            self._release()
+            raise
+        call.add_done_callback(self._call_done)
+        return await asyncio.shield(call)
+
+    def _call_done(self, call: asyncio.Future) -> None:
+        """Libera el cupo de una llamada terminada (y consume su excepción)."""
+        self._release()
+        if not call.cancelled():
+            call.exception()
+
+    async def _acquire(self, client: str, priority: int) -> None:
+        """Toma un cupo libre o espera su turno en la cola."""
+        if self._in_flight < self.max_concurrent and not self._depth:
+            self._in_flight += 1
+            self._counters["admitted"] += 1
+            self._waits.append(0.0)
+            return
+        if self._depth >= self.max_queue:
+            self._counters["rejected_queue"] += 1
+            raise RateLimitExceededError("Cola del modelo llena", retry_after=self.max_wait)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters[priority].setdefault(client, deque()).append(fut)
+        self._depth += 1
+        self._counters["queued"] += 1
+        t0 = time.monotonic()
+        try:
+            done, _ = await asyncio.wait({fut}, timeout=self.max_wait if priority == INTERACTIVE else None)
+        except asyncio.CancelledError:
+            self._abandon(fut, client, priority)
+            raise
+        if not done:
+            self._abandon(fut, client, priority)
+            self._counters["rejected_queue"] += 1
+            raise RateLimitExceededError("Tiempo de espera del modelo agotado", retry_after=self.max_wait)
+        self._counters["admitted"] += 1
+        self._waits.append(time.monotonic() - t0)
+
+    def _abandon(self, fut: asyncio.Future, client: str, priority: int) -> None:
+        """Saca de la cola una espera cancelada (o libera el cupo si ya se le dio)."""
+        if fut.done():
+            self._release()
+            return
+        fut.cancel()
+        queue = self._waiters[priority].get(client)
+        if queue is not None and fut in queue:
+            queue.remove(fut)
+            self._depth -= 1
+            if not queue:
+                del self._waiters[priority][client]
+
+    def _release(self) -> None:
+        """Cede el cupo al siguiente en turno o lo devuelve."""
+        for priority in (INTERACTIVE, BATCH):
+            clients = self._waiters[priority]
+            while clients:
+                client, queue = next(iter(clients.items()))
+                fut = queue.popleft()
+                self._depth -= 1
+                if queue:
+                    clients.move_to_end(client)
+                else:
+                    del clients[client]
+                if not fut.done():
+                    fut.set_result(None)
+                    return
+        self._in_flight -= 1
+
+    def stats(self) -> Dict[str, float]:
+        """Métricas: cupos en uso, profundidad de la cola, esperas y rechazos."""
+        waits = sorted(self._waits)
+        return {
+            "in_flight": self._in_flight,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": self._depth,
+            **self._counters,
+            "wait_ms_p50": round(waits[len(waits) // 2] * 1000, 2) if waits else 0.0,
+            "wait_ms_p95": round(waits[int(len(waits) * 0.95)] * 1000, 2) if waits else 0.0,
+            "wait_ms_max": round(waits[-1] * 1000, 2) if waits else 0.0,
+        }
+
+
+class AdmittedLLMService:
+    """Proveedor de IA cuyas llamadas pasan por un `AdmissionController`.
+
+    Attributes:
+        inner: Proveedor envuelto.
+        client (str): Cliente al que se atribuyen las llamadas.
+        priority (int): `INTERACTIVE` o `BATCH`.
+    """
+
+    def __init__(self, inner, controller: AdmissionController, client: str = "anon", priority: int = INTERACTIVE):
+        """Envuelve `inner` con el controlador de admisión."""
+        self.inner = inner
+        self.client = client
+        self.priority = priority
+        self._controller = controller
+
+    async def generate_response(self, user_message, products, context) -> str:
+        """Espera un cupo y delega en el proveedor envuelto (ver `AdmissionController.run`)."""
+        return await self._controller.run(
+            lambda: self.inner.generate_response(user_message=user_message, products=products, context=context),
+            self.client, self.priority,
+        )
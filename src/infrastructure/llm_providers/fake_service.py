@@ -0,0 +1,48 @@
+"""
+Proveedor de IA simulado (sin red ni API key).
+
+Útil para benchmarks de carga del endpoint `/chat` y para entornos de
+desarrollo sin `GEMINI_API_KEY`. Se activa con `LLM_PROVIDER=fake`.
+"""
+
+import asyncio
+from typing import Iterable, Union
+
+from src.domain.entities import Product, ChatContext
+
+
+class FakeLLMService:
+    """Proveedor determinista con latencia configurable.
+
+    Attributes:
+        latency (float): Segundos que simula tardar cada generación.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        """Inicializa el proveedor.
+
+        Args:
+            latency (float): Segundos de espera simulada por respuesta.
+        """
+        self.latency = latency
+
+    async def generate_response(
+        self,
+        user_message: str,
+        products: Iterable[Product],
+        context: Union[ChatContext, str],
+    ) -> str:
+        """Genera una respuesta simulada a partir del mensaje y el catálogo.
+
+        Args:
+            user_message (str): Texto del usuario.
+            products (Iterable[Product]): Productos disponibles.
+            context (ChatContext | str): Historial o texto formateado (no se usa).
+
+        Returns:
+            str: Respuesta simulada no vacía.
+        """
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        n = len(products) if hasattr(products, "__len__") else sum(1 for _ in products)
+        return f"(respuesta simulada) {user_message} — {n} productos disponibles"
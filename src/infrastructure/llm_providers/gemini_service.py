@@ -1,18 +1,28 @@
 """
 Servicio de IA con Google Gemini.
 
-Lee GEMINI_API_KEY de .env y genera respuestas usando el contexto y los
-productos disponibles en el catálogo.
+Lee GEMINI_API_KEY de la configuración y genera respuestas usando el
+contexto y los productos disponibles en el catálogo.
+
+El SDK `google.generativeai` (~0.6 s de import) se importa al crear el
+servicio, no al importar este módulo: los procesos que no usan el modelo
+(endpoints de productos, tests, scripts) no pagan ese costo.
 """
 
-import os
 import asyncio
 from typing import Iterable, Union
-from dotenv import load_dotenv
-import google.generativeai as genai
+from src.application.deadline import current as current_deadline
 from src.domain.entities import Product, ChatContext
+from src.infrastructure.config import get_settings
+from src.infrastructure.llm_providers.journal import report_usage
+from src.infrastructure.llm_providers.prompt import PromptBuilder
+
 
-load_dotenv()
+def _report_usage(resp) -> None:
+    """Informa los tokens de la respuesta al journal de llamadas, si graba."""
+    usage = getattr(resp, "usage_metadata", None)
+    if usage is not None:
+        report_usage(getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None))
 
 
 class GeminiService:
@@ -39,31 +49,26 @@ class GeminiService:
         Raises:
             RuntimeError: Si `GEMINI_API_KEY` no está configurada.
         """
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
+        settings = get_settings()
+        if not settings.gemini_api_key:
             raise RuntimeError("GEMINI_API_KEY no configurada.")
-        genai.configure(api_key=api_key)
+        import google.generativeai as genai
+
+        self._genai = genai
+        genai.configure(api_key=settings.gemini_api_key)
 
         # Default moderno (alineado a la guía)
-        self.model_name = model_name or os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+        self.model_name = model_name or settings.gemini_model
 
         # Instancia del modelo
         self.model = genai.GenerativeModel(self.model_name)
 
-    def format_products_info(self, products: Iterable[Product]) -> str:
-        """Formatea la lista de productos para incluirla en el prompt.
-
-        Args:
-            products (Iterable[Product]): Productos del catálogo.
+        # Reutiliza el bloque de productos entre prompts.
+        self._prompts = PromptBuilder()
 
-        Returns:
-            str: Texto con una línea por producto (nombre, marca, precio, etc.).
-        """
-        lines = [
-            f"- {p.name} | {p.brand} | ${p.price:.2f} | Stock: {p.stock} | Talla: {p.size} | Color: {p.color}"
-            for p in products
-        ]
-        return "\n".join(lines) if lines else "- (sin productos)"
+    def format_products_info(self, products: Iterable[Product]) -> str:
+        """Formatea la lista de productos para el prompt (ver `PromptBuilder`)."""
+        return self._prompts.format_products(products)
 
     def _build_prompt(
         self,
@@ -73,8 +78,6 @@ class GeminiService:
     ) -> str:
         """Construye el prompt consolidando catálogo, instrucciones e historial.
 
-        Acepta `context` como `ChatContext` o como `str` ya formateado.
-
         Args:
             user_message (str): Mensaje actual del usuario.
             products (Iterable[Product]): Productos disponibles para recomendar.
@@ -83,25 +86,7 @@ class GeminiService:
         Returns:
             str: Prompt final que se envía al modelo generativo.
         """
-        """
-        Acepta `context` como ChatContext o como string ya formateado.
-        """
-        history = context.format_for_prompt() if isinstance(context, ChatContext) else (context or "")
-        products_txt = self.format_products_info(products)
-
-        return (
-            "Eres un asistente virtual experto en ventas de zapatos para un e-commerce.\n"
-            "Tu objetivo es ayudar a los clientes a encontrar los zapatos perfectos.\n\n"
-            f"PRODUCTOS DISPONIBLES:\n{products_txt}\n\n"
-            "INSTRUCCIONES:\n"
-            "- Sé amigable y profesional\n"
-            "- Usa el contexto de la conversación anterior\n"
-            "- Recomienda productos específicos cuando sea apropiado\n"
-            "- Menciona precios, tallas y disponibilidad\n"
-            "- Si no tienes información, sé honesto\n\n"
-            f"{history}\n\n"
-            f"Usuario: {user_message}\n\nAsistente:"
-        )
+        return self._prompts.build(user_message, products, context)
 
     async def generate_response(
         self,
@@ -113,7 +98,9 @@ class GeminiService:
 
         El prompt se arma con el catálogo, el historial (contexto) y el mensaje
         actual del usuario. Internamente ejecuta la llamada de forma no
-        bloqueante usando `asyncio.to_thread`.
+        bloqueante usando `asyncio.to_thread`. Respeta el plazo de la
+        solicitud en curso (`src.application.deadline`): no llama al modelo
+        si ya se abandonó y usa el tiempo restante como timeout de red.
 
         Args:
             user_message (str): Texto del usuario.
@@ -133,16 +120,25 @@ class GeminiService:
         prompt = self._build_prompt(user_message, products, context)
 
         def _call():
+            # El hilo pudo esperar un worker libre: si la solicitud ya se
+            # abandonó no se inicia la generación, y si tiene plazo la llamada
+            # de red no lo excede.
+            deadline = current_deadline()
+            if deadline is not None and deadline.abandoned():
+                return ""
+            options = {"timeout": deadline.remaining()} if deadline is not None and deadline.expires_at else None
             try:
-                resp = self.model.generate_content(prompt)
+                resp = self.model.generate_content(prompt, request_options=options)
+                _report_usage(resp)
                 text = getattr(resp, "text", "")
                 return text.strip() if isinstance(text, str) and text.strip() else "No pude generar una respuesta en este momento."
             except Exception as e:
                 # Fallback rápido a un modelo muy compatible si el actual no está habilitado/permitido
                 if "not found" in str(e).lower() or "unsupported" in str(e).lower():
                     fallback = "gemini-1.5-flash"
-                    self.model = genai.GenerativeModel(fallback)
-                    resp2 = self.model.generate_content(prompt)
+                    self.model = self._genai.GenerativeModel(fallback)
+                    resp2 = self.model.generate_content(prompt, request_options=options)
+                    _report_usage(resp2)
                     text2 = getattr(resp2, "text", "")
                     return text2.strip() if isinstance(text2, str) and text2.strip() else "No pude generar una respuesta en este momento."
                 raise
@@ -0,0 +1,419 @@
+"""
+Journal de llamadas al modelo: grabación y reproducción offline.
+
+`RecordingLLMService` envuelve a cualquier proveedor con
+`generate_response(user_message, products, context)` y agrega una entrada
+por llamada a un `LLMJournal` (`LLM_JOURNAL`):
+
+- hash del prompt exacto (`PromptBuilder`, el mismo texto que ve Gemini),
+  mensaje del usuario y sesión;
+- prompt (la primera vez que aparece en el proceso) y respuesta o error;
+- instante de inicio, latencia y tokens de prompt y respuesta si el
+  proveedor los informa (`report_usage`; Gemini lo hace, el simulado no).
+
+El archivo es NDJSON de solo agregado; con extensión `.gz` se escribe como
+un flujo gzip (nivel 6) con un *flush* por tanda de entradas, que comprime
+los bloques de catálogo repetidos entre prompts. La compresión y la
+escritura corren en un hilo propio: la llamada al modelo solo encola la
+entrada. Un corte del proceso pierde las entradas aún en cola (normalmente
+ninguna o la en curso): la lectura se detiene en el final truncado.
+
+Cada proceso escribe su propio archivo, `<nombre>.<pid>.jsonl.gz` junto a
+`LLM_JOURNAL` (dos workers en un mismo flujo gzip intercalarían bloques y lo
+dejarían ilegible). `read_journals` reúne los archivos de una ruta y ordena
+las entradas por `ts`; la reproducción y el resumen lo usan.
+
+`ReplayLLMService` (`LLM_PROVIDER=replay`) responde desde un journal sin red
+ni API key. Busca la entrada por hash del prompt y, si el historial o el
+catálogo difieren de la grabación, por mensaje del usuario. Las entradas
+repetidas se entregan en el orden grabado. Espera la latencia original
+multiplicada por `time_scale` (0 = sin espera) y repite los errores grabados.
+
+Resumen de un journal (todos sus archivos por proceso):
+    python -m src.infrastructure.llm_providers.journal data/llm_journal.jsonl.gz
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import queue
+import re
+import statistics
+import threading
+import time
+import zlib
+from contextvars import ContextVar
+from dataclasses import dataclass
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import orjson
+
+from src.domain.entities import ChatContext, Product
+from src.infrastructure.llm_providers.prompt import PromptBuilder
+
+logger = logging.getLogger(__name__)
+
+# Nivel de gzip: casi la compresión del 9 (el de `gzip.open`) a menor costo de CPU.
+_GZIP_LEVEL = 6
+
+_usage: ContextVar[Optional[dict]] = ContextVar("llm_usage", default=None)
+
+
+def report_usage(prompt_tokens: Optional[int], response_tokens: Optional[int]) -> None:
+    """Informa los tokens de la llamada en curso a quien la esté grabando.
+
+    Lo llaman los proveedores (también desde `asyncio.to_thread`, que
+    propaga el contexto); sin grabación activa no hace nada.
+    """
+    usage = _usage.get()
+    if usage is not None:
+        usage["prompt_tokens"] = prompt_tokens
+        usage["response_tokens"] = response_tokens
+
+
+def prompt_key(prompt: str) -> str:
+    """Hash (SHA-256, 32 hex) que identifica un prompt."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:32]
+
+
+class JournalMissError(LookupError):
+    """El journal no tiene una respuesta para la llamada."""
+
+
+@dataclass(slots=True, frozen=True)
+class JournalEntry:
+    """Una llamada grabada al modelo.
+
+    Attributes:
+        ts (float): Inicio de la llamada (epoch, s).
+        key (str): Hash del prompt (`prompt_key`).
+        message (str): Mensaje del usuario.
+        latency_ms (float): Duración de la llamada.
+        session (Optional[str]): Sesión de chat (None en lotes).
+        response (Optional[str]): Texto devuelto (None si falló).
+        error (Optional[str]): Error de la llamada, si falló.
+        prompt_tokens (Optional[int]): Tokens del prompt informados por el proveedor.
+        response_tokens (Optional[int]): Tokens de la respuesta.
+        prompt (Optional[str]): Prompt completo (solo la primera vez por proceso).
+    """
+
+    ts: float
+    key: str
+    message: str
+    latency_ms: float
+    session: Optional[str] = None
+    response: Optional[str] = None
+    error: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    response_tokens: Optional[int] = None
+    prompt: Optional[str] = None
+
+    def encode(self) -> bytes:
+        """Serializa la entrada como una línea NDJSON."""
+        return orjson.dumps({f: getattr(self, f) for f in self.__slots__ if getattr(self, f) is not None}) + b"\n"
+
+    @classmethod
+    def decode(cls, line: bytes) -> "JournalEntry":
+        """Reconstruye una entrada serializada con `encode`."""
+        return cls(**orjson.loads(line))
+
+
+def read_journal(path: Union[str, Path]) -> Iterator[JournalEntry]:
+    """Entradas de un journal en orden de escritura.
+
+    Un final truncado (proceso cortado a mitad de escritura) termina la
+    lectura con una advertencia en lugar de fallar.
+    """
+    path = Path(path)
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rb") as f:
+        try:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                yield JournalEntry.decode(line)
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+            logger.warning("Journal %s truncado: %s", path, e)
+
+
+def _name_parts(path: Path) -> tuple:
+    """Nombre sin extensiones y extensiones (`llm.jsonl.gz` → `llm`, `.jsonl.gz`)."""
+    head, dot, tail = path.name.partition(".")
+    return head, dot + tail
+
+
+def journal_file(path: Union[str, Path], pid: int) -> Path:
+    """Archivo del proceso `pid` para el journal `path` (`llm.<pid>.jsonl.gz`)."""
+    path = Path(path)
+    head, tail = _name_parts(path)
+    return path.with_name(f"{head}.{pid}{tail}")
+
+
+def journal_files(path: Union[str, Path]) -> List[Path]:
+    """Archivos del journal `path`: el propio (si existe) y los de cada proceso."""
+    path = Path(path)
+    head, tail = _name_parts(path)
+    pattern = re.compile(re.escape(head) + r"\.\d+" + re.escape(tail))
+    files = [path] if path.is_file() else []
+    if path.parent.is_dir():
+        files += sorted(p for p in path.parent.iterdir() if pattern.fullmatch(p.name))
+    return files
+
+
+def read_journals(path: Union[str, Path]) -> List[JournalEntry]:
+    """Entradas de todos los archivos del journal `path`, ordenadas por `ts`."""
+    return sorted(chain.from_iterable(read_journal(f) for f in journal_files(path)), key=lambda e: e.ts)
+
+
+class LLMJournal:
+    """Archivo de solo agregado con las llamadas grabadas.
+
+    Attributes:
+        path (Path): Ruta del journal (`.gz` = comprimido).
+        file (Optional[Path]): Archivo de este proceso (`journal_file`), abierto
+            en la primera entrada.
+        prompts (PromptBuilder): Armador de prompts compartido por las grabaciones.
+        recorded (int): Entradas recibidas por este proceso.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """Prepara el journal (el archivo y el hilo escritor arrancan con la primera entrada)."""
+        self.path = Path(path)
+        self.file: Optional[Path] = None
+        self.prompts = PromptBuilder()
+        self.recorded = 0
+        self._file = None
+        self._stored: set = set()
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[JournalEntry]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    def append(self, entry: JournalEntry) -> None:
+        """Encola la entrada para el hilo escritor (no espera la compresión ni el disco)."""
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="llm-journal", daemon=True)
+                self._writer.start()
+            self.recorded += 1
+        self._queue.put(entry)
+
+    def _run(self) -> None:
+        """Hilo escritor: escribe las entradas en orden y envía cada tanda al sistema operativo."""
+        while True:
+            entry = self._queue.get()
+            try:
+                if entry is None:
+                    return
+                self._write(entry, flush=self._queue.empty())
+            except Exception:  # noqa: BLE001 - una entrada perdida no detiene la grabación
+                logger.exception("No se pudo grabar la llamada al modelo en %s", self.path)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, entry: JournalEntry, flush: bool) -> None:
+        """Escribe una entrada; el prompt solo si su hash no apareció antes en este proceso."""
+        if entry.prompt is not None and entry.key in self._stored:
+            entry = JournalEntry(**{f: getattr(entry, f) for f in entry.__slots__ if f != "prompt"})
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = journal_file(self.path, os.getpid())
+            self._file = (gzip.open(self.file, "ab", compresslevel=_GZIP_LEVEL) if self.path.suffix == ".gz"
+                          else open(self.file, "ab"))
+        self._file.write(entry.encode())
+        if flush:
+            self._file.flush()
+        self._stored.add(entry.key)
+
+    def flush(self) -> None:
+        """Espera a que las entradas encoladas lleguen al sistema operativo."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Escribe lo encolado, detiene el hilo y cierra el archivo (en gzip, completa el miembro)."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class RecordingLLMService:
+    """Proveedor que graba en el journal cada llamada a `inner`."""
+
+    def __init__(self, inner, journal: LLMJournal, session: Optional[str] = None):
+        """Envuelve un proveedor.
+
+        Args:
+            inner: Proveedor con `generate_response`.
+            journal (LLMJournal): Destino de las entradas.
+            session (Optional[str]): Sesión a la que se atribuyen las llamadas.
+        """
+        self._inner = inner
+        self._journal = journal
+        self._session = session
+
+    async def generate_response(
+        self,
+        user_message: str,
+        products: Iterable[Product],
+        context: Union[ChatContext, str],
+    ) -> str:
+        """Delegada en `inner`; las llamadas canceladas no se graban."""
+        products = tuple(products)
+        prompt = self._journal.prompts.build(user_message, products, context)
+        usage: dict = {}
+        token = _usage.set(usage)
+        ts, t0 = time.time(), time.perf_counter()
+        response, error = None, None
+        try:
+            response = await self._inner.generate_response(
+                user_message=user_message, products=products, context=context
+            )
+            return response
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            raise
+        finally:
+            _usage.reset(token)
+            if response is not None or error is not None:
+                self._journal.append(JournalEntry(
+                    ts=ts, key=prompt_key(prompt), message=user_message, session=self._session,
+                    latency_ms=round((time.perf_counter() - t0) * 1000, 3), response=response, error=error,
+                    prompt_tokens=usage.get("prompt_tokens"), response_tokens=usage.get("response_tokens"),
+                    prompt=prompt,
+                ))
+
+
+class ReplayLLMService:
+    """Proveedor que responde desde un journal grabado.
+
+    Attributes:
+        time_scale (float): Factor de la latencia grabada (1 = original, 0 = sin espera).
+        strict (bool): Si True, solo responde prompts idénticos a los grabados.
+    """
+
+    def __init__(self, entries: Iterable[JournalEntry], time_scale: float = 1.0, strict: bool = False):
+        """Indexa las entradas por hash de prompt y por mensaje.
+
+        Args:
+            entries (Iterable[JournalEntry]): Entradas en orden de grabación.
+            time_scale (float): Factor aplicado a la latencia grabada.
+            strict (bool): Desactiva la búsqueda por mensaje.
+        """
+        self.time_scale = time_scale
+        self.strict = strict
+        self._by_prompt: Dict[str, List[JournalEntry]] = {}
+        self._by_message: Dict[str, List[JournalEntry]] = {}
+        self._cursor: Dict[tuple, int] = {}
+        self._prompts = PromptBuilder()
+        self.entries = 0
+        self.hits = {"prompt": 0, "message": 0, "miss": 0}
+        for entry in entries:
+            self._by_prompt.setdefault(entry.key, []).append(entry)
+            self._by_message.setdefault(entry.message, []).append(entry)
+            self.entries += 1
+
+    @classmethod
+    def load(cls, path: Union[str, Path], time_scale: float = 1.0, strict: bool = False) -> "ReplayLLMService":
+        """Crea el proveedor desde un journal (todos sus archivos por proceso).
+
+        Raises:
+            RuntimeError: Si el journal no tiene archivos.
+        """
+        if not journal_files(path):
+            raise RuntimeError(f"Journal de reproducción no encontrado: {path}")
+        return cls(read_journals(path), time_scale, strict)
+
+    def _next(self, index: Dict[str, List[JournalEntry]], name: str, key: str) -> Optional[JournalEntry]:
+        """Siguiente entrada de `key` en orden de grabación (cíclico)."""
+        entries = index.get(key)
+        if not entries:
+            return None
+        i = self._cursor.get((name, key), 0)
+        self._cursor[(name, key)] = i + 1
+        return entries[i % len(entries)]
+
+    def match(self, user_message: str, products: Iterable[Product], context: Union[ChatContext, str]) -> JournalEntry:
+        """Entrada que responde a la llamada (avanza los cursores).
+
+        Raises:
+            JournalMissError: Si no hay entrada para el prompt (ni para el mensaje).
+        """
+        key = prompt_key(self._prompts.build(user_message, products, context))
+        entry = self._next(self._by_prompt, "prompt", key)
+        if entry is not None:
+            self.hits["prompt"] += 1
+            return entry
+        entry = None if self.strict else self._next(self._by_message, "message", user_message)
+        if entry is None:
+            self.hits["miss"] += 1
+            raise JournalMissError(f"Sin respuesta grabada para el prompt {key}")
+        self.hits["message"] += 1
+        return entry
+
+    async def generate_response(
+        self,
+        user_message: str,
+        products: Iterable[Product],
+        context: Union[ChatContext, str],
+    ) -> str:
+        """Respuesta grabada, tras la latencia grabada escalada.
+
+        Raises:
+            JournalMissError: Si no hay entrada que responda a la llamada.
+            RuntimeError: Si la llamada grabada falló.
+        """
+        entry = self.match(user_message, products, context)
+        delay = entry.latency_ms / 1000 * self.time_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+        report_usage(entry.prompt_tokens, entry.response_tokens)
+        if entry.error is not None:
+            raise RuntimeError(entry.error)
+        return entry.response
+
+    def stats(self) -> dict:
+        """Entradas cargadas y llamadas respondidas por prompt, por mensaje o sin respuesta."""
+        return {"entries": self.entries, **self.hits}
+
+
+def _percentile(values: List[float], p: float) -> float:
+    return statistics.quantiles(values, n=100)[p - 1] if len(values) > 1 else (values[0] if values else 0.0)
+
+
+def cli() -> None:
+    """Imprime un resumen de un journal."""
+    parser = argparse.ArgumentParser(description="Resume un journal de llamadas al modelo.")
+    parser.add_argument("path", help="Journal (.jsonl o .jsonl.gz); se leen también sus archivos por proceso")
+    args = parser.parse_args()
+
+    entries = read_journals(args.path)
+    if not entries:
+        print("Journal vacío")
+        return
+    latencies = [e.latency_ms for e in entries]
+    size = sum(f.stat().st_size for f in journal_files(args.path))
+    span = entries[-1].ts - entries[0].ts
+    print(f"entradas: {len(entries)}  errores: {sum(e.error is not None for e in entries)}  "
+          f"sesiones: {len({e.session for e in entries if e.session})}  "
+          f"prompts distintos: {len({e.key for e in entries})}")
+    print(f"duración: {span:.1f} s  ({len(entries) / span if span else 0:.2f} llamadas/s)")
+    print(f"latencia ms: p50 {_percentile(latencies, 50):.0f}  p95 {_percentile(latencies, 95):.0f}  "
+          f"p99 {_percentile(latencies, 99):.0f}")
+    prompt_tokens = [e.prompt_tokens for e in entries if e.prompt_tokens is not None]
+    if prompt_tokens:
+        response_tokens = sum(e.response_tokens or 0 for e in entries)
+        print(f"tokens: prompt {sum(prompt_tokens)}  respuesta {response_tokens}")
+    print(f"archivo: {size / 1024:.1f} KiB ({size / len(entries):.0f} bytes por entrada)")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,86 @@
+"""
+Prompt del asistente de ventas.
+
+Lo usan `GeminiService` para llamar al modelo y el journal de llamadas
+(`journal.py`) para identificar cada llamada por el hash del prompt exacto,
+de modo que grabación y reproducción vean el mismo texto.
+"""
+
+from typing import Iterable, Union
+
+from src.domain.entities import Product, ChatContext
+
+
+class PromptBuilder:
+    """Arma prompts reutilizando el bloque de catálogo de la llamada anterior.
+
+    El catálogo del snapshot (o de un lote de chat) es la misma lista de
+    objetos en cada prompt, así que su texto se arma una sola vez.
+
+    No hace falta suscribirse a los cambios del catálogo: la caché compara
+    por identidad y una recarga del snapshot crea objetos nuevos, así que el
+    primer prompt tras el cambio no coincide y rearma el bloque. La caché
+    conserva referencias a los objetos anteriores, así que ningún objeto
+    nuevo puede ocupar su lugar en memoria y pasar por uno viejo.
+    """
+
+    def __init__(self) -> None:
+        """Crea el armador sin bloque de productos en caché."""
+        self._products_block: tuple = ((), "")
+
+    def format_products(self, products: Iterable[Product]) -> str:
+        """Formatea la lista de productos para incluirla en el prompt.
+
+        Si son los mismos objetos que en la llamada anterior se reutiliza el
+        texto ya armado.
+
+        Args:
+            products (Iterable[Product]): Productos del catálogo.
+
+        Returns:
+            str: Texto con una línea por producto (nombre, marca, precio, etc.).
+        """
+        products = tuple(products)
+        cached, text = self._products_block
+        if cached and len(cached) == len(products) and all(a is b for a, b in zip(cached, products)):
+            return text
+        lines = [
+            f"- {p.name} | {p.brand} | ${p.price:.2f} | Stock: {p.stock} | Talla: {p.size} | Color: {p.color}"
+            for p in products
+        ]
+        text = "\n".join(lines) if lines else "- (sin productos)"
+        self._products_block = (products, text)
+        return text
+
+    def build(
+        self,
+        user_message: str,
+        products: Iterable[Product],
+        context: Union[ChatContext, str],
+    ) -> str:
+        """Construye el prompt consolidando catálogo, instrucciones e historial.
+
+        Args:
+            user_message (str): Mensaje actual del usuario.
+            products (Iterable[Product]): Productos disponibles para recomendar.
+            context (ChatContext | str): Historial formateado o VO de contexto.
+
+        Returns:
+            str: Prompt final que se envía al modelo generativo.
+        """
+        history = context.format_for_prompt() if isinstance(context, ChatContext) else (context or "")
+        products_txt = self.format_products(products)
+
+        return (
+            "Eres un asistente virtual experto en ventas de zapatos para un e-commerce.\n"
+            "Tu objetivo es ayudar a los clientes a encontrar los zapatos perfectos.\n\n"
+            f"PRODUCTOS DISPONIBLES:\n{products_txt}\n\n"
+            "INSTRUCCIONES:\n"
+            "- Sé amigable y profesional\n"
+            "- Usa el contexto de la conversación anterior\n"
+            "- Recomienda productos específicos cuando sea apropiado\n"
+            "- Menciona precios, tallas y disponibilidad\n"
+            "- Si no tienes información, sé honesto\n\n"
+            f"{history}\n\n"
+            f"Usuario: {user_message}\n\nAsistente:"
+        )
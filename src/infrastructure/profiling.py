@@ -0,0 +1,314 @@
+"""
+Perfilado a demanda de requests de `/chat` en producción.
+
+Desactivado por completo si no hay `PROFILE_TOKEN`. Con token, un request se
+perfila si:
+
+- trae la cabecera `X-Profile: <token>`, o
+- quedan requests "armados" con `POST /admin/profile?requests=N`.
+
+Solo se perfila un request a la vez por worker (los demás siguen sin costo
+extra). Cada perfil (`Capture`) registra:
+
+- Muestreo de pila (`mode="sample"`): un hilo toma la pila del hilo del
+  request cada `interval` segundos y la acumula en formato *folded*
+  (`marco;marco;marco cantidad`), que leen `flamegraph.pl`, speedscope o
+  inferno. En `/chat` el hilo es el del event loop: la espera al modelo
+  aparece como tiempo en el selector.
+- cProfile (`mode="cprofile"`): estadísticas deterministas en `.prof`
+  (`python -m pstats`, snakeviz).
+- Spans: duración de `process_message`, de cada llamada a los repositorios
+  y al modelo (`Timed`), devueltos en la cabecera `Server-Timing`.
+
+Muestreo y cProfile observan el hilo del event loop, no solo el request: un
+perfil es una ventana del worker mientras el request estuvo en curso e
+incluye las corrutinas de los demás requests que avanzaron en ese lapso.
+Para aislar un request, perfile con el worker sin más tráfico; los spans
+(`Server-Timing`) sí son solo del request perfilado.
+
+El archivo se escribe fuera del event loop (`write` en un hilo): detener la
+captura (`stop`) es lo único que corre en el hilo perfilado.
+
+Sin perfil activo el costo por request es una comparación (`start`); ver
+`benchmarks/bench_profiling.py`.
+"""
+
+import cProfile
+import hmac
+import inspect
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+PROFILE_MODES = ("sample", "cprofile")
+
+
+class StackSampler:
+    """Muestreo periódico de la pila de un hilo.
+
+    Attributes:
+        stacks (Counter): Pila *folded* (raíz primero) → muestras.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        """Prepara el muestreo del hilo `thread_id` cada `interval` segundos."""
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        """Arranca el hilo de muestreo."""
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        """Detiene el muestreo y retorna las pilas acumuladas."""
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(frames))] += 1
+
+
+class Capture:
+    """Perfil de un request en curso.
+
+    Attributes:
+        name (str): Nombre del perfil (p. ej. `chat`).
+        mode (str): `sample` o `cprofile`.
+        spans (List[Tuple[str, float]]): (nombre, ms) en orden de término.
+    """
+
+    def __init__(self, profiler: "RequestProfiler", name: str, mode: str):
+        """Inicia el perfil en el hilo actual (lo crea `RequestProfiler.start`)."""
+        self.name = name
+        self.mode = mode
+        self.spans: List[Tuple[str, float]] = []
+        self._profiler = profiler
+        self._started = time.perf_counter()
+        self._stopped = False
+        self._sampler: Optional[StackSampler] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+        if mode == "cprofile":
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        else:
+            self._sampler = StackSampler(threading.get_ident(), profiler.interval)
+            self._sampler.start()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Mide el bloque como span `name`."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((name, (time.perf_counter() - t0) * 1000))
+
+    async def timed(self, name: str, awaitable):
+        """Espera `awaitable` midiéndolo como span `name`."""
+        with self.span(name):
+            return await awaitable
+
+    def server_timing(self) -> str:
+        """Spans en formato de la cabecera `Server-Timing` (duraciones sumadas por nombre)."""
+        totals: dict = {}
+        for name, ms in self.spans:
+            totals[name] = totals.get(name, 0.0) + ms
+        return ", ".join(f"{name};dur={ms:.2f}" for name, ms in totals.items())
+
+    def stop(self) -> None:
+        """Detiene la recolección.
+
+        Debe llamarse en el hilo perfilado (cProfile se activa por hilo).
+        """
+        if self._stopped:
+            return
+        self._stopped = True
+        self.spans.append(("total", (time.perf_counter() - self._started) * 1000))
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        else:
+            self._sampler.stop()
+
+    def write(self) -> Path:
+        """Escribe el perfil ya detenido y libera el cupo del worker.
+
+        Puede correr en otro hilo (p. ej. `asyncio.to_thread`).
+
+        Returns:
+            Path: Archivo escrito (`.folded` o `.prof`).
+        """
+        try:
+            directory = self._profiler.directory
+            directory.mkdir(parents=True, exist_ok=True)
+            stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.name}-{uuid.uuid4().hex[:6]}"
+            if self._cprofile is not None:
+                path = directory / f"{stem}.prof"
+                self._cprofile.dump_stats(str(path))
+            else:
+                path = directory / f"{stem}.folded"
+                stacks = self._sampler.stacks
+                path.write_text("".join(f"{stack} {n}\n" for stack, n in stacks.items()), encoding="utf-8")
+            return path
+        finally:
+            self._profiler._release()
+
+    def finish(self) -> Path:
+        """Detiene el perfil y lo escribe en disco (`stop` + `write`).
+
+        Returns:
+            Path: Archivo escrito (`.folded` o `.prof`).
+        """
+        try:
+            self.stop()
+        except Exception:
+            self._profiler._release()
+            raise
+        return self.write()
+
+
+class Timed:
+    """Proxy que mide cada llamada a un método de `target` como span.
+
+    Solo se construye para requests perfilados: el camino normal no paga
+    el proxy.
+    """
+
+    def __init__(self, target, capture: Capture, prefix: str):
+        """Envuelve `target`; los spans se llaman `<prefix>.<método>`."""
+        self._target = target
+        self._capture = capture
+        self._prefix = prefix
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        span = f"{self._prefix}.{name}"
+        capture = self._capture
+        if inspect.iscoroutinefunction(attr):
+            async def timed_async(*args, **kwargs):
+                with capture.span(span):
+                    return await attr(*args, **kwargs)
+            return timed_async
+
+        def timed(*args, **kwargs):
+            with capture.span(span):
+                return attr(*args, **kwargs)
+        return timed
+
+
+class RequestProfiler:
+    """Decide qué requests se perfilan y guarda los perfiles.
+
+    Attributes:
+        directory (Path): Carpeta de salida.
+        interval (float): Segundos entre muestras del modo `sample`.
+        mode (str): Modo por defecto.
+        captured (int): Perfiles escritos.
+        skipped (int): Requests pedidos que no se perfilaron por haber otro en curso.
+    """
+
+    def __init__(self, token: Optional[str], directory: str = "./data/profiles",
+                 interval: float = 0.005, mode: str = "sample"):
+        """Crea el perfilador (inactivo si `token` es vacío).
+
+        Args:
+            token (Optional[str]): Secreto de `X-Profile` y del endpoint de administración.
+            directory (str): Carpeta donde se escriben los perfiles.
+            interval (float): Segundos entre muestras.
+            mode (str): `sample` o `cprofile`.
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Modo de perfilado no soportado: {mode}")
+        self.token = token or None
+        self.directory = Path(directory)
+        self.interval = interval
+        self.mode = mode
+        self.captured = 0
+        self.skipped = 0
+        self._armed = 0
+        self._armed_mode = mode
+        self._active = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Indica si hay token configurado."""
+        return self.token is not None
+
+    def authorized(self, token: Optional[str]) -> bool:
+        """Compara `token` con el secreto en tiempo constante."""
+        return self.enabled and token is not None and hmac.compare_digest(token, self.token)
+
+    def arm(self, requests: int, mode: Optional[str] = None) -> None:
+        """Perfila los próximos `requests` requests (reemplaza lo armado antes).
+
+        Raises:
+            ValueError: Si `mode` no es un modo soportado.
+        """
+        mode = mode or self.mode
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Modo de perfilado no soportado: {mode}")
+        with self._lock:
+            self._armed = max(0, requests)
+            self._armed_mode = mode
+
+    def start(self, header: Optional[str], name: str = "chat") -> Optional[Capture]:
+        """Inicia un perfil si el request lo pide o hay requests armados.
+
+        Args:
+            header (Optional[str]): Valor de `X-Profile`.
+            name (str): Nombre del perfil.
+
+        Returns:
+            Optional[Capture]: Perfil en curso, o None (camino normal).
+        """
+        if self.token is None or (header is None and not self._armed):
+            return None
+        asked = header is not None and self.authorized(header)
+        with self._lock:
+            if not asked and not self._armed:
+                return None
+            if self._active:
+                self.skipped += 1
+                return None
+            mode = self.mode
+            if not asked:
+                self._armed -= 1
+                mode = self._armed_mode
+            self._active = True
+        try:
+            return Capture(self, name, mode)
+        except Exception:
+            with self._lock:
+                self._active = False
+            raise
+
+    def _release(self) -> None:
+        """Marca el perfil en curso como escrito."""
+        with self._lock:
+            self._active = False
+            self.captured += 1
+
+    def stats(self) -> dict:
+        """Requests armados, perfiles escritos y omitidos."""
+        return {"enabled": self.enabled, "armed": self._armed, "captured": self.captured,
+                "skipped": self.skipped}
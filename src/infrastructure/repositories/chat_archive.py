@@ -0,0 +1,317 @@
+"""
+Archivo del historial de chat: sesiones inactivas fuera de la tabla caliente.
+
+`ChatArchiver` mueve las sesiones sin mensajes en los últimos N días de
+`chat_memory` a `chat_archive`. Cada sesión archivada queda en una sola fila
+y sus mensajes se guardan como un arreglo JSON comprimido con zlib. Así
+`chat_memory` (y su índice por `session_id`) conserva solo las
+conversaciones activas.
+
+`ArchivedChatRepository` decora al repositorio SQL para que el historial
+combine transparentemente lo archivado con lo caliente, por ejemplo si la
+sesión se reanuda después de archivarse.
+
+Uso (cron):
+    python -m src.infrastructure.repositories.chat_archive [--idle-days 30]
+
+Con `CHAT_SHARDS` configurado se archiva cada shard del historial.
+"""
+
+import argparse
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional
+
+import orjson
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from src.domain.entities import ChatMessage
+from src.domain.repositories import IChatRepository
+from src.infrastructure.db.models import ChatArchiveModel, ChatMemoryModel
+
+_hot = ChatMemoryModel.__table__
+_cold = ChatArchiveModel.__table__
+
+# Nivel de zlib: el texto de chat comprime ~3–5x ya en niveles medios.
+COMPRESSION_LEVEL = 6
+# Límite de parámetros por sentencia `IN` (SQLite admite 32766 desde 3.32).
+_IN_CHUNK = 900
+
+
+def encode_messages(messages: Iterable[ChatMessage]) -> bytes:
+    """Serializa los mensajes (id, rol, texto, timestamp) y los comprime."""
+    rows = [[m.id, m.role, m.message, m.timestamp.isoformat()] for m in messages]
+    return zlib.compress(orjson.dumps(rows), COMPRESSION_LEVEL)
+
+
+def decode_messages(session_id: str, payload: bytes) -> List[ChatMessage]:
+    """Reconstruye los mensajes de una sesión desde su `payload` archivado."""
+    return [
+        ChatMessage.from_trusted(id_, session_id, role, message, datetime.fromisoformat(ts))
+        for id_, role, message, ts in orjson.loads(zlib.decompress(payload))
+    ]
+
+
+def _chunks(items: List, size: int = _IN_CHUNK):
+    """Divide `items` en listas de a lo sumo `size` elementos."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class ChatArchiver:
+    """Mueve sesiones inactivas de `chat_memory` a `chat_archive`.
+
+    Attributes:
+        batch_sessions (int): Sesiones movidas por transacción.
+    """
+
+    def __init__(self, db: Session, batch_sessions: int = 200):
+        """Crea el archivador.
+
+        Args:
+            db (Session): Sesión de SQLAlchemy (se hace commit por lote).
+            batch_sessions (int): Sesiones por transacción.
+        """
+        self.db = db
+        self.batch_sessions = batch_sessions
+
+    def archive_idle(self, idle_days: float, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Archiva las sesiones cuyo último mensaje es anterior a `idle_days`.
+
+        Si la sesión ya tenía un archivo (se reanudó después de archivarse),
+        sus mensajes nuevos se agregan al existente.
+
+        Args:
+            idle_days (float): Días sin mensajes para considerar inactiva una sesión.
+            now (datetime | None): Instante de referencia (UTC naive).
+
+        Returns:
+            dict: `sessions`, `messages`, `raw_bytes` y `stored_bytes` movidos.
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(days=idle_days)
+        stats = {"sessions": 0, "messages": 0, "raw_bytes": 0, "stored_bytes": 0}
+        after = None
+        while True:
+            # Cursor por `session_id`: cada lote sigue desde el último, así el
+            # conjunto de sesiones se recorre una sola vez en total.
+            idle = (
+                select(_hot.c.session_id)
+                .group_by(_hot.c.session_id)
+                .having(func.max(_hot.c.timestamp) < cutoff)
+                .order_by(_hot.c.session_id)
+                .limit(self.batch_sessions)
+            )
+            if after is not None:
+                idle = idle.where(_hot.c.session_id > after)
+            session_ids = self.db.execute(idle).scalars().all()
+            if not session_ids:
+                break
+            self._archive(session_ids, stats)
+            self.db.commit()
+            after = session_ids[-1]
+        return stats
+
+    def _archive(self, session_ids: List[str], stats: Dict[str, int]) -> None:
+        """Mueve un lote de sesiones dentro de la transacción actual."""
+        rows = self.db.execute(
+            select(_hot.c.id, _hot.c.session_id, _hot.c.role, _hot.c.message, _hot.c.timestamp)
+            .where(_hot.c.session_id.in_(session_ids))
+            .order_by(_hot.c.session_id, _hot.c.timestamp, _hot.c.id)
+        ).all()
+        previous = {
+            sid: payload for sid, payload in self.db.execute(
+                select(_cold.c.session_id, _cold.c.payload).where(_cold.c.session_id.in_(session_ids))
+            )
+        }
+
+        records, moved_ids = [], []
+        for session_id, group in groupby(rows, key=lambda r: r.session_id):
+            messages = [ChatMessage.from_trusted(*row) for row in group]
+            moved_ids.extend(m.id for m in messages)
+            stats["raw_bytes"] += sum(len(m.message.encode()) for m in messages)
+            if session_id in previous:
+                messages = decode_messages(session_id, previous[session_id]) + messages
+            payload = encode_messages(messages)
+            stats["stored_bytes"] += len(payload)
+            records.append({
+                "session_id": session_id,
+                "message_count": len(messages),
+                "first_at": messages[0].timestamp,
+                "last_at": messages[-1].timestamp,
+                "archived_at": datetime.utcnow(),
+                "payload": payload,
+            })
+
+        if previous:
+            self.db.execute(delete(_cold).where(_cold.c.session_id.in_(list(previous))))
+        if records:
+            self.db.execute(insert(_cold), records)
+        for ids in _chunks(moved_ids):
+            self.db.execute(delete(_hot).where(_hot.c.id.in_(ids)))
+        stats["sessions"] += len(records)
+        stats["messages"] += len(moved_ids)
+
+
+def _utc_naive(ts: datetime) -> datetime:
+    """Timestamp en UTC sin zona, como los que compara el archivador."""
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
+
+
+class ArchiveMisses:
+    """Sesiones activas sin archivo, para no releer `chat_archive` en cada fallo de caché.
+
+    Solo se recuerda una sesión cuyo último mensaje es más reciente que
+    `idle_days - ttl`: el archivador no puede moverla antes de que la entrada
+    venza, así que "no tiene archivo" sigue siendo cierto mientras dure.
+
+    Attributes:
+        idle_days (float): Días de inactividad con que se archiva (`CHAT_ARCHIVE_AFTER_DAYS`).
+        ttl (float): Segundos de validez de cada entrada.
+        max_entries (int): Sesiones recordadas como máximo (LRU).
+    """
+
+    def __init__(self, idle_days: float, ttl: float = 3600.0, max_entries: int = 100_000):
+        """Configura la caché (el TTL se acota a la mitad de `idle_days`)."""
+        self.idle_days = idle_days
+        self.ttl = min(ttl, idle_days * 86400 / 2)
+        self.max_entries = max_entries
+        self._items: "OrderedDict[str, float]" = OrderedDict()
+
+    def known(self, session_id: str) -> bool:
+        """Indica si la sesión se vio sin archivo hace menos de `ttl` segundos."""
+        seen = self._items.get(session_id)
+        if seen is None:
+            return False
+        if time.monotonic() - seen > self.ttl:
+            self._items.pop(session_id, None)
+            return False
+        return True
+
+    def remember(self, session_id: str, newest: datetime) -> None:
+        """Registra que la sesión no tiene archivo si su último mensaje es reciente."""
+        horizon = datetime.utcnow() - timedelta(days=self.idle_days) + timedelta(seconds=self.ttl)
+        if _utc_naive(newest) <= horizon:
+            return
+        self._items[session_id] = time.monotonic()
+        self._items.move_to_end(session_id)
+        if len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def discard(self, session_id: str) -> None:
+        """Olvida la sesión (p. ej. al borrar su historial)."""
+        self._items.pop(session_id, None)
+
+
+class ArchivedChatRepository(IChatRepository):
+    """Decorador que completa el historial caliente con el archivado.
+
+    Solo consulta `chat_archive` (una lectura por clave primaria) cuando la
+    tabla caliente no alcanza para responder: sesiones archivadas o
+    reanudadas con menos mensajes nuevos que los pedidos. Con `misses`, las
+    sesiones activas ya vistas sin archivo tampoco lo consultan.
+    """
+
+    def __init__(self, inner: IChatRepository, db: Session, misses: Optional[ArchiveMisses] = None):
+        """Crea el decorador.
+
+        Args:
+            inner (IChatRepository): Repositorio de la tabla caliente.
+            db (Session): Sesión para leer `chat_archive`.
+            misses (Optional[ArchiveMisses]): Sesiones sin archivo compartidas
+                entre requests del worker.
+        """
+        self._inner = inner
+        self.db = db
+        self._misses = misses
+
+    def _archived(self, session_id: str) -> List[ChatMessage]:
+        """Mensajes archivados de la sesión (vacío si no tiene archivo)."""
+        owns_tx = not self.db.in_transaction()
+        payload = self.db.execute(
+            select(_cold.c.payload).where(_cold.c.session_id == session_id)
+        ).scalar()
+        if owns_tx:
+            self.db.commit()
+        return decode_messages(session_id, payload) if payload is not None else []
+
+    def _with_archive(self, session_id: str, hot: List[ChatMessage], limit: Optional[int]) -> List[ChatMessage]:
+        """Antepone lo archivado si lo caliente no cubre `limit` mensajes."""
+        if limit and len(hot) >= limit:
+            return hot
+        # Sin mensajes calientes la sesión pudo archivarse: siempre se consulta.
+        if hot and self._misses is not None and self._misses.known(session_id):
+            return hot
+        archived = self._archived(session_id)
+        if hot and not archived and self._misses is not None:
+            self._misses.remember(session_id, hot[-1].timestamp)
+        merged = archived + hot
+        return merged[-limit:] if limit else merged
+
+    def save_message(self, message: ChatMessage) -> ChatMessage:
+        """Los mensajes nuevos siempre van a la tabla caliente."""
+        return self._inner.save_message(message)
+
+    def save_messages(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        """Los mensajes nuevos siempre van a la tabla caliente."""
+        return self._inner.save_messages(messages)
+
+    def get_session_history(self, session_id: str, limit: Optional[int] = None) -> List[ChatMessage]:
+        """Historial en orden cronológico, incluyendo lo archivado."""
+        return self._with_archive(session_id, self._inner.get_session_history(session_id, limit), limit)
+
+    def get_recent_messages(self, session_id: str, count: int) -> List[ChatMessage]:
+        """Últimos `count` mensajes, incluyendo lo archivado si hace falta."""
+        return self._with_archive(session_id, self._inner.get_recent_messages(session_id, count), count)
+
+    def delete_session_history(self, session_id: str) -> int:
+        """Elimina el historial caliente y el archivado de la sesión."""
+        if self._misses is not None:
+            self._misses.discard(session_id)
+        archived = self._archived(session_id)
+        if archived:
+            self.db.execute(delete(_cold).where(_cold.c.session_id == session_id))
+            self.db.commit()
+        return self._inner.delete_session_history(session_id) + len(archived)
+
+
+def cli() -> None:
+    """Punto de entrada de `python -m src.infrastructure.repositories.chat_archive`."""
+    from src.infrastructure.config import get_settings
+    from src.infrastructure.db.database import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Archiva sesiones de chat inactivas.")
+    parser.add_argument("--idle-days", type=float, default=get_settings().chat_archive_after_days,
+                        help="Días sin mensajes para archivar una sesión")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    if settings.chat_shards:
+        # Historial particionado: se archiva cada shard por separado.
+        from src.infrastructure.db.shards import ChatShards
+
+        shards = ChatShards(settings.chat_shard_dir, settings.chat_shards)
+        shards.init()
+        stats = {"sessions": 0, "messages": 0, "raw_bytes": 0, "stored_bytes": 0}
+        for index in range(shards.count):
+            with shards.session(index) as db:
+                for key, value in ChatArchiver(db).archive_idle(args.idle_days).items():
+                    stats[key] += value
+        shards.dispose()
+    else:
+        init_db()
+        db = SessionLocal()
+        try:
+            stats = ChatArchiver(db).archive_idle(args.idle_days)
+        finally:
+            db.close()
+    ratio = stats["raw_bytes"] / stats["stored_bytes"] if stats["stored_bytes"] else 0
+    print(f"Archivadas {stats['sessions']} sesiones ({stats['messages']} mensajes); "
+          f"{stats['raw_bytes']} → {stats['stored_bytes']} bytes ({ratio:.1f}x)")
+
+
+if __name__ == "__main__":
+    cli()
@@ -1,26 +1,38 @@
 """
 Repositorio concreto de chat usando SQLAlchemy.
 Cumple IChatRepository (guardar y consultar historial).
+
+Las lecturas usan SQLAlchemy Core con sentencias constantes de módulo (ver
+`product_repository`), mapeando filas directo a `ChatMessage`. Con réplicas
+configuradas (`db.replicas`) las lecturas van a una réplica, salvo las de
+una sesión recién escrita.
 """
 
+from itertools import starmap
 from typing import List, Optional
+from sqlalchemy import bindparam, delete, select
 from sqlalchemy.orm import Session
 from src.domain.entities import ChatMessage
 from src.domain.repositories import IChatRepository
 from src.infrastructure.db.models import ChatMemoryModel
+from src.infrastructure.db.replicas import ReplicaSet, read_from_replica
 
+_t = ChatMemoryModel.__table__
 
-def _model_to_entity(m: ChatMemoryModel) -> ChatMessage:
-    """Convierte un modelo ORM en entidad de dominio ChatMessage.
-
-    Args:
-        m (ChatMemoryModel): Fila ORM.
+# Mismo orden que los argumentos de `ChatMessage.from_trusted`.
+_SELECT_SESSION = (
+    select(_t.c.id, _t.c.session_id, _t.c.role, _t.c.message, _t.c.timestamp)
+    .where(_t.c.session_id == bindparam("session_id"))
+)
+_SELECT_HISTORY = _SELECT_SESSION.order_by(_t.c.timestamp.asc(), _t.c.id.asc())
+# Últimos N (orden inverso); el llamador los devuelve en orden cronológico.
+_SELECT_TAIL = (
+    _SELECT_SESSION.order_by(_t.c.timestamp.desc(), _t.c.id.desc())
+    .limit(bindparam("limit"))
+)
 
-    Returns:
-        ChatMessage: Entidad construida a partir del modelo.
-    """
-    return ChatMessage(id=m.id, session_id=m.session_id, role=m.role,
-                       message=m.message, timestamp=m.timestamp)
+# Un solo DELETE en vez de leer y borrar fila por fila.
+_DELETE_SESSION = delete(_t).where(_t.c.session_id == bindparam("session_id"))
 
 
 def _entity_to_model(e: ChatMessage) -> ChatMemoryModel:
@@ -36,24 +48,56 @@ def _entity_to_model(e: ChatMessage) -> ChatMemoryModel:
                            message=e.message, timestamp=e.timestamp)
 
 
+def _read(db: Session, stmt, params: dict) -> List[ChatMessage]:
+    """Ejecuta una sentencia Core en `db` y mapea cada fila a `ChatMessage`."""
+    owns_tx = not db.in_transaction()
+    rows = list(starmap(ChatMessage.from_trusted, db.connection().execute(stmt, params)))
+    if owns_tx:
+        # Cierra la transacción de lectura para devolver la conexión al pool:
+        # /chat no debe retenerla mientras espera al modelo de IA.
+        db.commit()
+    return rows
+
+
 class SQLChatRepository(IChatRepository):
     """Repositorio SQLAlchemy de historial de chat."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, replicas: Optional[ReplicaSet] = None):
         """Crea el repositorio con una sesión de base de datos.
 
         Args:
-            db (Session): Sesión activa de SQLAlchemy.
+            db (Session): Sesión activa de SQLAlchemy (base principal).
+            replicas (ReplicaSet | None): Réplicas para las lecturas.
         """
         self.db = db
+        self.replicas = replicas
+
+    def _written(self, session_ids) -> None:
+        """Marca las sesiones escritas para leerlas de la principal un tiempo."""
+        if self.replicas is not None:
+            for sid in set(session_ids):
+                self.replicas.mark_written(sid)
 
     def save_message(self, message: ChatMessage) -> ChatMessage:
         """Persiste un mensaje de chat y retorna la entidad con ID asignado."""
         orm = _entity_to_model(message)
-        self.db.add(orm); self.db.commit(); self.db.refresh(orm)
+        # El ID queda asignado en el flush; sin `refresh` la conexión vuelve al
+        # pool tras el commit en lugar de quedar retenida hasta cerrar la sesión.
+        self.db.add(orm); self.db.commit()
         message.id = orm.id
+        self._written([message.session_id])
         return message
 
+    def save_messages(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        """Inserta varios mensajes con un único commit y asigna sus IDs."""
+        orms = [_entity_to_model(m) for m in messages]
+        self.db.add_all(orms)
+        self.db.commit()
+        for m, orm in zip(messages, orms):
+            m.id = orm.id
+        self._written(m.session_id for m in messages)
+        return messages
+
     def get_session_history(self, session_id: str, limit: Optional[int] = None) -> List[ChatMessage]:
         """Obtiene los mensajes de una sesión en orden cronológico.
 
@@ -67,29 +111,27 @@ class SQLChatRepository(IChatRepository):
         Returns:
             List[ChatMessage]: Mensajes en orden cronológico ascendente.
         """
-        q = (self.db.query(ChatMemoryModel)
-             .filter(ChatMemoryModel.session_id == session_id)
-             .order_by(ChatMemoryModel.timestamp.asc()))
-        rows = q.all()
-        if limit is not None:
-            rows = rows[-limit:]
-        return [_model_to_entity(r) for r in rows]
+        if not limit:
+            return self._fetch(_SELECT_HISTORY, {"session_id": session_id})
+        return self._fetch_tail(session_id, limit)
 
     def delete_session_history(self, session_id: str) -> int:
         """Elimina todos los mensajes de una sesión y devuelve la cantidad eliminada."""
-        rows = (self.db.query(ChatMemoryModel)
-                .filter(ChatMemoryModel.session_id == session_id).all())
-        n = len(rows)
-        for r in rows:
-            self.db.delete(r)
+        n = self.db.execute(_DELETE_SESSION, {"session_id": session_id}).rowcount
         self.db.commit()
+        self._written([session_id])
         return n
 
     def get_recent_messages(self, session_id: str, count: int) -> List[ChatMessage]:
         """Obtiene los últimos `count` mensajes en orden cronológico."""
-        q = (self.db.query(ChatMemoryModel)
-             .filter(ChatMemoryModel.session_id == session_id)
-             .order_by(ChatMemoryModel.timestamp.desc())
-             .limit(count))
-        rows = list(reversed(q.all()))  # devolver cronológico
-        return [_model_to_entity(r) for r in rows]
+        return self._fetch_tail(session_id, count)
+
+    def _fetch(self, stmt, params: dict) -> List[ChatMessage]:
+        """Ejecuta una sentencia Core (en réplica si corresponde) y mapea a `ChatMessage`."""
+        return read_from_replica(self.replicas, params["session_id"], lambda db: _read(db, stmt, params), self.db)
+
+    def _fetch_tail(self, session_id: str, count: int) -> List[ChatMessage]:
+        """Obtiene los últimos `count` mensajes y los devuelve en orden cronológico."""
+        msgs = self._fetch(_SELECT_TAIL, {"session_id": session_id, "limit": count})
+        msgs.reverse()
+        return msgs
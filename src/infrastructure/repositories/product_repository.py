@@ -1,20 +1,48 @@
 """
 Repositorio concreto de productos usando SQLAlchemy.
 Cumple el contrato IProductRepository del dominio.
+
+Las lecturas usan SQLAlchemy Core (`select()` de columnas) sobre la conexión
+de la sesión: las filas se mapean directo a entidades, sin identity map ni
+unidad de trabajo. Las sentencias son constantes de módulo con `bindparam`,
+de modo que su forma compilada se reutiliza desde la caché del engine.
+Con réplicas configuradas (`db.replicas`) las lecturas van a una réplica y
+las escrituras a la base principal; la carga del snapshot del catálogo
+(`get_all_from_primary`) lee siempre de la principal.
+
+Cada escritura agrega su fila al registro de cambios del catálogo en la
+misma transacción y, tras el commit, la publica en el `ChangeBus` (si hay)
+para que las cachés de todos los workers se invaliden.
 """
 
+from itertools import starmap
 from typing import List, Optional
+from sqlalchemy import bindparam, func, select
 from sqlalchemy.orm import Session
 from src.domain.entities import Product
 from src.domain.repositories import IProductRepository
+from src.infrastructure.db.fts import SEARCH_SQL, match_expression
 from src.infrastructure.db.models import ProductModel
+from src.infrastructure.db.replicas import ReplicaSet, read_from_replica
+from src.infrastructure.events.changes import CHANGE_DELETE, CHANGE_UPSERT, CatalogChange, ChangeBus, record_change
+
+_t = ProductModel.__table__
+
+# Mismo orden que los argumentos de `Product.from_trusted`.
+_SELECT_PRODUCTS = select(
+    _t.c.id, _t.c.name, _t.c.brand, _t.c.category, _t.c.size, _t.c.color,
+    _t.c.price, _t.c.stock, func.coalesce(_t.c.description, ""),
+)
+_SELECT_BY_BRAND = _SELECT_PRODUCTS.where(_t.c.brand == bindparam("brand"))
+_SELECT_BY_CATEGORY = _SELECT_PRODUCTS.where(_t.c.category == bindparam("category"))
+_SELECT_BY_IDS = _SELECT_PRODUCTS.where(_t.c.id.in_(bindparam("ids", expanding=True)))
 
 
 def _model_to_entity(m: ProductModel) -> Product:
-    """Convierte un modelo ORM en entidad de dominio Product."""
-    return Product(id=m.id, name=m.name, brand=m.brand, category=m.category,
-                   size=m.size, color=m.color, price=m.price, stock=m.stock,
-                   description=m.description or "")
+    """Convierte un modelo ORM en entidad de dominio Product (sin re-validar)."""
+    return Product.from_trusted(id=m.id, name=m.name, brand=m.brand, category=m.category,
+                                size=m.size, color=m.color, price=m.price, stock=m.stock,
+                                description=m.description or "")
 
 
 def _entity_to_model(e: Product) -> ProductModel:
@@ -24,59 +52,126 @@ def _entity_to_model(e: Product) -> ProductModel:
                         description=e.description or "")
 
 
+def _read(db: Session, stmt, params: dict) -> List[Product]:
+    """Ejecuta una sentencia Core en `db` y mapea cada fila a `Product`."""
+    owns_tx = not db.in_transaction()
+    rows = list(starmap(Product.from_trusted, db.connection().execute(stmt, params)))
+    if owns_tx:
+        # Cierra la transacción de lectura para devolver la conexión al pool:
+        # /chat no debe retenerla mientras espera al modelo de IA.
+        db.commit()
+    return rows
+
+
+def _read_by_id(db: Session, product_id: int) -> Optional[Product]:
+    """Lee un producto por clave primaria en `db`."""
+    r = db.get(ProductModel, product_id)
+    return _model_to_entity(r) if r else None
+
+
 class SQLProductRepository(IProductRepository):
     """Repositorio SQLAlchemy para acceso a productos."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, replicas: Optional[ReplicaSet] = None, events: Optional[ChangeBus] = None):
         """Crea el repositorio con una sesión de base de datos.
 
         Args:
-            db (Session): Sesión activa de SQLAlchemy.
+            db (Session): Sesión activa de SQLAlchemy (base principal).
+            replicas (ReplicaSet | None): Réplicas para las lecturas.
+            events (ChangeBus | None): Bus al que se publican las escrituras.
         """
         self.db = db
+        self.replicas = replicas
+        self.events = events
+
+    def _fetch(self, stmt, params: Optional[dict] = None) -> List[Product]:
+        """Ejecuta una sentencia Core (en réplica si corresponde) y mapea a `Product`."""
+        return read_from_replica(self.replicas, None, lambda db: _read(db, stmt, params or {}), self.db)
 
     def get_all(self) -> List[Product]:
         """Retorna todos los productos almacenados."""
-        rows = self.db.query(ProductModel).all()
-        return [_model_to_entity(r) for r in rows]
+        return self._fetch(_SELECT_PRODUCTS)
+
+    def get_all_from_primary(self) -> List[Product]:
+        """Todos los productos leídos de la base principal, sin réplicas.
+
+        Lo usa la recarga del snapshot del catálogo: tras una invalidación,
+        una réplica retrasada devolvería el catálogo anterior y el snapshot
+        lo serviría hasta `max_age`.
+        """
+        return _read(self.db, _SELECT_PRODUCTS, {})
+
+    def get_by_ids_from_primary(self, product_ids: List[int]) -> List[Product]:
+        """Productos con esos IDs leídos de la base principal (los que existan).
+
+        Lo usa la actualización incremental de las facetas tras un cambio.
+        """
+        return _read(self.db, _SELECT_BY_IDS, {"ids": list(product_ids)})
 
     def get_by_id(self, product_id: int) -> Optional[Product]:
         """Busca un producto por su identificador."""
-        r = self.db.get(ProductModel, product_id)
-        return _model_to_entity(r) if r else None
+        return read_from_replica(self.replicas, None, lambda db: _read_by_id(db, product_id), self.db)
 
     def get_by_brand(self, brand: str) -> List[Product]:
         """Retorna productos filtrando por marca exacta."""
-        rows = self.db.query(ProductModel).filter(ProductModel.brand == brand).all()
-        return [_model_to_entity(r) for r in rows]
+        return self._fetch(_SELECT_BY_BRAND, {"brand": brand})
 
     def get_by_category(self, category: str) -> List[Product]:
         """Retorna productos filtrando por categoría exacta."""
-        rows = self.db.query(ProductModel).filter(ProductModel.category == category).all()
-        return [_model_to_entity(r) for r in rows]
+        return self._fetch(_SELECT_BY_CATEGORY, {"category": category})
+
+    def search_text(self, query: str, limit: int = 20) -> List[Product]:
+        """Búsqueda de texto libre con el índice FTS5 (ranking BM25).
+
+        Primero exige todos los términos (intersección de listas: barata y
+        más precisa); si no alcanza para `limit`, completa con productos que
+        coinciden con alguno. Fuera de SQLite usa la búsqueda en memoria del
+        contrato.
+        """
+        if self.db.get_bind().dialect.name != "sqlite":
+            return super().search_text(query, limit)
+        match = match_expression(query)
+        if match is None:
+            return []
+        found = self._fetch(SEARCH_SQL, {"match": match, "limit": limit})
+        loose = match_expression(query, any_term=True)
+        if len(found) < limit and loose != match:
+            seen = {p.id for p in found}
+            extra = self._fetch(SEARCH_SQL, {"match": loose, "limit": limit})
+            found += [p for p in extra if p.id not in seen][: limit - len(found)]
+        return found
 
     def save(self, product: Product) -> Product:
         """Inserta o actualiza un producto y retorna la entidad persistida."""
-        if product.id is None:
+        existing = self.db.get(ProductModel, product.id) if product.id is not None else None
+        if existing is None:
             orm = _entity_to_model(product)
             self.db.add(orm)
-            self.db.commit()
-            self.db.refresh(orm)
-            return _model_to_entity(orm)
-        existing = self.db.get(ProductModel, product.id)
-        if not existing:
-            orm = _entity_to_model(product)
-            self.db.add(orm); self.db.commit(); self.db.refresh(orm)
-            return _model_to_entity(orm)
-        for f in ("name","brand","category","size","color","price","stock","description"):
-            setattr(existing, f, getattr(product, f))
-        self.db.commit(); self.db.refresh(existing)
-        return _model_to_entity(existing)
+        else:
+            orm = existing
+            for f in ("name","brand","category","size","color","price","stock","description"):
+                setattr(orm, f, getattr(product, f))
+        self.db.flush()
+        # La entidad se arma tras el flush (ID asignado): sin `refresh` después
+        # del commit se ahorra una consulta.
+        saved = _model_to_entity(orm)
+        change = record_change(self.db, CHANGE_UPSERT, orm.id)
+        self.db.commit()
+        self._published(change)
+        return saved
 
     def delete(self, product_id: int) -> bool:
         """Elimina un producto por ID. Devuelve True si existía y fue eliminado."""
         obj = self.db.get(ProductModel, product_id)
         if not obj:
             return False
-        self.db.delete(obj); self.db.commit()
+        self.db.delete(obj)
+        change = record_change(self.db, CHANGE_DELETE, product_id)
+        self.db.commit()
+        self._published(change)
         return True
+
+    def _published(self, change: CatalogChange) -> None:
+        """Publica un cambio ya confirmado."""
+        if self.events is not None:
+            self.events.publish(change)
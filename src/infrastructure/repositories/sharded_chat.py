@@ -0,0 +1,73 @@
+"""
+Repositorio de chat sobre historial particionado por sesión (`ChatShards`).
+
+Cada operación abre una sesión de corta duración en el shard de la sesión
+y delega en el mismo repositorio que usa la base única (`SQLChatRepository`
+con su archivo de sesiones inactivas), de modo que las reglas de lectura y
+escritura no cambian; solo el destino.
+
+Los IDs de mensaje son únicos dentro de cada shard (y por tanto dentro de
+cada sesión), no entre shards.
+"""
+
+from itertools import groupby
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from src.domain.entities import ChatMessage
+from src.domain.repositories import IChatRepository
+from src.infrastructure.db.shards import ChatShards
+from src.infrastructure.repositories.chat_archive import ArchivedChatRepository
+from src.infrastructure.repositories.chat_repository import SQLChatRepository
+
+
+def _default_repo(db: Session) -> IChatRepository:
+    """Repositorio por shard: tabla caliente + archivo."""
+    return ArchivedChatRepository(SQLChatRepository(db), db)
+
+
+class ShardedChatRepository(IChatRepository):
+    """Enruta cada operación al shard de su `session_id`."""
+
+    def __init__(self, shards: ChatShards, repo_factory: Callable[[Session], IChatRepository] = _default_repo):
+        """Crea el repositorio.
+
+        Args:
+            shards (ChatShards): Particiones del historial.
+            repo_factory (Callable): Construye el repositorio de un shard a
+                partir de su sesión.
+        """
+        self._shards = shards
+        self._repo_factory = repo_factory
+
+    def _call(self, session_id: str, op: str, *args):
+        """Ejecuta `op` del repositorio del shard de `session_id`."""
+        with self._shards.session(self._shards.index_for(session_id)) as db:
+            return getattr(self._repo_factory(db), op)(session_id, *args)
+
+    def save_message(self, message: ChatMessage) -> ChatMessage:
+        """Persiste el mensaje en el shard de su sesión."""
+        with self._shards.session(self._shards.index_for(message.session_id)) as db:
+            return self._repo_factory(db).save_message(message)
+
+    def save_messages(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        """Persiste el lote con una inserción (y un commit) por shard."""
+        index_for = self._shards.index_for
+        for index, group in groupby(sorted(messages, key=lambda m: index_for(m.session_id)),
+                                    key=lambda m: index_for(m.session_id)):
+            with self._shards.session(index) as db:
+                self._repo_factory(db).save_messages(list(group))
+        return messages
+
+    def get_session_history(self, session_id: str, limit: Optional[int] = None) -> List[ChatMessage]:
+        """Historial de la sesión desde su shard."""
+        return self._call(session_id, "get_session_history", limit)
+
+    def delete_session_history(self, session_id: str) -> int:
+        """Elimina el historial de la sesión en su shard."""
+        return self._call(session_id, "delete_session_history")
+
+    def get_recent_messages(self, session_id: str, count: int) -> List[ChatMessage]:
+        """Últimos `count` mensajes de la sesión desde su shard."""
+        return self._call(session_id, "get_recent_messages", count)
@@ -0,0 +1,456 @@
+"""
+Persistencia diferida (write-behind) del historial de chat.
+
+En modo write-behind `ChatService.process_message` no espera los commits de
+los mensajes: los encola en una `asyncio.Queue` acotada y responde. Un worker
+en segundo plano drena la cola e inserta por lotes en `chat_memory`.
+
+- Backpressure: si la cola está llena, `submit` espera a que haya espacio.
+- Lectura de lo escrito: `WriteBehindChatRepository` mezcla los mensajes aún
+  pendientes en las lecturas de historial de la sesión.
+- Borrado: `delete_session_history` espera a que termine el lote en vuelo de
+  la sesión antes de descartar sus pendientes y borrar la BD; si no, ese
+  lote se insertaría después del borrado.
+- Apagado: `stop()` (invocado desde el lifespan de FastAPI) vacía la cola.
+- Seguridad ante caídas (opcional): cada mensaje se agrega a un journal
+  local con `fsync` antes de confirmar; al iniciar se re-persiste lo que no
+  llegó a la BD (semántica al-menos-una-vez). Las escrituras del journal
+  corren en un hilo (no frenan el event loop) y se ordenan con un
+  `asyncio.Lock`. Cada proceso escribe su propio
+  archivo (`<nombre>.<pid><ext>`) y lo mantiene bloqueado con `flock`
+  mientras vive; al arrancar, un worker adopta los journals cuyo bloqueo está
+  libre (su proceso murió), los re-persiste y los borra.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+
+from src.domain.entities import ChatMessage
+from src.domain.repositories import IChatRepository
+
+try:  # POSIX; en Windows no se adoptan journals de otros procesos
+    import fcntl
+except ImportError:  # pragma: no cover - depende de la plataforma
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class _Journal:
+    """Journal append-only de mensajes pendientes de este proceso (JSON Lines).
+
+    Cada mensaje se registra como `{"seq": n, "m": [...]}` y cada lote
+    persistido como `{"ack": [n, ...]}` con los `seq` que contenía: el orden
+    de la cola no es el de los `seq` (dos `submit` concurrentes con la cola
+    llena intercalan sus mensajes), así que confirmar "hasta n" perdería los
+    que aún esperan. Cuando la cola queda vacía se trunca.
+
+    Attributes:
+        base (Path): Ruta configurada; da nombre a los journals de cada proceso.
+        path (Path): Journal de este proceso (`<nombre>.<pid><ext>`).
+    """
+
+    def __init__(self, path: str):
+        """Crea y bloquea el journal de este proceso.
+
+        Args:
+            path (str): Ruta configurada (`CHAT_WRITE_JOURNAL`).
+        """
+        self.base = Path(path)
+        self.base.parent.mkdir(parents=True, exist_ok=True)
+        self.path = self.base.with_name(f"{self.base.stem}.{os.getpid()}{self.base.suffix}")
+        with self._directory_lock():
+            self._fh = open(self.path, "ab")
+            if fcntl is not None:
+                fcntl.flock(self._fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    @contextmanager
+    def _directory_lock(self) -> Iterator[None]:
+        """Serializa la creación y la adopción de journals entre procesos."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.base.with_name(self.base.name + ".lock"), "ab") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            yield
+
+    def claim_orphans(self) -> List[Tuple[Path, BinaryIO]]:
+        """Bloquea los journals de procesos que ya no existen.
+
+        Un journal cuyo `flock` se puede tomar no tiene dueño vivo (el sistema
+        libera el bloqueo al morir el proceso). Incluye el archivo de la ruta
+        configurada, que usaban las versiones con un journal compartido.
+
+        Returns:
+            List[Tuple[Path, BinaryIO]]: Journals adoptados, bloqueados hasta `release`.
+        """
+        if fcntl is None:
+            return []
+        own = re.compile(re.escape(self.base.stem) + r"\.\d+" + re.escape(self.base.suffix) + "$")
+        candidates = [p for p in self.base.parent.iterdir()
+                      if p != self.path and (p == self.base or own.match(p.name))]
+        claimed = []
+        with self._directory_lock():
+            for p in sorted(candidates):
+                try:
+                    fh = open(p, "r+b")
+                except FileNotFoundError:
+                    continue
+                try:
+                    fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    fh.close()
+                    continue
+                claimed.append((p, fh))
+        return claimed
+
+    @staticmethod
+    def release(path: Path, fh: BinaryIO) -> None:
+        """Vacía, borra y libera un journal adoptado ya re-persistido."""
+        fh.truncate(0)
+        path.unlink(missing_ok=True)
+        fh.close()
+
+    def append(self, records: List[dict], sync: bool = True) -> None:
+        """Escribe registros y, con `sync`, fuerza su llegada a disco.
+
+        Los acks no necesitan `fsync`: perder uno solo hace que su lote se
+        re-persista al recuperar (al-menos-una-vez).
+        """
+        self._fh.write(b"".join(orjson.dumps(r) + b"\n" for r in records))
+        self._fh.flush()
+        if sync:
+            os.fsync(self._fh.fileno())
+
+    @staticmethod
+    def unacknowledged(path: Path) -> List[ChatMessage]:
+        """Mensajes registrados en `path` cuyo lote no fue confirmado."""
+        entries: Dict[int, ChatMessage] = {}
+        acked: set = set()
+        acked_upto = 0  # journals de versiones que confirmaban "hasta n"
+        if not path.exists():
+            return []
+        for line in path.read_bytes().splitlines():
+            try:
+                rec = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue  # última línea truncada por la caída
+            if "ack" in rec:
+                if isinstance(rec["ack"], list):
+                    acked.update(rec["ack"])
+                else:
+                    acked_upto = max(acked_upto, rec["ack"])
+            else:
+                session_id, role, message, ts = rec["m"]
+                entries[rec["seq"]] = ChatMessage.from_trusted(
+                    id=None, session_id=session_id, role=role, message=message,
+                    timestamp=datetime.fromisoformat(ts),
+                )
+        return [m for seq, m in sorted(entries.items()) if seq > acked_upto and seq not in acked]
+
+    def truncate(self) -> None:
+        """Vacía el journal (todo lo registrado ya está en la BD)."""
+        self._fh.truncate(0)
+        self._fh.seek(0)
+
+    def close(self, remove: bool = False) -> None:
+        """Cierra el archivo (y lo borra si `remove`, tras un apagado limpio)."""
+        if remove:
+            self._fh.truncate(0)
+            self.path.unlink(missing_ok=True)
+        self._fh.close()
+
+
+class ChatWriteBehindQueue:
+    """Cola acotada de mensajes con un worker que los persiste por lotes.
+
+    Attributes:
+        maxsize (int): Capacidad de la cola (en mensajes).
+        batch_size (int): Máximo de mensajes por inserción.
+    """
+
+    def __init__(
+        self,
+        repo_factory: Callable[[], ContextManager[IChatRepository]],
+        maxsize: int = 1000,
+        batch_size: int = 100,
+        journal_path: Optional[str] = None,
+    ):
+        """Configura la cola (el worker se inicia con `start`).
+
+        Args:
+            repo_factory (Callable): Devuelve un context manager que entrega un
+                `IChatRepository` con su propia sesión de BD para cada lote.
+            maxsize (int): Capacidad de la cola; al llenarse `submit` espera.
+            batch_size (int): Máximo de mensajes por inserción.
+            journal_path (Optional[str]): Si se indica, activa el journal local.
+        """
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self._repo_factory = repo_factory
+        self._journal = _Journal(journal_path) if journal_path else None
+        self._queue: Optional[asyncio.Queue] = None
+        self._journal_lock: Optional[asyncio.Lock] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._pending: Dict[str, List[ChatMessage]] = {}
+        self._seq = 0
+        self._seqs: Dict[int, int] = {}
+        self._inflight: set = set()
+        # Sesiones con mensajes en el lote en vuelo; `discard` espera a que se vacíen.
+        self._inflight_sessions: Counter = Counter()
+        self._inflight_done = threading.Condition()
+
+    async def start(self) -> None:
+        """Crea la cola en el loop actual, re-persiste el journal y arranca el worker."""
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._journal_lock = asyncio.Lock()
+        if self._journal is not None:
+            orphans = await asyncio.to_thread(self._journal.claim_orphans)
+            for path in [self._journal.path] + [p for p, _ in orphans]:
+                recovered = _Journal.unacknowledged(path)
+                if recovered:
+                    logger.warning("Recuperando %d mensajes del journal %s", len(recovered), path.name)
+                    await asyncio.to_thread(self._persist, recovered)
+            for path, fh in orphans:
+                _Journal.release(path, fh)
+            self._journal.truncate()
+        self._worker = asyncio.create_task(self._run(), name="chat-write-behind")
+
+    async def submit(self, messages: List[ChatMessage]) -> None:
+        """Encola mensajes para su persistencia.
+
+        Con journal, los mensajes se escriben en disco (en un hilo) antes de
+        encolarlos. Si la cola está llena, espera (backpressure) hasta que
+        haya espacio.
+
+        Args:
+            messages (List[ChatMessage]): Mensajes en orden cronológico.
+
+        Raises:
+            RuntimeError: Si la cola no fue iniciada.
+        """
+        if self._queue is None:
+            raise RuntimeError("La cola write-behind no está iniciada.")
+        if self._journal is not None:
+            records = []
+            for m in messages:
+                self._seq += 1
+                self._seqs[id(m)] = self._seq
+                records.append({"seq": self._seq, "m": [m.session_id, m.role, m.message, m.timestamp.isoformat()]})
+            # Con el lock, un ack o un truncado de `_complete` no se cruza con
+            # esta escritura: los mensajes pasan a pendientes antes de soltarlo.
+            async with self._journal_lock:
+                await asyncio.to_thread(self._journal.append, records)
+        for m in messages:
+            self._pending.setdefault(m.session_id, []).append(m)
+        for m in messages:
+            await self._queue.put(m)
+
+    def pending(self, session_id: str) -> List[ChatMessage]:
+        """Mensajes de la sesión aún no persistidos (copia, en orden).
+
+        Args:
+            session_id (str): Identificador de la sesión.
+
+        Returns:
+            List[ChatMessage]: Mensajes pendientes.
+        """
+        return list(self._pending.get(session_id, ()))
+
+    def in_flight(self, message: ChatMessage) -> bool:
+        """Indica si el mensaje (este objeto) está en un lote que se está insertando.
+
+        Su commit puede haber terminado antes de que el repositorio le asigne
+        el `id`, así que una lectura concurrente puede verlo ya persistido.
+        """
+        return id(message) in self._inflight
+
+    def discard(self, session_id: str, timeout: float = 30.0) -> int:
+        """Descarta los pendientes de una sesión (p. ej. al borrar su historial).
+
+        Si un lote con mensajes de la sesión se está insertando, espera a que
+        termine: esos mensajes quedan en la BD y el borrado posterior los
+        alcanza. Bloquea el hilo: se llama desde el threadpool (endpoints
+        síncronos), nunca desde el event loop.
+
+        Args:
+            session_id (str): Identificador de la sesión.
+            timeout (float): Espera máxima por el lote en vuelo.
+
+        Returns:
+            int: Mensajes pendientes descartados.
+        """
+        with self._inflight_done:
+            if not self._inflight_done.wait_for(lambda: not self._inflight_sessions[session_id], timeout):
+                logger.warning("Borrando la sesión %s con un lote aún en vuelo", session_id)
+            return len(self._pending.pop(session_id, ()))
+
+    @property
+    def depth(self) -> int:
+        """Mensajes en cola esperando ser persistidos."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def flush(self) -> None:
+        """Espera a que todo lo encolado hasta ahora esté persistido."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Vacía la cola, detiene el worker y cierra el journal.
+
+        Args:
+            timeout (float): Segundos máximos de espera para vaciar la cola. Si
+                se agota, lo pendiente queda en el journal (si está activo).
+        """
+        if self._queue is None:
+            return
+        flushed = True
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            flushed = False
+            logger.error("Apagado con %d mensajes sin persistir", self.depth)
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        if self._journal is not None:
+            self._journal.close(remove=flushed)
+        self._queue = None
+        self._worker = None
+
+    async def _run(self) -> None:
+        """Worker: toma lotes de la cola y los persiste en un hilo."""
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            with self._inflight_done:
+                live = [m for m in batch if self._is_pending(m)]
+                self._inflight.update(id(m) for m in live)
+                self._inflight_sessions.update(m.session_id for m in live)
+            while live:
+                try:
+                    await asyncio.to_thread(self._persist, live)
+                    break
+                except Exception:
+                    logger.exception("Error persistiendo %d mensajes; reintentando", len(live))
+                    await asyncio.sleep(0.5)
+            await self._complete(batch)
+
+    def _is_pending(self, message: ChatMessage) -> bool:
+        """Indica si el mensaje sigue pendiente (no fue descartado)."""
+        return any(m is message for m in self._pending.get(message.session_id, ()))
+
+    def _persist(self, messages: List[ChatMessage]) -> None:
+        """Inserta un lote con un repositorio nuevo (se ejecuta en un hilo)."""
+        with self._repo_factory() as repo:
+            repo.save_messages(messages)
+
+    async def _complete(self, batch: List[ChatMessage]) -> None:
+        """Quita el lote de los pendientes, lo confirma en el journal y marca las tareas."""
+        with self._inflight_done:
+            for m in batch:
+                if id(m) in self._inflight:
+                    self._inflight.discard(id(m))
+                    self._inflight_sessions[m.session_id] -= 1
+                items = self._pending.get(m.session_id)
+                if items is not None:
+                    items[:] = [x for x in items if x is not m]
+                    if not items:
+                        del self._pending[m.session_id]
+            self._inflight_sessions += Counter()  # quita las sesiones en cero
+            self._inflight_done.notify_all()
+        if self._journal is not None:
+            acked = sorted(seq for seq in (self._seqs.pop(id(m), None) for m in batch) if seq is not None)
+            async with self._journal_lock:
+                if self._queue.qsize() == 0 and not self._pending:
+                    await asyncio.to_thread(self._journal.truncate)
+                elif acked:
+                    await asyncio.to_thread(self._journal.append, [{"ack": acked}], False)
+        for _ in batch:
+            self._queue.task_done()
+
+
+class WriteBehindChatRepository(IChatRepository):
+    """Decorador que agrega a las lecturas los mensajes aún en cola.
+
+    Garantiza lectura-de-lo-escrito para `/chat/history` y para el contexto
+    del siguiente turno mientras el worker no haya persistido el lote.
+
+    Attributes:
+        _inner (IChatRepository): Repositorio real.
+        _queue (ChatWriteBehindQueue): Cola write-behind del proceso.
+    """
+
+    def __init__(self, inner: IChatRepository, queue: ChatWriteBehindQueue):
+        """Crea el decorador.
+
+        Args:
+            inner (IChatRepository): Repositorio al que se delega.
+            queue (ChatWriteBehindQueue): Cola con los mensajes pendientes.
+        """
+        self._inner = inner
+        self._queue = queue
+
+    def save_message(self, message: ChatMessage) -> ChatMessage:
+        """Escritura síncrona (sin cola), delegada al repositorio interno."""
+        return self._inner.save_message(message)
+
+    def save_messages(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        """Escritura síncrona por lotes, delegada al repositorio interno."""
+        return self._inner.save_messages(messages)
+
+    def get_session_history(self, session_id: str, limit: Optional[int] = None) -> List[ChatMessage]:
+        """Historial persistido más los pendientes de la sesión."""
+        pending = self._queue.pending(session_id)  # antes de leer: nunca se pierde un mensaje
+        rows = self._inner.get_session_history(session_id, limit)
+        return self._merge(rows, pending, limit)
+
+    def delete_session_history(self, session_id: str) -> int:
+        """Espera el lote en vuelo de la sesión, descarta sus pendientes y elimina el historial."""
+        discarded = self._queue.discard(session_id)
+        return self._inner.delete_session_history(session_id) + discarded
+
+    def get_recent_messages(self, session_id: str, count: int) -> List[ChatMessage]:
+        """Últimos `count` mensajes incluyendo los pendientes."""
+        pending = self._queue.pending(session_id)
+        rows = self._inner.get_recent_messages(session_id, count)
+        return self._merge(rows, pending, count)
+
+    def _merge(self, rows: List[ChatMessage], pending: List[ChatMessage], limit: Optional[int]) -> List[ChatMessage]:
+        """Une persistidos y pendientes sin duplicar los que se guardaron entretanto.
+
+        Un pendiente con `id` está persistido si ese `id` vino en `rows`. Uno
+        sin `id` solo puede estar ya en la BD si su lote está en vuelo (el
+        repositorio asigna los ids después del commit); en ese caso se lo
+        reconoce por su contenido entre las filas leídas.
+        """
+        if not pending:
+            return rows
+        persisted = {m.id for m in rows if m.id is not None}
+        written = None
+        merged = list(rows)
+        for m in pending:
+            if m.id is not None:
+                if m.id in persisted:
+                    continue
+            elif self._queue.in_flight(m):
+                if written is None:
+                    written = {(r.role, r.message, r.timestamp) for r in rows}
+                if (m.role, m.message, m.timestamp) in written:
+                    continue
+            merged.append(m)
+        return merged[-limit:] if limit else merged
@@ -0,0 +1,136 @@
+"""
+Embeddings locales (sin red) para texto de productos y consultas.
+
+- `HashedNgramEmbedder`: proyección por hashing de palabras y n-gramas de
+  caracteres (tolera plurales, tildes y errores de tipeo). No requiere
+  entrenamiento ni dependencias además de NumPy.
+- `SentenceTransformerEmbedder`: modelo local opcional de
+  `sentence-transformers` (se importa solo si se configura).
+
+Ambos devuelven matrices `float32` con filas de norma 1, de modo que el
+producto punto es la similitud coseno.
+"""
+
+import zlib
+from abc import ABC, abstractmethod
+from typing import List, Sequence
+
+import numpy as np
+
+from src.domain.entities import Product
+from src.domain.search import words
+
+
+def product_text(product: Product) -> str:
+    """Texto que representa a un producto para el embedding."""
+    return " ".join((product.name, product.brand, product.category, product.color, product.description or ""))
+
+
+class Embedder(ABC):
+    """Contrato de un generador de embeddings.
+
+    Attributes:
+        dim (int): Dimensión de los vectores.
+        signature (str): Identifica el modelo; si cambia, el índice se reconstruye.
+    """
+
+    dim: int
+    signature: str
+
+    @abstractmethod
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Calcula los embeddings normalizados de `texts` (`len(texts)` × `dim`)."""
+        raise NotImplementedError
+
+
+class HashedNgramEmbedder(Embedder):
+    """Embedding por hashing de palabras y trigramas de caracteres.
+
+    Cada característica se asigna a una de `dim` posiciones con CRC32 y un
+    signo derivado del mismo hash (reduce el sesgo de colisiones).
+    """
+
+    def __init__(self, dim: int = 256, ngram: int = 3, word_weight: float = 2.0):
+        """Configura la proyección.
+
+        Args:
+            dim (int): Dimensión del vector.
+            ngram (int): Largo de los n-gramas de caracteres.
+            word_weight (float): Peso de la palabra completa frente a cada n-grama.
+        """
+        self.dim = dim
+        self.ngram = ngram
+        self.word_weight = word_weight
+        self.signature = f"hashed-ngram:{dim}:{ngram}:{word_weight}"
+
+    def _features(self, text: str) -> List[tuple]:
+        """Pares (hash, peso) de las palabras y n-gramas del texto."""
+        feats = []
+        for word in words(text):
+            feats.append((zlib.crc32(word.encode()), self.word_weight))
+            padded = f"#{word}#"
+            for i in range(max(1, len(padded) - self.ngram + 1)):
+                feats.append((zlib.crc32(padded[i:i + self.ngram].encode(), 0x9E3779B9), 1.0))
+        return feats
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Proyecta los textos y normaliza cada fila (filas vacías quedan en cero)."""
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        rows, cols, vals = [], [], []
+        for r, text in enumerate(texts):
+            for h, w in self._features(text):
+                rows.append(r)
+                cols.append(h % self.dim)
+                vals.append(w if h & 0x80000000 else -w)
+        if rows:
+            np.add.at(out, (np.asarray(rows), np.asarray(cols)), np.asarray(vals, dtype=np.float32))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """Modelo local de `sentence-transformers` (dependencia opcional)."""
+
+    def __init__(self, model_name: str):
+        """Carga el modelo desde la caché local.
+
+        Args:
+            model_name (str): Nombre o ruta del modelo (p. ej.
+                `paraphrase-multilingual-MiniLM-L12-v2`).
+
+        Raises:
+            RuntimeError: Si `sentence-transformers` no está instalado.
+        """
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError("Instala 'sentence-transformers' para usar un modelo local.") from e
+        self._model = SentenceTransformer(model_name)
+        self.dim = int(self._model.get_sentence_embedding_dimension())
+        self.signature = f"st:{model_name}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings normalizados del modelo."""
+        vecs = self._model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True)
+        return vecs.astype(np.float32, copy=False)
+
+
+def create_embedder(spec: str) -> Embedder:
+    """Crea el embedder indicado en la configuración.
+
+    Args:
+        spec (str): `hashed` (por defecto), `hashed:<dim>` o `st:<modelo>`.
+
+    Returns:
+        Embedder: Instancia configurada.
+
+    Raises:
+        ValueError: Si el formato no es reconocido.
+    """
+    kind, _, arg = (spec or "hashed").partition(":")
+    if kind == "hashed":
+        return HashedNgramEmbedder(dim=int(arg) if arg else 256)
+    if kind == "st" and arg:
+        return SentenceTransformerEmbedder(arg)
+    raise ValueError(f"Embedder no soportado: {spec!r}")
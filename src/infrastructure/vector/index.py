@@ -0,0 +1,490 @@
+"""
+Índice vectorial de productos en disco (matriz NumPy mapeada en memoria).
+
+Estructura del directorio del índice:
+
+- `vectors.f32`: matriz `capacidad × dim` de embeddings normalizados.
+- `ids.i64`: ID de producto de cada fila (`-1` = fila libre).
+- `sums.u32`: CRC32 del texto embebido, para re-embeber solo lo que cambió.
+- `meta.json`: dimensión, firma del embedder y filas usadas.
+
+Los archivos se abren con `np.memmap`: los workers comparten las páginas
+vía la caché del sistema operativo y el índice no se recalcula al reiniciar.
+Las escrituras se serializan con `fcntl.flock` (en Windows, solo entre hilos
+del proceso); los demás procesos recargan al detectar un `meta.json` nuevo.
+
+La búsqueda exacta es un producto matriz-vector sobre todas las filas. A
+partir de `ann_threshold` filas se construye un índice aproximado IVF
+(k-means sobre los vectores; se comparan solo las listas de los `nprobe`
+centroides más cercanos). El IVF se construye y se reconstruye en el camino
+de escritura (`sync` y `upsert`), nunca durante una búsqueda. Al recargar
+cambios publicados por otro proceso (o al abrir un índice grande), un hilo
+de fondo lo reconstruye sin tomar el lock; mientras tanto la búsqueda es
+exacta.
+"""
+
+import json
+import logging
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.domain.entities import Product
+from src.domain.repositories import IProductRepository
+from .embeddings import Embedder, product_text
+
+try:  # POSIX; en Windows las escrituras solo se serializan entre hilos
+    import fcntl
+except ImportError:  # pragma: no cover - depende de la plataforma
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class _IVF:
+    """Índice aproximado por listas invertidas sobre centroides k-means."""
+
+    def __init__(self, centroids: np.ndarray, assign: np.ndarray):
+        """Agrupa las filas por centroide.
+
+        Args:
+            centroids (np.ndarray): Matriz `nlist × dim` normalizada.
+            assign (np.ndarray): Centroide de cada fila.
+        """
+        self.centroids = centroids
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(centroids) + 1))
+        self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(centroids))]
+        self.extra: Dict[int, List[int]] = {}
+        self.added = 0
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Asigna filas nuevas o modificadas a su centroide más cercano."""
+        for row, c in zip(rows.tolist(), np.argmax(vectors @ self.centroids.T, axis=1).tolist()):
+            self.extra.setdefault(c, []).append(row)
+        self.added += len(rows)
+
+    def candidates(self, q: np.ndarray, nprobe: int) -> np.ndarray:
+        """Filas de las listas de los `nprobe` centroides más similares a `q`."""
+        sims = self.centroids @ q
+        probe = np.argpartition(-sims, min(nprobe, len(sims)) - 1)[:nprobe]
+        parts = [self.lists[c] for c in probe]
+        parts += [np.asarray(self.extra[c], dtype=np.int64) for c in probe if c in self.extra]
+        return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+
+class ProductVectorIndex:
+    """Índice de embeddings de productos con búsqueda top-K por coseno.
+
+    Attributes:
+        directory (Path): Directorio de los archivos del índice.
+        embedder (Embedder): Generador de embeddings.
+        ann_threshold (int): Filas a partir de las cuales se usa el IVF.
+        nprobe (int): Listas del IVF a revisar por consulta.
+    """
+
+    _INITIAL_CAPACITY = 1024
+
+    def __init__(self, directory: str, embedder: Embedder, ann_threshold: int = 50_000, nprobe: int = 32):
+        """Abre (o crea) el índice en `directory`.
+
+        Si la firma o la dimensión del embedder no coinciden con las del
+        índice guardado, se descarta y se empieza vacío.
+
+        Args:
+            directory (str): Directorio del índice.
+            embedder (Embedder): Generador de embeddings.
+            ann_threshold (int): Filas a partir de las cuales se usa el IVF.
+            nprobe (int): Listas del IVF a revisar por consulta.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder
+        self.ann_threshold = ann_threshold
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self._meta_mtime = 0
+        self._ann: Optional[_IVF] = None
+        self._ann_thread: Optional[threading.Thread] = None
+        # Cambia con cada recarga o escritura de vectores: invalida un IVF de fondo en curso.
+        self._version = 0
+        with self._file_lock():
+            self._load()
+
+    # --- almacenamiento -------------------------------------------------
+
+    def _path(self, name: str) -> Path:
+        """Ruta de un archivo del índice."""
+        return self.directory / name
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusión entre procesos (y entre hilos) para escrituras."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._path("index.lock"), "a+") as fh:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _load(self) -> None:
+        """Abre los archivos existentes o inicializa un índice vacío."""
+        meta_path = self._path("meta.json")
+        meta = json.loads(meta_path.read_bytes()) if meta_path.exists() else None
+        dim = self.embedder.dim
+        if meta is None or meta["signature"] != self.embedder.signature or meta["dim"] != dim:
+            self._open(self._INITIAL_CAPACITY, reset=True)
+            self._rows = 0
+            self._write_meta()
+        else:
+            capacity = self._path("ids.i64").stat().st_size // 8
+            self._open(capacity)
+            self._rows = meta["rows"]
+            self._meta_mtime = meta_path.stat().st_mtime_ns
+        ids = self._ids[:self._rows]
+        self._row_of = {int(pid): row for row, pid in enumerate(ids.tolist()) if pid >= 0}
+        self._free = [row for row, pid in enumerate(ids.tolist()) if pid < 0]
+        self._ann = None
+        self._version += 1
+        self._build_ann_in_background()
+
+    def _open(self, capacity: int, reset: bool = False) -> None:
+        """Mapea los archivos con `capacity` filas (creándolos o agrandándolos)."""
+        dim = self.embedder.dim
+        for name, size in (("vectors.f32", capacity * dim * 4), ("ids.i64", capacity * 8), ("sums.u32", capacity * 4)):
+            with open(self._path(name), "w+b" if reset else "r+b") as fh:
+                fh.truncate(size)
+        self._vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r+", shape=(capacity, dim))
+        self._ids = np.memmap(self._path("ids.i64"), dtype=np.int64, mode="r+", shape=(capacity,))
+        self._sums = np.memmap(self._path("sums.u32"), dtype=np.uint32, mode="r+", shape=(capacity,))
+        if reset:
+            self._ids[:] = -1
+
+    def _grow(self, needed: int) -> None:
+        """Duplica la capacidad hasta alojar `needed` filas."""
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        new_capacity = capacity
+        while new_capacity < needed:
+            new_capacity *= 2
+        self._flush()
+        self._open(new_capacity)
+        self._ids[capacity:] = -1
+
+    def _flush(self) -> None:
+        """Escribe las páginas modificadas a disco."""
+        for arr in (self._vectors, self._ids, self._sums):
+            arr.flush()
+
+    def _write_meta(self) -> None:
+        """Publica el estado (escritura atómica) para los demás procesos."""
+        self._flush()
+        tmp = self._path("meta.json.tmp")
+        tmp.write_text(json.dumps({"dim": self.embedder.dim, "signature": self.embedder.signature, "rows": self._rows}))
+        os.replace(tmp, self._path("meta.json"))
+        self._meta_mtime = self._path("meta.json").stat().st_mtime_ns
+
+    def _refresh(self) -> None:
+        """Recarga si otro proceso publicó cambios."""
+        try:
+            mtime = self._path("meta.json").stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._meta_mtime:
+            self._load()
+
+    # --- escritura ------------------------------------------------------
+
+    def __len__(self) -> int:
+        """Cantidad de productos indexados."""
+        return len(self._row_of)
+
+    def upsert(self, products: Iterable[Product]) -> int:
+        """Agrega o actualiza productos; solo re-embebe los que cambiaron.
+
+        Args:
+            products (Iterable[Product]): Productos con ID asignado.
+
+        Returns:
+            int: Cantidad de productos (re)embebidos.
+        """
+        with self._file_lock():
+            self._refresh()
+            changed = self._upsert_locked(products)
+            if changed:
+                self._write_meta()
+        if changed:
+            self._maybe_build_ann()
+        return changed
+
+    def _upsert_locked(self, products: Iterable[Product]) -> int:
+        """`upsert` con el lock tomado (sin publicar meta)."""
+        pending: Dict[int, Tuple[str, int]] = {}
+        for p in products:
+            text = product_text(p)
+            crc = zlib.crc32(text.encode())
+            row = self._row_of.get(p.id)
+            if row is None or int(self._sums[row]) != crc:
+                pending[p.id] = (text, crc)
+        if not pending:
+            return 0
+        new = sum(1 for pid in pending if pid not in self._row_of)
+        self._grow(self._rows + max(0, new - len(self._free)))
+        rows = []
+        for pid in pending:
+            row = self._row_of.get(pid)
+            if row is None:
+                row = self._free.pop() if self._free else self._next_row()
+                self._row_of[pid] = row
+            rows.append(row)
+        rows_arr = np.asarray(rows, dtype=np.int64)
+        vectors = self.embedder.embed([t for t, _ in pending.values()])
+        self._vectors[rows_arr] = vectors
+        self._ids[rows_arr] = np.fromiter(pending.keys(), dtype=np.int64, count=len(pending))
+        self._sums[rows_arr] = np.fromiter((c for _, c in pending.values()), dtype=np.uint32, count=len(pending))
+        if self._ann is not None:
+            self._ann.add(rows_arr, vectors)
+        self._version += 1
+        return len(pending)
+
+    def _next_row(self) -> int:
+        """Reserva la siguiente fila al final de la matriz."""
+        row = self._rows
+        self._rows += 1
+        return row
+
+    def remove(self, product_id: int) -> bool:
+        """Quita un producto del índice.
+
+        Args:
+            product_id (int): ID del producto.
+
+        Returns:
+            bool: `True` si estaba indexado.
+        """
+        with self._file_lock():
+            self._refresh()
+            removed = self._remove_locked(product_id)
+            if removed:
+                self._write_meta()
+            return removed
+
+    def _remove_locked(self, product_id: int) -> bool:
+        """`remove` con el lock tomado (sin publicar meta)."""
+        row = self._row_of.pop(product_id, None)
+        if row is None:
+            return False
+        self._ids[row] = -1
+        self._vectors[row] = 0.0
+        self._free.append(row)
+        return True
+
+    def sync(self, products: Sequence[Product]) -> int:
+        """Alinea el índice con el catálogo completo (p. ej. al iniciar).
+
+        Args:
+            products (Sequence[Product]): Catálogo actual.
+
+        Returns:
+            int: Productos agregados, actualizados o eliminados.
+        """
+        with self._file_lock():
+            self._refresh()
+            current = {p.id for p in products}
+            stale = [pid for pid in self._row_of if pid not in current]
+            for pid in stale:
+                self._remove_locked(pid)
+            changed = len(stale) + self._upsert_locked(products)
+            if changed:
+                self._write_meta()
+        if self._ann is None or changed:
+            self._maybe_build_ann()
+        return changed
+
+    def _maybe_build_ann(self) -> None:
+        """(Re)construye el IVF si el índice lo amerita.
+
+        Se construye al alcanzar `ann_threshold` filas y se reconstruye cuando
+        las filas agregadas desde la última construcción superan el 20%.
+        """
+        with self._lock:
+            if len(self) < self.ann_threshold:
+                return
+            if self._ann is None and self._ann_thread is not None:
+                return  # lo está construyendo el hilo de fondo
+            if self._ann is None or self._ann.added > 0.2 * self._rows:
+                self.build_ann()
+
+    def _build_ann_in_background(self) -> None:
+        """Arranca un hilo que construye el IVF si falta y el índice lo amerita (requiere el lock)."""
+        if self._ann is not None or self._ann_thread is not None or len(self) < self.ann_threshold:
+            return
+        self._ann_thread = threading.Thread(target=self._ann_worker, name="vector-ann", daemon=True)
+        self._ann_thread.start()
+
+    def _ann_worker(self) -> None:
+        """Entrena el IVF sobre una foto del índice y lo publica si sigue vigente.
+
+        El k-means corre sin el lock, así que las búsquedas siguen (exactas).
+        Si entre tanto se recargó o se escribió el índice, se descarta y se
+        vuelve a entrenar.
+        """
+        try:
+            while True:
+                with self._lock:
+                    if self._ann is not None or len(self) < self.ann_threshold:
+                        return
+                    version, rows, vectors = self._version, self._rows, self._vectors
+                    ids = np.array(self._ids[:rows])
+                ann = self._train(vectors, ids)
+                with self._lock:
+                    if self._version == version:
+                        self._ann = ann
+                        return
+        except Exception:  # noqa: BLE001 - la búsqueda exacta sigue funcionando
+            logger.exception("No se pudo construir el índice aproximado en segundo plano")
+        finally:
+            with self._lock:
+                self._ann_thread = None
+
+    # --- búsqueda -------------------------------------------------------
+
+    def build_ann(self, nlist: Optional[int] = None, iterations: int = 8, sample: int = 20_000) -> None:
+        """Construye el índice aproximado IVF con k-means esférico.
+
+        Args:
+            nlist (Optional[int]): Cantidad de centroides (por defecto ~√N).
+            iterations (int): Iteraciones de k-means sobre la muestra.
+            sample (int): Filas usadas para entrenar los centroides.
+        """
+        with self._lock:
+            self._ann = self._train(self._vectors, np.asarray(self._ids[:self._rows]), nlist, iterations, sample)
+
+    @staticmethod
+    def _train(vectors: np.ndarray, ids: np.ndarray, nlist: Optional[int] = None,
+               iterations: int = 8, sample: int = 20_000) -> Optional[_IVF]:
+        """IVF de las primeras `len(ids)` filas de `vectors` (None si no hay filas válidas)."""
+        rows = len(ids)
+        valid = np.flatnonzero(ids >= 0)
+        if len(valid) == 0:
+            return None
+        nlist = max(1, min(nlist or int(np.sqrt(len(valid))), len(valid)))
+        rng = np.random.default_rng(0)
+        train = np.asarray(vectors[np.sort(rng.choice(valid, min(sample, len(valid)), replace=False))])
+        centroids = train[rng.choice(len(train), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(train @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, train)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        assign = np.empty(rows, dtype=np.int64)
+        for start in range(0, rows, 65_536):
+            block = np.asarray(vectors[start:min(start + 65_536, rows)])
+            assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return _IVF(centroids.astype(np.float32), assign)
+
+    def search(self, query: str, k: int = 8) -> List[Tuple[int, float]]:
+        """Top-`k` productos más similares a `query` (coseno).
+
+        Es trabajo de CPU (embedding y producto matricial): desde código
+        asíncrono se llama con `asyncio.to_thread`.
+
+        Args:
+            query (str): Texto libre.
+            k (int): Cantidad de resultados.
+
+        Returns:
+            List[Tuple[int, float]]: Pares (ID de producto, similitud), mejor primero.
+        """
+        q = self.embedder.embed([query])[0]
+        if not q.any():
+            return []
+        with self._lock:
+            self._refresh()
+            ann = self._ann
+            if ann is not None:
+                rows = ann.candidates(q, self.nprobe)
+                rows = rows[rows < self._rows]
+                scores = np.asarray(self._vectors[rows]) @ q
+                ids = np.asarray(self._ids[rows])
+            else:
+                scores = np.asarray(self._vectors[:self._rows]) @ q
+                ids = np.asarray(self._ids[:self._rows])
+        scores = np.where(ids >= 0, scores, -np.inf)
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[i]), float(scores[i])) for i in top if scores[i] > 0]
+
+    def retrieve(self, query: str, k: int = 8) -> List[int]:
+        """IDs de los `k` productos más relevantes para `query` (para el chat)."""
+        return [pid for pid, _ in self.search(query, k)]
+
+
+class IndexedProductRepository(IProductRepository):
+    """Decorador que mantiene el índice vectorial al guardar o eliminar productos.
+
+    Attributes:
+        _inner (IProductRepository): Repositorio al que se delega.
+        _index (ProductVectorIndex): Índice a actualizar.
+    """
+
+    def __init__(self, inner: IProductRepository, index: ProductVectorIndex):
+        """Crea el decorador.
+
+        Args:
+            inner (IProductRepository): Repositorio al que se delega.
+            index (ProductVectorIndex): Índice vectorial del proceso.
+        """
+        self._inner = inner
+        self._index = index
+
+    def get_all(self) -> List[Product]:
+        """Delegado al repositorio interno."""
+        return self._inner.get_all()
+
+    def get_by_id(self, product_id: int) -> Optional[Product]:
+        """Delegado al repositorio interno."""
+        return self._inner.get_by_id(product_id)
+
+    def get_by_brand(self, brand: str) -> List[Product]:
+        """Delegado al repositorio interno."""
+        return self._inner.get_by_brand(brand)
+
+    def get_by_category(self, category: str) -> List[Product]:
+        """Delegado al repositorio interno."""
+        return self._inner.get_by_category(category)
+
+    def search_text(self, query: str, limit: int = 20) -> List[Product]:
+        """Delegado al repositorio interno."""
+        return self._inner.search_text(query, limit)
+
+    def find(self, filters=None, sort=None, limit=None) -> Sequence[Product]:
+        """Delegado al repositorio interno."""
+        return self._inner.find(filters, sort, limit)
+
+    def save(self, product: Product) -> Product:
+        """Persiste y actualiza el vector del producto."""
+        saved = self._inner.save(product)
+        self._index.upsert([saved])
+        return saved
+
+    def delete(self, product_id: int) -> bool:
+        """Elimina y quita el vector del producto."""
+        deleted = self._inner.delete(product_id)
+        if deleted:
+            self._index.remove(product_id)
+        return deleted
@@ -0,0 +1,37 @@
+"""Límite de sentencias SQL por bloque para los tests.
+
+`max_queries(engine, n)` cuenta las sentencias que `engine` (o una lista de
+engines, p. ej. principal + shards) ejecuta dentro del bloque, sin importar
+el hilo (el `TestClient` atiende en otro), y falla listándolas si superan `n`. Detecta N+1 y viajes de más antes de producción.
+"""
+
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@contextmanager
+def max_queries(engine: Union[Engine, Iterable[Engine]], limit: int) -> Iterator[List[str]]:
+    """Falla si `engine` (o los engines dados) ejecutan más de `limit` sentencias dentro del bloque.
+
+    Yields:
+        List[str]: Sentencias ejecutadas hasta el momento.
+    """
+    statements: List[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = [engine] if isinstance(engine, Engine) else list(engine)
+    for e in engines:
+        event.listen(e, "after_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for e in engines:
+            event.remove(e, "after_cursor_execute", record)
+    assert len(statements) <= limit, (
+        f"{len(statements)} sentencias SQL (máximo {limit}):\n" + "\n".join(statements)
+    )
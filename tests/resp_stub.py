@@ -0,0 +1,149 @@
+"""Servidor mínimo compatible con el protocolo RESP de Redis para pruebas.
+
+Implementa solo los comandos que usa la aplicación (GET, SET con PX/NX, DEL,
+INCRBY, PEXPIRE, SELECT, PING, PUBLISH, SUBSCRIBE y el `EVAL` de liberación
+de bloqueos) sobre un diccionario en
+memoria. Permite probar `RedisBackend` y `RedisTransport` sin un Redis real.
+"""
+
+import socketserver
+import threading
+import time
+
+from src.infrastructure.cache.backends import RELEASE_LOCK_SCRIPT
+
+
+class _State:
+    """Datos compartidos por todas las conexiones del servidor."""
+
+    def __init__(self):
+        """Inicializa el almacenamiento vacío."""
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}
+        self.subscribers: dict[bytes, list] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: bytes):
+        """Valor vigente de una clave o `None`."""
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry[0]
+
+
+def _bulk(value) -> bytes:
+    """Codifica un bulk string RESP (o nulo)."""
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Atiende comandos RESP de una conexión."""
+
+    def _read_command(self):
+        """Lee un arreglo RESP de bulk strings."""
+        line = self.rfile.readline()
+        if not line:
+            return None
+        n = int(line[1:-2])
+        args = []
+        for _ in range(n):
+            size = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        """Bucle de lectura/respuesta hasta que el cliente cierre."""
+        state: _State = self.server.state
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            cmd = args[0].upper()
+            with state.lock:
+                reply = self._dispatch(state, cmd, args[1:])
+            self.wfile.write(reply)
+
+    def _dispatch(self, state: _State, cmd: bytes, args) -> bytes:
+        """Ejecuta un comando sobre el estado compartido."""
+        if cmd in (b"PING", b"SELECT"):
+            return b"+OK\r\n" if cmd == b"SELECT" else b"+PONG\r\n"
+        if cmd == b"GET":
+            return _bulk(state.get(args[0]))
+        if cmd == b"SET":
+            key, value, opts = args[0], args[1], [a.upper() for a in args[2:]]
+            expires = None
+            if b"PX" in opts:
+                expires = time.monotonic() + int(args[2 + opts.index(b"PX") + 1]) / 1000
+            if b"NX" in opts and state.get(key) is not None:
+                return b"$-1\r\n"
+            state.data[key] = (value, expires)
+            return b"+OK\r\n"
+        if cmd == b"DEL":
+            n = sum(1 for k in args if state.get(k) is not None and state.data.pop(k, None))
+            return b":%d\r\n" % n
+        if cmd == b"INCRBY":
+            current = state.get(args[0])
+            expires = state.data[args[0]][1] if current is not None else None
+            value = int(current or 0) + int(args[1])
+            state.data[args[0]] = (str(value).encode(), expires)
+            return b":%d\r\n" % value
+        if cmd == b"PEXPIRE":
+            if state.get(args[0]) is None:
+                return b":0\r\n"
+            state.data[args[0]] = (state.data[args[0]][0], time.monotonic() + int(args[1]) / 1000)
+            return b":1\r\n"
+        if cmd == b"EVAL":
+            if args[0] != RELEASE_LOCK_SCRIPT.encode():
+                return b"-ERR script no soportado por el stub\r\n"
+            key, token = args[2], args[3]
+            if state.get(key) == token:
+                del state.data[key]
+                return b":1\r\n"
+            return b":0\r\n"
+        if cmd == b"SUBSCRIBE":
+            state.subscribers.setdefault(args[0], []).append(self.wfile)
+            return b"*3\r\n" + _bulk(b"subscribe") + _bulk(args[0]) + b":1\r\n"
+        if cmd == b"PUBLISH":
+            message = b"*3\r\n" + _bulk(b"message") + _bulk(args[0]) + _bulk(args[1])
+            alive = []
+            for out in state.subscribers.get(args[0], []):
+                try:
+                    out.write(message)
+                    alive.append(out)
+                except OSError:
+                    pass
+            state.subscribers[args[0]] = alive
+            return b":%d\r\n" % len(alive)
+        return b"-ERR unknown command\r\n"
+
+
+class RespStubServer(socketserver.ThreadingTCPServer):
+    """Servidor RESP en un hilo de fondo sobre un puerto efímero local."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        """Abre el socket en 127.0.0.1 con un puerto libre."""
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.state = _State()
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def port(self) -> int:
+        """Puerto asignado por el sistema operativo."""
+        return self.server_address[1]
+
+    def __enter__(self):
+        """Arranca el servidor en segundo plano."""
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        """Detiene el servidor y cierra el socket."""
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,123 @@
+"""Tests del control de admisión de llamadas al modelo."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.domain.exceptions import RateLimitExceededError
+from src.infrastructure.cache.backends import InMemoryBackend
+from src.infrastructure.llm_providers.admission import BATCH, AdmissionController, AdmittedLLMService
+
+
+def test_session_bucket_rejects_bursts_with_retry_after():
+    """Tras la ráfaga, la sesión recibe un rechazo con el tiempo hasta el próximo token."""
+    ctl = AdmissionController(session_rate=1.0, session_burst=2, client_rate=0)
+    ctl.admit("s1", "ip")
+    ctl.admit("s1", "ip")
+    with pytest.raises(RateLimitExceededError) as exc:
+        ctl.admit("s1", "ip")
+    assert 0 < exc.value.retry_after <= 1.0
+    ctl.admit("s2", "ip")  # otra sesión no se ve afectada
+    assert ctl.stats()["rejected_rate"] == 1
+
+
+def test_shared_backend_makes_rate_limits_global_across_workers():
+    """Dos workers sobre el mismo backend comparten el límite por cliente."""
+    backend = InMemoryBackend()
+    workers = [AdmissionController(session_rate=0, client_rate=1.0, client_burst=3, backend=backend)
+               for _ in range(2)]
+    for i in range(3):
+        workers[i % 2].admit(f"s{i}", "ip")
+    with pytest.raises(RateLimitExceededError) as exc:
+        workers[1].admit("s9", "ip")
+    assert 0 < exc.value.retry_after <= 3.0
+    workers[0].admit("s9", "otra-ip")
+
+
+def test_shared_session_rejections_do_not_spend_the_client_window():
+    """Una sesión rechazada no consume la ventana compartida de su cliente."""
+    ctl = AdmissionController(session_rate=0.1, session_burst=1, client_rate=0.1, client_burst=3,
+                              backend=InMemoryBackend())
+    ctl.admit("s1", "ip")
+    for _ in range(5):
+        with pytest.raises(RateLimitExceededError):
+            ctl.admit("s1", "ip")
+    ctl.admit("s2", "ip")
+    ctl.admit("s3", "ip")
+
+
+def test_queue_is_fair_across_clients_and_prioritizes_interactive():
+    """Con un cupo: turnos rotativos por cliente y los lotes al final."""
+    ctl = AdmissionController(max_concurrent=1, max_wait=5)
+    order = []
+
+    async def call(client, tag, priority=0):
+        async with ctl.slot(client, priority):
+            order.append(tag)
+            await asyncio.sleep(0)
+
+    async def scenario():
+        async with ctl.slot("a"):
+            tasks = [asyncio.create_task(call("a", f"a{i}")) for i in range(3)]
+            tasks.append(asyncio.create_task(call("batch", "lote", BATCH)))
+            tasks.append(asyncio.create_task(call("b", "b0")))
+            await asyncio.sleep(0)
+            assert ctl.stats()["queue_depth"] == 5
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert order == ["a0", "b0", "a1", "a2", "lote"]
+    assert ctl.stats()["in_flight"] == 0 and ctl.stats()["queue_depth"] == 0
+
+
+def test_bounded_wait_rejects_and_frees_the_queue():
+    """Si no hay cupo dentro de `max_wait`, se rechaza y la espera sale de la cola."""
+    ctl = AdmissionController(max_concurrent=1, max_wait=0.01)
+
+    async def scenario():
+        async with ctl.slot("a"):
+            with pytest.raises(RateLimitExceededError):
+                async with ctl.slot("b"):
+                    pass
+        async with ctl.slot("b"):
+            pass
+
+    asyncio.run(scenario())
+    stats = ctl.stats()
+    assert stats["rejected_queue"] == 1 and stats["queue_depth"] == 0 and stats["in_flight"] == 0
+
+
+def test_timed_out_calls_keep_their_slot_until_the_provider_thread_ends():
+    """Cancelar la espera no libera el cupo mientras el hilo del proveedor sigue llamando al modelo."""
+    ctl = AdmissionController(max_concurrent=1, max_wait=5)
+    active, peak, lock = [0], [0], threading.Lock()
+
+    class ThreadedAI:
+        async def generate_response(self, user_message, products, context):
+            def call():
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.05)
+                with lock:
+                    active[0] -= 1
+                return user_message
+            return await asyncio.to_thread(call)
+
+    ai = AdmittedLLMService(ThreadedAI(), ctl)
+
+    async def scenario():
+        async def ask(i):
+            try:
+                return await asyncio.wait_for(ai.generate_response(f"m{i}", [], ""), 0.01)
+            except asyncio.TimeoutError:
+                return None
+        results = [await ask(i) for i in range(4)]  # cada uno vence antes de que termine el hilo
+        while ctl.stats()["in_flight"] or ctl.stats()["queue_depth"]:
+            await asyncio.sleep(0.01)
+        return results
+
+    assert asyncio.run(scenario()) == [None] * 4
+    assert peak[0] == 1
@@ -0,0 +1,300 @@
+"""Tests de la API HTTP (FastAPI).
+
+Usan una base SQLite en memoria inyectada con `dependency_overrides` para
+validar el contrato JSON de los endpoints de productos e historial.
+"""
+
+from datetime import datetime
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.application.intent_parser import IntentParser
+from src.infrastructure.api import main
+from src.infrastructure.api.main import app
+from src.infrastructure.db import query_stats
+from src.infrastructure.db.database import Base, get_session
+from src.infrastructure.db.models import ProductModel, ChatMemoryModel
+from src.infrastructure.db.shards import ChatShards
+from src.infrastructure.events.changes import CatalogChange
+from src.infrastructure.llm_providers.admission import AdmissionController
+from src.infrastructure.llm_providers.fake_service import FakeLLMService
+from src.infrastructure.llm_providers.journal import LLMJournal, ReplayLLMService, read_journals
+from src.infrastructure.profiling import RequestProfiler
+from tests.query_guard import max_queries
+
+
+@pytest.fixture()
+def engine():
+    """Base SQLite en memoria aislada por test (con conteo de sentencias)."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    query_stats.install(engine)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def client(engine):
+    """Cliente HTTP sobre la base en memoria del test."""
+    TestSession = sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
+
+    db = TestSession()
+    db.add_all([
+        ProductModel(name="Pegasus 40", brand="Nike", category="Running", size="42", color="Negro", price=120.0, stock=8, description="Running diaria"),
+        ProductModel(name="Suede Classic", brand="Puma", category="Casual", size="41", color="Azul", price=80.0, stock=0, description=""),
+        ChatMemoryModel(session_id="s1", role="user", message="hola", timestamp=datetime(2024, 1, 1, 10, 0, 0)),
+        ChatMemoryModel(session_id="s1", role="assistant", message="¡hola!", timestamp=datetime(2024, 1, 1, 10, 0, 1)),
+    ])
+    db.commit()
+    db.close()
+
+    def _override():
+        s = TestSession()
+        try:
+            yield s
+        finally:
+            s.close()
+
+    app.dependency_overrides[get_session] = _override
+    main.catalog.invalidate()
+    main.facet_updates.reset()
+    main.window_cache.clear()
+    main.idempotency.clear()
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_list_products_returns_dto_fields(client):
+    """GET /products: devuelve todos los productos con los campos del DTO."""
+    res = client.get("/products")
+    assert res.status_code == 200
+    data = res.json()
+    assert [p["name"] for p in data] == ["Pegasus 40", "Suede Classic"]
+    assert set(data[0]) == {"id", "name", "brand", "category", "size", "color", "price", "stock", "description"}
+
+
+def test_list_products_etag_follows_catalog_changes(client):
+    """GET /products: 304 con el mismo ETag; un cambio del catálogo lo renueva."""
+    first = client.get("/products")
+    etag = first.headers["etag"]
+    assert client.get("/products", headers={"If-None-Match": etag}).status_code == 304
+
+    # Otro worker modificó el producto y avisa por el transporte.
+    db = next(app.dependency_overrides[get_session]())
+    db.get(ProductModel, 1).stock = 0
+    db.commit()
+    db.close()
+    main.catalog_events.receive(CatalogChange(main.catalog_events.version + 1, "upsert", 1))
+    res = client.get("/products", headers={"If-None-Match": etag})
+    assert res.status_code == 200 and res.headers["etag"] != etag
+    assert res.json()[0]["stock"] == 0
+
+
+def test_list_formats_and_compression(client, engine):
+    """Formato por `Accept` y compresión por `Accept-Encoding`, en streaming para listas grandes."""
+    res = client.get("/products", headers={"Accept": "application/vnd.columnar+json"})
+    assert res.headers["content-type"] == "application/vnd.columnar+json"
+    assert "content-encoding" not in res.headers and res.headers["vary"] == "Accept"
+    assert res.json()["columns"]["name"] == ["Pegasus 40", "Suede Classic"] and res.json()["count"] == 2
+
+    db = sessionmaker(bind=engine)()
+    db.add_all(ChatMemoryModel(session_id="big", role="user", message=f"mensaje {i}",
+                               timestamp=datetime(2024, 1, 1, 10, 0, 0)) for i in range(1500))
+    db.commit()
+    db.close()
+    res = client.get("/chat/history/big?limit=1500", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip" and "content-length" not in res.headers
+    assert res.headers["vary"] == "Accept, Accept-Encoding"
+    assert len(res.json()) == 1500 and res.json()[-1]["message"] == "mensaje 1499"
+
+
+def test_get_product_and_not_found(client):
+    """GET /products/{id}: 200 para un ID existente y 404 si no existe."""
+    assert client.get("/products/1").json()["brand"] == "Nike"
+    assert client.get("/products/999").status_code == 404
+
+
+def test_search_products_by_free_text(client):
+    """GET /products/search: coincidencia sin tildes ni mayúsculas; `q` es obligatorio."""
+    res = client.get("/products/search", params={"q": "RUNNING diária"})
+    assert res.status_code == 200
+    assert [p["name"] for p in res.json()] == ["Pegasus 40"]
+    assert client.get("/products/search", params={"q": "sandalia"}).json() == []
+    assert client.get("/products/search").status_code == 422
+
+
+def test_chat_history_is_chronological(client):
+    """GET /chat/history/{session_id}: mensajes en orden cronológico sin session_id."""
+    data = client.get("/chat/history/s1").json()
+    assert [m["role"] for m in data] == ["user", "assistant"]
+    assert data[0]["timestamp"].startswith("2024-01-01T10:00:00")
+    assert "session_id" not in data[0]
+
+
+def test_chat_with_preloaded_fake_provider(client, monkeypatch):
+    """POST /chat: usa el proveedor precargado y persiste el intercambio."""
+    monkeypatch.setattr(main, "ai_service", FakeLLMService())
+    res = client.post("/chat", json={"session_id": "s2", "message": "Busco Nike"})
+    assert res.status_code == 200
+    assert "2 productos" in res.json()["assistant_message"]
+    assert [m["role"] for m in client.get("/chat/history/s2").json()] == ["user", "assistant"]
+
+
+def test_chat_records_llm_calls_and_replays_them(client, monkeypatch, tmp_path):
+    """POST /chat: con journal se graba la llamada al modelo; el proveedor replay la responde."""
+    journal = LLMJournal(tmp_path / "llm.jsonl")
+    monkeypatch.setattr(main, "llm_journal", journal)
+    monkeypatch.setattr(main, "ai_service", FakeLLMService())
+    recorded = client.post("/chat", json={"session_id": "rec", "message": "¿Qué me recomiendas para el verano?"})
+    journal.flush()
+    [entry] = read_journals(tmp_path / "llm.jsonl")
+    assert entry.session == "rec" and entry.response == recorded.json()["assistant_message"]
+
+    monkeypatch.setattr(main, "llm_journal", None)
+    monkeypatch.setattr(main, "ai_service", ReplayLLMService([entry], time_scale=0))
+    replayed = client.post("/chat", json={"session_id": "rep", "message": "¿Qué me recomiendas para el verano?"})
+    assert replayed.json()["assistant_message"] == entry.response
+    assert client.get("/metrics").json()["llm_replay"]["prompt"] == 1
+
+
+def test_chat_answers_catalog_lookup_without_llm(client, monkeypatch):
+    """POST /chat: una consulta simple de catálogo se responde sin el modelo."""
+    ai = FakeLLMService()
+    monkeypatch.setattr(main, "ai_service", ai)
+    monkeypatch.setattr(main, "intent_parser", IntentParser())
+    monkeypatch.setattr(ai, "generate_response", lambda **_: pytest.fail("no debe llamar a la IA"))
+    res = client.post("/chat", json={"session_id": "s3", "message": "¿Tienen Nike en talla 42?"})
+    assert res.status_code == 200
+    assert "Pegasus 40" in res.json()["assistant_message"]
+
+
+def test_chat_idempotency_key_replays_without_llm_or_writes(client, monkeypatch):
+    """POST /chat: un reintento con la misma `Idempotency-Key` repite la respuesta."""
+    ai = FakeLLMService()
+    monkeypatch.setattr(main, "ai_service", ai)
+    body = {"session_id": "idem", "message": "¿Qué me recomiendas para el verano?"}
+    first = client.post("/chat", json=body, headers={"Idempotency-Key": "k-1"})
+    assert first.status_code == 200 and "idempotent-replayed" not in first.headers
+
+    monkeypatch.setattr(ai, "generate_response", lambda **_: pytest.fail("no debe llamar a la IA"))
+    again = client.post("/chat", json=body, headers={"Idempotency-Key": "k-1"})
+    assert again.status_code == 200
+    assert again.headers["idempotent-replayed"] == "true"
+    assert again.json() == first.json()
+    assert len(client.get("/chat/history/idem").json()) == 2
+
+    other = client.post("/chat", json={**body, "message": "otra cosa"}, headers={"Idempotency-Key": "k-1"})
+    assert other.status_code == 422
+    assert client.get("/metrics").json()["idempotency"]["replayed"] == 1
+
+
+def test_admin_profile_arms_next_chat_request(client, monkeypatch, tmp_path):
+    """POST /admin/profile: el siguiente /chat se perfila y trae Server-Timing."""
+    monkeypatch.setattr(main, "ai_service", FakeLLMService(latency=0.03))
+    monkeypatch.setattr(main, "profiler", RequestProfiler("secreto", tmp_path, interval=0.001))
+    assert client.post("/admin/profile", params={"requests": 1}).status_code == 403
+    armed = client.post("/admin/profile", params={"requests": 1}, headers={"X-Profile-Token": "secreto"})
+    assert armed.json()["armed"] == 1
+
+    body = {"session_id": "prof", "message": "¿Qué me recomiendas para el verano?"}
+    res = client.post("/chat", json=body)
+    assert "process_message;dur=" in res.headers["server-timing"]
+    assert "llm.generate_response" in res.headers["server-timing"]
+    assert (tmp_path / res.headers["x-profile-file"]).stat().st_size > 0
+    assert "server-timing" not in client.post("/chat", json=body).headers
+
+
+def test_chat_batch_streams_ndjson_and_persists(client, monkeypatch):
+    """POST /chat/batch: una línea NDJSON por mensaje y el historial guardado en orden."""
+    monkeypatch.setattr(main, "ai_service", FakeLLMService())
+    messages = [{"session_id": f"b{i % 2}", "message": f"¿Qué me recomiendas? {i}"} for i in range(4)]
+    res = client.post("/chat/batch", json={"messages": messages, "concurrency": 2})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [orjson.loads(line) for line in res.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2, 3]
+    history = client.get("/chat/history/b0").json()
+    assert [m["message"] for m in history if m["role"] == "user"] == ["¿Qué me recomiendas? 0", "¿Qué me recomiendas? 2"]
+
+
+def test_chat_rate_limit_returns_429_with_retry_after(client, monkeypatch):
+    """POST /chat: al agotar la ráfaga de la sesión responde 429 con Retry-After."""
+    monkeypatch.setattr(main, "ai_service", FakeLLMService())
+    monkeypatch.setattr(main, "admission", AdmissionController(session_rate=0.1, session_burst=1))
+    body = {"session_id": "rl", "message": "¿Qué me recomiendas?"}
+    assert client.post("/chat", json=body).status_code == 200
+    res = client.post("/chat", json=body)
+    assert res.status_code == 429
+    assert res.headers["retry-after"] == "10"
+    assert client.get("/metrics").json()["admission"]["rejected_rate"] == 1
+
+
+def test_chat_deadline_header_returns_504(client, monkeypatch):
+    """POST /chat: `X-Request-Timeout` acota la espera del modelo y responde 504."""
+    monkeypatch.setattr(main, "ai_service", FakeLLMService(latency=0.5))
+    res = client.post("/chat", json={"session_id": "dl", "message": "¿Qué me recomiendas?"},
+                      headers={"X-Request-Timeout": "0.05"})
+    assert res.status_code == 504
+    assert client.get("/chat/history/dl").json() == []
+    assert client.get("/metrics").json()["chat"]["timed_out"] >= 1
+
+
+def test_product_facets_counts_within_filters(client):
+    """/products/facets cuenta por campo, globalmente y dentro de un filtro."""
+    body = client.get("/products/facets").json()
+    assert body["total"] == 2 and body["in_stock"] == 1
+    assert body["facets"]["category"] == {"Running": 1, "Casual": 1}
+    assert body["facets"]["price_range"] == {"100-150": 1, "50-100": 1}
+
+    running = client.get("/products/facets", params={"category": "Running"}).json()
+    assert running["total"] == 1 and running["facets"]["brand"] == {"Nike": 1}
+    assert client.get("/products/facets", params={"category": "Running", "color": "Azul"}).json()["total"] == 0
+
+
+def test_query_budgets_include_the_history_shards(client, engine, monkeypatch, tmp_path):
+    """Con CHAT_SHARDS, el presupuesto y `X-DB-Queries` cuentan las sentencias de los shards."""
+    shards = ChatShards(str(tmp_path / "shards"), 2)
+    shards.init()
+    monkeypatch.setattr(main, "chat_shards", shards)
+    monkeypatch.setattr(main, "ai_service", FakeLLMService())
+    engines = [engine, *shards.engines]
+    with max_queries(engines, 2) as statements:  # historial reciente + archivo, en el shard
+        res = client.get("/chat/history/s9")
+    assert res.headers["x-db-queries"] == str(len(statements)) == "2"
+    with max_queries(engines, 5) as statements:  # catálogo (principal) + historial + archivo + intercambio
+        res = client.post("/chat", json={"session_id": "s9", "message": "¿Qué me recomiendas para el verano?"})
+    assert res.status_code == 200 and res.headers["x-db-queries"] == str(len(statements))
+    with max_queries(shards.engines, 2):  # archivo + un solo DELETE
+        assert client.delete("/chat/history/s9").json() == {"deleted": 2}
+    shards.dispose()
+
+
+def test_endpoint_query_budgets(client, engine, monkeypatch):
+    """Cada endpoint ejecuta a lo sumo las sentencias SQL previstas (sin N+1)."""
+    monkeypatch.setattr(main, "ai_service", FakeLLMService())
+    with max_queries(engine, 1):
+        res = client.get("/products")  # carga el snapshot del catálogo
+    assert res.headers["x-db-queries"] == "1"
+    with max_queries(engine, 0):
+        client.get("/products/1")
+        client.get("/products/facets", params={"brand": "Nike"})
+    with max_queries(engine, 2):  # historial reciente + archivo
+        client.get("/chat/history/s1")
+    # historial + archivo + el intercambio en un commit (SQLite inserta fila a
+    # fila para obtener los IDs; PostgreSQL lo hace en una sola sentencia).
+    with max_queries(engine, 4):
+        client.post("/chat", json={"session_id": "s1", "message": "¿Qué me recomiendas para el verano?"})
+    client.get("/chat/history/s1")  # sesión activa: se confirma que no tiene archivo
+    with max_queries(engine, 1):  # ... y las lecturas siguientes no lo consultan
+        client.get("/chat/history/s1")
+    with max_queries(engine, 2):  # archivo + un solo DELETE
+        assert client.delete("/chat/history/s1").json() == {"deleted": 4}
@@ -0,0 +1,178 @@
+"""Tests de contrato de los backends clave-valor y de la caché compartida.
+
+La misma batería se ejecuta contra el backend en memoria, el de archivos y
+el de Redis (usando un servidor RESP local de prueba) para garantizar una
+semántica de invalidación idéntica en todos.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from src.domain.entities import ChatMessage
+from src.infrastructure.cache.backends import (
+    _LOCK_STRIPES, FileBackend, InMemoryBackend, RedisBackend, create_backend,
+)
+from src.infrastructure.cache.idempotency import IdempotencyKeyConflictError, IdempotencyStore
+from src.infrastructure.cache.session_window import CachedChatRepository, SharedSessionWindowCache
+from tests.resp_stub import RespStubServer
+from tests.test_session_cache import CountingChatRepo
+
+
+@pytest.fixture(params=["memory", "file", "redis"])
+def backend(request, tmp_path):
+    """Instancia de cada backend soportado."""
+    if request.param == "memory":
+        yield InMemoryBackend()
+    elif request.param == "file":
+        yield FileBackend(str(tmp_path / "kv"))
+    else:
+        with RespStubServer() as server:
+            b = RedisBackend("127.0.0.1", server.port)
+            yield b
+            b.close()
+
+
+def test_backend_contract_set_get_delete_ttl(backend):
+    """Contrato: set sobrescribe, delete invalida y una clave expirada no existe."""
+    assert backend.get("k") is None
+    backend.set("k", b"v1")
+    backend.set("k", b"v2")
+    assert backend.get("k") == b"v2"
+    assert backend.delete("k") is True
+    assert backend.get("k") is None
+    assert backend.delete("k") is False
+
+    backend.set("t", b"x", ttl=0.05)
+    time.sleep(0.08)
+    assert backend.get("t") is None
+    assert backend.delete("t") is False
+
+
+def test_backend_contract_incr_and_lock(backend):
+    """Contrato: incr crea y acumula contadores; lock es reentrante por uso secuencial."""
+    assert backend.incr("c") == 1
+    assert backend.incr("c", 4) == 5
+    with backend.lock("c"):
+        backend.set("c", b"10")
+    with backend.lock("c"):
+        assert backend.incr("c") == 11
+
+
+def test_backend_contract_add_only_if_absent(backend):
+    """Contrato: add escribe una sola vez hasta que la clave se borra o expira."""
+    assert backend.add("m", b"a", ttl=0.05) is True
+    assert backend.add("m", b"b", ttl=0.05) is False
+    assert backend.get("m") == b"a"
+    time.sleep(0.08)
+    assert backend.add("m", b"c") is True
+    backend.delete("m")
+    assert backend.add("m", b"d") is True and backend.get("m") == b"d"
+
+
+def test_shared_window_cache_is_shared_between_workers(backend):
+    """Dos 'workers' con la misma BD y backend ven las escrituras e invalidaciones del otro."""
+    db = CountingChatRepo()
+    worker_a = CachedChatRepository(db, SharedSessionWindowCache(backend, window=4))
+    worker_b = CachedChatRepository(db, SharedSessionWindowCache(backend, window=4))
+
+    assert worker_a.get_recent_messages("s1", 4) == []  # llena la ventana compartida
+    worker_b.save_message(ChatMessage(id=None, session_id="s1", role="user", message="hola", timestamp=datetime(2024, 1, 1)))
+    assert [m.message for m in worker_a.get_recent_messages("s1", 4)] == ["hola"]
+    assert db.recent_reads == 1
+
+    worker_b.delete_session_history("s1")
+    assert worker_a.get_recent_messages("s1", 4) == []
+    assert db.recent_reads == 2
+
+
+def test_idempotency_keys_are_shared_between_workers(backend):
+    """Un reintento que llega a otro worker espera al primero y repite su respuesta."""
+    worker_a = IdempotencyStore(backend=backend, poll_interval=0.005)
+    worker_b = IdempotencyStore(backend=backend, poll_interval=0.005)
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"answer": len(calls)}
+
+    async def scenario():
+        return await asyncio.gather(worker_a.run("k", "body", work), worker_b.run("k", "body", work))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert sorted(replayed for _, replayed in results) == [False, True]
+    assert all(value == {"answer": 1} for value, _ in results)
+    assert asyncio.run(worker_b.run("k", "body", work)) == ({"answer": 1}, True)
+    with pytest.raises(IdempotencyKeyConflictError):
+        asyncio.run(worker_a.run("k", "otro", work))
+    assert worker_a.stats()["in_flight"] == worker_b.stats()["in_flight"] == 0
+    assert backend.get("idem:k:run") is None
+
+
+def test_concurrent_write_discards_stale_fill():
+    """Una escritura durante el llenado anula el token y no se guarda una ventana vieja."""
+    cache = SharedSessionWindowCache(InMemoryBackend(), window=4)
+    token = cache.begin_fill("s1")
+    cache.append("s1", ChatMessage(id=1, session_id="s1", role="user", message="nuevo", timestamp=datetime(2024, 1, 1)))
+    cache.put("s1", [], complete=True, token=token)
+    assert cache.get("s1", 4) is None
+
+
+def test_redis_lock_release_keeps_a_lock_taken_after_expiry():
+    """Si el bloqueo expiró y otro lo tomó, liberar el propio no borra el ajeno."""
+    with RespStubServer() as server:
+        a, b = RedisBackend("127.0.0.1", server.port), RedisBackend("127.0.0.1", server.port)
+        with a.lock("k", timeout=0.05):
+            time.sleep(0.08)
+            assert b.command("SET", "k:lock", "otro", "NX", "PX", 5000) == "OK"
+        assert b.get("k:lock") == b"otro"
+        a.close()
+        b.close()
+
+
+def test_file_backend_lock_files_do_not_grow_with_keys(tmp_path):
+    """Los archivos `.lock` son uno por franja, no uno por clave."""
+    backend = FileBackend(str(tmp_path / "kv"))
+    for i in range(500):
+        backend.incr(f"rate:{i}", ttl=0.01)
+    locks = list((tmp_path / "kv").glob("*.lock"))
+    assert 0 < len(locks) <= _LOCK_STRIPES
+    time.sleep(0.02)
+    assert backend.purge_expired() == 500
+    assert {p.suffix for p in (tmp_path / "kv").iterdir()} == {".lock"}
+
+
+def test_file_backend_lock_is_reentrant_within_a_stripe(tmp_path):
+    """Bloquear otra clave de la franja que ya se sostiene no se bloquea a sí mismo."""
+    backend = FileBackend(str(tmp_path / "kv"))
+    first = "k0"
+    other = next(f"k{i}" for i in range(1, 10_000) if backend._stripe(f"k{i}") == backend._stripe(first))
+    with backend.lock(first, timeout=0.2), backend.lock(other, timeout=0.2):
+        assert backend.incr(other) == 1
+
+
+def test_shared_window_cache_falls_through_when_the_backend_is_down():
+    """Con el backend caído la caché cuenta fallos y el repositorio responde desde la BD."""
+    with RespStubServer() as server:
+        port = server.port
+    cache = SharedSessionWindowCache(RedisBackend("127.0.0.1", port, timeout=0.2), window=4)
+    db = CountingChatRepo()
+    repo = CachedChatRepository(db, cache)
+    repo.save_message(ChatMessage(id=None, session_id="s1", role="user", message="hola", timestamp=datetime(2024, 1, 1)))
+    assert [m.message for m in repo.get_recent_messages("s1", 4)] == ["hola"]
+    repo.delete_session_history("s1")
+    assert repo.get_recent_messages("s1", 4) == []
+    assert db.recent_reads == 2 and cache.errors >= 4
+
+
+def test_create_backend_from_url(tmp_path):
+    """create_backend: elige la implementación según el esquema de la URL."""
+    assert isinstance(create_backend("memory://"), InMemoryBackend)
+    assert isinstance(create_backend(f"file://{tmp_path}"), FileBackend)
+    assert isinstance(create_backend("redis://localhost:6379/0"), RedisBackend)
+    with pytest.raises(ValueError):
+        create_backend("ftp://x")
@@ -0,0 +1,157 @@
+"""Tests de la notificación de cambios del catálogo (registro, bus y transportes)."""
+
+import socket
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.domain.entities import Product
+from src.infrastructure.db.database import Base
+from src.infrastructure.events.changes import (
+    CHANGE_BULK,
+    CatalogChange,
+    ChangeBus,
+    latest_version,
+    load_changes,
+    record_change,
+)
+from src.infrastructure.events.transports import InProcessTransport, SocketTransport, create_transport
+from src.infrastructure.repositories.product_repository import SQLProductRepository
+from tests.resp_stub import RespStubServer
+
+
+@pytest.fixture()
+def sessions():
+    """Fábrica de sesiones sobre una base en memoria compartida."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine, expire_on_commit=False)
+    engine.dispose()
+
+
+def _source(sessions):
+    def read(after):
+        with sessions() as db:
+            return load_changes(db, after)
+    return read
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_repository_writes_reach_other_workers_in_order(sessions):
+    """Las escrituras se registran, se entregan al propio bus y a los demás por el transporte."""
+    transport = InProcessTransport()
+    writer, reader = ChangeBus(transport, _source(sessions)), ChangeBus(transport, _source(sessions))
+    seen = []
+    reader.subscribe(lambda change: seen.append((change.version, change.op, change.product_id)))
+    writer.start()
+    reader.start()
+
+    db = sessions()
+    repo = SQLProductRepository(db, events=writer)
+    saved = repo.save(Product(id=None, name="Pegasus", brand="Nike", category="Running", size="42",
+                              color="Negro", price=120.0, stock=3))
+    repo.save(Product(id=saved.id, name="Pegasus", brand="Nike", category="Running", size="42",
+                      color="Negro", price=99.0, stock=3))
+    assert repo.delete(saved.id) and not repo.delete(saved.id)
+
+    assert seen == [(1, "upsert", saved.id), (2, "upsert", saved.id), (3, "delete", saved.id)]
+    assert writer.version == reader.version == latest_version(db) == 3
+    assert reader.stats()["delivered"] == 3
+
+
+def test_gaps_and_bulk_imports_are_read_from_the_log(sessions):
+    """Un aviso fuera de orden rellena el hueco; el sondeo ve cargas de otros procesos."""
+    bus = ChangeBus(source=_source(sessions))
+    seen = []
+    bus.subscribe(lambda change: seen.append(change.version))
+    with sessions() as db:
+        changes = [record_change(db, CHANGE_BULK) for _ in range(3)]
+        db.commit()
+
+    bus.receive(changes[2])
+    bus.receive(changes[1])
+    assert seen == [1, 2, 3] and bus.stats()["duplicates"] == 1
+
+    with sessions() as db:
+        record_change(db, CHANGE_BULK)
+        db.commit()
+    assert bus.poll() == 1 and seen[-1] == 4 and bus.poll() == 0
+
+
+@pytest.mark.parametrize("kind", ["socket", "redis"])
+def test_transports_deliver_between_processes(kind, tmp_path):
+    """Sockets Unix y RESP `PUBLISH`/`SUBSCRIBE` llevan el cambio a otro bus."""
+    if kind == "socket" and not hasattr(socket, "AF_UNIX"):
+        pytest.skip("sin sockets Unix")
+    server = RespStubServer() if kind == "redis" else None
+    if server is not None:
+        server.__enter__()
+    url = f"unix://{tmp_path}/events" if kind == "socket" else f"redis://127.0.0.1:{server.port}/0"
+    a, b = create_transport(url), create_transport(url)
+    received = []
+    try:
+        b.start(received.append)
+        a.start(lambda change: None)
+        if kind == "redis":
+            assert _wait_for(lambda: len(server.state.subscribers.get(b"catalog:changes", [])) == 2)
+        a.publish(CatalogChange(7, "upsert", 42))
+        assert _wait_for(lambda: received == [CatalogChange(7, "upsert", 42)])
+    finally:
+        a.close()
+        b.close()
+        if server is not None:
+            server.__exit__(None, None, None)
+    if kind == "socket":
+        assert list((tmp_path / "events").glob("*.sock")) == []
+        assert isinstance(a, SocketTransport)
+
+
+def test_facets_follow_changes_without_full_rebuilds(sessions):
+    """Altas y bajas de otro worker se aplican una a una; solo `bulk` recalcula todo."""
+    from src.application.facet_service import FacetService
+    from src.infrastructure.events.facet_updates import FacetUpdater
+
+    def by_ids(ids):
+        with sessions() as db:
+            return SQLProductRepository(db).get_by_ids_from_primary(ids)
+
+    def everything():
+        with sessions() as db:
+            return SQLProductRepository(db).get_all_from_primary()
+
+    transport = InProcessTransport()
+    writer, reader = ChangeBus(transport, _source(sessions)), ChangeBus(transport, _source(sessions))
+    updater = FacetUpdater(FacetService(), by_ids, everything)
+    reader.subscribe(updater)
+    writer.start()
+    reader.start()
+    updater.rebuild(everything())
+    updater.start()
+
+    db = sessions()
+    repo = SQLProductRepository(db, events=writer)
+    pegasus = repo.save(Product(id=None, name="Pegasus", brand="Nike", category="Running", size="42",
+                                color="Negro", price=120.0, stock=3))
+    repo.save(Product(id=None, name="Suede", brand="Puma", category="Casual", size="41",
+                      color="Azul", price=80.0, stock=0))
+    assert _wait_for(lambda: updater.facets.facets()["total"] == 2)
+    repo.delete(pegasus.id)
+    assert _wait_for(lambda: updater.facets.facets()["facets"]["brand"] == {"Puma": 1})
+    assert updater.stats()["rebuilds"] == 1 and updater.stats()["applied"] >= 2
+
+    record_change(db, CHANGE_BULK)
+    db.commit()
+    reader.poll()
+    assert _wait_for(lambda: updater.stats()["rebuilds"] == 2)
+    assert updater.facets.facets()["total"] == 1
+    updater.close()
+    db.close()
@@ -0,0 +1,75 @@
+"""Tests del snapshot en memoria del catálogo (`CatalogSnapshot`).
+
+Validan que las lecturas se sirvan desde memoria, que `save`/`delete`
+invaliden el snapshot y que `max_age` fuerce la recarga.
+"""
+
+import time
+
+from src.domain.entities import Product
+from src.infrastructure.cache.catalog import CatalogSnapshot, SnapshotProductRepository
+from tests.test_services import FakeProductRepo
+
+
+class CountingProductRepo(FakeProductRepo):
+    """Repositorio en memoria que cuenta las lecturas completas del catálogo."""
+
+    def __init__(self):
+        """Inicializa los datos base y el contador."""
+        super().__init__()
+        self.loads = 0
+
+    def get_all(self):
+        """Cuenta la lectura y retorna todos los productos."""
+        self.loads += 1
+        return super().get_all()
+
+
+def test_reads_are_served_from_snapshot_and_writes_invalidate():
+    """Lecturas sin ir al repositorio; save invalida y la siguiente lectura recarga."""
+    inner = CountingProductRepo()
+    snapshot = CatalogSnapshot(max_age=None)
+    snapshot.load(inner.get_all)
+    repo = SnapshotProductRepository(inner, snapshot)
+
+    assert len(repo.get_all()) == 2
+    assert repo.get_by_id(1).name == "Pegasus"
+    assert [p.name for p in repo.get_by_brand("Adidas")] == ["Ultraboost"]
+    assert inner.loads == 1
+
+    repo.save(Product(id=1, name="Pegasus", brand="Nike", category="Running", size="42",
+                      color="Negro", price=120.0, stock=0))
+    assert not snapshot.loaded
+    assert repo.get_by_id(1).stock == 0 and inner.loads == 2
+
+    assert repo.delete(2) is True
+    assert repo.get_by_id(2) is None
+
+
+def test_snapshot_expires_after_max_age():
+    """Un snapshot vencido se recarga en el siguiente acceso."""
+    inner = CountingProductRepo()
+    snapshot = CatalogSnapshot(max_age=0.01)
+    repo = SnapshotProductRepository(inner, snapshot)
+    repo.get_all()
+    time.sleep(0.02)
+    repo.get_all()
+    assert inner.loads == 2
+
+
+def test_load_interrupted_by_an_invalidation_is_not_installed():
+    """Una carga que se cruza con `invalidate` no queda como snapshot vigente."""
+    inner = CountingProductRepo()
+    snapshot = CatalogSnapshot(max_age=None)
+
+    def racing_loader():
+        products = inner.get_all()  # lectura anterior al cambio
+        snapshot.invalidate()       # el cambio llega mientras se lee
+        return products
+
+    assert len(snapshot.load(racing_loader)) == 2
+    assert not snapshot.loaded
+    assert snapshot.get(1, racing_loader).name == "Pegasus"
+    assert not snapshot.loaded
+    snapshot.products(inner.get_all)
+    assert snapshot.loaded and inner.loads == 3
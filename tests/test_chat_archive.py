@@ -0,0 +1,90 @@
+"""Tests del archivo de sesiones de chat inactivas."""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from src.domain.entities import ChatMessage
+from src.infrastructure.db.models import ChatArchiveModel, ChatMemoryModel
+from src.infrastructure.repositories.chat_archive import ArchiveMisses, ArchivedChatRepository, ChatArchiver
+from src.infrastructure.repositories.chat_repository import SQLChatRepository
+from tests.query_guard import max_queries
+from tests.test_repositories import db  # noqa: F401  (fixture)
+
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+
+
+def _msgs(session_id, start, n):
+    """`n` mensajes alternando roles, uno por minuto desde `start`."""
+    return [ChatMessage(id=None, session_id=session_id, role="user" if i % 2 == 0 else "assistant",
+                        message=f"{session_id} mensaje {i}", timestamp=start + timedelta(minutes=i))
+            for i in range(n)]
+
+
+def _hot_count(db):
+    return db.execute(select(func.count()).select_from(ChatMemoryModel)).scalar()
+
+
+def test_idle_sessions_move_to_archive_and_history_stays_readable(db):
+    """Solo las sesiones inactivas se archivan; el historial se lee igual."""
+    repo = ArchivedChatRepository(SQLChatRepository(db), db)
+    repo.save_messages(_msgs("vieja", NOW - timedelta(days=40), 6))
+    repo.save_messages(_msgs("activa", NOW - timedelta(hours=1), 4))
+    before = [m.message for m in repo.get_session_history("vieja")]
+
+    stats = ChatArchiver(db).archive_idle(30, now=NOW)
+
+    assert stats["sessions"] == 1 and stats["messages"] == 6
+    assert _hot_count(db) == 4
+    assert [m.message for m in repo.get_session_history("vieja")] == before
+    assert [m.message for m in repo.get_session_history("vieja", limit=2)] == before[-2:]
+    assert repo.get_session_history("vieja")[0].timestamp == NOW - timedelta(days=40)
+    assert ChatArchiver(db).archive_idle(30, now=NOW)["sessions"] == 0
+
+
+def test_resumed_session_merges_archive_and_rearchives(db):
+    """Una sesión reanudada combina archivo + caliente y luego se re-archiva completa."""
+    repo = ArchivedChatRepository(SQLChatRepository(db), db)
+    repo.save_messages(_msgs("s", NOW - timedelta(days=60), 4))
+    ChatArchiver(db).archive_idle(30, now=NOW - timedelta(days=20))
+    repo.save_messages(_msgs("s", NOW - timedelta(days=10), 2))
+
+    recent = repo.get_recent_messages("s", 3)
+    assert [m.message for m in recent] == ["s mensaje 3", "s mensaje 0", "s mensaje 1"]
+
+    ChatArchiver(db).archive_idle(5, now=NOW)
+    assert _hot_count(db) == 0
+    assert db.get(ChatArchiveModel, "s").message_count == 6
+    assert len(repo.get_session_history("s")) == 6
+
+    assert repo.delete_session_history("s") == 6
+    assert repo.get_session_history("s") == []
+
+
+def test_active_sessions_without_archive_skip_the_archive_lookup(db):
+    """Una sesión activa vista sin archivo no vuelve a consultar `chat_archive`; una vacía o vieja sí."""
+    misses = ArchiveMisses(idle_days=30)
+    repo = ArchivedChatRepository(SQLChatRepository(db), db, misses)
+    now = datetime.utcnow()
+    repo.save_messages(_msgs("activa", now - timedelta(minutes=5), 2))
+    repo.save_messages(_msgs("dormida", now - timedelta(days=29, hours=23, minutes=30), 2))
+    engine = db.get_bind()
+
+    for session_id, reads in (("activa", 1), ("dormida", 2), ("nueva", 2)):
+        repo.get_recent_messages(session_id, 6)  # primera lectura: caliente + archivo
+        with max_queries(engine, reads) as statements:
+            repo.get_recent_messages(session_id, 6)
+        assert len(statements) == reads
+    assert misses.known("activa") and not misses.known("dormida") and not misses.known("nueva")
+    repo.delete_session_history("activa")
+    assert not misses.known("activa")
+
+
+def test_archiver_pages_idle_sessions_with_a_cursor(db):
+    """Con lotes pequeños se archivan todas las sesiones inactivas y ninguna activa."""
+    repo = SQLChatRepository(db)
+    for i in range(7):
+        repo.save_messages(_msgs(f"vieja{i}", NOW - timedelta(days=40), 2))
+        repo.save_messages(_msgs(f"viva{i}", NOW - timedelta(days=1), 2))
+    stats = ChatArchiver(db, batch_sessions=2).archive_idle(30, now=NOW)
+    assert stats["sessions"] == 7 and _hot_count(db) == 14
@@ -0,0 +1,97 @@
+"""Tests del historial de chat particionado en varios archivos SQLite."""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from src.domain.entities import ChatMessage
+from src.infrastructure.db.shards import ChatShards
+from src.infrastructure.repositories.chat_archive import ChatArchiver
+from src.infrastructure.repositories.sharded_chat import ShardedChatRepository
+
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+
+
+def _msgs(session_id, start, n):
+    return [ChatMessage(id=None, session_id=session_id, role="user" if i % 2 == 0 else "assistant",
+                        message=f"{session_id} mensaje {i}", timestamp=start + timedelta(minutes=i))
+            for i in range(n)]
+
+
+def _shards(tmp_path, count=4):
+    shards = ChatShards(str(tmp_path), count)
+    shards.init()
+    return shards
+
+
+def test_sessions_are_routed_to_a_single_shard(tmp_path):
+    """Cada sesión queda completa en su shard y se lee desde ahí."""
+    shards = _shards(tmp_path)
+    repo = ShardedChatRepository(shards)
+    sessions = [f"s{i}" for i in range(12)]
+    repo.save_messages([m for sid in sessions for m in _msgs(sid, NOW, 4)])
+
+    counts = []
+    for i, engine in enumerate(shards.engines):
+        with engine.connect() as conn:
+            rows = conn.execute(text("SELECT DISTINCT session_id FROM chat_memory")).scalars().all()
+        assert all(shards.index_for(sid) == i for sid in rows)
+        counts.append(len(rows))
+    assert sum(counts) == 12 and sum(1 for c in counts if c) > 1
+
+    recent = repo.get_recent_messages("s3", 2)
+    assert [m.message for m in recent] == ["s3 mensaje 2", "s3 mensaje 3"]
+    assert repo.delete_session_history("s3") == 4
+    assert repo.get_session_history("s3") == []
+    shards.dispose()
+
+
+def test_routing_is_stable_and_maintenance_runs_per_shard(tmp_path):
+    """El shard no depende del proceso; el archivo y el mantenimiento son por shard."""
+    shards = _shards(tmp_path)
+    again = ChatShards(str(tmp_path), 4)
+    assert all(shards.index_for(f"s{i}") == again.index_for(f"s{i}") for i in range(50))
+
+    repo = ShardedChatRepository(shards)
+    repo.save_messages(_msgs("vieja", NOW - timedelta(days=40), 6) + _msgs("nueva", NOW, 2))
+    index = shards.index_for("vieja")
+    with shards.session(index) as db:
+        assert ChatArchiver(db).archive_idle(30, now=NOW)["sessions"] == 1
+    assert len(repo.get_session_history("vieja")) == 6
+
+    maintained = dict(shards.maintain())
+    assert sum(maintained.values()) == 2 and len(maintained) == 4
+    shards.dispose()
+    again.dispose()
+
+
+def test_migrate_moves_the_primary_history_into_the_shards(tmp_path):
+    """`migrate_from` deja cada sesión (caliente y archivada) en su shard y vacía la base principal."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from src.infrastructure.db.database import Base
+    from src.infrastructure.db import models  # noqa: F401
+    from src.infrastructure.repositories.chat_repository import SQLChatRepository
+
+    primary = create_engine(f"sqlite:///{tmp_path / 'main.db'}")
+    Base.metadata.create_all(bind=primary)
+    db = sessionmaker(bind=primary, expire_on_commit=False)()
+    SQLChatRepository(db).save_messages(
+        _msgs("vieja", NOW - timedelta(days=40), 4) + [m for i in range(5) for m in _msgs(f"s{i}", NOW, 3)])
+    ChatArchiver(db).archive_idle(30, now=NOW)
+    db.close()
+
+    shards = _shards(tmp_path / "shards")
+    moved = shards.migrate_from(primary, batch=4)
+    assert moved == {"messages": 15, "archived": 1}
+    with primary.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM chat_memory")).scalar() == 0
+        assert conn.execute(text("SELECT COUNT(*) FROM chat_archive")).scalar() == 0
+
+    repo = ShardedChatRepository(shards)
+    assert [m.message for m in repo.get_session_history("s2")] == [f"s2 mensaje {i}" for i in range(3)]
+    assert len(repo.get_session_history("vieja")) == 4
+    assert shards.migrate_from(primary) == {"messages": 0, "archived": 0}
+    shards.dispose()
+    primary.dispose()
@@ -0,0 +1,66 @@
+"""Tests del catálogo en columnas (`ColumnarCatalog`)."""
+
+import random
+
+import pytest
+
+from src.application.product_service import ProductService
+from src.domain.entities import Product
+from src.domain.filters import filter_products
+from src.infrastructure.cache.catalog import CatalogSnapshot, SnapshotProductRepository
+from src.infrastructure.cache.columnar import ColumnarCatalog, ProductSelection
+from tests.test_services import FakeProductRepo
+
+
+def _catalog(n=500, seed=3):
+    rng = random.Random(seed)
+    return [
+        Product.from_trusted(i, f"Modelo {i}", rng.choice(["Nike", "Adidas", "Puma"]),
+                             rng.choice(["Running", "Casual"]), rng.choice(["40", "41", "42"]),
+                             rng.choice(["Negro", "Blanco"]), float(rng.choice([60, 80, 80, 120, 150])),
+                             rng.randint(0, 2), "")
+        for i in range(1, n + 1)
+    ]
+
+
+@pytest.mark.parametrize("filters", [
+    None,
+    {"brand": "Nike"},
+    {"brand": "Nike", "category": "Running", "size": "42"},
+    {"color": "Blanco", "min_price": 80, "max_price": 120},
+    {"in_stock": True, "max_price": 80},
+    {"brand": "Reebok"},
+    {"brand": "", "size": None},
+])
+@pytest.mark.parametrize("sort,limit", [(None, None), ("price", None), ("-price", 7), ("stock", 25), (None, 3)])
+def test_select_matches_python_filters(filters, sort, limit):
+    """Filtros, orden estable y top-K idénticos a `filter_products` (incluidos empates)."""
+    products = _catalog()
+    columns = ColumnarCatalog(products)
+    got = columns.select(filters, sort, limit)
+    assert isinstance(got, ProductSelection)
+    assert [p.id for p in got] == [p.id for p in filter_products(products, filters, sort, limit)]
+
+
+def test_selection_is_lazy_and_sliceable():
+    """La selección indexa y recorta sin materializar la lista completa."""
+    columns = ColumnarCatalog(_catalog())
+    cheap = columns.select({"category": "Casual"}, sort="price")
+    assert len(cheap[:3]) == 3 and cheap[0].price == min(p.price for p in cheap)
+    assert cheap[-1] is list(cheap)[-1]
+
+
+def test_snapshot_repository_routes_filters_through_columns():
+    """Con `columnar=True` ProductService filtra sobre las columnas del snapshot."""
+    inner = FakeProductRepo()
+    snapshot = CatalogSnapshot(max_age=None, columnar=True)
+    repo = SnapshotProductRepository(inner, snapshot)
+    service = ProductService(repo)
+
+    assert isinstance(service.search_products({"brand": "Nike"}), ProductSelection)
+    assert [p.name for p in service.get_available_products()] == ["Pegasus"]
+    assert [p.name for p in repo.get_by_category("Running")] == ["Pegasus", "Ultraboost"]
+
+    repo.save(Product(id=1, name="Pegasus", brand="Nike", category="Running", size="42",
+                      color="Negro", price=120.0, stock=0))
+    assert list(service.get_available_products()) == []
@@ -0,0 +1,51 @@
+"""Pruebas de la configuración centralizada y de los imports diferidos."""
+
+import subprocess
+import sys
+
+from src.infrastructure.config import Settings
+
+
+def test_settings_from_env(monkeypatch):
+    """Lee y convierte las variables de entorno; sin ellas usa los defaults."""
+    for var in ("WEB_CONCURRENCY", "CHAT_WRITE_JOURNAL", "GEMINI_API_KEY"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setenv("LLM_PROVIDER", "FAKE")
+    monkeypatch.setenv("FAKE_LLM_LATENCY_MS", "250")
+    monkeypatch.setenv("CHAT_WRITE_BEHIND", "yes")
+    s = Settings.from_env()
+    assert s.llm_provider == "fake" and s.fake_llm_latency == 0.25
+    assert s.chat_write_behind is True and s.chat_write_journal is None
+    assert s.web_concurrency is None and s.gemini_api_key is None
+
+
+def test_api_import_does_not_load_llm_sdk():
+    """Importar la app no importa el SDK de Gemini (se carga al crear el servicio)."""
+    code = "import sys, src.infrastructure.api.main; print('google.generativeai' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_server_shares_chat_windows_between_workers(monkeypatch):
+    """Con varios workers y sin CACHE_URL el servidor fija una caché compartida."""
+    from src.infrastructure.api import server
+
+    calls = []
+    monkeypatch.setattr(server.uvicorn, "run", lambda app, **kw: calls.append(kw))
+    monkeypatch.setattr(server, "get_settings", lambda: Settings.from_env())
+    monkeypatch.setenv("CACHE_URL", "")
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    server.main()
+    assert calls[-1]["workers"] == 1 and server.os.environ["CACHE_URL"] == ""
+    assert calls[-1]["proxy_headers"] and calls[-1]["forwarded_allow_ips"] == "127.0.0.1"
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    server.main()
+    assert calls[-1]["workers"] == 3 and server.os.environ["CACHE_URL"] == server.DEFAULT_SHARED_CACHE_URL
+
+
+def test_catalog_import_does_not_load_numpy():
+    """El snapshot y las facetas importan NumPy al cargar datos, no al importarse."""
+    code = ("import sys, src.infrastructure.cache.catalog, src.application.product_service; "
+            "print('numpy' in sys.modules)")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
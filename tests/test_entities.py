@@ -104,3 +104,28 @@ def test_chatcontext_format_for_prompt_keeps_last_n_and_format():
     assert "user: m3" in text
     assert "assistant: m8" in text
     assert "m1" not in text and "m2" not in text
+
+
+# ───────────────── Tests de representación compacta ─────────────────
+
+def test_entities_are_slotted_and_context_is_frozen():
+    """Entidades: usan __slots__ (sin __dict__) y ChatContext es inmutable."""
+    p = Product(id=1, name="Pegasus", brand="Nike", category="Running",
+                size="42", color="Negro", price=120.0, stock=2)
+    assert not hasattr(p, "__dict__")
+
+    ctx = ChatContext(messages=[], max_messages=6)
+    with pytest.raises(AttributeError):
+        ctx.max_messages = 3
+
+
+def test_from_trusted_skips_validation_but_keeps_equality():
+    """from_trusted: crea entidades equivalentes sin ejecutar __post_init__."""
+    now = datetime.now(UTC)
+    trusted = ChatMessage.from_trusted(id=1, session_id="s1", role="user", message="hola", timestamp=now)
+    assert trusted == ChatMessage(id=1, session_id="s1", role="user", message="hola", timestamp=now)
+
+    # Sin validación: una fila "rara" de la BD no rompe la hidratación
+    legacy = Product.from_trusted(id=9, name="X", brand="B", category="C", size="40",
+                                  color="Rojo", price=10.0, stock=-1)
+    assert legacy.stock == -1 and legacy.is_available() is False
@@ -0,0 +1,109 @@
+"""Tests de las facetas del catálogo (`FacetService`)."""
+
+import random
+
+import pytest
+
+from src.application.dtos import ProductDTO
+from src.application.facet_service import FacetService
+from src.application.product_service import ProductService
+from src.domain.entities import Product
+from tests.test_services import FakeProductRepo
+
+BRANDS = ["Nike", "Adidas", "Puma"]
+CATEGORIES = ["Running", "Casual", "Formal"]
+COLORS = ["Negro", "Blanco", "Azul"]
+
+
+def _product(rng, pid):
+    return Product(id=pid, name=f"Modelo {pid}", brand=rng.choice(BRANDS), category=rng.choice(CATEGORIES),
+                   size=str(rng.randint(38, 44)), color=rng.choice(COLORS),
+                   price=float(rng.choice([30, 50, 99.9, 120, 180, 250, 400])), stock=rng.randint(0, 3))
+
+
+def test_counts_and_price_ranges():
+    """Conteos globales, filtrados por un campo y por rango de precio."""
+    facets = FacetService()
+    facets.rebuild(FakeProductRepo().get_all())
+    everything = facets.facets()
+    assert everything["total"] == 2 and everything["in_stock"] == 1 and everything["avg_price"] == 135.0
+    assert everything["facets"]["brand"] == {"Nike": 1, "Adidas": 1}
+    assert everything["facets"]["price_range"] == {"100-150": 1, "150-200": 1}
+
+    nike = facets.facets({"brand": "Nike"})
+    assert nike["total"] == 1 and nike["facets"]["color"] == {"Negro": 1}
+    assert facets.facets({"brand": "Reebok"})["total"] == 0
+    with pytest.raises(ValueError):
+        facets.facets({"name": "Pegasus"})
+
+
+def test_incremental_updates_match_a_full_rebuild():
+    """Tras altas, cambios y bajas, las facetas coinciden con recalcular todo."""
+    rng = random.Random(5)
+    catalog = {pid: _product(rng, pid) for pid in range(1, 301)}
+    incremental = FacetService()
+    incremental.rebuild(catalog.values())
+    for _ in range(400):
+        pid = rng.randint(1, 400)
+        if rng.random() < 0.3 and pid in catalog:
+            del catalog[pid]
+            incremental.remove(pid)
+        else:
+            catalog[pid] = _product(rng, pid)
+            incremental.upsert(catalog[pid])
+
+    rebuilt = FacetService()
+    rebuilt.rebuild(catalog.values())
+    queries = [None, {"category": "Running"}, {"price_range": "50-100"},
+               {"category": "Casual", "color": "Azul"}, {"brand": "Puma", "size": "40", "price_range": "300+"}]
+    for filters in queries:
+        got, want = incremental.facets(filters), rebuilt.facets(filters)
+        assert got["total"] == want["total"] and got["in_stock"] == want["in_stock"]
+        assert got["facets"] == want["facets"]
+
+    # El camino de un filtro (precalculado) y el de varios (máscaras) coinciden.
+    single = incremental.facets({"category": "Formal"})
+    scanned = incremental._render(incremental._scan({"category": incremental._code_of["category"]["Formal"]}))
+    assert single["facets"] == scanned["facets"] and single["total"] == scanned["total"]
+
+
+def test_rebuild_with_high_cardinality_counts_only_present_cells():
+    """Miles de marcas y cientos de categorías: el rebuild no reserva el producto de cardinalidades."""
+    rng = random.Random(11)
+    products = [Product(id=pid, name=f"Modelo {pid}", brand=f"Marca {rng.randrange(3000)}",
+                        category=f"Cat {rng.randrange(600)}", size=str(rng.randint(30, 50)),
+                        color=f"Color {rng.randrange(300)}", price=float(rng.randint(10, 500)),
+                        stock=rng.randint(0, 3))
+                for pid in range(1, 4001)]
+    rebuilt = FacetService()
+    rebuilt.rebuild(products)
+    incremental = FacetService()
+    for p in products:
+        incremental.upsert(p)
+
+    p = products[0]
+    for filters in (None, {"brand": p.brand}, {"brand": p.brand, "category": p.category},
+                    {"category": p.category, "color": p.color}, {"brand": p.brand, "size": p.size, "color": p.color}):
+        got, want = rebuilt.facets(filters), incremental.facets(filters)
+        assert got["total"] == want["total"] and got["in_stock"] == want["in_stock"]
+        assert got["facets"] == want["facets"]
+
+
+def test_product_service_keeps_facets_up_to_date():
+    """Crear, actualizar y eliminar con `ProductService` actualiza las facetas."""
+    repo = FakeProductRepo()
+    facets = FacetService()
+    facets.rebuild(repo.get_all())
+    service = ProductService(repo, facets)
+
+    dto = ProductDTO(name="Gazelle", brand="Adidas", category="Casual", size="41", color="Verde", price=90.0, stock=2,
+                     description="")
+    created = service.create_product(dto)
+    assert facets.facets({"category": "Casual"})["facets"]["color"] == {"Verde": 1}
+
+    service.update_product(created.id, dto.model_copy(update={"color": "Rojo"}))
+    assert facets.facets({"category": "Casual"})["facets"]["color"] == {"Rojo": 1}
+
+    service.delete_product(created.id)
+    assert facets.facets({"category": "Casual"})["total"] == 0
+    assert facets.facets()["total"] == 2
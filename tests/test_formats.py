@@ -0,0 +1,101 @@
+"""Tests de los formatos compactos de listas y de la compresión de respuestas."""
+
+import asyncio
+import gzip
+import zlib
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+
+from src.application.dtos import ChatHistoryDTO, ProductDTO, to_payload
+from src.domain.entities import ChatMessage, Product
+from src.infrastructure.api import formats
+from src.infrastructure.api.middleware import CompressionMiddleware, negotiate_encoding
+
+
+def _products(n):
+    return [Product(id=i, name=f"Modelo {i}", brand="Nike", category="Running", size="42",
+                    color="Negro", price=100.0 + i % 50, stock=i % 7) for i in range(1, n + 1)]
+
+
+def test_accept_negotiation():
+    """Gana el tipo soportado con mayor q; comodines y tipos desconocidos caen a JSON."""
+    assert formats.negotiate(None) == formats.JSON
+    assert formats.negotiate("*/*") == formats.JSON
+    assert formats.negotiate("text/html, application/vnd.columnar+json") == formats.COLUMNAR
+    assert formats.negotiate("application/json;q=0.9, application/vnd.columnar+json") == formats.COLUMNAR
+    assert formats.negotiate("application/vnd.columnar+json;q=0.5, application/json") == formats.JSON
+    expected = formats.MSGPACK if formats.msgpack is not None else formats.JSON
+    assert formats.negotiate("application/x-msgpack") == expected
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding("*") in ("br", "gzip") and negotiate_encoding(None) is None
+
+
+@pytest.mark.parametrize("media_type", [formats.JSON, formats.COLUMNAR, formats.MSGPACK])
+def test_streamed_chunks_match_the_whole_document(media_type):
+    """Los bloques concatenados son el documento completo, en filas o columnas."""
+    if media_type == formats.MSGPACK:
+        msgpack = pytest.importorskip("msgpack")
+    base = datetime(2024, 1, 1)
+    messages = [ChatMessage(id=i, session_id="s", role="user", message=f"m{i}",
+                            timestamp=base + timedelta(seconds=i)) for i in range(1, 4)]
+    for dto_cls, items in ((ProductDTO, _products(2500)), (ChatHistoryDTO, messages), (ProductDTO, [])):
+        body = b"".join(formats.encode_chunks(media_type, dto_cls, items))
+        assert body == formats.encode(media_type, dto_cls, items)
+        rows = orjson.loads(orjson.dumps(to_payload(dto_cls, items)))
+        if media_type == formats.JSON:
+            assert orjson.loads(body) == rows
+            continue
+        doc = orjson.loads(body) if media_type == formats.COLUMNAR else msgpack.unpackb(body)
+        assert doc["count"] == len(items)
+        assert [dict(zip(doc["columns"], values)) for values in zip(*doc["columns"].values())] == rows
+
+
+def test_list_payloads_match_the_single_item_dto():
+    """Una descripción `None` sale como `""` en listas y columnas, igual que en `from_entity`."""
+    product = Product.from_trusted(1, "Pegasus", "Nike", "Running", "42", "Negro", 120.0, 3, None)
+    [row] = to_payload(ProductDTO, [product])
+    assert row == ProductDTO.from_entity(product).model_dump() and row["description"] == ""
+    assert orjson.loads(formats.encode(formats.COLUMNAR, ProductDTO, [product]))["columns"]["description"] == [""]
+
+
+def test_compression_streams_chunks_and_skips_small_bodies():
+    """Cada trozo sale comprimido al llegar; los cuerpos chicos o ya codificados pasan tal cual."""
+    async def app(scope, receive, send):
+        path = scope["path"]
+        headers = [(b"content-type", b"application/x-ndjson" if path == "/stream" else b"application/json")]
+        if path == "/png":
+            headers = [(b"content-type", b"image/png")]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        if path == "/stream":
+            for i in range(3):
+                await send({"type": "http.response.body", "body": b'{"i":%d}\n' % i, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        else:
+            await send({"type": "http.response.body", "body": b"x" * (10 if path == "/small" else 5000)})
+
+    def call(path, accept_encoding="gzip"):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "path": path, "headers": [(b"accept-encoding", accept_encoding.encode())]}
+        asyncio.run(CompressionMiddleware(app, minimum_size=100)(scope, None, send))
+        return dict(sent[0]["headers"]), [m["body"] for m in sent[1:]]
+
+    headers, bodies = call("/stream")
+    assert headers[b"content-encoding"] == b"gzip" and headers[b"vary"] == b"Accept-Encoding"
+    assert len(bodies) == 4 and all(bodies[:3])
+    # Un flush por trozo: cada prefijo ya se puede descomprimir.
+    reader = zlib.decompressobj(31)
+    assert reader.decompress(bodies[0]) == b'{"i":0}\n'
+    assert gzip.decompress(b"".join(bodies)) == b'{"i":0}\n{"i":1}\n{"i":2}\n'
+
+    headers, bodies = call("/big")
+    assert gzip.decompress(bodies[0]) == b"x" * 5000 and len(bodies[0]) < 100
+    for path, accept_encoding in (("/small", "gzip"), ("/png", "gzip"), ("/big", "identity")):
+        headers, bodies = call(path, accept_encoding)
+        assert b"content-encoding" not in headers and bodies[0].startswith(b"x" * 10)
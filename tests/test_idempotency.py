@@ -0,0 +1,69 @@
+"""Tests del almacén de claves de idempotencia (`IdempotencyStore`)."""
+
+import asyncio
+
+import pytest
+
+from src.infrastructure.cache.idempotency import IdempotencyKeyConflictError, IdempotencyStore
+
+
+def test_concurrent_duplicates_wait_for_the_first_run():
+    """Los duplicados en curso esperan al primero y reciben su resultado."""
+    store = IdempotencyStore()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"answer": len(calls)}
+
+    async def scenario():
+        return await asyncio.gather(*(store.run("k", "body", work) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [value for value, _ in results] == [{"answer": 1}] * 5
+    assert [replayed for _, replayed in results].count(False) == 1
+    assert store.stats() == {"entries": 1, "in_flight": 0, "replayed": 4, "joined": 4}
+
+
+def test_failures_are_not_stored_and_a_waiter_retries():
+    """Si el primero falla, un duplicado en espera ejecuta el trabajo."""
+    store = IdempotencyStore()
+    attempts = []
+
+    async def work():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError("modelo caído")
+        return "ok"
+
+    async def scenario():
+        return await asyncio.gather(store.run("k", "body", work), store.run("k", "body", work),
+                                    return_exceptions=True)
+
+    first, second = asyncio.run(scenario())
+    assert isinstance(first, RuntimeError)
+    assert second == ("ok", False)
+    assert asyncio.run(store.run("k", "body", work)) == ("ok", True)
+    assert len(attempts) == 2
+
+
+def test_conflicting_body_expiry_and_bound():
+    """Otra huella es un conflicto; los resultados expiran y el LRU se acota."""
+    store = IdempotencyStore(ttl=60, max_entries=2)
+
+    async def work():
+        return "r"
+
+    asyncio.run(store.run("a", "body", work))
+    with pytest.raises(IdempotencyKeyConflictError):
+        asyncio.run(store.run("a", "otro", work))
+    asyncio.run(store.run("b", "body", work))
+    asyncio.run(store.run("c", "body", work))
+    assert len(store) == 2 and asyncio.run(store.run("a", "body", work)) == ("r", False)
+
+    store.ttl = 0
+    asyncio.run(store.run("d", "body", work))
+    assert asyncio.run(store.run("d", "body", work)) == ("r", False)
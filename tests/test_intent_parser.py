@@ -0,0 +1,84 @@
+"""Tests del analizador de intención (consultas de catálogo sin IA)."""
+
+import asyncio
+
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+from src.application.intent_parser import IntentParser
+from src.domain.entities import Product
+from tests.test_services import FakeAI, FakeChatRepo, FakeProductRepo
+
+CATALOG = [
+    Product(id=1, name="Pegasus", brand="Nike", category="Running", size="42", color="Negro", price=120.0, stock=5),
+    Product(id=2, name="574", brand="New Balance", category="Casual", size="41", color="Gris", price=95.0, stock=3),
+    Product(id=3, name="Oxford", brand="Hush Puppies", category="Formal", size="42", color="Café", price=140.0, stock=2),
+]
+
+
+def test_extracts_catalog_filters_and_price_bounds():
+    """Marca de varias palabras, sinónimos, plurales de color, talla y precios."""
+    parser = IntentParser()
+    intent = parser.parse("¿Tienen New Balance grises talla 41 por menos de $100?", CATALOG)
+    assert intent.filters == {"brand": "New Balance", "color": "Gris", "size": "41", "max_price": 100.0}
+    assert intent.answerable
+
+    intent = parser.parse("zapatos para la oficina entre 100 y 150 dólares", CATALOG)
+    assert intent.filters == {"category": "Formal", "min_price": 100.0, "max_price": 150.0}
+    assert intent.answerable
+
+
+def test_open_ended_or_unknown_words_fall_back_to_llm():
+    """Pedidos de consejo o palabras no reconocidas no se responden con plantilla."""
+    parser = IntentParser()
+    recommend = parser.parse("¿Qué Nike me recomiendas para correr?", CATALOG)
+    assert recommend.filters == {"brand": "Nike", "category": "Running"}
+    assert not recommend.answerable
+    unknown = parser.parse("Nike con suela de carbono", CATALOG)
+    assert not unknown.answerable and "carbono" in unknown.unknown_words
+    assert not parser.parse("hola, ¿cómo estás?", CATALOG).filters
+
+
+def test_chat_service_answers_simple_lookups_and_narrows_the_rest():
+    """Consulta simple → plantilla sin IA; consulta abierta → IA con productos filtrados."""
+    parser = IntentParser()
+    chat_repo = FakeChatRepo()
+    svc = ChatService(FakeProductRepo(), chat_repo, FakeAI(), intent_parser=parser)
+
+    res = asyncio.run(svc.process_message(ChatMessageRequestDTO(session_id="s", message="Busco Nike talla 42")))
+    assert not res.assistant_message.startswith("[AI]")
+    assert "Pegasus" in res.assistant_message and "$120.00" in res.assistant_message
+
+    res = asyncio.run(svc.process_message(ChatMessageRequestDTO(session_id="t", message="¿Qué Adidas me recomiendas?")))
+    assert res.assistant_message.startswith("[AI]") and "(1 productos)" in res.assistant_message
+    assert parser.stats == {"parsed": 2, "answered": 1, "narrowed": 1}
+    assert len(chat_repo.get_session_history("s")) == 2
+
+
+def test_follow_ups_and_negations_go_to_the_llm():
+    """Con historial o con una negación el mensaje no se responde ni se acota por reglas."""
+    parser = IntentParser()
+    assert parser.parse("No quiero Nike, ¿qué más hay?", CATALOG).filters == {}
+    assert parser.parse("Nike sin cordones", CATALOG).filters == {}
+    assert parser.parse("hasta 100, no más de eso", CATALOG).filters == {}
+    assert parser.parse("talla 41 por no más de 100", CATALOG).filters == {"size": "41", "max_price": 100.0}
+
+    svc = ChatService(FakeProductRepo(), FakeChatRepo(), FakeAI(), intent_parser=parser)
+    asyncio.run(svc.process_message(ChatMessageRequestDTO(session_id="s", message="Busco Nike talla 42")))
+    res = asyncio.run(svc.process_message(ChatMessageRequestDTO(session_id="s", message="¿y en talla 41?")))
+    assert res.assistant_message.startswith("[AI]")
+    assert parser.stats["parsed"] == 5
+
+
+def test_brand_removal_respects_word_boundaries_and_vocabulary_follows_the_catalog():
+    """Una marca dentro de otra palabra no se borra; un catálogo nuevo del mismo tamaño se reconoce."""
+    catalog = [*CATALOG, Product(id=4, name="Ultra", brand="On", category="Running", size="43",
+                                 color="Blanco", price=180.0, stock=1)]
+    parser = IntentParser()
+    intent = parser.parse("On blancas para running en talla 43 con cordones", catalog)
+    assert intent.filters == {"brand": "On", "color": "Blanco", "category": "Running", "size": "43"}
+    assert intent.unknown_words == ["cordones"]
+
+    renamed = [*CATALOG[:2], Product(id=3, name="Oxford", brand="Clarks", category="Formal", size="42",
+                                     color="Café", price=140.0, stock=2)]
+    parser.parse("Hush Puppies", CATALOG)
+    assert parser.parse("Clarks formales", renamed).filters == {"brand": "Clarks", "category": "Formal"}
@@ -0,0 +1,137 @@
+"""Tests del journal de llamadas al modelo (grabación y reproducción)."""
+
+import asyncio
+import multiprocessing
+import time
+
+import pytest
+
+from src.domain.entities import Product
+from src.infrastructure.llm_providers.journal import (
+    JournalMissError,
+    LLMJournal,
+    RecordingLLMService,
+    ReplayLLMService,
+    journal_files,
+    read_journal,
+    read_journals,
+    report_usage,
+)
+
+PRODUCTS = [Product(id=1, name="Pegasus", brand="Nike", category="Running", size="42",
+                    color="Negro", price=120.0, stock=3)]
+
+
+class UsageAI:
+    """Proveedor que informa tokens desde un hilo, como Gemini."""
+
+    async def generate_response(self, user_message, products, context):
+        if user_message == "falla":
+            raise RuntimeError("cuota agotada")
+
+        def call():
+            time.sleep(0.02)
+            report_usage(len(user_message), 7)
+            return f"eco: {user_message}"
+        return await asyncio.to_thread(call)
+
+
+def _call(ai, message, context=""):
+    return asyncio.run(ai.generate_response(user_message=message, products=PRODUCTS, context=context))
+
+
+def test_recorded_calls_replay_deterministically(tmp_path):
+    """Se graba prompt, respuesta, latencia, tokens y errores; la reproducción los repite en orden."""
+    journal = LLMJournal(tmp_path / "llm.jsonl.gz")
+    recorder = RecordingLLMService(UsageAI(), journal, session="s1")
+    assert _call(recorder, "hola") == "eco: hola"
+    assert _call(recorder, "hola") == "eco: hola"
+    with pytest.raises(RuntimeError):
+        _call(recorder, "falla")
+    journal.close()
+
+    first, second, failed = entries = read_journals(tmp_path / "llm.jsonl.gz")
+    assert first.key == second.key and first.session == "s1" and first.latency_ms >= 20
+    assert (first.prompt_tokens, first.response_tokens) == (4, 7)
+    assert "Usuario: hola" in first.prompt and second.prompt is None  # el prompt se guarda una vez
+    assert failed.error == "cuota agotada" and failed.response is None
+
+    replay = ReplayLLMService(entries, time_scale=0)
+    t0 = time.perf_counter()
+    assert _call(replay, "hola") == _call(replay, "hola") == "eco: hola"
+    assert time.perf_counter() - t0 < 0.02
+    with pytest.raises(RuntimeError, match="cuota agotada"):
+        _call(replay, "falla")
+    assert replay.stats() == {"entries": 3, "prompt": 3, "message": 0, "miss": 0}
+
+    slow = ReplayLLMService(entries, time_scale=0.5)
+    t0 = time.perf_counter()
+    _call(slow, "hola")
+    assert time.perf_counter() - t0 >= first.latency_ms / 2000
+
+
+def test_replay_falls_back_to_the_message_and_survives_truncation(tmp_path):
+    """Con otro historial se responde por mensaje (salvo `strict`); un final truncado no rompe la lectura."""
+    path = tmp_path / "llm.jsonl.gz"
+    journal = LLMJournal(path)
+    recorder = RecordingLLMService(UsageAI(), journal)
+    for message in ("uno", "dos"):
+        _call(recorder, message)
+    journal.close()
+    journal.file.write_bytes(journal.file.read_bytes()[:-8])  # sin el trailer gzip
+
+    entries = list(read_journal(journal.file))
+    assert [e.message for e in entries] == ["uno", "dos"]
+    replay = ReplayLLMService(entries, time_scale=0)
+    assert _call(replay, "dos", context="user: hola") == "eco: dos"
+    with pytest.raises(JournalMissError):
+        _call(replay, "tres")
+    with pytest.raises(JournalMissError):
+        _call(ReplayLLMService(entries, strict=True), "dos", context="user: hola")
+    assert replay.stats() == {"entries": 2, "prompt": 0, "message": 1, "miss": 1}
+
+
+def test_recording_does_not_wait_for_compression(tmp_path, monkeypatch):
+    """La llamada grabada solo encola la entrada; el hilo escritor la comprime y escribe."""
+    journal = LLMJournal(tmp_path / "llm.jsonl.gz")
+    write = journal._write
+
+    def slow_write(entry, flush):
+        time.sleep(0.2)  # disco o compresión lentos
+        write(entry, flush)
+
+    monkeypatch.setattr(journal, "_write", slow_write)
+    recorder = RecordingLLMService(UsageAI(), journal)
+    t0 = time.perf_counter()
+    _call(recorder, "uno")
+    assert time.perf_counter() - t0 < 0.15
+    journal.flush()
+    assert [e.message for e in read_journal(journal.file)] == ["uno"]
+    journal.close()
+
+
+def _record_in_child(path, worker):
+    journal = LLMJournal(path)
+    recorder = RecordingLLMService(UsageAI(), journal, session=f"w{worker}")
+    for i in range(20):
+        _call(recorder, f"w{worker} mensaje {i}")
+    journal.close()
+
+
+def test_each_worker_writes_its_own_file_and_reads_merge_by_time(tmp_path):
+    """Workers concurrentes no comparten flujo gzip; la lectura une sus archivos por `ts`."""
+    path = tmp_path / "llm.jsonl.gz"
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_record_in_child, args=(path, w)) for w in range(3)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+        assert p.exitcode == 0
+
+    files = journal_files(path)
+    assert len(files) == 3 and not path.exists()
+    entries = read_journals(path)
+    assert len(entries) == 60 and [e.ts for e in entries] == sorted(e.ts for e in entries)
+    assert {e.session for e in entries} == {"w0", "w1", "w2"}
+    assert ReplayLLMService.load(path, time_scale=0).stats()["entries"] == 60
@@ -0,0 +1,77 @@
+"""Tests del perfilado a demanda (`RequestProfiler`)."""
+
+import pstats
+import time
+
+from src.infrastructure.profiling import RequestProfiler, Timed
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class _Repo:
+    def get_all(self):
+        _busy(0.002)
+        return [1, 2]
+
+
+def test_disabled_without_token_and_single_capture_per_worker(tmp_path):
+    """Sin token no se perfila; con token, un perfil a la vez y los armados se consumen."""
+    assert RequestProfiler(None, tmp_path).start("x") is None
+    profiler = RequestProfiler("secreto", tmp_path)
+    assert profiler.start(None) is None and profiler.start("otro") is None
+
+    profiler.arm(2)
+    first = profiler.start(None)
+    assert first is not None and profiler.start("secreto") is None
+    first.finish()
+    assert profiler.start(None) is not None
+    assert profiler.stats() == {"enabled": True, "armed": 0, "captured": 1, "skipped": 1}
+
+
+def test_sampled_profile_is_folded_and_spans_time_calls(tmp_path):
+    """El modo `sample` escribe pilas folded y `Timed` mide cada llamada."""
+    profiler = RequestProfiler("secreto", tmp_path, interval=0.001)
+    capture = profiler.start("secreto")
+    repo = Timed(_Repo(), capture, "products")
+    with capture.span("turno"):
+        assert repo.get_all() == [1, 2]
+        _busy(0.05)
+    path = capture.finish()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert path.suffix == ".folded" and lines
+    assert any("_busy" in line.rsplit(" ", 1)[0].split(";")[-1] for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    timing = capture.server_timing()
+    assert "products.get_all;dur=" in timing and "turno;dur=" in timing and "total;dur=" in timing
+
+
+def test_cprofile_mode_writes_pstats(tmp_path):
+    """El modo `cprofile` escribe un `.prof` legible con pstats."""
+    profiler = RequestProfiler("secreto", tmp_path, mode="cprofile")
+    capture = profiler.start("secreto")
+    _busy(0.005)
+    path = capture.finish()
+    assert path.suffix == ".prof"
+    assert any(func[2] == "_busy" for func in pstats.Stats(str(path)).stats)
+
+
+def test_profile_is_written_off_the_profiled_thread(tmp_path):
+    """`stop` corre en el hilo perfilado; `write` en otro hilo y libera el cupo."""
+    import asyncio
+
+    profiler = RequestProfiler("secreto", tmp_path, mode="cprofile")
+
+    async def request():
+        capture = profiler.start("secreto")
+        _busy(0.005)
+        capture.stop()
+        return await asyncio.to_thread(capture.write)
+
+    path = asyncio.run(request())
+    assert path.suffix == ".prof" and "write" not in {f[2] for f in pstats.Stats(str(path)).stats}
+    assert profiler.stats()["captured"] == 1 and profiler.start("secreto") is not None
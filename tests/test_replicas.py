@@ -0,0 +1,107 @@
+"""Tests del enrutamiento de lecturas a réplicas (archivos SQLite locales)."""
+
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from src.domain.entities import ChatMessage
+from src.infrastructure.cache.backends import FileBackend
+from src.infrastructure.db.database import Base
+from src.infrastructure.db.models import ProductModel
+from src.infrastructure.db.query_stats import track
+from src.infrastructure.db.replicas import ReplicaSet
+from src.infrastructure.repositories.chat_repository import SQLChatRepository
+from src.infrastructure.repositories.product_repository import SQLProductRepository
+
+_PRODUCT = dict(brand="Nike", category="Running", size="42", color="Negro", price=100.0, stock=5, description="")
+
+
+def _database(path, product_name):
+    """Base SQLite con un producto cuyo nombre identifica al archivo."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(ProductModel.__table__), [{"id": 1, "name": product_name, **_PRODUCT}])
+    return engine
+
+
+def _setup(tmp_path, **kwargs):
+    primary = _database(tmp_path / "primary.db", "principal")
+    _database(tmp_path / "a.db", "replica a")
+    _database(tmp_path / "b.db", "replica b")
+    replicas = ReplicaSet([f"sqlite:///{tmp_path / 'a.db'}", f"sqlite:///{tmp_path / 'b.db'}"], **kwargs)
+    return sessionmaker(bind=primary, expire_on_commit=False)(), replicas
+
+
+def test_product_reads_rotate_over_replicas(tmp_path):
+    """Las lecturas de productos se reparten entre réplicas; nunca van a la principal."""
+    db, replicas = _setup(tmp_path)
+    repo = SQLProductRepository(db, replicas)
+    with track() as queries:
+        names = {repo.get_all()[0].name for _ in range(4)} | {repo.get_by_id(1).name}
+    assert names == {"replica a", "replica b"}
+    assert replicas.stats()["primary_reads"] == 0
+    assert queries.count == 5 + 2  # lecturas y verificación de salud de cada réplica cuentan
+    replicas.dispose()
+
+
+def test_catalog_snapshot_reloads_from_the_primary(tmp_path):
+    """Tras invalidar, el snapshot se recarga de la principal aunque las réplicas estén retrasadas."""
+    from src.infrastructure.cache.catalog import CatalogSnapshot, SnapshotProductRepository
+
+    db, replicas = _setup(tmp_path)
+    sql = SQLProductRepository(db, replicas)
+    repo = SnapshotProductRepository(sql, CatalogSnapshot(max_age=None), loader=sql.get_all_from_primary)
+    assert repo.get_by_id(1).name == "principal"
+    assert repo.get_all()[0].name == "principal"
+    assert replicas.stats()["primary_reads"] == 0  # no es una lectura de réplica caída
+    replicas.dispose()
+
+
+def test_chat_reads_stick_to_primary_after_a_write(tmp_path):
+    """Tras escribir, la sesión lee de la principal durante `sticky_seconds`."""
+    db, replicas = _setup(tmp_path, sticky_seconds=60)
+    repo = SQLChatRepository(db, replicas)
+    repo.save_messages([ChatMessage(id=None, session_id="s1", role="user", message="hola",
+                                    timestamp=datetime(2024, 1, 1))])
+    # La réplica aún no recibió el mensaje (retraso de replicación simulado).
+    assert [m.message for m in repo.get_recent_messages("s1", 5)] == ["hola"]
+    assert repo.get_recent_messages("otra", 5) == []
+    assert replicas.stats()["primary_reads"] == 1
+
+    replicas.sticky_seconds = 0
+    assert repo.get_recent_messages("s1", 5) == []
+    replicas.dispose()
+
+
+def test_sticky_marks_are_shared_between_workers(tmp_path):
+    """Con backend compartido, otro worker también lee de la principal la sesión escrita."""
+    db, worker_a = _setup(tmp_path, sticky_seconds=60, backend=FileBackend(str(tmp_path / "kv")))
+    worker_b = ReplicaSet([f"sqlite:///{tmp_path / 'a.db'}"], sticky_seconds=60,
+                          backend=FileBackend(str(tmp_path / "kv")))
+    SQLChatRepository(db, worker_a).save_messages([ChatMessage(id=None, session_id="s1", role="user",
+                                                               message="hola", timestamp=datetime(2024, 1, 1))])
+    repo_b = SQLChatRepository(db, worker_b)
+    assert [m.message for m in repo_b.get_session_history("s1")] == ["hola"]
+    assert repo_b.get_session_history("otra") == []
+    assert worker_b.stats()["primary_reads"] == 1
+    worker_a.dispose()
+    worker_b.dispose()
+
+
+def test_unhealthy_replica_is_skipped_and_reads_fall_back_to_primary(tmp_path):
+    """Una réplica caída se saca de servicio; sin réplicas sanas se lee de la principal."""
+    db, replicas = _setup(tmp_path, check_interval=3600)
+    (tmp_path / "a.db").unlink()
+    (tmp_path / "a.db").mkdir()  # ya no se puede abrir como base
+    repo = SQLProductRepository(db, replicas)
+    assert {repo.get_all()[0].name for _ in range(4)} == {"replica b"}
+    assert [r["healthy"] for r in replicas.stats()["replicas"]] == [False, True]
+
+    (tmp_path / "b.db").unlink()
+    (tmp_path / "b.db").mkdir()
+    replicas.dispose()  # conexiones ya abiertas a b.db seguirían leyendo el archivo borrado
+    assert repo.get_all()[0].name == "principal"
+    assert replicas.stats()["replicas"][1]["failures"] == 1
+    replicas.dispose()
@@ -0,0 +1,72 @@
+"""Tests de los repositorios SQLAlchemy sobre SQLite en memoria.
+
+Validan el camino de lectura con SQLAlchemy Core (mapeo directo de filas a
+entidades), el orden cronológico del historial y los límites.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.domain.entities import Product, ChatMessage
+from src.infrastructure.db.database import Base
+from src.infrastructure.repositories.product_repository import SQLProductRepository
+from src.infrastructure.repositories.chat_repository import SQLChatRepository
+
+
+@pytest.fixture()
+def db():
+    """Sesión sobre una base SQLite en memoria con las tablas creadas."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def test_product_reads_map_rows_to_entities(db):
+    """Productos: get_all/get_by_brand/get_by_category devuelven entidades."""
+    repo = SQLProductRepository(db)
+    repo.save(Product(id=None, name="Pegasus", brand="Nike", category="Running", size="42", color="Negro", price=120.0, stock=5))
+    repo.save(Product(id=None, name="Samba", brand="Adidas", category="Casual", size="41", color="Blanco", price=90.0, stock=0))
+
+    allp = repo.get_all()
+    assert [type(p) for p in allp] == [Product, Product]
+    assert [p.name for p in repo.get_by_brand("Nike")] == ["Pegasus"]
+    assert [p.name for p in repo.get_by_category("Casual")] == ["Samba"]
+    assert repo.get_by_brand("Puma") == []
+    assert allp[1].description == ""
+
+
+def test_chat_history_order_and_limits(db):
+    """Chat: historial cronológico; límite y recientes devuelven los últimos N."""
+    repo = SQLChatRepository(db)
+    base = datetime(2024, 1, 1)
+    for i in range(5):
+        role = "user" if i % 2 == 0 else "assistant"
+        repo.save_message(ChatMessage(id=None, session_id="s1", role=role, message=f"m{i}", timestamp=base + timedelta(seconds=i)))
+    repo.save_message(ChatMessage(id=None, session_id="s2", role="user", message="otra", timestamp=base))
+
+    assert [m.message for m in repo.get_session_history("s1")] == ["m0", "m1", "m2", "m3", "m4"]
+    assert [m.message for m in repo.get_session_history("s1", limit=2)] == ["m3", "m4"]
+    assert [m.message for m in repo.get_recent_messages("s1", 3)] == ["m2", "m3", "m4"]
+    assert repo.delete_session_history("s1") == 5
+    assert repo.get_recent_messages("s1", 3) == []
+    assert len(repo.get_session_history("s2")) == 1
+
+
+def test_reads_and_saves_release_the_connection(db):
+    """Lecturas y guardados no dejan la transacción (ni la conexión) abierta."""
+    chat = SQLChatRepository(db)
+    saved = chat.save_message(ChatMessage(id=None, session_id="s", role="user", message="hola", timestamp=datetime(2024, 1, 1)))
+    assert saved.id is not None
+    assert not db.in_transaction()
+    chat.get_recent_messages("s", 6)
+    SQLProductRepository(db).get_all()
+    assert not db.in_transaction()
@@ -0,0 +1,94 @@
+"""Pruebas de la búsqueda de texto libre (reglas del dominio e índice FTS5)."""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.domain.entities import Product
+from src.domain.search import normalize, query_terms, rank_products
+from src.infrastructure.db.database import Base
+from src.infrastructure.db.fts import ensure_product_fts, match_expression
+from src.infrastructure.repositories.product_repository import SQLProductRepository
+
+
+def _product(name, brand, category, color, description, pid=None):
+    return Product(id=pid, name=name, brand=brand, category=category, size="42",
+                   color=color, price=100.0, stock=5, description=description)
+
+
+CATALOG = [
+    _product("Ultraboost Light", "Adidas", "Running", "Blanco", "Amortiguación premium"),
+    _product("Pegasus 40", "Nike", "Running", "Negro", "Running diaria"),
+    _product("Classic Leather", "Reebok", "Casual", "Blanco", "Clásico urbano"),
+    _product("Oxford Cap Toe", "Clarks", "Formal", "Marrón", "Cuero genuino"),
+]
+
+
+@pytest.fixture()
+def engine():
+    """Base SQLite en memoria con tablas (y el índice FTS) creadas."""
+    eng = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=eng)
+    yield eng
+    eng.dispose()
+
+
+@pytest.fixture()
+def repo(engine):
+    """Repositorio SQL con el catálogo de prueba cargado."""
+    db = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)()
+    r = SQLProductRepository(db)
+    for p in CATALOG:
+        r.save(_product(p.name, p.brand, p.category, p.color, p.description))
+    yield r
+    db.close()
+
+
+def test_query_terms_normalize_accents_case_and_plurals():
+    """Términos en minúsculas, sin tildes, plurales simples, duplicados ni palabras vacías."""
+    assert normalize("Amortiguación") == "amortiguacion"
+    assert query_terms("Zapatos BLANCOS, blanco y marrones") == ["zapato", "blanco", "marron"]
+    assert match_expression("¿?") is None
+    assert match_expression("Running blancos") == '"running"* "blanco"*'
+    assert match_expression("Running blancos", any_term=True) == '"running"* OR "blanco"*'
+
+
+def test_in_memory_ranking_prefers_more_and_heavier_matches():
+    """El ranking por defecto suma pesos por campo y descarta no coincidentes."""
+    catalog = [_product(p.name, p.brand, p.category, p.color, p.description, pid=i)
+               for i, p in enumerate(CATALOG, 1)]
+    ranked = rank_products(catalog, "amortiguacion running blanco")
+    assert [p.name for p in ranked] == ["Ultraboost Light", "Pegasus 40", "Classic Leather"]
+    assert rank_products(catalog, "sandalia") == []
+
+
+def test_fts_search_ranks_and_ignores_accents(repo):
+    """FTS5: insensible a tildes; primero los que tienen todos los términos."""
+    names = [p.name for p in repo.search_text("amortiguacion RUNNING blanco")]
+    assert names[0] == "Ultraboost Light"
+    assert set(names) == {"Ultraboost Light", "Pegasus 40", "Classic Leather"}
+    assert [p.name for p in repo.search_text("marron")] == ["Oxford Cap Toe"]
+    assert repo.search_text("running", limit=1)[0].category == "Running"
+    assert repo.search_text("   ") == []
+
+
+def test_fts_index_follows_updates_and_deletes(repo):
+    """Los triggers mantienen el índice al actualizar y eliminar productos."""
+    oxford = repo.search_text("oxford")[0]
+    repo.save(_product("Derby Liso", oxford.brand, oxford.category, oxford.color, oxford.description, pid=oxford.id))
+    assert repo.search_text("oxford") == []
+    assert [p.name for p in repo.search_text("derby")] == ["Derby Liso"]
+    assert repo.delete(oxford.id)
+    assert repo.search_text("derby") == []
+
+
+def test_ensure_fts_backfills_existing_database(engine, repo):
+    """Una base creada sin índice lo recibe poblado al inicializar."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE products_fts")
+        conn.exec_driver_sql("DROP TRIGGER products_fts_ai")
+    ensure_product_fts(engine)
+    assert [p.name for p in repo.search_text("leather")] == ["Classic Leather"]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM products_fts")).scalar() == len(CATALOG)
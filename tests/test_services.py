@@ -207,3 +207,63 @@ def test_chat_service_ai_error_is_propagated_or_wrapped():
     req = ChatMessageRequestDTO(session_id="s1", message="hola")
     with pytest.raises(CHAT_ERROR_TYPES):
         asyncio.run(svc.process_message(req))
+
+
+def test_chat_service_batch_keeps_session_order_and_bulk_saves():
+    """Lote: orden por sesión, contexto acumulado, errores aislados y un solo guardado."""
+
+    class ContextAI(FakeAI):
+        async def generate_response(self, user_message: str, products, context: str) -> str:
+            await asyncio.sleep(0.01 if user_message.endswith("1") else 0)
+            if user_message == "falla":
+                raise RuntimeError("IA caída")
+            return f"{user_message} tras {context.count('user:')}"
+
+    chat_repo = FakeChatRepo()
+    saves = []
+    chat_repo.save_messages = lambda msgs: saves.append(len(msgs)) or [chat_repo.save_message(m) for m in msgs]
+    svc = ChatService(FakeProductRepo(), chat_repo, ContextAI())
+    reqs = [ChatMessageRequestDTO(session_id=s, message=f"{s}{n}") for n in (1, 2) for s in ("a", "b")]
+    reqs.append(ChatMessageRequestDTO(session_id="c", message="falla"))
+
+    async def collect():
+        return [item async for item in svc.process_batch(reqs, concurrency=2)]
+
+    results = dict(asyncio.run(collect()))
+    assert results[0].assistant_message == "a1 tras 0" and results[2].assistant_message == "a2 tras 1"
+    assert isinstance(results[4], RuntimeError)
+    assert [m.message for m in chat_repo.get_session_history("a")] == ["a1", "a1 tras 0", "a2", "a2 tras 1"]
+    assert saves == [8]
+
+
+def test_chat_service_deadline_and_cancellation_skip_persistence():
+    """Plazo vencido → DeadlineExceededError; cancelación → sin guardar nada."""
+    from src.application.deadline import Deadline, current
+    from src.domain.exceptions import DeadlineExceededError
+
+    seen = []
+
+    class SlowAI(FakeAI):
+        async def generate_response(self, user_message: str, products, context: str) -> str:
+            seen.append(current())
+            await asyncio.sleep(0.2)
+            return "tarde"
+
+    chat_repo = FakeChatRepo()
+    svc = ChatService(FakeProductRepo(), chat_repo, SlowAI())
+    req = ChatMessageRequestDTO(session_id="s1", message="hola")
+
+    deadline = Deadline(0.02)
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(svc.process_message(req, deadline))
+    assert seen == [deadline]
+
+    async def disconnect():
+        task = asyncio.create_task(svc.process_message(req, Deadline(5)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(disconnect())
+    assert chat_repo.get_session_history("s1") == []
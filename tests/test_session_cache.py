@@ -0,0 +1,111 @@
+"""Tests de la caché de ventanas de sesión (`SessionWindowCache`).
+
+Validan que los turnos de chat en régimen estable no lean historial del
+repositorio, la invalidación al borrar una sesión y la expulsión LRU por
+cantidad de sesiones y por bytes.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+from src.domain.entities import ChatMessage
+from src.domain.repositories import IChatRepository
+from src.infrastructure.cache.session_window import CachedChatRepository, SessionWindowCache
+
+
+class CountingChatRepo(IChatRepository):
+    """Repositorio en memoria que cuenta las lecturas de mensajes recientes."""
+
+    def __init__(self):
+        """Inicializa el almacenamiento y el contador de lecturas."""
+        self._msgs: list[ChatMessage] = []
+        self.recent_reads = 0
+
+    def save_message(self, message: ChatMessage) -> ChatMessage:
+        """Guarda el mensaje asignando un ID incremental."""
+        message.id = len(self._msgs) + 1
+        self._msgs.append(message)
+        return message
+
+    def get_session_history(self, session_id: str, limit: Optional[int] = None) -> List[ChatMessage]:
+        """Historial por sesión; si hay límite, los últimos N."""
+        items = [m for m in self._msgs if m.session_id == session_id]
+        return items if limit is None else items[-limit:]
+
+    def delete_session_history(self, session_id: str) -> int:
+        """Borra los mensajes de la sesión."""
+        before = len(self._msgs)
+        self._msgs = [m for m in self._msgs if m.session_id != session_id]
+        return before - len(self._msgs)
+
+    def get_recent_messages(self, session_id: str, count: int) -> List[ChatMessage]:
+        """Últimos N mensajes; incrementa el contador de lecturas."""
+        self.recent_reads += 1
+        return [m for m in self._msgs if m.session_id == session_id][-count:]
+
+
+class FakeProductRepo:
+    """Catálogo vacío (solo se usa `get_all`)."""
+
+    def get_all(self):
+        """Retorna un catálogo vacío."""
+        return []
+
+
+class EchoAI:
+    """Proveedor de IA que responde con el largo del contexto recibido."""
+
+    async def generate_response(self, user_message: str, products, context: str) -> str:
+        """Devuelve un eco del mensaje."""
+        return f"eco: {user_message}"
+
+
+def _msg(session_id: str, text: str, role: str = "user") -> ChatMessage:
+    """Crea un mensaje de prueba."""
+    return ChatMessage(id=None, session_id=session_id, role=role, message=text, timestamp=datetime(2024, 1, 1))
+
+
+def test_steady_state_turns_do_not_read_history():
+    """Tras el primer turno, los siguientes se sirven desde la ventana en memoria."""
+    inner = CountingChatRepo()
+    repo = CachedChatRepository(inner, SessionWindowCache(window=6))
+    svc = ChatService(FakeProductRepo(), repo, EchoAI())
+
+    for i in range(5):
+        asyncio.run(svc.process_message(ChatMessageRequestDTO(session_id="s1", message=f"hola {i}")))
+
+    assert inner.recent_reads == 1
+    recent = repo.get_recent_messages("s1", 6)
+    assert [m.message for m in recent] == [m.message for m in inner.get_recent_messages("s1", 6)]
+
+
+def test_delete_invalidates_and_falls_back_to_repository():
+    """delete_session_history invalida la ventana; la siguiente lectura va al repositorio."""
+    inner = CountingChatRepo()
+    cache = SessionWindowCache(window=4)
+    repo = CachedChatRepository(inner, cache)
+    repo.save_message(_msg("s1", "a"))
+    assert [m.message for m in repo.get_recent_messages("s1", 4)] == ["a"]
+
+    assert repo.delete_session_history("s1") == 1
+    assert len(cache) == 0
+    assert repo.get_recent_messages("s1", 4) == []
+    assert inner.recent_reads == 2
+
+
+def test_lru_eviction_by_sessions_and_bytes():
+    """La caché expulsa la sesión menos usada al superar sesiones o bytes."""
+    cache = SessionWindowCache(window=2, max_sessions=2)
+    cache.put("a", [_msg("a", "1")], complete=True)
+    cache.put("b", [_msg("b", "1")], complete=True)
+    assert cache.get("a", 1) is not None  # "a" pasa a ser la más reciente
+    cache.put("c", [_msg("c", "1")], complete=True)
+    assert cache.get("b", 1) is None and cache.get("a", 1) is not None
+
+    small = SessionWindowCache(window=2, max_bytes=400)
+    small.put("a", [_msg("a", "x" * 100)], complete=True)
+    small.put("b", [_msg("b", "y" * 100)], complete=True)
+    assert len(small) == 1 and small.size_bytes <= 400
@@ -0,0 +1,128 @@
+"""Pruebas del índice vectorial de productos y su uso en el chat."""
+
+import asyncio
+import time
+
+import numpy as np
+
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+from src.domain.entities import Product
+from src.infrastructure.vector.embeddings import HashedNgramEmbedder
+from src.infrastructure.vector.index import IndexedProductRepository, ProductVectorIndex
+from tests.test_services import FakeChatRepo, FakeProductRepo
+
+
+def _product(pid, name, brand, category, color, description):
+    return Product(id=pid, name=name, brand=brand, category=category, size="42",
+                   color=color, price=100.0, stock=5, description=description)
+
+
+CATALOG = [
+    _product(1, "Oxford Cap Toe", "Clarks", "Formal", "Negro", "Zapato elegante de cuero para eventos"),
+    _product(2, "Pegasus 40", "Nike", "Running", "Negro", "Running diaria con amortiguación"),
+    _product(3, "Suede Classic", "Puma", "Casual", "Azul", "Clásico de gamuza"),
+    _product(4, "Derby Liso", "Clarks", "Formal", "Marrón", "Zapatos elegantes para boda"),
+]
+
+
+def test_hashed_embedder_is_normalized_and_tolerates_inflections():
+    """Vectores de norma 1; singular/plural y tildes quedan cerca."""
+    emb = HashedNgramEmbedder(dim=128)
+    vecs = emb.embed(["zapato elegante", "Zapatos ELEGANTES", "gamuza azul", "!!"])
+    assert vecs.shape == (4, 128) and vecs.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vecs[:3], axis=1), 1.0, atol=1e-5)
+    assert not vecs[3].any()
+    assert vecs[0] @ vecs[1] > 0.5 > vecs[0] @ vecs[2]
+
+
+def test_search_persists_and_reembeds_only_changes(tmp_path):
+    """Top-K por coseno; el índice se reabre desde disco y `sync` es incremental."""
+    index = ProductVectorIndex(str(tmp_path), HashedNgramEmbedder(dim=128))
+    assert index.sync(CATALOG) == 4
+    assert set(index.retrieve("zapato elegante para boda", k=2)) == {1, 4}
+    assert index.retrieve("boda", k=1) == [4]
+
+    reopened = ProductVectorIndex(str(tmp_path), HashedNgramEmbedder(dim=128))
+    assert len(reopened) == 4
+    assert reopened.retrieve("boda", k=1) == [4]
+    changed = _product(3, "Suede Classic", "Puma", "Casual", "Rojo", "Clásico de gamuza")
+    assert reopened.sync([CATALOG[0], CATALOG[1], changed]) == 2  # 1 actualizado + 1 eliminado
+    assert 4 not in reopened.retrieve("boda", k=4)
+    assert ProductVectorIndex(str(tmp_path), HashedNgramEmbedder(dim=64)).sync(CATALOG) == 4  # otro embedder: reconstruye
+
+
+def test_index_grows_and_ann_matches_exact_top_hit(tmp_path):
+    """Crece más allá de la capacidad inicial; el IVF encuentra el mismo mejor resultado."""
+    names = ["Runner", "Trail", "Court", "Loafer", "Boot", "Sandal"]
+    catalog = [_product(i, f"{names[i % 6]} {i}", f"Marca{i % 40}", names[i % 6], "Negro", f"modelo {i}")
+               for i in range(1, 3001)]
+    index = ProductVectorIndex(str(tmp_path), HashedNgramEmbedder(dim=64), ann_threshold=10**9)
+    index.sync(catalog)
+    exact = index.search("boot 1234 marca34", k=5)
+    index.build_ann(nlist=32)
+    approx = index.search("boot 1234 marca34", k=5)
+    assert exact[0][0] == approx[0][0] == 1234
+
+
+def test_ann_is_rebuilt_on_writes_not_on_search(tmp_path):
+    """El IVF se arma en `sync` y se rehace en `upsert` al crecer un 20%; `search` no lo toca."""
+    catalog = [_product(i, f"Modelo {i}", f"Marca{i % 7}", "Running", "Negro", f"modelo {i}") for i in range(1, 101)]
+    index = ProductVectorIndex(str(tmp_path), HashedNgramEmbedder(dim=64), ann_threshold=50)
+    index.sync(catalog)
+    built = index._ann
+    assert built is not None
+    index.upsert([_product(i, f"Nuevo {i}", "Marca", "Trail", "Rojo", "nuevo") for i in range(101, 111)])
+    index.search("nuevo", k=3)
+    assert index._ann is built and built.added == 10
+    index.upsert([_product(i, f"Nuevo {i}", "Marca", "Trail", "Rojo", "nuevo") for i in range(111, 131)])
+    assert index._ann is not built and index._ann.added == 0
+
+
+def _wait_for_ann(index, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while index._ann is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return index._ann
+
+
+def test_search_only_worker_rebuilds_ann_in_background_after_reload(tmp_path):
+    """Otro proceso publica cambios: el lector recarga y rehace el IVF fuera de la búsqueda."""
+    catalog = [_product(i, f"Modelo {i}", f"Marca{i % 7}", "Running", "Negro", f"modelo {i}") for i in range(1, 101)]
+    writer = ProductVectorIndex(str(tmp_path), HashedNgramEmbedder(dim=64), ann_threshold=50)
+    writer.sync(catalog)
+    reader = ProductVectorIndex(str(tmp_path), HashedNgramEmbedder(dim=64), ann_threshold=50)
+    first = _wait_for_ann(reader)
+    assert first is not None
+
+    time.sleep(0.01)  # mtime distinto de meta.json
+    writer.upsert([_product(200, "Botín Chelsea", "Clarks", "Formal", "Marrón", "boda")])
+    assert reader.search("botín chelsea", k=1)[0][0] == 200  # exacta mientras se rehace
+    rebuilt = _wait_for_ann(reader)
+    assert rebuilt is not None and rebuilt is not first
+    assert reader.search("botín chelsea", k=1)[0][0] == 200
+
+
+def test_indexed_repository_updates_vectors_and_feeds_chat(tmp_path):
+    """Guardar/eliminar actualiza el índice y el chat recibe solo los relevantes."""
+    index = ProductVectorIndex(str(tmp_path), HashedNgramEmbedder(dim=128))
+    repo = IndexedProductRepository(FakeProductRepo(), index)
+    index.sync(repo.get_all())
+    boots = repo.save(_product(None, "Botín Chelsea", "Clarks", "Formal", "Marrón", "Elegante para boda"))
+    assert index.retrieve("botines chelsea", k=1) == [boots.id]
+
+    seen = {}
+
+    class CapturingAI:
+        async def generate_response(self, user_message, products, context):
+            seen["products"] = [p.name for p in products]
+            return "ok"
+
+    service = ChatService(repo, FakeChatRepo(), CapturingAI(), retriever=index)
+    service.RETRIEVE_K = 1
+    asyncio.run(service.process_message(ChatMessageRequestDTO(session_id="s", message="algo para una boda")))
+    assert seen["products"] == ["Botín Chelsea"]
+
+    assert repo.delete(boots.id)
+    asyncio.run(service.process_message(ChatMessageRequestDTO(session_id="s", message="chelsea")))
+    assert len(seen["products"]) == 2  # sin coincidencias: catálogo completo
@@ -0,0 +1,283 @@
+"""Tests de la persistencia diferida (write-behind) del historial de chat.
+
+Cubren el flujo de ChatService con cola, la lectura de lo escrito antes de
+que el worker persista, el backpressure con la cola llena y la
+recuperación desde el journal tras una caída.
+"""
+
+import asyncio
+import fcntl
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+from src.domain.entities import ChatMessage
+from src.infrastructure.repositories.write_behind import ChatWriteBehindQueue, WriteBehindChatRepository
+from src.infrastructure.repositories.write_behind import _Journal
+from tests.test_session_cache import CountingChatRepo, EchoAI, FakeProductRepo
+
+
+class BatchRecordingRepo(CountingChatRepo):
+    """Repositorio en memoria que registra el tamaño de cada lote insertado."""
+
+    def __init__(self):
+        """Inicializa el almacenamiento y la lista de lotes."""
+        super().__init__()
+        self.batches: list[int] = []
+
+    def save_messages(self, messages):
+        """Guarda el lote y registra su tamaño."""
+        self.batches.append(len(messages))
+        return [self.save_message(m) for m in messages]
+
+
+def _factory(repo):
+    """Fábrica de repositorios para la cola (siempre el mismo repo en memoria)."""
+    @contextmanager
+    def make():
+        yield repo
+    return make
+
+
+def _msg(text: str) -> ChatMessage:
+    """Mensaje de usuario de prueba en la sesión 's1'."""
+    return ChatMessage(id=None, session_id="s1", role="user", message=text, timestamp=datetime(2024, 1, 1))
+
+
+def test_chat_turns_are_persisted_in_background_with_read_your_writes():
+    """Las respuestas no esperan el commit y el historial incluye los pendientes."""
+    db = BatchRecordingRepo()
+
+    async def scenario():
+        queue = ChatWriteBehindQueue(_factory(db), batch_size=10)
+        await queue.start()
+        repo = WriteBehindChatRepository(db, queue)
+        svc = ChatService(FakeProductRepo(), repo, EchoAI(), write_queue=queue)
+
+        await svc.process_message(ChatMessageRequestDTO(session_id="s1", message="uno"))
+        await svc.process_message(ChatMessageRequestDTO(session_id="s1", message="dos"))
+        before = [m.message for m in repo.get_session_history("s1")]
+        await queue.stop()
+        return before
+
+    before = asyncio.run(scenario())
+    assert before == ["uno", "eco: uno", "dos", "eco: dos"]
+    assert [m.message for m in db.get_session_history("s1")] == before
+    assert sum(db.batches) == 4 and len(db.batches) < 4  # inserciones por lotes
+
+
+def test_submit_applies_backpressure_when_queue_is_full():
+    """Con la cola llena, submit espera hasta que el worker libera espacio."""
+    gate = threading.Event()
+    db = BatchRecordingRepo()
+
+    @contextmanager
+    def blocking_factory():
+        gate.wait(timeout=5)
+        yield db
+
+    async def scenario():
+        queue = ChatWriteBehindQueue(blocking_factory, maxsize=1, batch_size=1)
+        await queue.start()
+        await queue.submit([_msg("a")])
+        await asyncio.sleep(0.01)  # el worker toma "a" y queda bloqueado
+        await queue.submit([_msg("b")])  # ocupa la única posición
+        third = asyncio.create_task(queue.submit([_msg("c")]))
+        await asyncio.sleep(0.05)
+        blocked = not third.done()
+        gate.set()
+        await third
+        await queue.stop()
+        return blocked
+
+    assert asyncio.run(scenario()) is True
+    assert [m.message for m in db.get_session_history("s1")] == ["a", "b", "c"]
+
+
+def test_journal_recovers_unpersisted_messages_after_crash(tmp_path):
+    """Lo confirmado al cliente pero no persistido se re-inserta al reiniciar."""
+    journal = str(tmp_path / "chat.journal")
+
+    @contextmanager
+    def broken_factory():
+        raise RuntimeError("BD caída")
+        yield  # pragma: no cover
+
+    async def crash():
+        queue = ChatWriteBehindQueue(broken_factory, journal_path=journal)
+        await queue.start()
+        await queue.submit([_msg("a"), _msg("b")])
+        queue._worker.cancel()  # simula la caída del proceso,
+        queue._journal.close()  # que libera el bloqueo de su journal
+
+    asyncio.run(crash())
+
+    db = BatchRecordingRepo()
+
+    async def restart():
+        queue = ChatWriteBehindQueue(_factory(db), journal_path=journal)
+        await queue.start()
+        await queue.stop()
+
+    asyncio.run(restart())
+    assert [m.message for m in db.get_session_history("s1")] == ["a", "b"]
+
+
+def test_journal_acks_only_what_each_batch_persisted(tmp_path):
+    """Con la cola llena, dos `submit` concurrentes intercalan sus mensajes; una caída no pierde ninguno."""
+    first, crash = threading.Event(), threading.Event()
+    db = BatchRecordingRepo()
+    calls = []
+
+    @contextmanager
+    def gated_factory():
+        # Lote 1 espera a que la cola se llene; 2-4 pasan (p1, a1, b1); el 5.º (a2) queda en la caída.
+        calls.append(None)
+        if len(calls) == 1:
+            first.wait(timeout=5)
+        elif len(calls) >= 5:
+            crash.wait(timeout=5)
+        yield db
+
+    async def scenario():
+        queue = ChatWriteBehindQueue(gated_factory, maxsize=1, batch_size=2, journal_path=str(tmp_path / "c.journal"))
+        await queue.start()
+        await queue.submit([_msg("p0")])
+        await asyncio.sleep(0.01)  # el worker toma p0 y queda bloqueado
+        await queue.submit([_msg("p1")])  # cola llena
+        a = asyncio.create_task(queue.submit([_msg("a1"), _msg("a2")]))
+        b = asyncio.create_task(queue.submit([_msg("b1"), _msg("b2")]))
+        await asyncio.sleep(0.02)
+        first.set()
+        await asyncio.sleep(0.1)
+        recovered = [m.message for m in _Journal.unacknowledged(queue._journal.path)]
+        persisted = [m.message for m in db.get_session_history("s1")]
+        crash.set()
+        await asyncio.gather(a, b)
+        await queue.stop()
+        return persisted, recovered
+
+    persisted, recovered = asyncio.run(scenario())
+    assert persisted == ["p0", "p1", "a1", "b1"]  # orden de la cola: a2 (seq 4) detrás de b1 (seq 5)
+    assert sorted(persisted + recovered) == ["a1", "a2", "b1", "b2", "p0", "p1"]
+
+
+def test_journal_fsync_does_not_block_the_event_loop(tmp_path, monkeypatch):
+    """Mientras el journal hace `fsync`, el loop sigue atendiendo otras tareas."""
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        time.sleep(0.1)  # disco lento
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+    db = BatchRecordingRepo()
+
+    async def scenario():
+        queue = ChatWriteBehindQueue(_factory(db), journal_path=str(tmp_path / "c.journal"))
+        await queue.start()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await asyncio.gather(queue.submit([_msg("a")]), queue.submit([_msg("b")]))
+        task.cancel()
+        await queue.stop()
+        return ticks
+
+    assert asyncio.run(scenario()) >= 10
+    assert [m.message for m in db.get_session_history("s1")] == ["a", "b"]
+
+
+def test_orphaned_journals_of_dead_workers_are_adopted(tmp_path):
+    """Cada worker usa su journal; al arrancar se adoptan los de procesos muertos, no los de los vivos."""
+    base = tmp_path / "chat.journal"
+    for pid, text in ((999001, "huérfano"), (999002, "vivo")):
+        (tmp_path / f"chat.{pid}.journal").write_bytes(
+            b'{"seq":1,"m":["s1","user","%s","2024-01-01T00:00:00"]}\n' % text.encode())
+    alive = open(tmp_path / "chat.999002.journal", "r+b")
+    fcntl.flock(alive, fcntl.LOCK_EX | fcntl.LOCK_NB)  # otro worker en marcha
+    db = BatchRecordingRepo()
+
+    async def scenario():
+        queue = ChatWriteBehindQueue(_factory(db), journal_path=str(base))
+        await queue.start()
+        await queue.submit([_msg("nuevo")])
+        await queue.stop()
+
+    asyncio.run(scenario())
+    alive.close()
+    assert [m.message for m in db.get_session_history("s1")] == ["huérfano", "nuevo"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["chat.999002.journal", "chat.journal.lock"]
+    assert [m.message for m in _Journal.unacknowledged(tmp_path / "chat.999002.journal")] == ["vivo"]
+
+
+def test_history_does_not_duplicate_a_batch_committed_before_its_ids_are_set():
+    """Un lote en vuelo ya confirmado en la BD pero aún sin ids no aparece dos veces."""
+    committed, release = threading.Event(), threading.Event()
+
+    class SlowIdRepo(BatchRecordingRepo):
+        def save_messages(self, messages):
+            rows = [ChatMessage(id=None, session_id=m.session_id, role=m.role, message=m.message,
+                                timestamp=m.timestamp) for m in messages]
+            for row in rows:
+                self.save_message(row)
+            committed.set()
+            release.wait(timeout=5)  # el repositorio asigna los ids después del commit
+            for m, row in zip(messages, rows):
+                m.id = row.id
+            return messages
+
+    db = SlowIdRepo()
+
+    async def scenario():
+        queue = ChatWriteBehindQueue(_factory(db))
+        await queue.start()
+        repo = WriteBehindChatRepository(db, queue)
+        await queue.submit([_msg("a"), _msg("b")])
+        await asyncio.to_thread(committed.wait, 5)
+        during = [m.message for m in repo.get_session_history("s1")]
+        release.set()
+        await queue.stop()
+        return during
+
+    assert asyncio.run(scenario()) == ["a", "b"]
+
+
+def test_delete_waits_for_the_sessions_batch_in_flight():
+    """Borrar durante la inserción de un lote de la sesión no deja ese lote en la BD."""
+    inserting, release = threading.Event(), threading.Event()
+
+    class SlowRepo(BatchRecordingRepo):
+        def save_messages(self, messages):
+            inserting.set()
+            release.wait(timeout=5)
+            return super().save_messages(messages)
+
+    db = SlowRepo()
+
+    async def scenario():
+        queue = ChatWriteBehindQueue(_factory(db))
+        await queue.start()
+        repo = WriteBehindChatRepository(db, queue)
+        await queue.submit([_msg("a"), _msg("b")])
+        await asyncio.to_thread(inserting.wait, 5)
+        deleting = asyncio.ensure_future(asyncio.to_thread(repo.delete_session_history, "s1"))
+        await asyncio.sleep(0.05)
+        assert not deleting.done()  # espera al lote en vuelo
+        release.set()
+        deleted = await deleting
+        await queue.stop()
+        return deleted
+
+    assert asyncio.run(scenario()) == 2
+    assert db.get_session_history("s1") == []